@@ -0,0 +1,266 @@
+"""
+Structured provider availability and a time-aware matching index.
+
+Availability is stored as weekly windows in minutes since Monday 00:00
+(e.g. Saturday 18:00-24:00 is (8280, 8640)). AvailabilityIndex keeps one
+bitmap per hour of the week, with bit i set when the i-th ranked provider
+is available during that hour, so "who is free at 5pm today" is a single
+list lookup and intersecting with a service filter is one integer AND.
+
+Windows are campus wall-clock times (students type Paris times), so every
+"now" they are compared with comes from campus_now(), whatever timezone
+the server runs in.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import messages
+
+CAMPUS_TZ = ZoneInfo('Europe/Paris')
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+HOURS_PER_WEEK = 7 * 24
+
+# Same ranges the registration flow shows providers; "Any time" means around the clock
+TIME_SLOTS = {
+    'morning': (6 * 60, 12 * 60),
+    'afternoon': (12 * 60, 18 * 60),
+    'evening': (18 * 60, 24 * 60),
+    'any': (0, 24 * 60),
+}
+
+Window = Tuple[int, int]
+
+URGENT_WORDS = ['asap', 'urgent', 'right now', 'immediately', 'emergency', 'maintenant', 'tout de suite']
+
+# Free text needs minutes or a suffix ("5pm", "17h", "17:30") so "2 boxes" isn't a time
+CLOCK_RE = re.compile(r'\b(\d{1,2})(?:[:h](\d{2})|\s*(am|pm|h)\b)')
+BARE_CLOCK_RE = re.compile(r'\b(\d{1,2})(?:[:h](\d{2}))?\s*(am|pm|h)?\b')
+RANGE_RE = re.compile(r'\b(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\s*(?:-|–|to|à)\s*(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+AFTER_RE = re.compile(r'\b(?:after|from|après|dès|à partir de)\s+(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+BEFORE_RE = re.compile(r'\b(?:before|until|till|avant|jusqu\'à)\s+(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+
+
+def parse_clock(text: str, bare: bool = False) -> Optional[int]:
+    """Minutes after midnight for '5pm', '17h', '17:30' (or '9' when bare); None if not a time"""
+    match = (BARE_CLOCK_RE if bare else CLOCK_RE).search((text or '').lower())
+    if not match:
+        return None
+    hour, minute, suffix = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if suffix == 'pm' and hour < 12:
+        hour += 12
+    elif suffix == 'am' and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        return None
+    return min(hour * 60 + minute, MINUTES_PER_DAY)
+
+
+def parse_daily_hours(text: str) -> Optional[Window]:
+    """Explicit daily hours like '9am-5pm', 'after 6pm' or 'avant 14h'"""
+    text = (text or '').lower()
+    match = RANGE_RE.search(text)
+    if match:
+        start, end = parse_clock(match.group(1), bare=True), parse_clock(match.group(2), bare=True)
+        if start is not None and end is not None and end > start:
+            return start, end
+    match = AFTER_RE.search(text)
+    if match and parse_clock(match.group(1), bare=True) is not None:
+        return parse_clock(match.group(1), bare=True), MINUTES_PER_DAY
+    match = BEFORE_RE.search(text)
+    if match and parse_clock(match.group(1), bare=True) is not None:
+        return 0, parse_clock(match.group(1), bare=True)
+    return None
+
+
+def build_windows(available_days: int, time_preference: str, note: str = '') -> Tuple[Window, ...]:
+    """Weekly windows from a weekday bitmask plus time preference (or explicit hours in the note)"""
+    daily = parse_daily_hours(note) or parse_daily_hours(time_preference)
+    if daily:
+        slots = [daily]
+    else:
+        slots = [TIME_SLOTS[name] for name in (time_preference or 'any').split(',') if name in TIME_SLOTS]
+        slots = slots or [TIME_SLOTS['any']]
+
+    windows = []
+    for day in range(7):
+        if available_days & (1 << day):
+            offset = day * MINUTES_PER_DAY
+            windows.extend((offset + start, offset + end) for start, end in slots)
+    return merge_windows(windows)
+
+
+def merge_windows(windows: Iterable[Window]) -> Tuple[Window, ...]:
+    """Sort and coalesce overlapping or touching windows"""
+    merged: List[List[int]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+
+def encode_windows(windows: Sequence[Window]) -> str:
+    """Compact column format: 'start-end;start-end'"""
+    return ';'.join(f'{start}-{end}' for start, end in windows)
+
+
+def decode_windows(value: str) -> Tuple[Window, ...]:
+    if not value:
+        return ()
+    return tuple(tuple(int(part) for part in window.split('-')) for window in value.split(';'))
+
+
+def minute_of_week(when: datetime) -> int:
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def is_available_at(windows: Sequence[Window], when: datetime) -> bool:
+    minute = minute_of_week(when)
+    return any(start <= minute < end for start, end in windows)
+
+
+def campus_now() -> datetime:
+    """Current campus wall-clock time, naive like the weekly windows (the servers run in UTC)"""
+    return datetime.now(CAMPUS_TZ).replace(tzinfo=None)
+
+
+def campus_time(utc: datetime) -> datetime:
+    """A naive UTC timestamp (SQLite CURRENT_TIMESTAMP) as campus wall-clock time"""
+    return utc.replace(tzinfo=timezone.utc).astimezone(CAMPUS_TZ).replace(tzinfo=None)
+
+
+def next_window_start(windows: Sequence[Window], when: datetime) -> Optional[datetime]:
+    """Start of the next availability window after `when` (wrapping over the week)"""
+    if not windows:
+        return None
+    minute = minute_of_week(when)
+    upcoming = [start for start, _ in windows if start > minute]
+    delta = (upcoming[0] - minute) if upcoming else (windows[0][0] + MINUTES_PER_WEEK - minute)
+    return (when + timedelta(minutes=delta)).replace(second=0, microsecond=0)
+
+
+def availability_label(windows: Sequence[Window], now: datetime = None, when: datetime = None,
+                       language: str = messages.DEFAULT_LANGUAGE) -> str:
+    """Honest availability text for match lists, relative to a requested time if given"""
+    now = now or campus_now()
+    days = messages.DAY_LABELS.get(language, messages.DAY_LABELS[messages.DEFAULT_LANGUAGE])
+    if when and when > now + timedelta(minutes=15) and (not windows or is_available_at(windows, when)):
+        return _relative_label('at', when, now, days, language)
+    if not windows or is_available_at(windows, now):
+        return messages.render('available_now', language)
+    return _relative_label('from', next_window_start(windows, now), now, days, language)
+
+
+def _relative_label(kind: str, moment: datetime, now: datetime, days: Sequence[str], language: str) -> str:
+    time = f"{moment:%H:%M}"
+    if moment.date() == now.date():
+        return messages.render(f'available_{kind}', language, time=time)
+    if moment.date() == (now + timedelta(days=1)).date():
+        return messages.render(f'available_tomorrow_{kind}', language, time=time)
+    return messages.render(f'available_day_{kind}', language, day=days[moment.weekday()], time=time)
+
+
+def is_urgent(text: str) -> bool:
+    """'asap', 'urgent', 'tout de suite'... (requests that get broadcast instead of one-by-one asks)"""
+    text = (text or '').lower()
+    return any(word in text for word in URGENT_WORDS)
+
+
+def parse_request_time(text: str, now: datetime = None) -> Optional[datetime]:
+    """When a seeker needs help: 'at 5pm today', 'tomorrow morning', 'asap'. None = flexible"""
+    now = now or campus_now()
+    text = (text or '').lower()
+    if not text.strip() or any(word in text for word in ['flexible', 'anytime', 'whenever', "n'importe"]):
+        return None
+    if is_urgent(text):
+        return now
+
+    day = now
+    if any(word in text for word in ['tomorrow', 'tmr', 'demain']):
+        day = now + timedelta(days=1)
+
+    clock = parse_clock(text)
+    if clock is None:
+        for slot, keywords in [('morning', ['morning', 'matin']),
+                               ('afternoon', ['afternoon', 'après-midi']),
+                               ('evening', ['evening', 'tonight', 'soir', 'night'])]:
+            if any(word in text for word in keywords):
+                start, end = TIME_SLOTS[slot]
+                clock = start + 60 if day.date() != now.date() else max(start, now.hour * 60 + now.minute)
+                clock = min(clock, end - 1)
+                break
+    if clock is None:
+        if day.date() != now.date():
+            # "tomorrow" without an hour
+            return day.replace(hour=12, minute=0, second=0, microsecond=0)
+        # "today" / "now" without an hour means from now on; no time words means flexible
+        return now if re.search(r"\b(today|now|aujourd'hui)\b", text) else None
+
+    when = day.replace(hour=min(clock // 60, 23), minute=clock % 60 if clock < MINUTES_PER_DAY else 59,
+                       second=0, microsecond=0)
+    # "at 9am" said in the evening means tomorrow morning
+    if day.date() == now.date() and when < now - timedelta(minutes=30) and 'today' not in text:
+        when += timedelta(days=1)
+    return when
+
+
+class AvailabilityIndex:
+    """Per-hour-of-week bitmaps over a ranked list of providers"""
+
+    def __init__(self, providers: Sequence, windows_of=lambda p: p.windows):
+        self.providers = list(providers)
+        self.hour_bitmaps = [0] * HOURS_PER_WEEK
+        self.all_bits = (1 << len(self.providers)) - 1
+        self._term_bits: Dict[str, int] = {}
+        self._mask_bits: Dict[int, int] = {}
+
+        for position, provider in enumerate(self.providers):
+            bit = 1 << position
+            for start, end in windows_of(provider):
+                for hour in range(start // 60, (end + 59) // 60):
+                    self.hour_bitmaps[hour % HOURS_PER_WEEK] |= bit
+
+    def available_bits(self, when: Optional[datetime]) -> int:
+        """Bitmap of providers available during the hour containing `when` (all if None)"""
+        if when is None:
+            return self.all_bits
+        return self.hour_bitmaps[when.weekday() * 24 + when.hour]
+
+    def term_bits(self, term: str, text_of=lambda p: p.services_lower) -> int:
+        """Bitmap of providers whose services mention `term` (memoized per index)"""
+        bits = self._term_bits.get(term)
+        if bits is None:
+            bits = 0
+            for position, provider in enumerate(self.providers):
+                if term in text_of(provider):
+                    bits |= 1 << position
+            self._term_bits[term] = bits
+        return bits
+
+    def mask_bits(self, mask: int, mask_of=lambda p: p.service_mask) -> int:
+        """Bitmap of providers offering any of the service ids in `mask` (memoized per index)"""
+        bits = self._mask_bits.get(mask)
+        if bits is None:
+            bits = 0
+            for position, provider in enumerate(self.providers):
+                if mask_of(provider) & mask:
+                    bits |= 1 << position
+            self._mask_bits[mask] = bits
+        return bits
+
+    def first(self, bits: int, limit: int, accept=None) -> List:
+        """Up to `limit` providers for the lowest set bits, i.e. in ranking order"""
+        found = []
+        while bits and len(found) < limit:
+            low = bits & -bits
+            provider = self.providers[low.bit_length() - 1]
+            if accept is None or accept(provider):
+                found.append(provider)
+            bits ^= low
+        return found
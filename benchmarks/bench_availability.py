@@ -0,0 +1,129 @@
+"""
+Time-aware matching benchmark with 10k providers.
+
+Compares a linear scan over profiles (check services, then windows) with
+the per-hour bitmap AvailabilityIndex, and times find_matches end to end
+on a warm ProfileStore.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_availability --providers 10000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from availability import AvailabilityIndex, build_windows, encode_windows, is_available_at
+from profiles import ProviderProfile
+
+SERVICES = ["laundry", "food delivery", "it support", "translation", "car lending",
+            "airport pickup", "printing", "cleaning", "tutoring", "moving boxes"]
+PREFERENCES = ["morning", "afternoon", "evening", "any", "morning,evening", "afternoon,evening"]
+
+
+def generate_profiles(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(count):
+        days = rng.randint(1, 127)
+        preference = rng.choice(PREFERENCES)
+        profiles.append(ProviderProfile(
+            phone=f"+3370{i:07d}",
+            name=f"Provider {i}",
+            services=", ".join(rng.sample(SERVICES, rng.randint(1, 3))),
+            location="Campus",
+            rating=round(rng.uniform(3.5, 5.0), 1),
+            total_services=rng.randint(0, 50),
+            available_days=days,
+            time_preference=preference,
+            windows=build_windows(days, preference),
+        ))
+    profiles.sort(key=lambda p: (-p.rating, -p.total_services))
+    return profiles
+
+
+def linear_scan(profiles, term, when, limit=3):
+    found = []
+    for profile in profiles:
+        if term in profile.services_lower and is_available_at(profile.windows, when):
+            found.append(profile)
+            if len(found) == limit:
+                break
+    return found
+
+
+def timed(label, queries, fn):
+    start = time.perf_counter()
+    for term, when in queries:
+        fn(term, when)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed / len(queries) * 1e6:10.1f} µs/query")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark time-aware provider matching")
+    parser.add_argument("--providers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    profiles = generate_profiles(args.providers)
+    rng = random.Random(5)
+    monday = datetime(2026, 10, 19)
+    # Random service / time pairs across the week
+    queries = [(rng.choice(SERVICES), monday + timedelta(minutes=rng.randrange(7 * 24 * 60)))
+               for _ in range(args.queries)]
+
+    print(f"⏱️  Time-aware matching, {args.providers} providers, {args.queries} queries")
+    print("=" * 60)
+    start = time.perf_counter()
+    index = AvailabilityIndex(profiles)
+    print(f"{'index build':<38} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    for term in SERVICES:
+        index.term_bits(term)
+
+    def indexed(term, when):
+        accept = lambda p: is_available_at(p.windows, when)
+        return index.first(index.term_bits(term) & index.available_bits(when), 3, accept)
+
+    # Same answers either way
+    for term, when in queries[:200]:
+        assert [p.phone for p in indexed(term, when)] == [p.phone for p in linear_scan(profiles, term, when)]
+
+    scan = timed("linear scan (service + windows)", queries, lambda t, w: linear_scan(profiles, t, w))
+    bitmap = timed("bitmap index (service AND hour)", queries, indexed)
+    print(f"{'speedup':<38} {scan / bitmap:10.1f} x")
+
+    # End to end through GPTECLABot.find_matches on a warm profile cache
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        from gpt_bot_logic import GPTECLABot
+        bot = GPTECLABot(db_path=path, seed_sample_data=False)
+        conn = sqlite3.connect(path)
+        conn.executemany('''
+            INSERT INTO users (phone, name, services, location, rating, total_services,
+                               available_days, time_preference, availability_windows)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(p.phone, p.name, p.services, p.location, p.rating, p.total_services,
+               p.available_days, p.time_preference, encode_windows(p.windows)) for p in profiles])
+        conn.commit()
+        conn.close()
+        bot.profiles.invalidate()
+        start = time.perf_counter()
+        bot.find_matches("laundry", "campus", monday)
+        print(f"{'find_matches cold (load + index)':<38} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        timed("find_matches warm", queries, lambda t, w: bot.find_matches(t, "campus", w))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Urgent-request broadcast throughput against the fake Graph API.
+
+Broadcasts N urgent requests to the top providers through MatchOrchestrator
+and the real WhatsAppBusinessAPI pointed at FakeGraphAPI, then compares the
+shared, concurrency-bounded client with the old client-per-message sends.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_broadcast --requests 200 --graph-latency fixed:30
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_services import FakeGraphAPI
+from match_orchestrator import MatchOrchestrator
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+
+class PerMessageClientAPI(WhatsAppBusinessAPI):
+    """The previous behaviour: a new httpx.AsyncClient (and connection) per message, unbounded"""
+
+    async def _post_message(self, data):
+        url = f"{self.base_url}/{self.phone_number_id}/messages"
+        headers = {"Authorization": f"Bearer {self.access_token}", "Content-Type": "application/json"}
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, headers=headers, json=data)
+            return response.json()
+
+
+def run_mode(label, whatsapp, graph, args, db_path):
+    from gpt_bot_logic import GPTECLABot
+    bot = GPTECLABot(db_path=db_path, seed_sample_data=True)
+    graph.sent.clear()
+    graph.peak_in_flight = 0
+
+    async def scenario():
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=600)
+        start = time.perf_counter()
+        for i in range(args.requests):
+            bot.handle_service_request_with_gpt(f"+3361{i:07d}", "translation asap",
+                                                {"service": "translation", "time": "asap"})
+        await asyncio.sleep(0)
+        await bot.orchestrator.drain()
+        elapsed = time.perf_counter() - start
+        await bot.orchestrator.shutdown()
+        return elapsed
+
+    with contextlib.redirect_stdout(io.StringIO()):  # one line per failed send otherwise
+        elapsed = asyncio.run(scenario())
+    errors = bot.orchestrator.stats['send_errors']
+    print(f"{label:<26} {len(graph.sent):7d} sent {len(graph.sent) / elapsed:9.0f} msg/s "
+          f"{elapsed:7.2f} s  peak in flight {graph.peak_in_flight:4d}  errors {errors}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark urgent-request broadcast fan-out")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--graph-latency", default="fixed:30", help="fake Graph API latency (ms)")
+    parser.add_argument("--concurrency", type=int, default=16, help="shared client's max in-flight sends")
+    args = parser.parse_args(argv)
+
+    saved_env = dict(os.environ)
+    with FakeGraphAPI(latency=args.graph_latency) as graph, tempfile.TemporaryDirectory() as tmp:
+        os.environ["WHATSAPP_GRAPH_API_URL"] = graph.url
+        os.environ["WHATSAPP_BUSINESS_TOKEN"] = "fake-token"
+        os.environ["WHATSAPP_PHONE_NUMBER_ID"] = "100000000000001"
+        try:
+            print(f"⏱️  Urgent broadcast, {args.requests} requests x top providers, Graph latency {args.graph_latency}")
+            print("=" * 60)
+            run_mode("client per message", PerMessageClientAPI(), graph, args, os.path.join(tmp, "a.db"))
+            run_mode(f"shared client (≤{args.concurrency})", WhatsAppBusinessAPI(max_concurrency=args.concurrency),
+                     graph, args, os.path.join(tmp, "b.db"))
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Bulk import/export benchmark: a million provider rows through bulk_io.
+
+Writes a synthetic CSV (or JSONL) of providers to a temp file from a
+generator, imports it into a fresh SQLite database in batched
+transactions, exports it back out, and reports rows/sec and the peak RSS
+of the process. Memory should stay flat as --rows grows.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_bulk_io --rows 1000000 --batch 5000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from bulk_io import export_rows, import_rows, read_rows
+
+SERVICES = ["Laundry", "Math tutoring", "Printing", "Cooking", "Moving help", "Translation English-French",
+            "Bike repair", "Phone repair", "Cleaning", "Guitar lessons"]
+LOCATIONS = ["Residence A", "Residence B", "Residence C", "Library", "Campus"]
+DAYS = ["", "Weekends only", "Mon-Fri", "Evenings", "Saturday"]
+TIMES = ["", "Morning", "Afternoon", "Evening", "Flexible"]
+COLUMNS = ["name", "phone", "services", "location", "days", "time_preference", "pricing", "rating"]
+
+
+def generate(rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(rows):
+        low = rng.randint(3, 20)
+        yield {
+            "name": f"Student {i}",
+            # A few malformed numbers to exercise the reject path
+            "phone": f"06 {i // 1000000 % 100:02d} {i // 10000 % 100:02d} {i // 100 % 100:02d} {i % 100:02d}"
+                     if i % 997 else "not a phone",
+            "services": ", ".join(rng.sample(SERVICES, rng.randint(1, 3))),
+            "location": rng.choice(LOCATIONS),
+            "days": rng.choice(DAYS),
+            "time_preference": rng.choice(TIMES),
+            "pricing": f"{low}-{low + rng.randint(0, 10)}€",
+            "rating": f"{rng.uniform(3, 5):.1f}",
+        }
+
+
+def write_input(path: str, rows: int, fmt: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, COLUMNS)
+            writer.writeheader()
+            writer.writerows(generate(rows))
+        else:
+            f.writelines(json.dumps(row) + "\n" for row in generate(rows))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark streaming bulk import/export")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, f"providers.{args.format}")
+        db_path = os.path.join(tmp, "bench.db")
+
+        started = time.perf_counter()
+        write_input(source, args.rows, args.format)
+        print(f"Generated {args.rows:,} rows ({os.path.getsize(source) / 1e6:.0f} MB) "
+              f"in {time.perf_counter() - started:.1f}s, peak RSS {peak_rss_mb():.0f} MB")
+
+        with open(source, encoding="utf-8", newline="") as f:
+            stats = import_rows(db_path, "users", read_rows(f, args.format), args.batch)
+        print(stats.summary("Imported", "users") + f", peak RSS {peak_rss_mb():.0f} MB")
+
+        with open(os.path.join(tmp, "export.jsonl"), "w", encoding="utf-8") as f:
+            stats = export_rows(db_path, "users", f, "jsonl", batch_size=args.batch)
+        print(stats.summary("Exported", "users") + f", peak RSS {peak_rss_mb():.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Match cascade benchmark: thousands of concurrent provider confirmations on one loop.
+
+Starts N requests at once through MatchOrchestrator. Simulated providers
+accept, decline or never answer (so the timeout fires) after a random
+delay, and notifications go to an in-memory WhatsApp stub with simulated
+latency. Reports how long all cascades took to settle, event-loop lag, and
+how the requests ended.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cascades --requests 5000 --timeout 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from match_orchestrator import MatchOrchestrator
+from models import MatchCandidate
+
+
+class StubWhatsApp:
+    """In-memory stand-in for WhatsAppBusinessAPI with a fixed send latency"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.sent = 0
+
+    async def send_interactive_message(self, to_phone, header_text, body_text, buttons):
+        await asyncio.sleep(self.latency_s)
+        self.sent += 1
+        return {}
+
+    async def send_text_message(self, to_phone, message):
+        await asyncio.sleep(self.latency_s)
+        self.sent += 1
+        return {}
+
+
+async def run(args, bot):
+    rng = random.Random(args.seed)
+    loop = asyncio.get_running_loop()
+    whatsapp = StubWhatsApp(args.send_latency)
+    orchestrator = bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=args.timeout)
+    bot.save_match = lambda match: None  # keep SQLite out of the measurement
+
+    def provider(i):
+        return MatchCandidate(f"Provider {i}", f"+3370{i:07d}", "laundry", "campus", 5.0, 0, 10.0)
+
+    def on_notified(match_id):
+        # Each asked provider accepts, declines, or ignores the message
+        pending = bot.pending_matches.get(match_id)
+        if pending is None:
+            return
+        roll = rng.random()
+        if roll < args.accept:
+            reply = "yes"
+        elif roll < args.accept + args.decline:
+            reply = "no"
+        else:
+            return
+        loop.call_later(rng.uniform(0, args.timeout * 0.8), bot.handle_provider_confirmation,
+                        pending.provider_phone, reply)
+
+    ask = orchestrator._ask
+
+    def ask_and_simulate(match_id):
+        ask(match_id)
+        on_notified(match_id)
+
+    orchestrator._ask = ask_and_simulate
+
+    lag = []
+
+    async def ticker():
+        while True:
+            expected = loop.time() + 0.01
+            await asyncio.sleep(0.01)
+            lag.append(loop.time() - expected)
+
+    tick = loop.create_task(ticker())
+    start = time.perf_counter()
+    peak = 0
+    for i in range(args.requests):
+        seeker = f"+3361{i:07d}"
+        ranked = [provider(rng.randrange(args.providers)) for _ in range(args.depth)]
+        match_id = bot.add_pending_match(seeker, ranked[0], "laundry", ranked[1:])
+        orchestrator.start(match_id)
+    await asyncio.sleep(0)
+    while orchestrator.active or orchestrator._sends:
+        peak = max(peak, orchestrator.active)
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    tick.cancel()
+
+    stats = orchestrator.stats
+    lag.sort()
+    print(f"⏱️  Match cascades, {args.requests} concurrent requests, depth {args.depth}, timeout {args.timeout}s")
+    print("=" * 60)
+    print(f"{'all cascades settled in':<32} {elapsed:10.2f} s")
+    print(f"{'peak waiting on a provider':<32} {peak:10d}")
+    print(f"{'providers notified':<32} {stats['notified']:10d}")
+    print(f"{'accepted / declined / timed out':<32} {stats['accepted']:>4d} / {stats['declined']} / {stats['timed_out']}")
+    print(f"{'requests with nobody left':<32} {stats['exhausted']:10d}")
+    print(f"{'WhatsApp sends':<32} {whatsapp.sent:10d}")
+    if lag:
+        print(f"{'event loop lag p50 / max':<32} {lag[len(lag) // 2] * 1000:7.1f} / {lag[-1] * 1000:.1f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent provider-confirmation cascades")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--providers", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=5, help="ranked candidates per request")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds a provider has to answer")
+    parser.add_argument("--send-latency", type=float, default=0.05)
+    parser.add_argument("--accept", type=float, default=0.4)
+    parser.add_argument("--decline", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from gpt_bot_logic import GPTECLABot
+        bot = GPTECLABot(db_path=os.path.join(tmp, "bench.db"), seed_sample_data=False)
+        asyncio.run(run(args, bot))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Conversation history benchmark: memory per session and prompt size.
+
+Feeds the same synthetic conversations to the old representation (a list
+of the last 10 message dicts with ISO timestamps per phone) and to
+HistoryStore. It measures the traced memory of each with tracemalloc, and
+the characters of history each generation prompt carries: the old last 5
+verbatim messages versus the summary plus the last 4 turns.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_history --sessions 10000 --messages 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from history import HistoryStore
+
+LINES = [
+    "Hi", "I need help with laundry tomorrow evening", "Residence B, floor 3", "How much would it cost?",
+    "Happy to help! Tell me what you need and I'll find a neighbour. 😊",
+    "🔍 Found 3 helpers for laundry:\n1. Emma (12€)\n2. Lucas (10€)\n3. Ana (15€)\nReply with a number.",
+    "2", "Thanks a lot!", "Can someone print my internship report before 5pm?",
+]
+
+
+def conversations(sessions: int, messages: int, seed: int = 3):
+    rng = random.Random(seed)
+    for s in range(sessions):
+        phone = f"+3360{s:07d}"
+        for i in range(messages):
+            yield phone, 'user' if i % 2 == 0 else 'assistant', f"{rng.choice(LINES)} #{i}"
+
+
+def old_history(sessions: int, messages: int):
+    history = {}
+    for phone, role, content in conversations(sessions, messages):
+        turns = history.setdefault(phone, [])
+        turns.append({"role": role, "content": content, "timestamp": datetime.now().isoformat()})
+        if len(turns) > 10:
+            history[phone] = turns[-10:]
+    return history
+
+
+def new_history(sessions: int, messages: int):
+    store = HistoryStore()
+    for phone, role, content in conversations(sessions, messages):
+        store.add(phone, role, content)
+    store.wait()
+    return store
+
+
+def traced(build, *args):
+    tracemalloc.start()
+    result = build(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark conversation history memory and prompt size")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=30, help="messages per session")
+    args = parser.parse_args(argv)
+
+    old, old_bytes = traced(old_history, args.sessions, args.messages)
+    store, new_bytes = traced(new_history, args.sessions, args.messages)
+    store.close()
+
+    phone = next(iter(old))
+    old_prompt = sum(len(m["content"]) for m in old[phone][-5:])
+    new_prompt = sum(len(m["content"]) for m in store.context_messages(phone, limit=4))
+
+    print(f"{args.sessions:,} sessions × {args.messages} messages")
+    print(f"  dict history:  {old_bytes / args.sessions:,.0f} bytes/session, keeps the last 10 messages only")
+    print(f"  HistoryStore:  {new_bytes / args.sessions:,.0f} bytes/session, "
+          f"{store.stats['summarized_turns'] / args.sessions:.0f} older turns folded into the summary")
+    print(f"  prompt history: {old_prompt} chars covering 5 messages (verbatim) vs "
+          f"{new_prompt} chars covering {store.stats['summarized_turns'] // args.sessions + 4} (summary + last 4)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Language detection benchmark on a held-out French/English campus corpus.
+
+Runs language_detection.detect_language over the labelled messages in
+benchmarks/corpora/campus_languages.tsv (none of them appear in the
+detector's training samples) and reports, per language:
+- coverage: share of messages the detector decides on (it abstains when
+  the message is too short or too close to call);
+- accuracy on the decided messages.
+For comparison it also scores the keyword rules the GPT extraction prompt
+used (French greetings and language names), which only ever recognise
+French. Throughput is measured over the corpus repeated --rounds times.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_language_detection --rounds 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import language_detection
+
+CORPUS = os.path.join(REPO_ROOT, "benchmarks", "corpora", "campus_languages.tsv")
+PROMPT_KEYWORDS = ['bonjour', 'salut', 'bonsoir', 'coucou', 'français', 'french', '🇫🇷']
+
+
+def load_corpus(path: str = CORPUS):
+    with open(path, encoding="utf-8") as f:
+        return [tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip() and not line.startswith("#")]
+
+
+def keyword_rules(message: str):
+    return 'fr' if any(word in message.lower() for word in PROMPT_KEYWORDS) else None
+
+
+def evaluate(corpus, detect):
+    """language -> (messages, decided, correct)"""
+    results = {}
+    for language, message in corpus:
+        total, decided, correct = results.get(language, (0, 0, 0))
+        guess = detect(message)
+        results[language] = (total + 1, decided + (guess is not None), correct + (guess == language))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline language detection")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus()
+    print(f"⏱️  Language detection, {len(corpus)} held-out campus messages")
+    print("=" * 60)
+    for label, detect in [("trigram detector", language_detection.detect_language),
+                          ("prompt keyword rules", keyword_rules)]:
+        for language, (total, decided, correct) in sorted(evaluate(corpus, detect).items()):
+            accuracy = f"{correct / decided:6.1%}" if decided else "     -"
+            print(f"{label:<22} {language}: coverage {decided / total:6.1%} | accuracy {accuracy}")
+
+    messages = [message for _, message in corpus]
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for message in messages:
+            language_detection.detect_language(message)
+    elapsed = time.perf_counter() - start
+    count = args.rounds * len(messages)
+    print(f"Throughput: {count / elapsed:,.0f} msg/s ({elapsed / count * 1e6:.1f} µs/message)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
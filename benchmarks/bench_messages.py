@@ -0,0 +1,90 @@
+"""
+Message rendering benchmark: catalog templates vs the old inline f-strings.
+
+Renders the two largest fixed-shape replies many times:
+- the 3-option match list sent for a service request;
+- the profile summary sent at the end of provider registration.
+It reports microseconds per reply for the former hand-written f-string
+concatenation and for messages.render in English and French. The catalog
+adds a few microseconds of dict lookups and format_map per reply, which is
+what a translatable reply costs; a GPT round-trip is hundreds of ms.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_messages --replies 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import messages
+from models import MatchCandidate
+
+MATCHES = [MatchCandidate(f"Provider {i}", f"+3370000000{i}", "Laundry", "Residence B", 4.5 + i / 10, 10 + i,
+                          8.0 + i, 'available', 'Available now') for i in range(3)]
+PROFILE = {'name': "Emma", 'services': "Laundry, ironing", 'location': "Studio", 'availability': "Weekends",
+           'time_preference': "Evening", 'pricing': "8€"}
+
+
+def inline_match_list(service: str = "laundry") -> str:
+    response = f"Found {len(MATCHES)} neighbors who can help with {service}:\n\n"
+    for i, match in enumerate(MATCHES, 1):
+        emoji = "1️⃣" if i == 1 else "2️⃣" if i == 2 else "3️⃣"
+        response += f"{emoji} **{match.name}** - {match.location}\n"
+        response += f"   ⭐ Rating: {match.rating}/5 ({match.total_services} services)\n"
+        response += f"   💰 Price: {match.price}€\n"
+        response += f"   📍 {match.available_label}\n\n"
+    response += "Reply with 1, 2, or 3 to connect with your chosen neighbor! 🚀"
+    return response
+
+
+def inline_profile() -> str:
+    user_data = PROFILE
+    return f"Perfect! You're all set! 🎉\n\n**Your Profile:**\n• Name: {user_data['name']}\n• Services: {user_data['services']}\n• Location: {user_data['location']}\n• Available: {user_data['availability']}\n• Time: {user_data['time_preference']}\n• Pricing: {user_data['pricing']}\n\nI'll connect you with neighbors when they need your help! 🤝"
+
+
+def catalog_match_list(language: str, service: str = "laundry") -> str:
+    response = messages.render('matches_header', language, count=len(MATCHES), service=service)
+    for emoji, match in zip(messages.NUMBER_EMOJIS, MATCHES):
+        response += messages.render('match', language, number=emoji, name=match.name, location=match.location,
+                                    rating=match.rating, total_services=match.total_services,
+                                    price=match.price, available_label=match.available_label)
+    return response + messages.render('matches_footer', language)
+
+
+def timed(render, replies: int) -> float:
+    start = time.perf_counter()
+    for _ in range(replies):
+        render()
+    return (time.perf_counter() - start) / replies * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fixed-shape reply rendering")
+    parser.add_argument("--replies", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    assert catalog_match_list('en') == inline_match_list()
+    assert messages.render('profile_saved', **PROFILE) == inline_profile()
+    rows = [
+        ("match list, inline f-strings", lambda: inline_match_list()),
+        ("match list, catalog (en)", lambda: catalog_match_list('en')),
+        ("match list, catalog (fr)", lambda: catalog_match_list('fr')),
+        ("profile summary, inline f-string", inline_profile),
+        ("profile summary, catalog (en)", lambda: messages.render('profile_saved', **PROFILE)),
+        ("profile summary, catalog (fr)", lambda: messages.render('profile_saved', 'fr', **PROFILE)),
+    ]
+    print(f"⏱️  Reply rendering, {args.replies:,} replies each ({len(messages.TEMPLATES)} compiled templates)")
+    print("=" * 60)
+    for label, render in rows:
+        print(f"{label:<36} {timed(render, args.replies):8.2f} µs/reply")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Outbound send throughput against a rate-limited fake Graph API.
+
+Sends N text messages from one phone number ID to FakeGraphAPI, which
+allows --graph-limit messages/s per number and answers the rest with 429
+(error 130429), optionally failing a share of sends with 500s:
+- direct: the old behaviour, every send awaited straight away through the
+  shared client; a 429 or 500 is a lost message;
+- outbox: the same sends enqueued in OutboundQueue, paced by its token
+  bucket and retried with jittered backoff.
+It reports delivered and lost messages, 429s seen, elapsed time and msg/s.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_outbound_queue --messages 1000 --graph-limit 80 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_services import FakeGraphAPI
+from outbound_queue import OutboundQueue
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+PHONE_NUMBER_ID = "100000000000001"
+
+
+def report(label, graph, elapsed, lost):
+    delivered = len(graph.sent)
+    print(f"{label:<22} {delivered:6d} delivered {lost:6d} lost {graph.rejected[429]:6d} × 429 "
+          f"{elapsed:7.2f} s {delivered / elapsed:8.0f} msg/s")
+
+
+def run_direct(args, graph):
+    whatsapp = WhatsAppBusinessAPI(max_concurrency=args.concurrency)
+
+    async def scenario():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(whatsapp.send_text_message(f"3361{i:07d}", "hello")
+                                         for i in range(args.messages)))
+        elapsed = time.perf_counter() - start
+        await whatsapp.aclose()
+        return elapsed, sum(1 for result in results if "error" in result)
+
+    elapsed, lost = asyncio.run(scenario())
+    report("direct (old)", graph, elapsed, lost)
+
+
+def run_outbox(args, graph, db_path):
+    whatsapp = WhatsAppBusinessAPI(max_concurrency=args.concurrency)
+    # Pace a little under the API's limit so the bucket, not 429s, does the throttling
+    whatsapp.outbox = OutboundQueue(db_path, whatsapp.deliver, rate=args.graph_limit * 0.95,
+                                    burst=max(1, int(args.graph_limit * 0.5)), base_delay=0.1, max_delay=5,
+                                    max_attempts=8)
+
+    async def scenario():
+        start = time.perf_counter()
+        for i in range(args.messages):
+            await whatsapp.send_text_message(f"3361{i:07d}", "hello")
+        await whatsapp.outbox.drain(timeout=args.timeout)
+        elapsed = time.perf_counter() - start
+        await whatsapp.aclose()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+    counts = whatsapp.outbox.counts()
+    report("outbox (queue)", graph, elapsed, args.messages - counts.get('sent', 0))
+    stats = whatsapp.outbox.stats
+    print(f"{'':<22} retried {stats['retried']}, rate limited {stats['rate_limited']}, dead {stats['dead']}")
+    whatsapp.outbox.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the outbound queue against a rate-limited Graph API")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--graph-limit", type=float, default=80.0, help="messages/s the fake API allows per number")
+    parser.add_argument("--graph-latency", default="fixed:20", help="fake Graph API latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of sends answered with a 500")
+    parser.add_argument("--concurrency", type=int, default=16, help="shared client's max in-flight sends")
+    parser.add_argument("--timeout", type=float, default=120.0, help="give up draining the outbox after this")
+    args = parser.parse_args(argv)
+
+    saved_env = dict(os.environ)
+    os.environ["WHATSAPP_BUSINESS_TOKEN"] = "fake-token"
+    os.environ["WHATSAPP_PHONE_NUMBER_ID"] = PHONE_NUMBER_ID
+    try:
+        print(f"⏱️  Outbound sends, {args.messages} messages, API limit {args.graph_limit:.0f}/s, "
+              f"latency {args.graph_latency}, {args.error_rate:.0%} 500s")
+        print("=" * 60)
+        with FakeGraphAPI(latency=args.graph_latency, rate_limit=args.graph_limit,
+                          error_rate=args.error_rate) as graph:
+            os.environ["WHATSAPP_GRAPH_API_URL"] = graph.url
+            run_direct(args, graph)
+        with FakeGraphAPI(latency=args.graph_latency, rate_limit=args.graph_limit, error_rate=args.error_rate) as graph, \
+                tempfile.TemporaryDirectory() as tmp:
+            os.environ["WHATSAPP_GRAPH_API_URL"] = graph.url
+            run_outbox(args, graph, os.path.join(tmp, "bot.db"))
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Provider-confirmation lookup benchmark with 10k pending matches.
+
+Compares the old linear scan over the pending_matches dict (done for every
+inbound message) with the PendingMatches provider index, for both
+providers with a pending match and ordinary users who have none.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pending_matches --pending 10000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from models import PendingMatch
+from pending_matches import PendingMatches
+
+
+def generate_matches(count: int, providers: int, seed: int = 7):
+    rng = random.Random(seed)
+    matches = {}
+    for i in range(count):
+        seeker = f"+3361{i:07d}"
+        provider = f"+3370{rng.randrange(providers):07d}"
+        matches[f"{seeker}_{provider}_laundry"] = PendingMatch(seeker, provider, 'Provider', 'laundry', 10)
+    return matches
+
+
+def linear_first(matches, phone):
+    """What is_provider_confirmation / handle_provider_confirmation used to do"""
+    for match_id, match in matches.items():
+        if match.provider_phone == phone:
+            return match_id, match
+    return None
+
+
+def timed(label, phones, fn):
+    start = time.perf_counter()
+    for phone in phones:
+        fn(phone)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed / len(phones) * 1e6:10.2f} µs/lookup")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark provider-confirmation lookups")
+    parser.add_argument("--pending", type=int, default=10000)
+    parser.add_argument("--providers", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    legacy = generate_matches(args.pending, args.providers)
+    start = time.perf_counter()
+    indexed = PendingMatches()
+    for match_id, match in legacy.items():
+        indexed[match_id] = match
+    build = time.perf_counter() - start
+
+    rng = random.Random(11)
+    provider_phones = sorted({m.provider_phone for m in legacy.values()})
+    # Most inbound traffic is from seekers and idle users, who have no pending match
+    mixed = [rng.choice(provider_phones) if rng.random() < 0.2 else f"+3362{rng.randrange(10**7):07d}"
+             for _ in range(args.lookups)]
+
+    for phone in mixed[:500]:
+        expected = linear_first(legacy, phone)
+        found = indexed.first_for_provider(phone)
+        assert (expected and expected[0]) == (found and found[0])
+
+    print(f"⏱️  Provider confirmation lookup, {args.pending} pending matches, {args.lookups} lookups")
+    print("=" * 60)
+    print(f"{'index build':<38} {build * 1000:10.1f} ms")
+    scan = timed("linear scan (old)", mixed, lambda phone: linear_first(legacy, phone))
+    index = timed("provider index", mixed, indexed.first_for_provider)
+    print(f"{'speedup':<38} {scan / index:10.1f} x")
+
+    # Accept/decline churn: look up, resolve, and re-add one match per lookup
+    start = time.perf_counter()
+    for phone in provider_phones:
+        found = indexed.first_for_provider(phone)
+        if found:
+            match_id, match = found
+            del indexed[match_id]
+            indexed[match_id] = match
+    elapsed = time.perf_counter() - start
+    print(f"{'resolve + re-add':<38} {elapsed / len(provider_phones) * 1e6:10.2f} µs/op")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
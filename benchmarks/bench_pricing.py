@@ -0,0 +1,97 @@
+"""
+Pricing benchmark: keyword if/elif chain vs the table-driven PricingEngine.
+
+Prices every candidate of random requests over 10k providers (10 ranked
+candidates per request, as find_matches does for cascades). Compares the
+old per-candidate keyword chain + rating formula with PricingEngine.quote
+on a warm cache, and reports how much the shown short-list prices used to
+differ from the prices actually agreed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pricing --providers 10000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pricing
+from benchmarks.bench_availability import SERVICES, generate_profiles
+
+CANDIDATES = 10
+
+
+def keyword_price(service, profile):
+    """The old GPTECLABot.calculate_base_price chain plus the find_matches rating adjustment"""
+    service_lower = service.lower()
+    if any(word in service_lower for word in ['translation', 'french', 'prefecture']):
+        base = 15.0
+    elif any(word in service_lower for word in ['car', 'airport', 'transport']):
+        base = 20.0
+    elif any(word in service_lower for word in ['food', 'delivery', 'kfc']):
+        base = 5.0
+    elif any(word in service_lower for word in ['it', 'tech', 'computer']):
+        base = 12.0
+    elif any(word in service_lower for word in ['laundry', 'cleaning']):
+        base = 8.0
+    elif any(word in service_lower for word in ['print', 'document']):
+        base = 3.0
+    else:
+        base = 10.0
+    return round(base * (1 + (5.0 - profile.rating) * 0.1), 2)
+
+
+def timed(label, queries, fn):
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed / len(queries) * 1e6:10.1f} µs/request")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark match pricing")
+    parser.add_argument("--providers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(17)
+    profiles = generate_profiles(args.providers)
+    monday = datetime(2026, 10, 19)
+    queries = [(rng.choice(SERVICES), rng.sample(profiles, CANDIDATES), monday + timedelta(hours=rng.randrange(168)))
+               for _ in range(args.queries)]
+
+    print(f"⏱️  Pricing, {args.providers} providers, {args.queries} requests x {CANDIDATES} candidates")
+    print("=" * 60)
+    engine = pricing.PricingEngine()
+    for service, candidates, when in queries:
+        for profile in candidates:
+            engine.quote(service, profile, when)
+    print(f"{'memoized provider rates':<38} {engine.misses:10d}")
+
+    chain = timed("keyword chain per candidate", queries,
+                  lambda service, candidates, when: [keyword_price(service, p) for p in candidates])
+    engine.hits = engine.misses = 0
+    table = timed("PricingEngine.quote (warm)", queries,
+                  lambda service, candidates, when: [engine.quote(service, p, when) for p in candidates])
+    print(f"{'rate cache hit rate':<38} {engine.hits / max(engine.hits + engine.misses, 1):10.1%}")
+    print(f"{'speedup':<38} {chain / table:10.1f} x")
+
+    # The short list used to show i*2 / i*1.5 / i*3 euros whatever was agreed later
+    shown = [2.0, 3.0, 9.0]
+    gaps = [abs(shown[i] - engine.quote(service, candidates[i], when))
+            for service, candidates, when in queries for i in range(3)]
+    print(f"{'old short-list price error (mean)':<38} {sum(gaps) / len(gaps):10.2f} €")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Proximity-ranked matching benchmark with 10k providers.
+
+Providers get random free-text locations (seed data names, residences,
+accommodation types, misspellings and unplaceable text). For random
+service / seeker-location queries it compares:
+- the old `LIKE '%location%'` filter: how many queries find nobody;
+- a per-query sort: normalize every matching provider's location and sort
+  by distance;
+- the ProximityIndex: one AND per distance band over the ranked bitmaps.
+It also reports normalizer coverage and the index build time.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_proximity --providers 10000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import campus
+from availability import AvailabilityIndex
+from benchmarks.bench_availability import SERVICES, generate_profiles
+
+LOCATIONS = ["Main Campus", "Student Housing", "Library", "Computer Lab", "Cafeteria", "Parking Lot", "Dormitory",
+             "Residence A", "residence b floor 3", "Bâtiment C", "Studio", "Mini Studio", "Colocation", "coloc",
+             "the biblio", "near the agora", "Gym", "laverie", "Cinebox", "RER", "campus", "room 214", "Campus"]
+SEEKER_LOCATIONS = ["Library", "Residence B", "Parking", "Studio", "Agora", "Computer Lab", "cafétéria", "Gym"]
+
+
+def sort_by_distance(profiles, term, place, limit=3):
+    row = campus.DISTANCES[campus.PLACE_INDEX[place]]
+
+    def metres(profile):
+        other = campus.PLACE_INDEX.get(campus.normalize_location(profile.location))
+        return campus.UNKNOWN_DISTANCE if other is None else row[other]
+    return sorted((p for p in profiles if term in p.services_lower), key=lambda p: campus.band(metres(p)))[:limit]
+
+
+def timed(label, queries, fn):
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed / len(queries) * 1e6:10.1f} µs/query")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark proximity-ranked provider matching")
+    parser.add_argument("--providers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(11)
+    profiles = generate_profiles(args.providers)
+    for profile in profiles:
+        profile.location = rng.choice(LOCATIONS)
+    queries = [(rng.choice(SERVICES), rng.choice(SEEKER_LOCATIONS)) for _ in range(args.queries)]
+
+    print(f"⏱️  Proximity matching, {args.providers} providers, {args.queries} queries")
+    print("=" * 60)
+    placed = sum(campus.normalize_location(text) is not None for text in LOCATIONS)
+    print(f"{'normalizer coverage (location texts)':<38} {placed:7d}/{len(LOCATIONS)}")
+    empty = sum(not any(term in p.services_lower and location.lower() in p.location.lower() for p in profiles)
+                for term, location in queries)
+    print(f"{'LIKE filter: queries with no match':<38} {empty / len(queries):10.1%}")
+
+    start = time.perf_counter()
+    index = AvailabilityIndex(profiles)
+    proximity = campus.ProximityIndex(profiles)
+    print(f"{'index build (availability + proximity)':<38} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    def indexed(term, location, limit=3):
+        bits = index.term_bits(term)
+        found = []
+        for ring in proximity.rings(campus.normalize_location(location)):
+            found += index.first(bits & ring, limit - len(found), None)
+            if len(found) >= limit:
+                break
+        return found
+
+    # Same answers either way
+    for term, location in queries[:200]:
+        place = campus.normalize_location(location)
+        assert [p.phone for p in indexed(term, location)] == [p.phone for p in sort_by_distance(profiles, term, place)]
+
+    scan = timed("sort by distance per query", queries,
+                 lambda term, location: sort_by_distance(profiles, term, campus.normalize_location(location)))
+    rings = timed("proximity bitmaps (AND per band)", queries, indexed)
+    print(f"{'speedup':<38} {scan / rings:10.1f} x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
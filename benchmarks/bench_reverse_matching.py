@@ -0,0 +1,91 @@
+"""
+Reverse matching benchmark: which pending requests does a new provider fit?
+
+Indexes N pending requests and times lookups for freshly registered
+providers through PendingRequestIndex, against a scan over every pending
+request (what re-matching on registration cost before the index).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_reverse_matching --requests 100000 --providers 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from profiles import ProviderProfile, service_terms
+from request_index import PendingRequestIndex
+
+TOPICS = ["laundry", "grocery", "math", "physics", "french", "english", "bike", "car", "moving", "printing",
+          "cooking", "guitar", "piano", "photo", "resume", "visa", "bank", "phone", "laptop", "garden"]
+KINDS = ["help", "lessons", "repair", "delivery", "pickup", "advice", "sitting", "tutoring", "setup",
+         "review", "shopping", "cleaning", "support", "coaching", "checks"]
+# 300 distinct services, roughly what a campus of a few thousand people asks for
+SERVICES = [f"{topic} {kind}" for topic in TOPICS for kind in KINDS]
+LOCATIONS = ["campus", "Library", "Dormitory", "Cafeteria", "Student Housing", "Computer Lab"]
+TIMES = ["flexible", "today at 5pm", "tomorrow morning", "asap", "this evening"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark reverse matching of pending requests")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--providers", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(2)
+    now = datetime(2026, 10, 19, 9, 0)
+    rows = [(i, f"+3361{i:07d}", rng.choice(SERVICES), rng.choice(TIMES), rng.choice(LOCATIONS), now)
+            for i in range(args.requests)]
+    providers = [ProviderProfile(phone=f"+3370{i:07d}", name=f"Provider {i}",
+                                 services=", ".join(rng.sample(SERVICES, rng.randint(1, 3))),
+                                 location=rng.choice(LOCATIONS))
+                 for i in range(args.providers)]
+
+    print(f"⏱️  Reverse matching, {args.requests} pending requests, {args.providers} registrations")
+    print("=" * 60)
+    start = time.perf_counter()
+    index = PendingRequestIndex()
+    index.load(rows)
+    print(f"{'index build':<32} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    terms = {row[0]: service_terms(row[2]) for row in rows}
+
+    def scan(profile):
+        services = profile.services_lower
+        return [row for row in rows if row[1] != profile.phone and any(t in services for t in terms[row[0]])]
+
+    # A separate index for the scan comparison so "already suggested" marks don't differ
+    check = PendingRequestIndex()
+    check.load(rows)
+    for profile in providers[:20]:
+        with_windows = {r['id'] for r in check.affected(profile)}
+        assert with_windows <= {row[0] for row in scan(profile)}
+
+    sample = providers[:max(1, args.providers // 20)]
+    start = time.perf_counter()
+    for profile in sample:
+        scan(profile)
+    scan_s = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    found = 0
+    for profile in providers:
+        found += len(index.affected(profile))
+    index_s = (time.perf_counter() - start) / len(providers)
+
+    print(f"{'scan every pending request':<32} {scan_s * 1000:10.3f} ms/registration")
+    print(f"{'reverse index':<32} {index_s * 1000:10.3f} ms/registration")
+    print(f"{'speedup':<32} {scan_s / index_s:10.1f} x")
+    print(f"{'notifications enqueued':<32} {found:10d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Expiry scheduler benchmark: a once-a-second tick with 100k tracked items.
+
+Simulates an hour of traffic against ExpiryScheduler on a fake clock:
+every second a slice of the sessions sees activity (touch) and the
+scheduler ticks. Compares the tick with a naive sweep that scans every
+session's timestamp each second.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_scheduler --items 100000 --seconds 3600
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from scheduler import ExpiryScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the session expiry scheduler")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--seconds", type=int, default=3600, help="simulated seconds (one tick each)")
+    parser.add_argument("--active", type=float, default=0.002, help="share of items touched per second")
+    parser.add_argument("--ttl", type=float, default=1800)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    clock = FakeClock()
+    scheduler = ExpiryScheduler(clock)
+    expired = []
+    reminded = []
+    scheduler.register('conversation', args.ttl, expired.append, remind_before=300, on_remind=reminded.append)
+
+    # Sessions started at random points over the last TTL
+    naive = {}
+    start = time.perf_counter()
+    for i in range(args.items):
+        clock.now = -rng.uniform(0, args.ttl)
+        scheduler.touch('conversation', i)
+        naive[i] = clock.now
+    print(f"⏱️  Expiry scheduler, {args.items} items, {args.seconds} ticks, TTL {args.ttl:.0f}s")
+    print("=" * 60)
+    print(f"{'track all items':<30} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    per_tick = max(1, int(args.items * args.active))
+    tick_times, touch_time, sweep_times = [], 0.0, []
+    for second in range(args.seconds):
+        clock.now = float(second)
+        keys = [rng.randrange(args.items) for _ in range(per_tick)]
+        t0 = time.perf_counter()
+        for key in keys:
+            scheduler.touch('conversation', key)
+        touch_time += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        scheduler.run_due()
+        tick_times.append(time.perf_counter() - t0)
+
+        # Naive sweep over every session, sampled (it's slow)
+        if second % 60 == 0:
+            for key in keys:
+                naive[key] = clock.now
+            t0 = time.perf_counter()
+            stale = [key for key, seen in naive.items() if clock.now - seen > args.ttl]
+            for key in stale:
+                del naive[key]
+            sweep_times.append(time.perf_counter() - t0)
+
+    tick_times.sort()
+    sweep_times.sort()
+    print(f"{'touch':<30} {touch_time / (per_tick * args.seconds) * 1e6:10.2f} µs")
+    print(f"{'tick p50 / p99 / max':<30} {tick_times[len(tick_times) // 2] * 1000:10.3f} / "
+          f"{tick_times[int(len(tick_times) * 0.99)] * 1000:.3f} / {tick_times[-1] * 1000:.3f} ms")
+    print(f"{'naive full sweep p50':<30} {sweep_times[len(sweep_times) // 2] * 1000:10.3f} ms")
+    print(f"{'expired / reminded':<30} {len(expired):10d} / {len(reminded)}")
+    print(f"{'still tracked':<30} {len(scheduler):10d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
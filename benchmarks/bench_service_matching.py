@@ -0,0 +1,127 @@
+"""
+Service matching benchmark: substring terms vs canonical service ids.
+
+Providers describe their services in their own words and requests come in
+as whatever the LLM extracted, both drawn from labelled phrase lists
+below (the label is the category a human would file them under). For
+each request it compares the providers found by:
+- the old substring rule (service_terms, `term in services`);
+- service_taxonomy ids (`provider.service_mask & request_mask`).
+It reports recall / precision against the labels, and the cost per query
+of a cold scan (every LLM phrasing is new, so per-term memoization rarely
+hits) and of the memoized AvailabilityIndex.mask_bits.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_service_matching --providers 10000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import service_taxonomy
+from availability import AvailabilityIndex
+from profiles import ProviderProfile, service_terms
+
+OFFERINGS = {
+    'transport': ["Car lending", "Airport pickup", "Rides to the airport", "Covoiturage", "Transportation"],
+    'food_delivery': ["Food delivery", "KFC runs", "Pizza delivery", "Livraison de repas"],
+    'shopping': ["Grocery shopping", "Errands", "Supermarket runs", "Shopping"],
+    'laundry': ["Laundry", "Dry cleaning", "Washing and ironing", "Lessive"],
+    'it_support': ["IT support", "Computer repair", "Tech help", "Wifi setup"],
+    'translation': ["Translation", "French paperwork", "Prefecture assistance", "Traduction"],
+    'printing': ["Printing", "Photocopies", "Scanning documents"],
+    'tutoring': ["Math tutoring", "Homework help", "Study group"],
+}
+REQUESTS = {
+    'transport': ["car lending", "lift to the airport", "lend me a car", "a ride", "airport"],
+    'food_delivery': ["kfc", "pizza", "deliver lunch", "food"],
+    'shopping': ["cigarettes", "groceries", "buy bread", "supermarket"],
+    'laundry': ["laundry", "washing clothes", "ironing", "dry-cleaning"],
+    'it_support': ["tech support", "laptop broken", "computer", "IT help"],
+    'translation': ["translate documents", "prefecture", "french translation", "paperwork for the CAF"],
+    'printing': ["print my CV", "photocopy", "printer"],
+    'tutoring': ["homework", "maths", "tutor"],
+}
+
+
+def generate_profiles(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    profiles, labels = [], []
+    for i in range(count):
+        categories = rng.sample(sorted(OFFERINGS), rng.randint(1, 2))
+        services = ", ".join(rng.choice(OFFERINGS[category]) for category in categories)
+        profiles.append(ProviderProfile(phone=f"+3370{i:07d}", name=f"Provider {i}", services=services,
+                                        location="Campus"))
+        labels.append(set(categories))
+    return profiles, labels
+
+
+def substring_bits(profiles, service):
+    terms = service_terms(service)
+    bits = 0
+    for position, profile in enumerate(profiles):
+        if any(term in profile.services_lower for term in terms):
+            bits |= 1 << position
+    return bits
+
+
+def mask_bits(profiles, service):
+    mask = service_taxonomy.service_mask(service)
+    bits = 0
+    for position, profile in enumerate(profiles):
+        if profile.service_mask & mask:
+            bits |= 1 << position
+    return bits
+
+
+def timed(label, queries, fn):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed / len(queries) * 1e6:10.1f} µs/query")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark substring vs taxonomy service matching")
+    parser.add_argument("--providers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(13)
+    profiles, labels = generate_profiles(args.providers)
+    phrases = [(category, text) for category, texts in REQUESTS.items() for text in texts]
+    queries = [rng.choice(phrases) for _ in range(args.queries)]
+
+    print(f"⏱️  Service matching, {args.providers} providers, {args.queries} queries")
+    print("=" * 60)
+    for label, fn in (("substring terms", substring_bits), ("taxonomy ids", mask_bits)):
+        found = relevant = hits = 0
+        for category, text in sorted(set(phrases)):
+            truth = sum(1 << i for i, categories in enumerate(labels) if category in categories)
+            bits = fn(profiles, text)
+            found += bin(bits).count("1")
+            relevant += bin(truth).count("1")
+            hits += bin(bits & truth).count("1")
+        print(f"{label + ': recall / precision':<38} {hits / relevant:9.1%} / {hits / max(found, 1):.1%}")
+
+    texts = [text for _, text in queries]
+    scan = timed("substring scan per query", texts, lambda text: substring_bits(profiles, text))
+    masks = timed("service id scan per query", texts, lambda text: mask_bits(profiles, text))
+    index = AvailabilityIndex(profiles)
+    memo = timed("AvailabilityIndex.mask_bits (memoized)", texts,
+                 lambda text: index.mask_bits(service_taxonomy.service_mask(text)))
+    print(f"{'speedup (scan / id scan / memoized)':<38} {scan / masks:10.1f} x {scan / memo:10.0f} x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Per-user memory benchmark: dict records vs the slotted models.
+
+Builds the in-memory state of N active users twice with tracemalloc
+running:
+- first in the old dict shapes: a conversation state dict, 10 history
+  dicts with ISO timestamps, an active request with 10 ranked 9-key match
+  dicts, and a pending match dict;
+- then with SessionState, history.Turn, ActiveRequest, MatchCandidate and
+  PendingMatch holding the same values.
+It reports bytes per active user for each. Field values are built the same
+way in both runs, so the difference is the record overhead.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_session_memory --users 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from history import Turn
+from models import ActiveRequest, MatchCandidate, PendingMatch, SessionState
+
+HISTORY = 10
+CANDIDATES = 10
+PROVIDERS = [(f"Provider {i}", f"+3370{i:07d}", "Laundry, ironing", "Residence B", 4.5 + i % 5 / 10, i)
+             for i in range(200)]
+
+
+def legacy_user(u: int):
+    phone = f"+3361{u:07d}"
+    candidates = []
+    for i in range(CANDIDATES):
+        name, provider_phone, services, location, rating, total = PROVIDERS[(u + i) % len(PROVIDERS)]
+        candidates.append({'name': name, 'phone': provider_phone, 'services': services, 'location': location,
+                           'rating': rating, 'total_services': total, 'price': 8.0 + i,
+                           'availability': 'available', 'available_label': 'Available now'})
+    state = {'state': 'choosing_provider', 'data': {'service': 'laundry'}, 'last_message': datetime.now()}
+    history = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f"message {i}",
+                'timestamp': datetime.now().isoformat()} for i in range(HISTORY)]
+    active = {'service': 'laundry', 'when': None, 'matches': candidates[:3], 'candidates': candidates,
+              'timestamp': datetime.now()}
+    first = candidates[0]
+    pending = {'seeker_phone': phone, 'provider_phone': first['phone'], 'provider_name': first['name'],
+               'service': 'laundry', 'price': first['price'], 'candidates': candidates[1:],
+               'broadcast_id': None, 'timestamp': datetime.now()}
+    return state, history, active, pending
+
+
+def slotted_user(u: int):
+    phone = f"+3361{u:07d}"
+    candidates = []
+    for i in range(CANDIDATES):
+        name, provider_phone, services, location, rating, total = PROVIDERS[(u + i) % len(PROVIDERS)]
+        candidates.append(MatchCandidate(name, provider_phone, services, location, rating, total, 8.0 + i,
+                                         'available', 'Available now'))
+    state = SessionState('choosing_provider', {'service': 'laundry'}, time.time())
+    history = [Turn('user' if i % 2 == 0 else 'assistant', f"message {i}") for i in range(HISTORY)]
+    active = ActiveRequest('laundry', None, candidates[:3], candidates)
+    first = candidates[0]
+    pending = PendingMatch(phone, first.phone, first.name, 'laundry', first.price, candidates[1:])
+    return state, history, active, pending
+
+
+def measure(build, users: int) -> float:
+    tracemalloc.start()
+    kept = [build(u) for u in range(users)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / users
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark memory per active user")
+    parser.add_argument("--users", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    before = measure(legacy_user, args.users)
+    after = measure(slotted_user, args.users)
+    print(f"⏱️  Memory per active user, {args.users:,} users "
+          f"({HISTORY} history turns, {CANDIDATES} ranked candidates, 1 pending match)")
+    print("=" * 60)
+    print(f"{'dict records (old)':<32} {before:10,.0f} bytes/user")
+    print(f"{'slotted models':<32} {after:10,.0f} bytes/user")
+    print(f"{'saved':<32} {1 - after / before:10.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Cold-start benchmark for main.py, broken down by import and init phase.
+
+Each run uses a fresh interpreter and an empty database directory, which is
+what a Render/Railway free-tier instance sees when it wakes up.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --importtime 15   # slowest imports of `import main`
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter, prints phase timings in ms as JSON
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, REPO_ROOT)
+timings = {}
+t = time.perf_counter()
+import fastapi
+timings["import fastapi"] = time.perf_counter() - t
+t = time.perf_counter()
+import main
+timings["import main"] = time.perf_counter() - t
+t = time.perf_counter()
+import gpt_bot_logic
+timings["import gpt_bot_logic"] = time.perf_counter() - t
+t = time.perf_counter()
+bot = main.get_bot()
+timings["lifespan: schema + bot init"] = time.perf_counter() - t
+t = time.perf_counter()
+bot.warm_up()
+timings["lifespan: openai warm-up (background)"] = time.perf_counter() - t
+print(json.dumps({k: v * 1000.0 for k, v in timings.items()}))
+"""
+
+# Phases that run before the app can answer its first request
+BLOCKING_PHASES = ["import fastapi", "import main", "import gpt_bot_logic", "lifespan: schema + bot init"]
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-fake-benchmark")
+    return env
+
+
+def run_once() -> dict:
+    with tempfile.TemporaryDirectory(prefix="ecla-startup-") as workdir:
+        output = subprocess.check_output(
+            [sys.executable, "-c", f"REPO_ROOT = {REPO_ROOT!r}\n{CHILD}"],
+            cwd=workdir, env=_child_env(), text=True,
+        )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(top: int) -> list:
+    """Slowest modules (cumulative µs) from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure main.py cold start by phase")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Also show the N slowest imports of `import main`")
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+
+    print(f"🚀 main.py cold start ({args.runs} runs, median / max ms)")
+    print("=" * 60)
+    for phase in runs[0]:
+        values = [r[phase] for r in runs]
+        print(f"{phase:<42} {statistics.median(values):8.1f} {max(values):8.1f}")
+    blocking = [sum(r[p] for p in BLOCKING_PHASES) for r in runs]
+    print("-" * 60)
+    print(f"{'time to ready (blocking phases)':<42} {statistics.median(blocking):8.1f} {max(blocking):8.1f}")
+
+    if args.importtime:
+        print(f"\n🐢 Slowest imports under `import main` (cumulative ms)")
+        for cumulative_us, name in import_profile(args.importtime):
+            print(f"{cumulative_us / 1000.0:8.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
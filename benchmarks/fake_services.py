@@ -0,0 +1,304 @@
+"""
+Local fake services for offline benchmarking of the ECLA bot.
+
+FakeOpenAIServer speaks just enough of the Chat Completions API for
+gpt_bot_logic, with deterministic answers and configurable latency.
+FakeGraphAPI accepts WhatsApp Business API sends and records them. It can
+also enforce a per-number throughput limit (429 with Meta's error 130429)
+and fail a share of requests with 500s.
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+class LatencyModel:
+    """Latency distribution in milliseconds.
+
+    Specs: "0", "fixed:50", "uniform:20:80", "normal:60:15",
+    "lognormal:4.0:0.5" (mu/sigma of the underlying normal).
+    """
+
+    def __init__(self, spec: str = "0", seed: int = 42):
+        self.spec = spec
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        parts = spec.split(":")
+        self.kind = parts[0] if len(parts) > 1 else "fixed"
+        self.params = [float(p) for p in (parts[1:] if len(parts) > 1 else parts)]
+
+    def sample_ms(self) -> float:
+        with self.lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self.random.uniform(self.params[0], self.params[1])
+            if self.kind == "normal":
+                return max(0.0, self.random.gauss(self.params[0], self.params[1]))
+            if self.kind == "lognormal":
+                return math.exp(self.random.gauss(self.params[0], self.params[1]))
+        raise ValueError(f"Unknown latency spec: {self.spec}")
+
+    def sleep(self):
+        delay = self.sample_ms()
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+
+# Keyword rules mirroring the intent rules in the extraction prompt
+INTENT_RULES = [
+    ("OFFER_HELP", ["i can help", "i offer", "i provide", "provide service", "register as provider", "i help people"]),
+    ("REQUEST_HELP", ["i need", "i want someone", "need help", "can someone", "looking for"]),
+    ("LANGUAGE_SELECTION", ["english", "français", "french", "language", "🇫🇷", "🇬🇧"]),
+    ("FRENCH_GREETING", ["bonjour", "salut", "bonsoir", "coucou"]),
+    ("GREETING", ["hi", "hello", "hey"]),
+    ("THANKS", ["thanks", "thank you", "merci"]),
+    ("GENERAL_QUERY", ["how can you help", "how does this work", "how do you work", "what can you do", "explain"]),
+]
+
+SERVICE_RULES = [
+    ("food delivery", ["food", "kfc", "pizza", "lunch", "delivery"]),
+    ("car lending", ["lend a car", "car"]),
+    ("airport pickup", ["airport"]),
+    ("IT support", ["it help", "it support", "computer", "wifi", "laptop"]),
+    ("translation", ["translation", "translate", "prefecture"]),
+    ("laundry", ["laundry", "washing"]),
+    ("printing", ["print"]),
+    ("cigarettes", ["cig"]),
+]
+
+
+def _mentions(text: str, words: set, keyword: str) -> bool:
+    """Whole-word match for plain words, substring match for phrases"""
+    if " " in keyword or not keyword.isalpha():
+        return keyword in text
+    return keyword in words
+
+
+def fake_extraction(message: str) -> Dict:
+    """Deterministic stand-in for the GPT extraction call"""
+    text = message.lower()
+    words = set(re.findall(r"[\w']+", text))
+    intent = "UNKNOWN"
+    for name, keywords in INTENT_RULES:
+        if any(_mentions(text, words, k) for k in keywords):
+            intent = name
+            break
+    service = None
+    for name, keywords in SERVICE_RULES:
+        if any(k in text for k in keywords):
+            service = name
+            break
+    time_match = re.search(r"\b(today|tomorrow|tonight|asap|now|\d{1,2}(?::\d{2})?\s*(?:am|pm))\b", text)
+    return {
+        "intent": intent,
+        "service": service,
+        "time": time_match.group(1) if time_match else None,
+        "location": None,
+        "confidence": 0.9 if intent != "UNKNOWN" else 0.3,
+    }
+
+
+class _JSONServer:
+    """Threaded HTTP server running in the background"""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        server = self
+
+        class Handler(self.handler_class):
+            owner = server
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _read_json(handler: BaseHTTPRequestHandler) -> Dict:
+    length = int(handler.headers.get("Content-Length") or 0)
+    raw = handler.rfile.read(length) if length else b""
+    return json.loads(raw or b"{}")
+
+
+def _write_json(handler: BaseHTTPRequestHandler, status: int, payload: Dict, headers: Dict = None):
+    body = json.dumps(payload).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(body)))
+    for key, value in (headers or {}).items():
+        handler.send_header(key, value)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = _read_json(self)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            _write_json(self, 404, {"error": {"message": "not found"}})
+            return
+        content = self.owner.complete(payload.get("messages", []))
+        _write_json(self, 200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+class FakeOpenAIServer(_JSONServer):
+    """Deterministic Chat Completions endpoint with configurable latency"""
+
+    handler_class = _OpenAIHandler
+
+    def __init__(self, latency: str = "0", seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = LatencyModel(latency, seed)
+        self.calls = 0
+        self.calls_by_kind: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def complete(self, messages: List[Dict]) -> str:
+        system = messages[0]["content"] if messages else ""
+        if system.startswith("Extract key information"):
+            kind = "extract"
+            user_message = next(
+                (m["content"] for m in messages if m["content"].startswith("Message: ")),
+                messages[-1]["content"] if messages else "",
+            )
+            content = json.dumps(fake_extraction(user_message[len("Message: "):]))
+        elif system.startswith("Summarize"):
+            kind = "summarize"
+            content = "User has been chatting about campus services."
+        else:
+            kind = "generate"
+            content = "Happy to help! Tell me what you need and I'll find a neighbour. 😊"
+        with self.lock:
+            self.calls += 1
+            self.calls_by_kind[kind] = self.calls_by_kind.get(kind, 0) + 1
+        self.latency.sleep()
+        return content
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.calls_by_kind = {}
+
+
+class _GraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = _read_json(self)
+        if not self.path.rstrip("/").endswith("/messages"):
+            _write_json(self, 404, {"error": {"message": "Unknown path", "code": 100}})
+            return
+        status, response, headers = self.owner.accept(self.path, payload)
+        _write_json(self, status, response, headers)
+
+
+class FakeGraphAPI(_JSONServer):
+    """WhatsApp Business (Graph) API stand-in that records outbound messages
+
+    rate_limit: messages/s allowed per phone number ID (a token bucket holding
+    one second's worth); sends over it get a 429. error_rate: share of sends
+    that fail with a 500.
+    """
+
+    handler_class = _GraphHandler
+
+    def __init__(self, latency: str = "0", seed: int = 7, rate_limit: float = None, error_rate: float = 0.0,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.latency = LatencyModel(latency, seed)
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.sent: List[Dict] = []
+        self.rejected = {429: 0, 500: 0}
+        self._buckets: Dict[str, List[float]] = {}  # phone number ID -> [tokens, updated]
+        self.in_flight = 0
+        self.peak_in_flight = 0  # most requests the bot had open at once
+
+    def _over_limit(self, path: str) -> bool:
+        """Called with the lock held"""
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(path, [self.rate_limit, now])
+        bucket[0] = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return True
+        bucket[0] -= 1
+        return False
+
+    def accept(self, path: str, payload: Dict):
+        with self.lock:
+            if self._over_limit(path):
+                self.rejected[429] += 1
+                return 429, {"error": {"message": "(#130429) Rate limit hit", "type": "OAuthException",
+                                       "code": 130429}}, None
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.rejected[500] += 1
+                return 500, {"error": {"message": "An unexpected error has occurred.", "code": 2}}, None
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            self.latency.sleep()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        with self.lock:
+            self.sent.append({"path": path, "payload": payload})
+            message_id = f"wamid.fake{len(self.sent)}"
+        return 200, {
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": payload.get("to"), "wa_id": payload.get("to")}],
+            "messages": [{"id": message_id}],
+        }, None
+
+    def sent_to(self, phone: str) -> List[Dict]:
+        with self.lock:
+            return [m["payload"] for m in self.sent if m["payload"].get("to") == phone]
@@ -0,0 +1,360 @@
+"""
+Offline replay and load-test harness for the ECLA bot.
+
+Replays recorded or synthetic conversation transcripts through
+GPTECLABot.process_message or the /webhook endpoint, against a local fake
+OpenAI server and a fake Graph API, and reports throughput, latency
+percentiles, DB ops per message and LLM calls per message.
+
+Usage (from the repository root):
+    python -m benchmarks.replay --transcripts benchmarks/transcripts/campus_sample.jsonl
+    python -m benchmarks.replay --target webhook --synthetic 200 --llm-latency uniform:20:80
+    python -m benchmarks.replay --json-out bench_output.txt
+    python -m benchmarks.replay --baseline baseline.json --tolerance 0.25   # regression gate
+
+Transcript files are JSONL, one conversation per line:
+    {"phone": "+33600000001", "messages": ["Hi", "Camille", "service seeker"]}
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_services import FakeGraphAPI, FakeOpenAIServer
+
+SAMPLE_TRANSCRIPTS = os.path.join(REPO_ROOT, "benchmarks", "transcripts", "campus_sample.jsonl")
+
+# Count-style metrics are deterministic against the fakes and gated exactly,
+# timing metrics are gated with a relative tolerance
+EXACT_GATE_METRICS = ["llm_calls_per_message", "db_statements_per_message", "db_connections_per_message"]
+
+
+class DBOpCounter:
+    """Counts SQLite connections and executed statements process-wide"""
+
+    def __init__(self):
+        self.connections = 0
+        self.statements = 0
+        self.lock = threading.Lock()
+        self._original_connect = None
+
+    def _trace(self, statement: str):
+        with self.lock:
+            self.statements += 1
+
+    def __enter__(self):
+        self._original_connect = original = sqlite3.connect
+        counter = self
+
+        def counting_connect(*args, **kwargs):
+            conn = original(*args, **kwargs)
+            conn.set_trace_callback(counter._trace)
+            with counter.lock:
+                counter.connections += 1
+            return conn
+
+        sqlite3.connect = counting_connect
+        return self
+
+    def __exit__(self, *exc):
+        sqlite3.connect = self._original_connect
+
+    def snapshot(self):
+        with self.lock:
+            return self.connections, self.statements
+
+
+def load_transcripts(path: str) -> List[Dict]:
+    """Load conversations from a JSONL transcript file"""
+    conversations = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                conversations.append(json.loads(line))
+    return conversations
+
+
+SYNTHETIC_FLOWS = [
+    ["Hi", "{name}", "service seeker"],
+    ["Hi", "{name}", "service seeker", "I need food delivery", "1"],
+    ["I need laundry help", "2"],
+    ["I need IT help", "1"],
+    ["I can help with cooking", "{name}", "service provider", "cooking and groceries", "Studio", "Weekends", "Evening", "10€"],
+    ["Bonjour", "{name}", "service seeker", "I need translation for prefecture", "1"],
+    ["How does this work?"],
+    ["Where is the cafeteria?", "Thanks!"],
+    ["I need a cig"],
+]
+
+SYNTHETIC_NAMES = ["Camille", "Lucas", "Ines", "Hugo", "Yasmine", "Noah", "Chloe", "Adam", "Lea", "Rayan"]
+
+
+def synthetic_transcripts(count: int, seed: int = 1) -> List[Dict]:
+    """Generate a reproducible mix of campus conversations"""
+    rng = random.Random(seed)
+    conversations = []
+    for i in range(count):
+        flow = rng.choice(SYNTHETIC_FLOWS)
+        name = rng.choice(SYNTHETIC_NAMES)
+        conversations.append({
+            "phone": f"+3361{i:07d}",
+            "messages": [m.format(name=name) for m in flow],
+        })
+    return conversations
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _configure_environment(openai_server: FakeOpenAIServer, graph: FakeGraphAPI, workdir: str):
+    """Point the bot at the fakes and an isolated database directory"""
+    os.environ["OPENAI_API_KEY"] = "sk-fake-benchmark"
+    os.environ["OPENAI_BASE_URL"] = openai_server.base_url
+    os.environ["WHATSAPP_GRAPH_API_URL"] = graph.url
+    os.environ["WHATSAPP_BUSINESS_TOKEN"] = "fake-token"
+    os.environ["WHATSAPP_PHONE_NUMBER_ID"] = "100000000000001"
+    os.chdir(workdir)
+
+
+class _BotTarget:
+    def __init__(self):
+        from gpt_bot_logic import GPTECLABot
+        self.bot = GPTECLABot()
+
+    def send(self, phone: str, text: str) -> str:
+        return self.bot.process_message(phone, text)
+
+    def close(self):
+        pass
+
+
+class _WebhookTarget:
+    def __init__(self):
+        from starlette.testclient import TestClient
+        import main
+        self.client = TestClient(main.app)
+        self.client.__enter__()
+        self.bot = main.bot
+
+    def send(self, phone: str, text: str) -> str:
+        response = self.client.post("/webhook", data={"From": f"whatsapp:{phone}", "Body": text})
+        if response.status_code != 200:
+            raise RuntimeError(f"/webhook returned {response.status_code}")
+        return response.text
+
+    def close(self):
+        self.client.__exit__(None, None, None)
+
+
+def run_replay(conversations: List[Dict], target: str = "bot", llm_latency: str = "0",
+               graph_latency: str = "0", concurrency: int = 1, workdir: Optional[str] = None) -> Dict:
+    """Replay conversations and return a metrics report"""
+    original_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    workdir = workdir or tempfile.mkdtemp(prefix="ecla-replay-")
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    with FakeOpenAIServer(latency=llm_latency) as openai_server, FakeGraphAPI(latency=graph_latency) as graph:
+        _configure_environment(openai_server, graph, workdir)
+        try:
+            with DBOpCounter() as db:
+                runner = _WebhookTarget() if target == "webhook" else _BotTarget()
+                # Startup work (schema, seeding) is not attributed to messages
+                openai_server.reset()
+                runner.bot.llm_stats.update(extractions=0, extractions_avoided=0)
+                runner.bot.db_context.hits = runner.bot.db_context.misses = 0
+                start_connections, start_statements = db.snapshot()
+                graph_start = len(graph.sent)
+
+                def replay(conversation: Dict):
+                    nonlocal errors
+                    local = []
+                    failed = 0
+                    for text in conversation["messages"]:
+                        began = time.perf_counter()
+                        try:
+                            runner.send(conversation["phone"], text)
+                        except Exception as e:
+                            print(f"Replay error for {conversation['phone']}: {e}")
+                            failed += 1
+                        local.append((time.perf_counter() - began) * 1000.0)
+                    with lock:
+                        latencies.extend(local)
+                        errors += failed
+
+                wall_start = time.perf_counter()
+                if concurrency > 1:
+                    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        list(pool.map(replay, conversations))
+                else:
+                    for conversation in conversations:
+                        replay(conversation)
+                wall = time.perf_counter() - wall_start
+
+                end_connections, end_statements = db.snapshot()
+                runner.close()
+        finally:
+            os.chdir(original_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        messages = len(latencies)
+        ordered = sorted(latencies)
+        per_message = lambda value: round(value / messages, 3) if messages else 0.0
+        return {
+            "target": target,
+            "conversations": len(conversations),
+            "messages": messages,
+            "errors": errors,
+            "concurrency": concurrency,
+            "llm_latency": llm_latency,
+            "wall_seconds": round(wall, 4),
+            "throughput_msg_per_s": round(messages / wall, 2) if wall > 0 else 0.0,
+            "latency_ms": {
+                "mean": round(sum(ordered) / messages, 3) if messages else 0.0,
+                "p50": round(percentile(ordered, 50), 3),
+                "p90": round(percentile(ordered, 90), 3),
+                "p95": round(percentile(ordered, 95), 3),
+                "p99": round(percentile(ordered, 99), 3),
+                "max": round(ordered[-1], 3) if ordered else 0.0,
+            },
+            "llm_calls_per_message": per_message(openai_server.calls),
+            "llm_calls_by_kind": dict(openai_server.calls_by_kind),
+            "extractions_avoided_per_conversation": round(
+                runner.bot.llm_stats['extractions_avoided'] / len(conversations), 2) if conversations else 0.0,
+            "db_connections_per_message": per_message(end_connections - start_connections),
+            "db_statements_per_message": per_message(end_statements - start_statements),
+            "context_cache_hit_ratio": round(runner.bot.db_context.hit_ratio, 3),
+            "graph_messages_sent": len(graph.sent) - graph_start,
+        }
+
+
+def check_gate(report: Dict, baseline: Optional[Dict] = None, tolerance: float = 0.25,
+               thresholds: Optional[Dict] = None) -> List[str]:
+    """Compare a report against a baseline report and/or absolute thresholds"""
+    failures = []
+    if report["errors"]:
+        failures.append(f"{report['errors']} messages raised errors")
+
+    if baseline:
+        for metric in EXACT_GATE_METRICS:
+            if report[metric] > baseline[metric] + 1e-9:
+                failures.append(f"{metric} regressed: {report[metric]} > baseline {baseline[metric]}")
+        p95, base_p95 = report["latency_ms"]["p95"], baseline["latency_ms"]["p95"]
+        if p95 > base_p95 * (1 + tolerance):
+            failures.append(f"p95 latency regressed: {p95}ms > {base_p95}ms +{tolerance:.0%}")
+        rate, base_rate = report["throughput_msg_per_s"], baseline["throughput_msg_per_s"]
+        if rate < base_rate * (1 - tolerance):
+            failures.append(f"throughput regressed: {rate} msg/s < {base_rate} msg/s -{tolerance:.0%}")
+
+    for metric, limit in (thresholds or {}).items():
+        if limit is None:
+            continue
+        if metric == "min_throughput_msg_per_s":
+            if report["throughput_msg_per_s"] < limit:
+                failures.append(f"throughput {report['throughput_msg_per_s']} msg/s below {limit}")
+        elif metric == "max_p95_ms":
+            if report["latency_ms"]["p95"] > limit:
+                failures.append(f"p95 latency {report['latency_ms']['p95']}ms above {limit}ms")
+        else:
+            name = metric[len("max_"):]
+            if report[name] > limit:
+                failures.append(f"{name} {report[name]} above {limit}")
+    return failures
+
+
+def print_report(report: Dict):
+    latency = report["latency_ms"]
+    print(f"📊 Replay report ({report['target']}, llm latency {report['llm_latency']})")
+    print("=" * 50)
+    print(f"Conversations:        {report['conversations']}")
+    print(f"Messages:             {report['messages']} ({report['errors']} errors)")
+    print(f"Throughput:           {report['throughput_msg_per_s']} msg/s")
+    print(f"Latency ms:           p50 {latency['p50']} | p90 {latency['p90']} | p95 {latency['p95']} | p99 {latency['p99']} | max {latency['max']}")
+    print(f"LLM calls/message:    {report['llm_calls_per_message']} {report['llm_calls_by_kind']}")
+    print(f"Extractions avoided:  {report['extractions_avoided_per_conversation']} per conversation")
+    print(f"DB statements/msg:    {report['db_statements_per_message']}")
+    print(f"DB connections/msg:   {report['db_connections_per_message']}")
+    print(f"DB context cache:     {report['context_cache_hit_ratio']:.0%} hits")
+    print(f"Graph API sends:      {report['graph_messages_sent']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay conversations against the ECLA bot with fake LLM and WhatsApp")
+    parser.add_argument("--target", choices=["bot", "webhook"], default="bot")
+    parser.add_argument("--transcripts", help="JSONL transcript file (default: bundled campus sample)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N synthetic conversations instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the transcripts N times with fresh phones")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--llm-latency", default="0", help="e.g. fixed:50, uniform:20:80, lognormal:4:0.5")
+    parser.add_argument("--graph-latency", default="0")
+    parser.add_argument("--json-out", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Baseline report JSON to gate against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slack for timing metrics")
+    parser.add_argument("--max-p95-ms", type=float)
+    parser.add_argument("--min-throughput", type=float)
+    parser.add_argument("--max-llm-calls-per-message", type=float)
+    parser.add_argument("--max-db-statements-per-message", type=float)
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        conversations = synthetic_transcripts(args.synthetic, args.seed)
+    else:
+        conversations = load_transcripts(args.transcripts or SAMPLE_TRANSCRIPTS)
+    if args.repeat > 1:
+        conversations = [
+            {"phone": f"{c['phone']}{r}", "messages": c["messages"]}
+            for r in range(args.repeat) for c in conversations
+        ]
+
+    report = run_replay(conversations, args.target, args.llm_latency, args.graph_latency, args.concurrency)
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = check_gate(report, baseline, args.tolerance, {
+        "max_p95_ms": args.max_p95_ms,
+        "min_throughput_msg_per_s": args.min_throughput,
+        "max_llm_calls_per_message": args.max_llm_calls_per_message,
+        "max_db_statements_per_message": args.max_db_statements_per_message,
+    })
+    if failures:
+        print("\n❌ Regression gate failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    if baseline or any(v is not None for v in (args.max_p95_ms, args.min_throughput,
+                                                args.max_llm_calls_per_message, args.max_db_statements_per_message)):
+        print("\n✅ Regression gate passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
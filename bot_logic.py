@@ -3,48 +3,20 @@ import re
 from datetime import datetime
 from typing import Dict, List, Tuple
 import random
+import campus
+import database
+import service_taxonomy
 
 class ECLABot:
     def __init__(self):
         self.conversation_states = {}  # Track user conversation state
-        self.db_path = 'ecla_bot.db'
+        self.db_path = database.DB_PATH
         self.user_names = {}  # Store user names for personalization
         self.init_db()
     
     def init_db(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Users table (service providers)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT UNIQUE NOT NULL,
-                services TEXT NOT NULL,
-                location TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Requests table (service seekers)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                service TEXT NOT NULL,
-                time TEXT NOT NULL,
-                location TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                matched_helper TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Apply schema migrations (shared with the GPT bot)"""
+        database.init_db(self.db_path)
     
     def get_user_state(self, phone: str) -> Dict:
         """Get current conversation state for a user"""
@@ -131,37 +103,9 @@ class ECLABot:
         return "UNKNOWN"
     
     def extract_service_from_message(self, message: str) -> str:
-        """Extract service type from message with expanded categories"""
-        message_lower = message.lower()
-        
-        services = {
-            'food_delivery': ['food', 'pick up', 'deliver', 'takeout', 'restaurant', 'kfc', 'mcdonalds', 'pizza', 'burger', 'coffee', 'lunch', 'dinner', 'breakfast'],
-            'errands': ['errand', 'pick up', 'get', 'bring', 'fetch', 'collect'],
-            'transport': ['transport', 'ride', 'car', 'drive', 'pickup', 'lift'],
-            'laundry': ['laundry', 'washing', 'clothes', 'wash', 'dry clean'],
-            'it': ['it', 'computer', 'tech', 'software', 'hardware', 'internet', 'coding', 'programming'],
-            'cleaning': ['cleaning', 'clean', 'housekeeping', 'tidy', 'organize'],
-            'cooking': ['cooking', 'meal', 'kitchen', 'cook', 'baking'],
-            'tutoring': ['tutor', 'study', 'homework', 'academic', 'teaching', 'math', 'science'],
-            'shopping': ['shopping', 'buy', 'purchase', 'grocery', 'store'],
-            'maintenance': ['maintenance', 'repair', 'fix', 'install'],
-            'design': ['design', 'graphic', 'art', 'creative', 'logo'],
-            'writing': ['writing', 'content', 'essay', 'resume', 'document'],
-            'moving': ['move', 'carry', 'lift', 'heavy', 'furniture'],
-            'photography': ['photo', 'photography', 'camera', 'picture'],
-            'music': ['music', 'instrument', 'guitar', 'piano', 'singing'],
-            'fitness': ['gym', 'workout', 'exercise', 'fitness', 'training'],
-            'beauty': ['hair', 'makeup', 'beauty', 'styling'],
-            'pet_care': ['pet', 'dog', 'cat', 'walk', 'feed'],
-            'gaming': ['game', 'gaming', 'esports', 'tournament'],
-            'language': ['language', 'translate', 'speak', 'conversation']
-        }
-        
-        for service, keywords in services.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return service
-        
-        return "general"
+        """Extract the canonical service key (see service_taxonomy.py) from a message"""
+        service = service_taxonomy.canonical(message)
+        return service.key if service else "general"
     
     def extract_time_from_message(self, message: str) -> str:
         """Extract time information from message"""
@@ -462,9 +406,9 @@ What would you like to do? 😊"""
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT OR REPLACE INTO users (phone, name, services, location)
-            VALUES (?, ?, ?, ?)
-        ''', (phone, name, services, location))
+            INSERT OR REPLACE INTO users (phone, name, services, location, service_mask)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (phone, name, services, location, service_taxonomy.service_mask(services)))
         
         conn.commit()
         conn.close()
@@ -475,26 +419,34 @@ What would you like to do? 😊"""
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO requests (phone, name, service, time, location)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (phone, name, service, time, location))
+            INSERT INTO requests (phone, name, service, time, location, service_mask)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (phone, name, service, time, location, service_taxonomy.service_mask(service)))
         
         conn.commit()
         conn.close()
     
     def find_matches(self, service: str, location: str) -> List[Dict]:
-        """Find matching helpers"""
+        """Find matching helpers, nearest to `location` first (see campus.py)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT name, services, location 
-            FROM users 
-            WHERE services LIKE ? AND location LIKE ?
-        ''', (f'%{service}%', f'%{location}%'))
+        mask = service_taxonomy.service_mask(service)
+        if mask:
+            cursor.execute('''
+                SELECT name, services, location 
+                FROM users 
+                WHERE service_mask & ? != 0
+            ''', (mask,))
+        else:
+            cursor.execute('''
+                SELECT name, services, location 
+                FROM users 
+                WHERE services LIKE ?
+            ''', (f'%{service}%',))
         
         matches = []
-        for row in cursor.fetchall():
+        for row in campus.by_proximity(location, cursor.fetchall(), location_of=lambda row: row[2]):
             matches.append({
                 'name': row[0],
                 'services': row[1],
@@ -0,0 +1,356 @@
+"""
+Bulk import / export of providers (`users`) and `requests` as CSV or JSONL.
+
+Everything streams: rows are read one at a time, normalized, and written
+in batched executemany transactions; exports iterate a cursor with
+fetchmany. Memory stays flat whether the file has 100 rows or 1M.
+
+Usage:
+    python bulk_io.py import users residence_floor_3.csv
+    python bulk_io.py import requests backlog.jsonl --batch 10000 --rejects bad_rows.jsonl
+    python bulk_io.py export users providers.jsonl
+    python bulk_io.py export requests - --format csv --status pending
+
+A running bot caches provider profiles and indexes pending requests in
+memory, so rows imported from the command line are only seen after it
+restarts. Imports done inside the bot's process pass
+`imported=bot.bulk_imported` instead, which refreshes both caches and
+re-matches pending requests against the imported providers.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+import database
+from availability import build_windows, encode_windows
+from profiles import parse_available_days, parse_pricing, parse_time_preference
+from service_taxonomy import service_mask
+
+DEFAULT_BATCH = 5000
+DEFAULT_COUNTRY_CODE = '33'  # ECLA is in France: national "06 12 34 56 78" numbers
+
+USER_COLUMNS = ['phone', 'name', 'services', 'location', 'availability', 'rating', 'total_services',
+                'available_days', 'availability_note', 'time_preference', 'pricing', 'price_min', 'price_max',
+                'availability_windows', 'service_mask']
+REQUEST_COLUMNS = ['id', 'phone', 'name', 'service', 'time', 'location', 'status', 'matched_helper',
+                   'price_offered', 'created_at', 'service_mask']
+
+_NON_DIGITS = re.compile(r'[\s().\-/]')
+
+
+class RowError(ValueError):
+    """A row that can't be imported (reported, not fatal)"""
+
+
+def normalize_phone(raw: str, country_code: str = DEFAULT_COUNTRY_CODE) -> str:
+    """E.164 ('+33612345678') from '06 12 34 56 78', '0033 6...', 'whatsapp:+33 6...' etc."""
+    phone = (raw or '').strip()
+    if phone.lower().startswith('whatsapp:'):
+        phone = phone[len('whatsapp:'):]
+    phone = _NON_DIGITS.sub('', phone)
+    if phone.startswith('00'):
+        phone = '+' + phone[2:]
+    elif phone.startswith('0'):
+        phone = '+' + country_code + phone[1:]
+    elif not phone.startswith('+'):
+        phone = '+' + phone
+    digits = phone[1:]
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        raise RowError(f"invalid phone number {raw!r}")
+    return phone
+
+
+def _text(row: Dict, key: str, required: bool = False) -> str:
+    value = row.get(key)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"missing {key}")
+    return value
+
+
+def _number(row: Dict, key: str, cast, default=None):
+    value = row.get(key)
+    if value is None or str(value).strip() == '':
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise RowError(f"invalid {key} {value!r}")
+
+
+# Imports repeat a handful of schedule and price phrasings ("Weekends only", "10-15€")
+# across thousands of rows, so the parsed forms are memoized.
+@lru_cache(maxsize=4096)
+def _schedule(days: str, note: str, time_text: str) -> Tuple[int, str, str]:
+    """(available_days bitmask, time_preference, encoded windows)"""
+    if not days:
+        available_days = parse_available_days(note)
+    elif days.isdigit():
+        available_days = int(days)
+    else:
+        available_days = parse_available_days(days)  # "Weekends", "Mon-Fri"
+    time_preference = parse_time_preference(time_text)
+    return available_days, time_preference, encode_windows(build_windows(available_days, time_preference, note))
+
+
+@lru_cache(maxsize=4096)
+def _pricing(pricing: str) -> Tuple[Optional[float], Optional[float]]:
+    return parse_pricing(pricing) if pricing else (None, None)
+
+
+def user_values(row: Dict, country_code: str = DEFAULT_COUNTRY_CODE) -> Tuple:
+    """Validated `users` column values (USER_COLUMNS order) from a CSV/JSONL row"""
+    availability_note = _text(row, 'availability_note') or _text(row, 'days')
+    available_days, time_preference, windows = _schedule(
+        _text(row, 'available_days'), availability_note, _text(row, 'time_preference'))
+    pricing = _text(row, 'pricing')
+    price_min, price_max = _pricing(pricing)
+    price_min = _number(row, 'price_min', float, price_min)
+    price_max = _number(row, 'price_max', float, price_max)
+    rating = _number(row, 'rating', float, 5.0)
+    if not 0 <= rating <= 5:
+        raise RowError(f"rating out of range {rating}")
+
+    services = _text(row, 'services', required=True)
+    return (
+        normalize_phone(_text(row, 'phone', required=True), country_code),
+        _text(row, 'name', required=True),
+        services,
+        _text(row, 'location') or 'Campus',
+        _text(row, 'availability') or 'available',
+        rating,
+        _number(row, 'total_services', int, 0),
+        available_days,
+        availability_note,
+        time_preference,
+        pricing,
+        price_min,
+        price_max,
+        windows,
+        service_mask(services),
+    )
+
+
+def request_values(row: Dict, country_code: str = DEFAULT_COUNTRY_CODE) -> Tuple:
+    """Validated `requests` column values (without id/created_at) from a CSV/JSONL row"""
+    service = _text(row, 'service', required=True)
+    return (
+        normalize_phone(_text(row, 'phone', required=True), country_code),
+        _text(row, 'name') or 'User',
+        service,
+        _text(row, 'time') or 'flexible',
+        _text(row, 'location') or 'campus',
+        _text(row, 'status') or 'pending',
+        _text(row, 'matched_helper') or None,
+        _number(row, 'price_offered', float),
+        service_mask(service),
+    )
+
+
+# Re-imports refresh the profile but keep ratings earned through the bot (as ProfileStore.save does)
+UPSERT_USER = f'''
+    INSERT INTO users ({', '.join(USER_COLUMNS)})
+    VALUES ({', '.join('?' * len(USER_COLUMNS))})
+    ON CONFLICT(phone) DO UPDATE SET
+        {', '.join(f'{c} = excluded.{c}' for c in USER_COLUMNS[1:] if c not in ('rating', 'total_services'))}
+'''
+INSERT_REQUEST = '''
+    INSERT INTO requests (phone, name, service, time, location, status, matched_helper, price_offered,
+                          service_mask)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+TABLES = {
+    'users': (user_values, UPSERT_USER, USER_COLUMNS),
+    'requests': (request_values, INSERT_REQUEST, REQUEST_COLUMNS),
+}
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError(f"can't tell the format of {path!r}; pass --format csv|jsonl")
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """(line number, row) pairs, one at a time; unparsable JSON lines yield a RowError"""
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), 2):
+            yield number, {key.strip().lower(): value for key, value in row.items() if key}
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, RowError(f"invalid JSON: {e.msg}")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("JSON line is not an object")
+
+
+class ImportStats:
+    """Counters for one import run"""
+
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def summary(self, action: str, table: str) -> str:
+        return (f"{action} {self.written:,} {table} rows in {self.seconds:.1f}s "
+                f"({self.rows_per_second:,.0f} rows/s), {self.rejected:,} rejected")
+
+
+def import_rows(db_path: str, table: str, rows: Iterable[Tuple[int, Dict]], batch_size: int = DEFAULT_BATCH,
+                country_code: str = DEFAULT_COUNTRY_CODE, rejects: Optional[TextIO] = None,
+                progress=None, imported=None) -> ImportStats:
+    """Validate, normalize and write rows in batched transactions
+
+    `imported(table, phones)` is called after each written batch with that batch's phone numbers.
+    """
+    to_values, sql, _ = TABLES[table]
+    stats = ImportStats()
+    database.init_db(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        batch = []
+        for number, row in rows:
+            stats.read += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                batch.append(to_values(row, country_code))
+            except RowError as e:
+                stats.rejected += 1
+                if rejects is not None:
+                    rejects.write(json.dumps({'line': number, 'error': str(e), 'row': row if isinstance(row, dict) else None}) + '\n')
+                continue
+            if len(batch) >= batch_size:
+                _write_batch(conn, sql, batch)
+                stats.written += len(batch)
+                if imported:
+                    imported(table, {values[0] for values in batch})
+                batch = []
+                if progress:
+                    progress(stats)
+        if batch:
+            _write_batch(conn, sql, batch)
+            stats.written += len(batch)
+            if imported:
+                imported(table, {values[0] for values in batch})
+    finally:
+        conn.close()
+    return stats
+
+
+def _write_batch(conn, sql: str, batch):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(sql, batch)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def export_rows(db_path: str, table: str, stream: TextIO, fmt: str, status: str = None,
+                batch_size: int = DEFAULT_BATCH) -> ImportStats:
+    """Stream a table out with fetchmany; never holds more than one batch"""
+    _, _, columns = TABLES[table]
+    stats = ImportStats()
+    database.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        params = ()
+        if status:
+            sql += " WHERE status = ?" if table == 'requests' else " WHERE availability = ?"
+            params = (status,)
+        cursor = conn.execute(sql, params)
+        writer = csv.writer(stream) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(columns)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if writer:
+                writer.writerows(rows)
+            else:
+                stream.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows)
+            stats.read += len(rows)
+            stats.written += len(rows)
+    finally:
+        conn.close()
+    return stats
+
+
+def _open(path: str, mode: str) -> TextIO:
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return io.TextIOWrapper(stream.buffer, encoding='utf-8', newline='') if hasattr(stream, 'buffer') else stream
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stream providers/requests in and out of the bot database")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path", help="CSV or JSONL file ('-' for stdin/stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--db", default=database.DB_PATH)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="rows per transaction")
+    parser.add_argument("--country-code", default=DEFAULT_COUNTRY_CODE, help="for national phone numbers")
+    parser.add_argument("--rejects", help="write rejected rows (with the reason) to this JSONL file")
+    parser.add_argument("--status", help="export only rows with this status/availability")
+    args = parser.parse_args(argv)
+
+    fmt = detect_format(args.path, args.format)
+    if args.action == "export":
+        with _open(args.path, "w") as stream:
+            stats = export_rows(args.db, args.table, stream, fmt, args.status, args.batch)
+        print(stats.summary("Exported", args.table), file=sys.stderr)
+        return 0
+
+    def progress(stats):
+        if stats.written % (args.batch * 20) == 0:
+            print(f"  {stats.written:,} rows ({stats.rows_per_second:,.0f} rows/s)", file=sys.stderr)
+
+    rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+    try:
+        with _open(args.path, "r") as stream:
+            stats = import_rows(args.db, args.table, read_rows(stream, fmt), args.batch,
+                                args.country_code, rejects, progress)
+    finally:
+        if rejects:
+            rejects.close()
+    print(stats.summary("Imported", args.table), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
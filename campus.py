@@ -0,0 +1,166 @@
+"""
+ECLA campus locations and proximity ranking.
+
+Locations used to be free text compared with `LIKE '%...%'`, so "Library"
+only matched providers who had typed exactly that, and the GPT bot ignored
+the seeker's location altogether. Now:
+- PLACES lists the campus's buildings and landmarks, with the floor they
+  are on and a rough position in metres on the campus plan (origin: the
+  Agora).
+- normalize_location maps free text ("résidence B, 3rd floor", "the
+  biblio", "Studio") to a canonical place id through an alias table, or
+  None when it names nowhere in particular ("campus").
+- DISTANCES is the walking-distance matrix between places, computed once
+  at import. Floors count as FLOOR_METRES each, and going between
+  buildings means going down to the ground floor first.
+- ProximityIndex turns the matrix into provider bitmaps per distance band
+  for the ranked provider list that AvailabilityIndex indexes. Ranking by
+  proximity is then one AND per band, with rating order kept inside each
+  band.
+"""
+
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+FLOOR_METRES = 5.0
+# Band limits in metres: same building / a short walk / further
+BANDS = (60.0, 250.0)
+# Providers whose location we can't place are treated as "somewhere on campus"
+UNKNOWN_DISTANCE = 150.0
+
+
+@dataclass(frozen=True, slots=True)
+class Place:
+    id: str
+    name: str
+    building: str
+    floor: int
+    x: float
+    y: float
+    aliases: Tuple[str, ...] = ()
+
+
+def _residence(letter: str, x: float, y: float) -> Place:
+    names = ('residence', 'building', 'batiment', 'bat', 'bloc', 'block', 'tower', 'tour')
+    return Place(f'residence_{letter}', f"Residence {letter.upper()}", f'residence_{letter}', 0, x, y,
+                 tuple(f'{name} {letter}' for name in names))
+
+
+PLACES: Tuple[Place, ...] = (
+    Place('agora', "The Agora", 'main', 0, 0, 0, ('agora',)),
+    Place('main_campus', "Main Campus", 'main', 0, 15, 0,
+          ('main campus', 'main building', 'batiment principal', 'reception', 'accueil', 'lobby', 'hall')),
+    Place('library', "Library", 'main', 1, 30, 10, ('library', 'bibliotheque', 'biblio')),
+    Place('coworking', "Coworking", 'main', 1, 35, 20,
+          ('coworking', 'co-working', 'study space', 'study spaces', 'study room', 'salle d etude')),
+    Place('computer_lab', "Computer Lab", 'main', 1, 45, 5,
+          ('computer lab', 'computer room', 'it room', 'salle informatique')),
+    Place('cafeteria', "Cafeteria", 'main', 0, -20, 10, ('cafeteria', 'canteen', 'cantine', 'restaurant', 'cafe')),
+    Place('kitchen', "Shared Kitchen", 'main', 0, -25, 20, ('shared kitchen', 'kitchen', 'cuisine')),
+    Place('cinebox', "Cinebox", 'main', -1, 5, -15, ('cinebox', 'cinema', 'movie room')),
+    Place('gym', "Gym", 'sports', 0, -60, -30, ('gym', 'fitness', 'salle de sport', 'sports hall')),
+    _residence('a', 90, 0),
+    _residence('b', 90, 60),
+    _residence('c', 150, 30),
+    Place('laundry_room', "Laundry Room", 'residence_a', -1, 95, 5, ('laundry room', 'laverie', 'buanderie')),
+    # Accommodation types are all in the residences
+    Place('student_housing', "Student Housing", 'residence', 0, 110, 30,
+          ('student housing', 'housing', 'residence', 'residences', 'dorm', 'dorms', 'dormitory', 'dortoir',
+           'logement', 'studio', 'mini studio', 'colocation', 'coloc', 'flatshare', 'hostel', 'cabane', 't2',
+           'apartment', 'appartement', 'my room', 'chambre')),
+    Place('parking_lot', "Parking Lot", 'outdoor', 0, 60, -80, ('parking lot', 'parking', 'car park', 'garage')),
+    Place('rer_station', "RER A Noisy-le-Grand-Mont d'Est", 'offsite', 0, 600, -400,
+          ('rer', 'station', 'gare', 'mont d est')),
+)
+
+PLACE_INDEX = {place.id: i for i, place in enumerate(PLACES)}
+
+
+def _fold(text: str) -> str:
+    """Lowercase, accents and punctuation stripped: "Résidence-B" -> 'residence b'"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+_ALIASES = {}
+for _place in PLACES:
+    for _alias in (_place.name, _place.id.replace('_', ' ')) + _place.aliases:
+        _ALIASES.setdefault(_fold(_alias), _place.id)
+# Longest alias first, so "residence b" wins over "residence" at the same position
+_ALIAS_RE = re.compile(r'\b(' + '|'.join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r')\b')
+
+
+@lru_cache(maxsize=4096)
+def normalize_location(text: str) -> Optional[str]:
+    """Canonical place id for free text, or None if it names no particular place"""
+    match = _ALIAS_RE.search(_fold(text))
+    return _ALIASES[match.group(1)] if match else None
+
+
+def _walk(a: Place, b: Place) -> float:
+    flat = math.hypot(a.x - b.x, a.y - b.y)
+    if a.building == b.building:
+        return flat + abs(a.floor - b.floor) * FLOOR_METRES
+    return flat + (abs(a.floor) + abs(b.floor)) * FLOOR_METRES
+
+
+DISTANCES: List[List[float]] = [[round(_walk(a, b), 1) for b in PLACES] for a in PLACES]
+
+
+def distance(a: str, b: str) -> Optional[float]:
+    """Walking metres between two place ids (None if either is unknown)"""
+    i, j = PLACE_INDEX.get(a), PLACE_INDEX.get(b)
+    return None if i is None or j is None else DISTANCES[i][j]
+
+
+def band(metres: float) -> int:
+    for number, limit in enumerate(BANDS):
+        if metres <= limit:
+            return number
+    return len(BANDS)
+
+
+def by_proximity(location: str, items: Iterable, location_of: Callable = lambda item: item) -> List:
+    """Sort items (stable) by distance from free-text `location`; unchanged order if it isn't a place"""
+    origin = PLACE_INDEX.get(normalize_location(location))
+    items = list(items)
+    if origin is None:
+        return items
+    row = DISTANCES[origin]
+
+    def metres(item):
+        place = PLACE_INDEX.get(normalize_location(location_of(item)))
+        return UNKNOWN_DISTANCE if place is None else row[place]
+    return sorted(items, key=metres)
+
+
+class ProximityIndex:
+    """Per-place, per-distance-band bitmaps over a ranked list of providers (bit i = i-th provider)"""
+
+    def __init__(self, providers: Sequence, location_of=lambda p: p.location):
+        self.providers = providers
+        place_bits = [0] * len(PLACES)
+        unknown_bits = 0
+        for position, provider in enumerate(providers):
+            place = PLACE_INDEX.get(normalize_location(location_of(provider)))
+            if place is None:
+                unknown_bits |= 1 << position
+            else:
+                place_bits[place] |= 1 << position
+
+        self._rings: List[List[int]] = []
+        for row in DISTANCES:
+            rings = [0] * (len(BANDS) + 1)
+            for place, metres in enumerate(row):
+                rings[band(metres)] |= place_bits[place]
+            rings[band(UNKNOWN_DISTANCE)] |= unknown_bits
+            self._rings.append(rings)
+
+    def rings(self, place_id: str) -> List[int]:
+        """Provider bitmaps from nearest band to furthest, as seen from a place"""
+        return self._rings[PLACE_INDEX[place_id]]
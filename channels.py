@@ -0,0 +1,122 @@
+"""
+Channel adapters: Twilio and Meta webhooks behind one /webhook endpoint.
+
+Twilio posts form-encoded fields and expects TwiML back. Meta's WhatsApp
+Business API posts JSON and expects the reply to be sent through the Graph
+API. Each adapter recognises its provider by content type, reads the
+request body exactly once, and yields InboundMessage records with the
+sender in E.164 form ('+33612345678'), so a user is the same session on
+either channel. A tapped button or list row also carries its choice id. main.py runs one pipeline over them: adapter_for ->
+parse -> bot.process_message -> respond.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+
+import twiml
+
+
+@dataclass(slots=True)
+class InboundMessage:
+    """A user's message, whatever channel it came from"""
+    channel: str
+    phone: str  # E.164
+    text: str
+    message_id: Optional[str] = None
+    choice_id: Optional[str] = None  # id of a tapped button / list row (see interactive.py)
+
+
+def e164(address: str) -> str:
+    """'whatsapp:+33612345678' (Twilio) or '33612345678' (Meta) -> '+33612345678'"""
+    address = (address or '').strip()
+    if address.startswith('whatsapp:'):
+        address = address[len('whatsapp:'):]
+    return address if not address or address.startswith('+') else '+' + address
+
+
+def to_graph_phone(address: str) -> str:
+    """Any stored or inbound address -> the Graph API's `to` form (digits, no '+')"""
+    return e164(address).lstrip('+')
+
+
+class TwilioAdapter:
+    """Form posts from Twilio's WhatsApp sandbox / sender; the reply is the TwiML response body"""
+    name = 'twilio'
+    content_types = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+    async def parse(self, request: Request) -> List[InboundMessage]:
+        form = await request.form()
+        text, sender = form.get("Body", ""), form.get("From", "")
+        if not text or not sender:
+            return []
+        return [InboundMessage(self.name, e164(sender), text, form.get("MessageSid"), form.get("ButtonPayload"))]
+
+    async def respond(self, inbound: List[InboundMessage], replies: List[str]):
+        if not replies:
+            return {"status": "received"}
+        return Response(twiml.render("\n\n".join(replies)), media_type=twiml.CONTENT_TYPE)
+
+
+class MetaAdapter:
+    """JSON callbacks from the WhatsApp Business API; replies go out through the Graph API"""
+    name = 'meta'
+    content_types = ('application/json',)
+
+    def __init__(self, whatsapp=None):
+        self._whatsapp = whatsapp
+
+    @property
+    def whatsapp(self):
+        if self._whatsapp is None:
+            from whatsapp_business_integration import WhatsAppBusinessAPI
+            self._whatsapp = WhatsAppBusinessAPI()
+        return self._whatsapp
+
+    @whatsapp.setter
+    def whatsapp(self, whatsapp):
+        self._whatsapp = whatsapp
+
+    async def parse(self, request: Request) -> List[InboundMessage]:
+        body = json.loads(await request.body() or b'{}')
+        return [InboundMessage(self.name, e164(message["from"]), message["text"], message.get("message_id"),
+                               message.get("choice_id"))
+                for message in self.whatsapp.parse_webhook(body) if message.get("text") and message.get("from")]
+
+    async def respond(self, inbound: List[InboundMessage], replies: List[str]):
+        sends = [self.whatsapp.send_reply(to_graph_phone(message.phone), reply)
+                 for message, reply in zip(inbound, replies) if reply]
+        # Meta retries callbacks that aren't answered 200, so a failed send is logged, not raised
+        for result in await asyncio.gather(*sends, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"WhatsApp reply error: {result!r}")
+        return {"status": "ok"}
+
+    def verify(self, params: Dict) -> Response:
+        """GET /webhook subscription handshake"""
+        mode, challenge, token = params.get("hub.mode"), params.get("hub.challenge"), params.get("hub.verify_token")
+        if mode and challenge and token and self.whatsapp.verify_webhook(mode, challenge, token):
+            return HTMLResponse(challenge)
+        return HTMLResponse("Forbidden", status_code=403)
+
+    async def aclose(self):
+        if self._whatsapp is not None and hasattr(self._whatsapp, 'aclose'):
+            await self._whatsapp.aclose()
+
+
+TWILIO = TwilioAdapter()
+META = MetaAdapter()
+ADAPTERS = [TWILIO, META]
+
+
+def adapter_for(content_type: str):
+    """The adapter for a request's Content-Type header, or None"""
+    media_type = (content_type or '').split(';', 1)[0].strip().lower()
+    for adapter in ADAPTERS:
+        if media_type in adapter.content_types:
+            return adapter
+    return None
@@ -0,0 +1,45 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+from gpt_bot_logic import GPTECLABot
+
+
+def unknown_intent(message, phone):
+    return {"intent": "UNKNOWN"}
+
+
+def greeting_or_unknown(message, phone):
+    if message.lower().startswith(("hi", "hey")):
+        return {"intent": "GREETING"}
+    return {"intent": "UNKNOWN"}
+
+
+def no_extraction(message, phone):
+    raise AssertionError(f"extraction for {message!r}")
+
+
+@pytest.fixture
+def make_bot(tmp_path):
+    """Factory for offline bots on a fresh database in tmp_path
+
+    make_bot(seed=True) loads the demo providers. `extraction(message, phone)`
+    replaces extract_info_with_gpt, and bot.extractions counts its calls;
+    without it the real method runs (offline, there is no API key).
+    """
+    def make(seed: bool = False, extraction=None) -> GPTECLABot:
+        bot = GPTECLABot(db_path=str(tmp_path / "bot.db"), seed_sample_data=seed)
+        bot.openai_api_key = None
+        if extraction is not None:
+            bot.extractions = 0
+
+            def counted(message, phone):
+                bot.extractions += 1
+                return extraction(message, phone)
+
+            bot.extract_info_with_gpt = counted
+        return bot
+
+    return make
@@ -0,0 +1,61 @@
+"""
+Per-phone cache of the pre-rendered database context used in GPT prompts.
+
+generate_response_with_gpt adds a line such as "User is registered as ...
+Recent requests: ..." to every prompt. Building it used to open a
+connection and run a query per generated reply. ContextCache keeps the
+rendered string per phone; the bot invalidates it whenever it writes a
+row that shows up in it (profile, requests, matches). Most replies
+therefore cost no database work. An empty context is cached as well,
+since that is the common case for new users.
+"""
+
+import threading
+from typing import Callable, Dict
+
+
+class ContextCache:
+    """phone -> rendered prompt context, invalidated on write (thread-safe)"""
+
+    def __init__(self, render: Callable[[str], str]):
+        self.render = render
+        self._lock = threading.Lock()
+        self._contexts: Dict[str, str] = {}
+        # Bumped on every invalidation, so a render racing a write isn't cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, phone: str) -> bool:
+        return phone in self._contexts
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def get(self, phone: str) -> str:
+        with self._lock:
+            context = self._contexts.get(phone)
+            if context is not None:
+                self.hits += 1
+                return context
+            self.misses += 1
+            generation = self._generation
+        context = self.render(phone)
+        with self._lock:
+            if generation == self._generation:
+                self._contexts[phone] = context
+        return context
+
+    def invalidate(self, *phones: str):
+        """Forget the context of these phones (all phones if none given)"""
+        with self._lock:
+            self._generation += 1
+            if not phones:
+                self._contexts.clear()
+            for phone in phones:
+                self._contexts.pop(phone, None)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
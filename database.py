@@ -0,0 +1,586 @@
+"""
+Shared SQLite setup for the ECLA bot.
+
+The schema is defined once, as ordered migrations tracked in a
+schema_version table. init_db() applies pending migrations once per
+database path per process, so the web app, the bots and scripts can all
+call it without repeating DDL.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+DB_PATH = os.getenv('ECLA_DB_PATH', 'ecla_bot.db')
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# Demo providers for development, loaded with bulk_io on first startup
+SAMPLE_PROVIDERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sample_providers.csv')
+
+
+def is_production() -> bool:
+    """True when running on a production deployment (ECLA_ENV=production)"""
+    return os.getenv('ECLA_ENV', 'development').lower() == 'production'
+
+
+def _add_missing_columns(cursor):
+    """Bring tables created by older code (main.py, bot_logic.py) up to the full schema"""
+    wanted = {
+        'users': [
+            ('availability', "TEXT DEFAULT 'available'"),
+            ('rating', 'REAL DEFAULT 5.0'),
+            ('total_services', 'INTEGER DEFAULT 0'),
+        ],
+        'requests': [
+            ('price_offered', 'REAL'),
+        ],
+    }
+    for table, columns in wanted.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+# Frozen copies of the parsers the data migrations below were written against.
+# Upgrading an old database must give the same rows whenever it happens, so
+# migrations never import the live parsers (profiles, availability,
+# service_taxonomy), which keep evolving. Don't edit these: if the live
+# parsing changes in a way stored data should follow, add a new migration.
+
+_V5_ALL_DAYS = 0b1111111
+_V5_WEEKDAYS = 0b0011111
+_V5_WEEKENDS = 0b1100000
+_V5_DAY_ALIASES = {name: index for index, names in enumerate([
+    ('monday', 'mon', 'lundi', 'lun'),
+    ('tuesday', 'tue', 'tues', 'mardi', 'mar'),
+    ('wednesday', 'wed', 'mercredi', 'mer'),
+    ('thursday', 'thu', 'thur', 'thurs', 'jeudi', 'jeu'),
+    ('friday', 'fri', 'vendredi', 'ven'),
+    ('saturday', 'sat', 'samedi', 'sam'),
+    ('sunday', 'sun', 'dimanche', 'dim'),
+]) for name in names}
+_V5_DAY_PATTERN = '|'.join(sorted(_V5_DAY_ALIASES, key=len, reverse=True))
+_V5_DAY_RANGE_RE = re.compile(
+    rf'\b({_V5_DAY_PATTERN})s?\b\s*(?:-|–|to|till|until|through|à|au)\s*\b({_V5_DAY_PATTERN})s?\b')
+_V5_DAY_RE = re.compile(rf'\b({_V5_DAY_PATTERN})s?\b')
+_V5_TIME_PREFERENCES = {
+    'morning': ['morning', 'matin', 'am', 'early'],
+    'afternoon': ['afternoon', 'après-midi', 'apres-midi', 'midday', 'lunch'],
+    'evening': ['evening', 'night', 'soir', 'soirée', 'tonight', 'pm', 'late'],
+}
+_V5_PRICE_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:€|eur|euros?)?(?:\s*(?:-|–|to|à)\s*(\d+(?:[.,]\d+)?))?')
+
+
+def _v5_available_days(text: str) -> int:
+    """profiles.parse_available_days as of migration 5"""
+    text = (text or '').lower()
+    if not text.strip() or any(word in text for word in ['every day', 'everyday', 'any day', 'daily', 'all week',
+                                                          'tous les jours', 'anytime', 'flexible']):
+        return _V5_ALL_DAYS
+    mask = 0
+    if 'weekend' in text or 'week-end' in text:
+        mask |= _V5_WEEKENDS
+    if 'weekday' in text or 'semaine' in text:
+        mask |= _V5_WEEKDAYS
+    for start, end in _V5_DAY_RANGE_RE.findall(text):
+        day, last = _V5_DAY_ALIASES[start], _V5_DAY_ALIASES[end]
+        while True:
+            mask |= 1 << day
+            if day == last:
+                break
+            day = (day + 1) % 7
+    for name in _V5_DAY_RE.findall(text):
+        mask |= 1 << _V5_DAY_ALIASES[name]
+    return mask or _V5_ALL_DAYS
+
+
+def _v5_time_preference(text: str) -> str:
+    """profiles.parse_time_preference as of migration 5"""
+    words = set(re.findall(r"[\w\-éè]+", (text or '').lower()))
+    found = [slot for slot, keywords in _V5_TIME_PREFERENCES.items() if words & set(keywords)]
+    if not found or len(found) == len(_V5_TIME_PREFERENCES):
+        return 'any'
+    return ','.join(found)
+
+
+def _v5_pricing(text: str):
+    """profiles.parse_pricing as of migration 5"""
+    text = (text or '').lower()
+    if any(word in text for word in ['free', 'gratuit', 'nothing', 'no charge']):
+        return 0.0, 0.0
+    match = _V5_PRICE_RE.search(text)
+    if not match:
+        return None, None
+    low = float(match.group(1).replace(',', '.'))
+    high = float(match.group(2).replace(',', '.')) if match.group(2) else low
+    return min(low, high), max(low, high)
+
+
+_V6_MINUTES_PER_DAY = 24 * 60
+_V6_TIME_SLOTS = {
+    'morning': (6 * 60, 12 * 60),
+    'afternoon': (12 * 60, 18 * 60),
+    'evening': (18 * 60, 24 * 60),
+    'any': (0, 24 * 60),
+}
+_V6_CLOCK_RE = re.compile(r'\b(\d{1,2})(?:[:h](\d{2}))?\s*(am|pm|h)?\b')
+_V6_RANGE_RE = re.compile(
+    r'\b(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\s*(?:-|–|to|à)\s*(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+_V6_AFTER_RE = re.compile(r'\b(?:after|from|après|dès|à partir de)\s+(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+_V6_BEFORE_RE = re.compile(r'\b(?:before|until|till|avant|jusqu\'à)\s+(\d{1,2}(?:[:h]\d{2})?\s*(?:am|pm|h)?)\b')
+
+
+def _v6_clock(text: str):
+    """availability.parse_clock(bare=True) as of migration 6"""
+    match = _V6_CLOCK_RE.search((text or '').lower())
+    if not match:
+        return None
+    hour, minute, suffix = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if suffix == 'pm' and hour < 12:
+        hour += 12
+    elif suffix == 'am' and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        return None
+    return min(hour * 60 + minute, _V6_MINUTES_PER_DAY)
+
+
+def _v6_daily_hours(text: str):
+    """availability.parse_daily_hours as of migration 6"""
+    text = (text or '').lower()
+    match = _V6_RANGE_RE.search(text)
+    if match:
+        start, end = _v6_clock(match.group(1)), _v6_clock(match.group(2))
+        if start is not None and end is not None and end > start:
+            return start, end
+    match = _V6_AFTER_RE.search(text)
+    if match and _v6_clock(match.group(1)) is not None:
+        return _v6_clock(match.group(1)), _V6_MINUTES_PER_DAY
+    match = _V6_BEFORE_RE.search(text)
+    if match and _v6_clock(match.group(1)) is not None:
+        return 0, _v6_clock(match.group(1))
+    return None
+
+
+def _v6_encoded_windows(available_days: int, time_preference: str, note: str = '') -> str:
+    """availability.encode_windows(build_windows(...)) as of migration 6"""
+    daily = _v6_daily_hours(note) or _v6_daily_hours(time_preference)
+    if daily:
+        slots = [daily]
+    else:
+        slots = [_V6_TIME_SLOTS[name] for name in (time_preference or 'any').split(',') if name in _V6_TIME_SLOTS]
+        slots = slots or [_V6_TIME_SLOTS['any']]
+    merged = []
+    for start, end in sorted((day * _V6_MINUTES_PER_DAY + start, day * _V6_MINUTES_PER_DAY + end)
+                             for day in range(7) if available_days & (1 << day) for start, end in slots):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return ';'.join(f'{start}-{end}' for start, end in merged)
+
+
+# service_taxonomy.SERVICES ids and synonyms as of migration 8
+_V8_SYNONYMS = {
+    1: ('translation', 'translation', 'translate', 'translator', 'interpreter', 'french', 'language', 'prefecture',
+        'paperwork', 'official documents', 'administrative', 'caf', 'visa', 'titre de sejour', 'traduction',
+        'traduire'),
+    2: ('transport', 'transport', 'transportation', 'car', 'car lending', 'lend a car', 'ride', 'lift', 'drive',
+        'driver', 'airport', 'airport pickup', 'taxi', 'voiture', 'covoiturage', 'aeroport'),
+    3: ('food delivery', 'food', 'food delivery', 'delivery', 'deliver', 'takeout', 'take away', 'restaurant', 'kfc',
+        'mcdonalds', 'mcdo', 'pizza', 'burger', 'lunch', 'dinner', 'breakfast', 'uber eats', 'deliveroo',
+        'livraison', 'repas'),
+    4: ('it support', 'it support', 'it help', 'tech', 'tech help', 'tech support', 'computer', 'laptop', 'wifi',
+        'internet', 'software', 'hardware', 'coding', 'programming', 'web design', 'website', 'informatique',
+        'ordinateur'),
+    5: ('laundry', 'laundry', 'washing', 'wash', 'clothes', 'ironing', 'dry clean', 'dry cleaning', 'lessive',
+        'linge', 'repassage'),
+    6: ('cleaning', 'cleaning', 'clean', 'housekeeping', 'tidy', 'menage', 'nettoyage'),
+    7: ('printing', 'print', 'printing', 'printer', 'printout', 'photocopy', 'scan', 'document help', 'impression',
+        'imprimer'),
+    8: ('shopping', 'shopping', 'shop', 'groceries', 'grocery', 'supermarket', 'buy', 'purchase', 'store', 'errand',
+        'cigarettes', 'cigs', 'tobacco', 'fetch', 'bring', 'pick up', 'achats', 'supermarche', 'tabac'),
+    9: ('cooking', 'cooking', 'cook', 'meal', 'baking', 'homemade', 'cuisine', 'cuisiner'),
+    10: ('tutoring', 'tutor', 'tutoring', 'study', 'study group', 'homework', 'academic', 'math', 'maths', 'science',
+         'exam', 'lesson', 'soutien scolaire', 'devoirs'),
+    11: ('maintenance', 'maintenance', 'repair', 'fix', 'install', 'plumbing', 'furniture assembly', 'bricolage',
+         'reparation'),
+    12: ('moving', 'moving', 'move', 'moving boxes', 'boxes', 'carry', 'heavy', 'furniture', 'demenagement'),
+    13: ('appointments', 'appointment', 'medical appointment', 'doctor', 'hospital', 'pharmacy', 'accompany',
+         'rendez vous', 'medecin', 'accompagner'),
+    14: ('design', 'design', 'graphic', 'graphic design', 'logo', 'creative'),
+    15: ('writing', 'writing', 'essay', 'resume', 'cv', 'cover letter', 'proofreading', 'redaction'),
+    16: ('photography', 'photo', 'photography', 'photographer', 'camera', 'picture'),
+    17: ('music', 'music', 'instrument', 'guitar', 'piano', 'singing', 'musique'),
+    18: ('fitness', 'gym', 'workout', 'exercise', 'fitness', 'training', 'sport', 'coach'),
+    19: ('beauty', 'hair', 'haircut', 'makeup', 'beauty', 'nails', 'coiffure'),
+    20: ('pet care', 'pet', 'pet sitting', 'dog', 'dog walking', 'cat', 'chien', 'chat'),
+    21: ('gaming', 'game', 'gaming', 'esports', 'video games'),
+}
+# As of migration 11: pet care no longer matches a bare 'chat' ("chat about my homework")
+_V11_SYNONYMS = {**_V8_SYNONYMS, 20: ('pet care', 'pet', 'pet sitting', 'dog', 'dog walking', 'cat', 'chien',
+                                      'garde de chat', 'garde d animaux')}
+_V8_WORD_RE = re.compile(r'[a-z0-9]+')
+_V8_DOUBLED = ('bb', 'dd', 'gg', 'mm', 'nn', 'pp', 'rr', 'tt')
+
+
+def _v8_words(text: str):
+    """service_taxonomy._words (folding + stem) as of migration 8"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    words = []
+    for word in _V8_WORD_RE.findall(text):
+        if len(word) > 5 and word.endswith('ing'):
+            word = word[:-3]
+            if word.endswith(_V8_DOUBLED):
+                word = word[:-1]
+        elif len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 4 and word.endswith('es'):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        if len(word) > 3 and word.endswith('e'):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def _v8_service_mask(text: str, phrases) -> int:
+    """service_taxonomy.service_mask as of migration 8 (`phrases` from _v8_phrases)"""
+    words = _v8_words(text)
+    mask = 0
+    for i in range(len(words)):
+        for n in range(1, min(3, len(words) - i) + 1):
+            mask |= phrases.get(' '.join(words[i:i + n]), 0)
+    return mask
+
+
+def _v8_phrases(taxonomy=_V8_SYNONYMS):
+    phrases = {}
+    for service_id, synonyms in taxonomy.items():
+        for synonym in synonyms:
+            phrase = ' '.join(_v8_words(synonym))
+            phrases[phrase] = phrases.get(phrase, 0) | 1 << service_id
+    return phrases
+
+
+def _merge_users_extended(cursor):
+    """Typed provider profile columns on users, absorbing users_extended rows"""
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(users)")}
+    for name, definition in [
+        ('available_days', 'INTEGER DEFAULT 127'),
+        ('availability_note', "TEXT DEFAULT ''"),
+        ('time_preference', "TEXT DEFAULT 'any'"),
+        ('pricing', "TEXT DEFAULT ''"),
+        ('price_min', 'REAL'),
+        ('price_max', 'REAL'),
+    ]:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE users ADD COLUMN {name} {definition}")
+
+    rows = cursor.execute('''
+        SELECT phone, name, services, location, availability, time_preference, pricing
+        FROM users_extended
+    ''').fetchall()
+    for phone, name, services, location, availability, time_preference, pricing in rows:
+        price_min, price_max = _v5_pricing(pricing)
+        cursor.execute('''
+            INSERT INTO users (phone, name, services, location, available_days, availability_note,
+                               time_preference, pricing, price_min, price_max)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(phone) DO UPDATE SET
+                name = COALESCE(NULLIF(users.name, ''), excluded.name),
+                services = COALESCE(NULLIF(users.services, ''), excluded.services),
+                location = COALESCE(NULLIF(users.location, ''), excluded.location),
+                available_days = excluded.available_days,
+                availability_note = excluded.availability_note,
+                time_preference = excluded.time_preference,
+                pricing = excluded.pricing,
+                price_min = excluded.price_min,
+                price_max = excluded.price_max
+        ''', (phone, name or '', services or '', location or '', _v5_available_days(availability),
+              availability or '', _v5_time_preference(time_preference), pricing or '', price_min, price_max))
+    cursor.execute("DROP TABLE users_extended")
+
+
+def _add_availability_windows(cursor):
+    """Parsed weekly availability windows per provider"""
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(users)")}
+    if 'availability_windows' not in existing:
+        cursor.execute("ALTER TABLE users ADD COLUMN availability_windows TEXT DEFAULT ''")
+    rows = cursor.execute(
+        "SELECT phone, available_days, time_preference, availability_note FROM users"
+    ).fetchall()
+    cursor.executemany(
+        "UPDATE users SET availability_windows = ? WHERE phone = ?",
+        [(_v6_encoded_windows(days if days is not None else 127, preference or 'any', note or ''), phone)
+         for phone, days, preference, note in rows]
+    )
+
+
+def _add_service_masks(cursor):
+    """Canonical service ids (service_taxonomy bitmask) for providers' offerings and requests"""
+    phrases = _v8_phrases()
+    for table, column in (('users', 'services'), ('requests', 'service')):
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if 'service_mask' not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN service_mask INTEGER NOT NULL DEFAULT 0")
+        rows = cursor.execute(f"SELECT rowid, {column} FROM {table}").fetchall()
+        cursor.executemany(f"UPDATE {table} SET service_mask = ? WHERE rowid = ?",
+                           [(_v8_service_mask(text or '', phrases), rowid) for rowid, text in rows])
+
+
+def _recompute_service_masks(cursor):
+    """Stored service masks recomputed with the migration 11 synonyms"""
+    phrases = _v8_phrases(_V11_SYNONYMS)
+    for table, column in (('users', 'services'), ('requests', 'service')):
+        rows = cursor.execute(f"SELECT rowid, {column} FROM {table}").fetchall()
+        cursor.executemany(f"UPDATE {table} SET service_mask = ? WHERE rowid = ?",
+                           [(_v8_service_mask(text or '', phrases), rowid) for rowid, text in rows])
+
+
+def _e164(address: str) -> str:
+    """Frozen copy of channels.e164: 'whatsapp:+33612345678' / '33612345678' -> '+33612345678'"""
+    address = (address or '').strip()
+    if address.startswith('whatsapp:'):
+        address = address[len('whatsapp:'):]
+    return address if not address or address.startswith('+') else '+' + address
+
+
+def _normalize_phones(cursor):
+    """Re-key rows stored with Twilio's 'whatsapp:+33...' address (or Meta's bare digits) as E.164"""
+    rows = cursor.execute(
+        "SELECT rowid, phone, name, services, location, rating, total_services FROM users"
+    ).fetchall()
+    for user_id, phone, name, services, location, rating, total in rows:
+        normalized = _e164(phone)
+        if normalized == phone:
+            continue
+        existing = cursor.execute(
+            "SELECT rowid, rating, total_services FROM users WHERE phone = ?", (normalized,)
+        ).fetchone()
+        if existing is None:
+            cursor.execute("UPDATE users SET phone = ? WHERE rowid = ?", (normalized, user_id))
+            continue
+        # Registered again since the switch: keep the newer profile, fold in the old rating history
+        other_id, other_rating, other_total = existing
+        total, other_total = total or 0, other_total or 0
+        if total + other_total:
+            combined = ((rating or 0) * total + (other_rating or 0) * other_total) / (total + other_total)
+        else:
+            combined = other_rating
+        cursor.execute('''
+            UPDATE users SET rating = ?, total_services = ?,
+                name = COALESCE(NULLIF(name, ''), ?),
+                services = COALESCE(NULLIF(services, ''), ?),
+                location = COALESCE(NULLIF(location, ''), ?)
+            WHERE rowid = ?
+        ''', (combined, total + other_total, name, services, location, other_id))
+        cursor.execute("DELETE FROM users WHERE rowid = ?", (user_id,))
+
+    for table, column in (('requests', 'phone'), ('requests', 'matched_helper'),
+                          ('matches', 'seeker_phone'), ('matches', 'provider_phone')):
+        rows = cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL").fetchall()
+        cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE {column} = ?",
+                           [(_e164(value), value) for value, in rows if _e164(value) != value])
+
+
+def _add_outbound_recipients(cursor):
+    """Recipient column on queued messages, so the worker can keep each recipient's messages in order"""
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(outbound_messages)")}
+    if 'recipient' not in existing:
+        cursor.execute("ALTER TABLE outbound_messages ADD COLUMN recipient TEXT")
+    rows = cursor.execute("SELECT id, payload FROM outbound_messages").fetchall()
+    cursor.executemany("UPDATE outbound_messages SET recipient = ? WHERE id = ?",
+                       [(json.loads(payload).get('to'), row_id) for row_id, payload in rows])
+    # The claim query's "nothing older still pending for this recipient" check
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbound_recipient "
+                   "ON outbound_messages (phone_number_id, recipient, id)")
+
+
+# Ordered schema migrations: (version, description, SQL statements or a callable taking a cursor).
+# Every step must be safe on databases created before versioning existed.
+MIGRATIONS = [
+    (1, "Base users, requests and matches tables", [
+        # Users table (service providers)
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT UNIQUE NOT NULL,
+            services TEXT NOT NULL,
+            location TEXT NOT NULL,
+            availability TEXT DEFAULT 'available',
+            rating REAL DEFAULT 5.0,
+            total_services INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Requests table (service seekers)
+        '''
+        CREATE TABLE IF NOT EXISTS requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            service TEXT NOT NULL,
+            time TEXT NOT NULL,
+            location TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            matched_helper TEXT,
+            price_offered REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Matches table (for tracking successful connections)
+        '''
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER,
+            seeker_phone TEXT NOT NULL,
+            provider_phone TEXT NOT NULL,
+            service TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            price REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            rating INTEGER
+        )
+        ''',
+    ]),
+    (2, "Columns missing from pre-GPT users and requests tables", _add_missing_columns),
+    (3, "Extended provider profiles", [
+        '''
+        CREATE TABLE IF NOT EXISTS users_extended (
+            phone TEXT PRIMARY KEY,
+            name TEXT,
+            services TEXT,
+            location TEXT,
+            availability TEXT,
+            time_preference TEXT,
+            pricing TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (4, "Indexes for the hot queries", [
+        # find_matches: available providers by rating, stops after LIMIT rows
+        "CREATE INDEX IF NOT EXISTS idx_users_availability_rating ON users (availability, rating DESC, total_services DESC)",
+        # get_database_context / check_user_status: a user's latest requests
+        "CREATE INDEX IF NOT EXISTS idx_requests_phone_created ON requests (phone, created_at)",
+        # /api/stats and pending request lookups
+        "CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status)",
+        "CREATE INDEX IF NOT EXISTS idx_matches_provider ON matches (provider_phone, status)",
+        "CREATE INDEX IF NOT EXISTS idx_matches_seeker ON matches (seeker_phone)",
+    ]),
+    (5, "Single provider profile table (users_extended merged into users)", _merge_users_extended),
+    (6, "Structured availability windows", _add_availability_windows),
+    (7, "Persistent outbound WhatsApp queue", [
+        '''
+        CREATE TABLE IF NOT EXISTS outbound_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_number_id TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            message_id TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )
+        ''',
+        # The worker's claim query: due messages in order
+        "CREATE INDEX IF NOT EXISTS idx_outbound_due ON outbound_messages (status, next_attempt_at)",
+    ]),
+    (8, "Service taxonomy ids on providers and requests", _add_service_masks),
+    (9, "E.164 phone numbers for Twilio and Meta senders", _normalize_phones),
+    (10, "Recipient of each outbound message", _add_outbound_recipients),
+    (11, "Service masks without the bare 'chat' pet-care synonym", _recompute_service_masks),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """Current schema version, 0 for an unversioned database"""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(db_path: str = None) -> int:
+    """Apply pending migrations in order and return the resulting version"""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    # Explicit transactions so each migration (DDL included) applies atomically
+    conn.isolation_level = None
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        for version, description, steps in MIGRATIONS:
+            if version <= get_schema_version(conn):
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have migrated while we waited for the lock
+                if version <= get_schema_version(conn):
+                    conn.execute("ROLLBACK")
+                    continue
+                cursor = conn.cursor()
+                if callable(steps):
+                    steps(cursor)
+                else:
+                    for statement in steps:
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return get_schema_version(conn)
+    finally:
+        conn.close()
+
+
+def init_db(db_path: str = None):
+    """Run schema migrations once per process for the given database"""
+    db_path = db_path or DB_PATH
+    key = os.path.abspath(db_path)
+    if key in _initialized_paths:
+        return
+
+    with _init_lock:
+        if key not in _initialized_paths:
+            migrate(db_path)
+            _initialized_paths.add(key)
+
+
+def seed_sample_providers(db_path: str = None):
+    """Import the demo providers into an empty database (development only, skipped in production)"""
+    if is_production():
+        return
+
+    db_path = db_path or DB_PATH
+    conn = sqlite3.connect(db_path)
+    has_users = conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None
+    conn.close()
+    if has_users:
+        return
+
+    # Imported here: bulk_io depends on this module
+    import bulk_io
+    with open(SAMPLE_PROVIDERS_CSV, encoding='utf-8', newline='') as stream:
+        bulk_io.import_rows(db_path, 'users', bulk_io.read_rows(stream, 'csv'))
@@ -2,117 +2,232 @@ import sqlite3
 import re
 import json
 from datetime import datetime
-from typing import Dict, List, Tuple
-import openai
+from typing import Dict, Iterable, List, Optional, Tuple
 import os
+import threading
+import time
+from dataclasses import replace
 from dotenv import load_dotenv
+import database
+from profiles import ProfileStore, ProviderProfile, service_terms
+from availability import availability_label, campus_now, is_available_at, is_urgent, parse_request_time
+from pending_matches import PendingMatches
+from request_index import PendingRequestIndex
+from scheduler import ExpiryScheduler
+from context_cache import ContextCache
+from history import HistoryStore, Turn, compact_summary
+from models import ActiveRequest, MatchCandidate, PendingMatch, SessionState
+import campus
+import interactive
+import language_detection
+import messages
+import pricing
+import service_taxonomy
+import state_machine
 
 load_dotenv()
 
 class GPTECLABot:
-    def __init__(self):
+    CASCADE_DEPTH = 10  # ranked candidates kept per request for decline/timeout fallbacks
+    BROADCAST_SIZE = 5  # providers asked at once for urgent requests
+    # Seconds before in-memory state (and unanswered `requests` rows) are dropped
+    TTLS = {
+        'conversation': 30 * 60,
+        'active_request': 15 * 60,
+        'pending_match': 30 * 60,
+        'history': 6 * 60 * 60,
+        'request_row': 24 * 60 * 60,
+    }
+    REMIND_BEFORE = 5 * 60  # nudge users this long before their session or options expire
+    
+    def __init__(self, db_path: str = None, seed_sample_data: bool = None, ttls: Dict = None):
         self.conversation_states = {}  # Track user conversation state
-        self.db_path = 'ecla_bot.db'
+        self.db_path = db_path or database.DB_PATH
+        self.seed_sample_data = not database.is_production() if seed_sample_data is None else seed_sample_data
         self.user_names = {}  # Store user names for personalization
-        self.conversation_history = {}  # Store conversation history for context
-        self.pending_matches = {}  # Track pending match confirmations
+        self.history = HistoryStore(summarizer=self.summarize_history)  # Rolling summary + recent turns per phone
+        self.llm_stats = {'extractions': 0, 'extractions_avoided': 0}  # process_message extraction calls made/skipped
+        self.db_context = ContextCache(self.render_database_context)  # Prompt context per phone, dropped on write
+        self.ttls = {**self.TTLS, **(ttls or {})}
+        self.pending_matches = PendingMatches(self.ttls['pending_match'])  # Pending confirmations, indexed by provider phone
         self.active_requests = {}  # Track active service requests
+        self.deferred_offers = {}  # Declined matches whose seeker couldn't be messaged, shown on their next message
+        self.orchestrator = None  # MatchOrchestrator, attached by the web app when WhatsApp is configured
+        self.broadcasts = {}  # Open urgent requests sent to several providers at once
+        self._claim_lock = threading.Lock()  # Serializes first-accept-wins for broadcasts
+        self.profiles = ProfileStore(self.db_path)  # Cached provider profiles
+        self.pricing = pricing.PricingEngine()  # Per-provider rates, memoized until their profile changes
+        self.new_providers = set()  # Registered since pending requests were last re-matched
+        self.request_index = PendingRequestIndex()  # Pending `requests` rows, for reverse matching
+        self.scheduler = ExpiryScheduler()  # Expires the state above; ticked by the web app
+        self.setup_expiry()
         self.init_db()
+        self.load_pending_requests()
         
-        # Initialize OpenAI
-        openai.api_key = os.getenv('OPENAI_API_KEY')
+        # OpenAI client is created lazily by get_openai_client()
+        self.openai_api_key = os.getenv('OPENAI_API_KEY')
+        self._openai_client = None
         
     def init_db(self):
-        """Initialize database tables"""
+        """Apply schema migrations and load demo data"""
+        database.init_db(self.db_path)
+        if self.seed_sample_data:
+            database.seed_sample_providers(self.db_path)
+    
+    def get_openai_client(self):
+        """Create the OpenAI client on first use and reuse it afterwards"""
+        if self._openai_client is None:
+            # Imported lazily: openai is the heaviest import and not needed at startup
+            import openai
+            self._openai_client = openai.OpenAI(api_key=self.openai_api_key)
+        return self._openai_client
+    
+    def warm_up(self):
+        """Pre-load the OpenAI client so the first message doesn't pay for the import"""
+        try:
+            self.get_openai_client()
+        except Exception as e:
+            print(f"OpenAI warm-up skipped: {e}")
+    
+    def setup_expiry(self):
+        """Register TTLs, reminders and periodic jobs with the scheduler"""
+        self.scheduler.register('conversation', self.ttls['conversation'], self.expire_conversation,
+                                self.REMIND_BEFORE, self.remind_conversation)
+        self.scheduler.register('active_request', self.ttls['active_request'], self.expire_active_request,
+                                self.REMIND_BEFORE, self.remind_active_request)
+        self.scheduler.register('history', self.ttls['history'], self.expire_history)
+        self.scheduler.register('deferred_offer', self.ttls['active_request'],
+                                lambda phone: self.deferred_offers.pop(phone, None))
+        self.scheduler.every(1, self.pending_matches.purge_expired)
+        self.scheduler.every(1, self.rematch_pending_requests)
+        self.scheduler.every(60, self.expire_stale_requests)
+    
+    def notify(self, phone: str, text: str) -> bool:
+        """Message a user outside of a reply (needs the WhatsApp Business API)"""
+        if not self.orchestrator:
+            return False
+        self.orchestrator.notify(phone, text)
+        return True
+    
+    def remind_conversation(self, phone: str):
+        state = self.conversation_states.get(phone)
+        if state and state.state != 'idle':
+            self.notify(phone, self.say(phone, 'still_there'))
+    
+    def expire_conversation(self, phone: str):
+        state = self.conversation_states.pop(phone, None)
+        if state and state.state != 'idle':
+            self.notify(phone, messages.render('conversation_expired', state.language))
+    
+    def remind_active_request(self, phone: str):
+        request = self.active_requests.get(phone)
+        if request:
+            self.notify(phone, self.say(phone, 'options_waiting', service=request.service))
+    
+    def expire_active_request(self, phone: str):
+        request = self.active_requests.pop(phone, None)
+        if request is None:
+            return
+        if self.get_user_state(phone).state == 'choosing_provider':
+            self.set_user_state(phone, 'idle')
+        self.notify(phone, self.say(phone, 'active_request_expired', service=request.service))
+    
+    def expire_history(self, phone: str):
+        self.history.pop(phone)
+        self.db_context.invalidate(phone)
+    
+    def load_pending_requests(self, phones: Iterable[str] = None):
+        """Index every pending `requests` row once (or just `phones`' rows); later changes are applied incrementally"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        sql = "SELECT id, phone, service, time, location, created_at, service_mask FROM requests WHERE status = 'pending'"
+        if phones is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(sql + " AND phone IN (SELECT value FROM json_each(?))", (json.dumps(list(phones)),))
+        # Already indexed rows keep their notified providers (this also runs after bulk imports)
+        self.request_index.load(row for row in cursor.fetchall() if row[0] not in self.request_index)
+        conn.close()
+    
+    def bulk_imported(self, table: str, phones: Iterable[str]):
+        """Catch up with one chunk of rows bulk_io.import_rows wrote behind the caches' back"""
+        phones = set(phones)
+        self.db_context.invalidate(*phones)
+        if table == 'requests':
+            self.load_pending_requests(phones)
+            return
+        self.profiles.invalidate()
+        self.new_providers.update(phones)
+        self.rematch_pending_requests()
+    
+    def expire_stale_requests(self) -> int:
+        """Close `requests` rows nobody matched within the request_row TTL"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        # Users table (service providers)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT UNIQUE NOT NULL,
-                services TEXT NOT NULL,
-                location TEXT NOT NULL,
-                availability TEXT DEFAULT 'available',
-                rating REAL DEFAULT 5.0,
-                total_services INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Requests table (service seekers)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                service TEXT NOT NULL,
-                time TEXT NOT NULL,
-                location TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                matched_helper TEXT,
-                price_offered REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Matches table (for tracking successful connections)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER,
-                seeker_phone TEXT NOT NULL,
-                provider_phone TEXT NOT NULL,
-                service TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                price REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                rating INTEGER
-            )
-        ''')
-        
-        # Add sample service providers
-        sample_providers = [
-            ("Marie", "+33123456789", "French-English translation, prefecture assistance", "Main Campus", "available", 5.0, 12),
-            ("Pierre", "+33987654321", "English-French translation, official documents", "Student Housing", "available", 4.8, 8),
-            ("Sophie", "+33555555555", "Translation services, medical appointments", "Library", "available", 4.9, 15),
-            ("Alex", "+33666666666", "IT support, web design, tech help", "Computer Lab", "available", 4.7, 6),
-            ("Sarah", "+33777777777", "Food delivery, grocery shopping, KFC delivery", "Cafeteria", "available", 4.6, 10),
-            ("Mike", "+33888888888", "Car lending, airport pickup, transportation", "Parking Lot", "available", 4.5, 5),
-            ("Emma", "+33999999999", "Laundry help, cleaning services", "Dormitory", "available", 4.8, 7),
-            ("David", "+33000000000", "Printing papers, document help", "Library", "available", 4.7, 9)
-        ]
-        
-        for name, phone, services, location, availability, rating, total_services in sample_providers:
-            cursor.execute('''
-                INSERT OR IGNORE INTO users (name, phone, services, location, availability, rating, total_services)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (name, phone, services, location, availability, rating, total_services))
-        
+            UPDATE requests SET status = 'expired'
+            WHERE status = 'pending' AND created_at < datetime('now', ?)
+            RETURNING id, phone
+        ''', (f"-{int(self.ttls['request_row'])} seconds",))
+        expired = cursor.fetchall()
         conn.commit()
         conn.close()
+        for request_id, _ in expired:
+            self.request_index.remove(request_id)
+        if expired:
+            self.db_context.invalidate(*{phone for _, phone in expired})
+        return len(expired)
+    
+    def rematch_pending_requests(self) -> int:
+        """Tell seekers with pending requests about providers who just registered or changed availability"""
+        if not self.new_providers:
+            return 0
+        new_providers, self.new_providers = self.new_providers, set()
+        
+        notified = 0
+        for provider_phone in new_providers:
+            profile = self.profiles.get(provider_phone)
+            if profile is None:
+                continue
+            # Reverse index lookup: only the pending requests this provider can serve
+            for request in self.request_index.affected(profile):
+                language = request['language'] or self.get_user_state(request['phone']).language
+                if not self.notify(request['phone'], messages.render('provider_available', language,
+                                                                     name=profile.name, service=request['service'])):
+                    # No outbound channel yet: nothing is marked, so a later tick tries again
+                    self.new_providers.add(provider_phone)
+                    break
+                self.request_index.mark_notified(request['id'], provider_phone)
+                notified += 1
+        return notified
     
-    def get_conversation_history(self, phone: str) -> List[Dict]:
-        """Get conversation history for context"""
-        return self.conversation_history.get(phone, [])
+    def get_conversation_history(self, phone: str) -> List[Turn]:
+        """Recent turns for context (older ones live in the summary)"""
+        return self.history.recent(phone)
     
     def add_to_history(self, phone: str, role: str, content: str):
         """Add message to conversation history"""
-        if phone not in self.conversation_history:
-            self.conversation_history[phone] = []
-        
-        self.conversation_history[phone].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Keep only last 10 messages for context
-        if len(self.conversation_history[phone]) > 10:
-            self.conversation_history[phone] = self.conversation_history[phone][-10:]
+        self.history.add(phone, role, content)
+        self.scheduler.touch('history', phone)
+    
+    def summarize_history(self, previous: str, turns: List[Turn]) -> str:
+        """Fold aged-out turns into the running summary (runs on the history worker thread)"""
+        if not self.openai_api_key:
+            return compact_summary(previous, turns)
+        transcript = "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+        client = self.get_openai_client()
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": "Summarize this WhatsApp conversation between a student and the ECLA service "
+                                              "bot, updating the summary so far. Keep names, services, times, locations, "
+                                              "prices and open requests. At most 3 sentences."},
+                {"role": "user", "content": f"Summary so far: {previous or '(none)'}\n\nNew messages:\n{transcript}"}
+            ],
+            max_tokens=120,
+            temperature=0.1
+        )
+        return response.choices[0].message.content.strip()
     
     def create_system_prompt(self) -> str:
         """Create system prompt for GPT with real ECLA campus knowledge"""
@@ -226,9 +341,10 @@ Keep responses friendly, helpful, and community-focused. Use emojis and natural
         try:
             # Get conversation history for context
             history = self.get_conversation_history(phone)
+            summary = self.history.summary(phone)
             
-            # Create messages for GPT
-            messages = [
+            # Create the prompt for GPT
+            prompt = [
                 {"role": "system", "content": """Extract key information from this message. Consider translation services (French-English, prefecture help) and ECLA campus locations. 
 
 IMPORTANT INTENT CLASSIFICATION:
@@ -259,13 +375,15 @@ Return JSON with: intent (REQUEST_HELP/OFFER_HELP/REGISTER/GREETING/THANKS/GENER
             
             # Add recent conversation context
             if history:
-                context = "Recent conversation:\n" + "\n".join([f"{msg['role']}: {msg['content']}" for msg in history[-3:]])
-                messages.insert(1, {"role": "user", "content": context})
+                context = "Recent conversation:\n" + "\n".join([f"{turn.role}: {turn.content}" for turn in history[-3:]])
+                if summary:
+                    context = f"Earlier: {summary}\n{context}"
+                prompt.insert(1, {"role": "user", "content": context})
             
-            client = openai.OpenAI(api_key=openai.api_key)
+            client = self.get_openai_client()
             response = client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=messages,
+                messages=prompt,
                 max_tokens=150,
                 temperature=0.1
             )
@@ -294,15 +412,12 @@ Return JSON with: intent (REQUEST_HELP/OFFER_HELP/REGISTER/GREETING/THANKS/GENER
                 "confidence": 0.5
             }
     
-    def generate_response_with_gpt(self, message: str, phone: str, extracted_info: Dict, user_state: Dict) -> str:
+    def generate_response_with_gpt(self, message: str, phone: str, extracted_info: Dict, user_state: SessionState) -> str:
         """Use GPT to generate natural response"""
         try:
-            # Get conversation history
-            history = self.get_conversation_history(phone)
-            
             # Create context for GPT
             context = f"""
-Current user state: {user_state.get('state', 'idle')}
+Current user state: {user_state.state}
 Extracted info: {extracted_info}
 User message: {message}
 """
@@ -312,21 +427,18 @@ User message: {message}
             if db_context:
                 context += f"\nDatabase context: {db_context}"
             
-            messages = [
+            prompt = [
                 {"role": "system", "content": self.create_system_prompt()},
                 {"role": "user", "content": f"{context}\n\nGenerate a concise, helpful response focused on service matching. Be friendly but brief. Keep it under 100 words."}
             ]
             
-            # Add recent conversation for context
-            if history:
-                recent_messages = history[-5:]  # Last 5 messages
-                for msg in recent_messages:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
+            # Add the summary of older turns and the last few messages for context
+            prompt.extend(self.history.context_messages(phone, limit=4))
             
-            client = openai.OpenAI(api_key=openai.api_key)
+            client = self.get_openai_client()
             response = client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=messages,
+                messages=prompt,
                 max_tokens=200,
                 temperature=0.7
             )
@@ -338,57 +450,108 @@ User message: {message}
             return "I'm having trouble understanding right now. Could you try rephrasing that?"
     
     def get_database_context(self, phone: str) -> str:
-        """Get relevant database information for context"""
+        """Get relevant database information for context (cached until this phone's rows change)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Check if user is registered
-            cursor.execute("SELECT name, services, location FROM users WHERE phone = ?", (phone,))
-            user = cursor.fetchone()
-            
-            # Check recent requests
-            cursor.execute("SELECT service, time, location, status FROM requests WHERE phone = ? ORDER BY created_at DESC LIMIT 3", (phone,))
-            requests = cursor.fetchall()
-            
-            conn.close()
-            
-            context = ""
-            if user:
-                context += f"User is registered as {user[0]} offering {user[1]} at {user[2]}. "
-            
-            if requests:
-                context += f"Recent requests: {', '.join([f'{r[0]} at {r[2]} ({r[3]})' for r in requests])}. "
-            
-            return context
-            
+            return self.db_context.get(phone)
         except Exception as e:
             print(f"Database context error: {e}")
             return ""
     
-    def process_message(self, phone: str, message: str) -> str:
-        """Main message processing with GPT"""
+    def render_database_context(self, phone: str) -> str:
+        """Build the context line from the profile cache and the latest requests"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # Check if user is registered (served from the profile cache)
+        user = self.profiles.get(phone)
+        
+        # Check recent requests
+        cursor.execute("SELECT service, time, location, status FROM requests WHERE phone = ? ORDER BY created_at DESC LIMIT 3", (phone,))
+        requests = cursor.fetchall()
+        
+        conn.close()
+        
+        context = ""
+        if user:
+            context += f"User is registered as {user.name} offering {user.services} at {user.location}. "
+        
+        if requests:
+            context += f"Recent requests: {', '.join([f'{r[0]} at {r[2]} ({r[3]})' for r in requests])}. "
+        
+        return context
+    
+    def process_message(self, phone: str, message: str, choice_id: str = None) -> str:
+        """Main message processing with GPT (`choice_id`: the button / list row the user tapped, if any)"""
         # Add user message to history
         self.add_to_history(phone, "user", message)
         
+        # A provider declined while we couldn't message this seeker: answer with the alternatives first
+        declined = self.deferred_offers.pop(phone, None)
+        if declined is not None:
+            self.scheduler.forget('deferred_offer', phone)
+            response = self.offer_alternatives(declined)
+            self.add_to_history(phone, "assistant", response)
+            return response
+        
+        # A tapped button goes straight to its handler; stale ones are treated as text
+        if choice_id:
+            response = self.handle_choice(phone, choice_id)
+            if response is not None:
+                self.llm_stats['extractions_avoided'] += 1
+                self.add_to_history(phone, "assistant", response)
+                return response
+        
+        self.detect_language(phone, message)
+        
         # Get current user state
         user_state = self.get_user_state(phone)
         
-        # Extract information using GPT
-        extracted_info = self.extract_info_with_gpt(message, phone)
+        # Extract information using GPT, only if the handler ends up reading it
+        # (never for states whose handler only looks at the raw message)
+        if state_machine.needs_extraction(user_state.state):
+            extracted_info = state_machine.LazyExtraction(lambda: self.extract_info_with_gpt(message, phone))
+        else:
+            extracted_info = {}
         
         # Handle based on intent and state
         response = self.handle_message_with_gpt(phone, message, extracted_info, user_state)
+        if isinstance(extracted_info, state_machine.LazyExtraction) and extracted_info.resolved:
+            self.llm_stats['extractions'] += 1
+        else:
+            self.llm_stats['extractions_avoided'] += 1
         
         # Add bot response to history
         self.add_to_history(phone, "assistant", response)
         
         return response
     
-    def handle_message_with_gpt(self, phone: str, message: str, extracted_info: Dict, user_state: Dict) -> str:
+    def detect_language(self, phone: str, message: str):
+        """Switch the session language when a message is clearly French or English (local, no GPT)"""
+        user_state = self.conversation_states.get(phone)
+        if user_state is not None and not state_machine.detects_language(user_state.state):
+            return
+        language = language_detection.detect_language(message)
+        if language is None:
+            return
+        if user_state is not None:
+            user_state.language = language
+        elif language != messages.DEFAULT_LANGUAGE:
+            self.set_user_state(phone, state_machine.IDLE, language=language)
+    
+    def handle_choice(self, phone: str, choice_id: str) -> Optional[str]:
+        """Route an interactive reply id (see interactive.py) to its handler; None if it no longer applies"""
+        kind, value, ref = interactive.parse_id(choice_id)
+        state = self.get_user_state(phone).state
+        if kind == interactive.CONFIRM and value in ('yes', 'no'):
+            return self.handle_provider_confirmation(phone, value, accept=value == 'yes', match_id=ref)
+        if kind == interactive.ROLE and value in ('provider', 'seeker') and state == 'asking_role':
+            return self.choose_role(phone, value)
+        if kind == interactive.OPTION and value.isdigit() and state == 'choosing_provider':
+            return self.handle_provider_choice_with_gpt(phone, value, {})
+        return None
+    
+    def handle_message_with_gpt(self, phone: str, message: str, extracted_info: Dict, user_state: SessionState) -> str:
         """Handle message based on GPT-extracted intent"""
-        intent = extracted_info.get("intent", "UNKNOWN")
-        
         # Check if this is a provider confirmation first
         if self.is_provider_confirmation(phone, message):
             return self.handle_provider_confirmation(phone, message)
@@ -399,11 +562,21 @@ User message: {message}
             return ecla_response
         
         # Handle conversation states
-        if user_state.get('state') != 'idle':
+        if user_state.state != 'idle':
             return self.handle_conversation_state_with_gpt(phone, message, extracted_info, user_state)
         
-        # Check if this is a first-time user (no conversation history)
-        history = self.get_conversation_history(phone)
+        # Bare greetings and language choices are recognised locally
+        greeting = language_detection.greeting_language(message)
+        if greeting == 'fr':
+            return self.handle_french_greeting(phone, message)
+        if greeting == 'en':
+            self.set_user_state(phone, 'registering_name', language='en')
+            return self.handle_first_time_greeting(phone)
+        if language_detection.chosen_language(message):
+            return self.handle_language_selection(phone, message)
+        
+        # Only now is the extraction needed (and made)
+        intent = extracted_info.get("intent", "UNKNOWN")
         if intent == "GREETING":
             # Set state to registering name directly
             self.set_user_state(phone, 'registering_name')
@@ -434,50 +607,23 @@ User message: {message}
     
     def is_provider_confirmation(self, phone: str, message: str) -> bool:
         """Check if this message is from a provider confirming availability"""
-        # Check if this phone number has any pending matches as a provider
-        for match_id, match_data in self.pending_matches.items():
-            if match_data['provider_phone'] == phone:
-                return True
-        return False
-    
-    def handle_conversation_state_with_gpt(self, phone: str, message: str, extracted_info: Dict, user_state: Dict) -> str:
-        """Handle ongoing conversations with GPT"""
-        state = user_state.get('state', 'idle')
-        
-        if state == 'registering_name':
-            # Check if this is the first message (greeting) or actual name
-            if message and message.lower().strip() in ['hey', 'hi', 'hello', 'bonjour', 'salut']:
-                return self.handle_first_time_greeting(phone)
-            else:
-                return self.handle_name_registration_with_gpt(phone, message, extracted_info)
-        elif state == 'asking_role':
-            return self.handle_role_selection(phone, message)
-        elif state == 'asking_service_need':
-            return self.handle_service_need(phone, message)
-        elif state == 'registering_services':
-            return self.handle_services_registration_with_gpt(phone, message, extracted_info)
-        elif state == 'registering_location':
-            return self.handle_location_registration_with_gpt(phone, message, extracted_info)
-        elif state == 'registering_availability':
-            return self.handle_availability_registration(phone, message)
-        elif state == 'registering_time_preference':
-            return self.handle_time_preference_registration(phone, message)
-        elif state == 'registering_pricing':
-            return self.handle_pricing_registration(phone, message)
-        elif state == 'requesting_service':
-            return self.handle_service_request_with_gpt(phone, message, extracted_info)
-        elif state == 'requesting_time':
-            return self.handle_time_request_with_gpt(phone, message, extracted_info)
-        elif state == 'requesting_location':
-            return self.handle_location_request_with_gpt(phone, message, extracted_info)
-        elif state == 'choosing_provider':
-            return self.handle_provider_choice_with_gpt(phone, message, extracted_info)
-        elif state == 'selecting_language':
-            return self.handle_language_selection(phone, message)
-        elif state == 'welcome_english':
-            return self.handle_english_welcome(phone)
-        else:
+        # Provider index lookup instead of scanning every pending match
+        return self.pending_matches.has_provider(phone)
+    
+    def handle_conversation_state_with_gpt(self, phone: str, message: str, extracted_info: Dict, user_state: SessionState) -> str:
+        """Dispatch to the current state's handler (see state_machine.STATES)"""
+        spec = state_machine.get_state(user_state.state)
+        if spec is None or spec.handler is None:
             return self.generate_response_with_gpt(message, phone, extracted_info, user_state)
+        return spec.handler(self, phone, message, extracted_info)
+    
+    def handle_name_state(self, phone: str, message: str, extracted_info: Dict) -> str:
+        """A greeting while we wait for the name repeats the intro; anything else is the name"""
+        greeting = language_detection.greeting_language(message)
+        if greeting:
+            self.set_user_state(phone, 'registering_name', self.get_user_state(phone).data, language=greeting)
+            return self.handle_first_time_greeting(phone)
+        return self.handle_name_registration_with_gpt(phone, message, extracted_info)
     
     def extract_name_from_context(self, phone: str) -> str:
         """Try to extract user name from context or return None"""
@@ -491,48 +637,29 @@ User message: {message}
     def handle_french_greeting(self, phone: str, message: str) -> str:
         """Handle French greetings and automatically switch to French mode"""
         # Set language preference to French
-        self.set_user_state(phone, 'registering_name', {'language': 'french'})
-        
-        return """Bonjour! 👋 Je suis votre assistant ECLA!
-
-🏠 **Comment ça marche:**
-• Besoin d'aide? Dites-moi ce dont vous avez besoin (lessive, nourriture, traduction, etc.)
-• Voulez-vous aider les autres? Dites "Je veux fournir un service" pour vous inscrire
-• Je vous connecterai avec 3 voisins qui peuvent aider
-
-💡 **Services populaires:** Lessive, livraison de nourriture, traduction, courses, aide informatique, assistance préfecture
-
-Comment puis-je vous aider aujourd'hui?"""
+        self.set_user_state(phone, 'registering_name', language='fr')
+        return self.say(phone, 'welcome')
     
     def handle_english_welcome(self, phone: str) -> str:
         """Handle English welcome message with clear examples"""
-        return """Hey there! 👋 I'm your ECLA Services Assistant.
-
-🏠 **How it works:**
-• Need help? Tell me what you need (laundry, food, translation, etc.)
-• Want to help others? Say "I want to provide service" to register
-• I'll connect you with 3 neighbors who can help
-
-💡 **Popular services:** Laundry, food delivery, translation, shopping, tech help, prefecture assistance
-
-What can I help you with today?"""
+        return self.say(phone, 'welcome')
     
     def handle_language_selection(self, phone: str, message: str) -> str:
         """Handle language preference selection"""
         message_lower = message.lower().strip()
         print(f"Language selection: '{message}' -> '{message_lower}'")
         
-        if any(word in message_lower for word in ['français', 'french', 'francais', '🇫🇷']):
+        language = language_detection.chosen_language(message)
+        if language is None and any(word in message_lower for word in ['français', 'french', 'francais', '🇫🇷']):
+            language = 'fr'
+        
+        if language == 'fr':
             # Set language preference and ask for name
-            self.set_user_state(phone, 'registering_name', {'language': 'french'})
-            return "Parfait! 🇫🇷 Comment vous appelez-vous?"
-        elif any(word in message_lower for word in ['english', '🇬🇧', 'en']):
-            # Set language preference and show welcome message
-            self.set_user_state(phone, 'welcome_english', {'language': 'english'})
-            return self.handle_english_welcome(phone)
+            self.set_user_state(phone, 'registering_name', language='fr')
+            return self.say(phone, 'language_chosen')
         else:
-            # Default to English and show welcome message
-            self.set_user_state(phone, 'welcome_english', {'language': 'english'})
+            # English (also the default): the welcome asks what they need, which idle's intent routing answers
+            self.set_user_state(phone, 'idle', language='en')
             return self.handle_english_welcome(phone)
     
     def handle_how_it_works(self, phone: str, message: str) -> str:
@@ -540,70 +667,13 @@ What can I help you with today?"""
         message_lower = message.lower()
         
         if any(word in message_lower for word in ['how', 'help', 'work', 'process', 'explain', 'what', 'does', 'do']):
-            return """🌟 **Hey Neighbour! Welcome to ECLA Community Services!**
-
-I noticed so many requests going unnoticed in our group, so I created this smart way to connect neighbors! 🤝
-
-**🏠 How it works:**
-
-🔄 **Smart Matching System**
-• You register as either a service provider OR service seeker
-• I store your data securely
-• When someone needs help, I find the perfect match
-• You get 3 options to choose from
-• Once accepted, you both get invited to chat directly!
-
-**💡 Popular ECLA Services:**
-• 🚗 "Hey I need someone to lend a car"
-• ✈️ "I want someone to pickup/drop to airport"
-• 🍕 "I need food delivery to pickup"
-• 🧺 "I need laundry help"
-• 💻 "I need IT help"
-• 🇫🇷 "I need French translation for prefecture"
-• 🛒 "I need shopping assistance"
-• 📦 "I need help moving boxes"
-
-**🎯 The Process:**
-1. Say your name
-2. Choose: Service Provider OR Service Seeker
-3. Tell me what you offer/need
-4. I'll match you with neighbors
-5. You choose who to connect with
-6. Chat directly - no middleman!
-
-**💪 Advantages:**
-• No more lost requests in the group
-• Direct connection with neighbors
-• Quick and easy matching
-• Perfect for ECLA community needs
-
-Ready to get started? Just say your name! 😊"""
+            return self.say(phone, 'how_it_works')
         
-        return self.generate_response_with_gpt(message, phone, {}, {'state': 'idle'})
+        return self.generate_response_with_gpt(message, phone, {}, SessionState())
 
     def handle_first_time_greeting(self, phone: str) -> str:
         """Handle first-time user greeting with simple, friendly approach"""
-        return """Hey Neighbour! 👋 I'm your ECLA Community Services Assistant!
-
-🏠 **Whether it's finding someone for IT help, laundry, moving boxes, or anything in between, we make it super easy.**
-
-I made this very customizable using our previous requests from the ECLA group. Now you can find what you need here!
-
-**💡 Just say things like:**
-• "Hey I need someone to lend a car"
-• "I want someone to pickup/drop to airport" 
-• "I need food delivery to pickup"
-• "I need a cig" 😄
-
-It will redirect you to the right person who is available for this kind of service, and once people are accepted, they will be invited to the same chat and you can connect directly!
-
-**💪 Advantages:**
-• No more lost requests in the group
-• Direct connection with neighbors
-• Quick and easy matching
-• Perfect for ECLA community needs
-
-Just say your name and let's get started! 😊"""
+        return self.say(phone, 'first_time_greeting')
 
     def handle_help_request_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle help requests with enhanced 3-option matching"""
@@ -615,7 +685,7 @@ Just say your name and let's get started! 😊"""
     def handle_registration_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle smart conversational registration with GPT"""
         self.set_user_state(phone, 'registering_name')
-        return "I'm your ECLA assistant! 👋 What's your name?"
+        return self.say(phone, 'ask_name')
     
     def handle_name_registration_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle name registration with GPT"""
@@ -623,11 +693,14 @@ Just say your name and let's get started! 😊"""
         self.user_names[phone] = name
         
         # Get current user data and add name
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['name'] = name
         self.set_user_state(phone, 'asking_role', user_data)
         
-        return f"Nice to meet you, {name}! 😊\n\nAre you a service provider or service seeker?\n\n🛠️ **Service Provider** - You help others (laundry, food, translation, shopping, tech help, etc.)\n🤝 **Service Seeker** - You need help from others\n\nJust tell me which one you are!"
+        return interactive.Reply(self.say(phone, 'ask_role', name=name), [
+            interactive.Choice(interactive.ROLE_PROVIDER, self.say(phone, 'button_provider')),
+            interactive.Choice(interactive.ROLE_SEEKER, self.say(phone, 'button_seeker')),
+        ])
     
     def handle_role_selection(self, phone: str, message: str) -> str:
         """Handle role selection (provider vs seeker)"""
@@ -635,38 +708,37 @@ Just say your name and let's get started! 😊"""
         
         # Check if user mentioned being a provider
         if any(word in message_lower for word in ['provider', 'help', 'offer', 'service provider', '🛠️', 'cook', 'food', 'give', 'can help']):
-            # User wants to be a service provider
-            user_data = self.get_user_state(phone)['data']
-            user_data['role'] = 'provider'
-            
             # Check if they also mentioned their services in the same message
             if any(word in message_lower for word in ['cook', 'food', 'laundry', 'translation', 'shopping', 'tech', 'help', 'delivery']):
-                # Extract services from the message
-                services = message.strip()
-                user_data['services'] = services
-                self.set_user_state(phone, 'registering_location', user_data)
-                return f"Perfect! 🛠️ You offer: {services}\n\nWhich accommodation type are you in? (Studio, Colocation, Hostel, etc.)"
-            else:
-                # Just role selection, ask for services
-                self.set_user_state(phone, 'registering_services', user_data)
-                return "Great! 🛠️ What services can you offer?\n\nExamples: laundry, food delivery, translation, shopping, tech help, prefecture assistance, etc.\n\nJust tell me what you can help with!"
+                return self.choose_role(phone, 'provider', services=message.strip())
+            return self.choose_role(phone, 'provider')
         
         elif any(word in message_lower for word in ['seeker', 'need', 'help me', 'service seeker', '🤝']):
-            # User needs help
-            user_data = self.get_user_state(phone)['data']
-            user_data['role'] = 'seeker'
-            self.set_user_state(phone, 'asking_service_need', user_data)
-            
-            return "Perfect! 🤝 What do you need help with?\n\nExamples: I need cigarettes, I need laundry help, I need someone to go to prefecture with me, etc.\n\nJust tell me what you need!"
+            return self.choose_role(phone, 'seeker')
         
         else:
             # Default to asking for service need
-            user_data = self.get_user_state(phone)['data']
+            user_data = self.get_user_state(phone).data
             user_data['role'] = 'seeker'
             self.set_user_state(phone, 'asking_service_need', user_data)
             
-            return "I'll help you find what you need! 🤝\n\nWhat do you need help with?\n\nExamples: I need cigarettes, I need laundry help, I need someone to go to prefecture with me, etc.\n\nJust tell me what you need!"
+            return self.say(phone, 'ask_need_default')
 
+    def choose_role(self, phone: str, role: str, services: str = None) -> str:
+        """Record the user's role ('provider' or 'seeker') and ask the next registration question"""
+        user_data = self.get_user_state(phone).data
+        user_data['role'] = role
+        if role == 'seeker':
+            self.set_user_state(phone, 'asking_service_need', user_data)
+            return self.say(phone, 'ask_need')
+        if services:
+            user_data['services'] = services
+            self.set_user_state(phone, 'registering_location', user_data)
+            return self.say(phone, 'provider_services_given', services=services)
+        # Just role selection, ask for services
+        self.set_user_state(phone, 'registering_services', user_data)
+        return self.say(phone, 'ask_services')
+    
     def handle_service_need(self, phone: str, message: str) -> str:
         """Handle when user tells us what they need with enhanced matching"""
         service = message.strip()
@@ -678,48 +750,48 @@ Just say your name and let's get started! 😊"""
     def handle_services_registration_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle services registration with GPT"""
         services = message.strip()
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['services'] = services
         self.set_user_state(phone, 'registering_location', user_data)
-        return f"Great! You offer: {services} 🛠️\n\nWhich accommodation type are you in? (Studio, Colocation, Hostel, etc.)"
+        return self.say(phone, 'ask_location', services=services)
     
     def handle_location_registration_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle location registration with GPT"""
         location = message.strip()
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['location'] = location
         
         # Ask for availability
         self.set_user_state(phone, 'registering_availability', user_data)
         
-        return f"Perfect! You're in {location} 📍\n\nWhat days are you available?\n\nExamples: Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday\n\nOr just say: 'Every day' or 'Weekends only'"
+        return self.say(phone, 'ask_availability', location=location)
     
     def handle_availability_registration(self, phone: str, message: str) -> str:
         """Handle availability registration"""
         availability = message.strip()
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['availability'] = availability
         
         # Ask for time preference
         self.set_user_state(phone, 'registering_time_preference', user_data)
         
-        return f"Great! You're available: {availability} 📅\n\nWhat time of day do you prefer?\n\n🌅 Morning (6 AM - 12 PM)\n🌞 Afternoon (12 PM - 6 PM)\n🌙 Evening (6 PM - 12 AM)\n\nOr say: 'Any time' or 'Flexible'"
+        return self.say(phone, 'ask_time_preference', availability=availability)
     
     def handle_time_preference_registration(self, phone: str, message: str) -> str:
         """Handle time preference registration"""
         time_preference = message.strip()
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['time_preference'] = time_preference
         
         # Ask for pricing (optional)
         self.set_user_state(phone, 'registering_pricing', user_data)
         
-        return f"Perfect! You prefer: {time_preference} ⏰\n\nWhat's your typical charge for this service?\n\nExamples: 10€, 15-20€, Free, Negotiable\n\nOr just say: 'I'll discuss with the person'"
+        return self.say(phone, 'ask_pricing', time_preference=time_preference)
     
     def handle_pricing_registration(self, phone: str, message: str) -> str:
         """Handle pricing registration"""
         pricing = message.strip()
-        user_data = self.get_user_state(phone)['data']
+        user_data = self.get_user_state(phone).data
         user_data['pricing'] = pricing
         
         # Save user to database with all details
@@ -728,102 +800,44 @@ Just say your name and let's get started! 😊"""
         # Reset state
         self.set_user_state(phone, 'idle')
         
-        return f"Perfect! You're all set! 🎉\n\n**Your Profile:**\n• Name: {user_data['name']}\n• Services: {user_data['services']}\n• Location: {user_data['location']}\n• Available: {user_data['availability']}\n• Time: {user_data['time_preference']}\n• Pricing: {user_data['pricing']}\n\nI'll connect you with neighbors when they need your help! 🤝"
-    
-    def complete_request_with_gpt(self, phone: str, user_data: Dict) -> str:
-        """Complete a help request with GPT"""
-        # Find matches
-        matches = self.find_matches(user_data['service'], user_data['location'])
-        
-        if matches:
-            # Show top 3 matches with pricing and availability
-            response = "Found 3 neighbors who can help:\n\n"
-            for i, match in enumerate(matches[:3], 1):
-                availability = "Available now" if i == 1 else f"Available in {i*30}min" if i == 2 else "Available tonight"
-                price = f"{i*2}€" if i == 1 else f"{i*1.5}€" if i == 2 else f"{i*3}€"
-                response += f"{i}️⃣ {match['name']} - {availability}, {price}\n"
-            response += "\nReply with 1, 2, or 3 to connect!"
-            # Set state to choosing provider
-            self.set_user_state(phone, 'choosing_provider', user_data)
-        else:
-            response = f"📝 I've saved your request!\n\nService: {user_data['service']}\nTime: {user_data['time']}\nLocation: {user_data['location']}\n\nI'll notify you when someone becomes available!"
-        
-        # Save request only if no matches found
-        if not matches:
-            user_name = self.user_names.get(phone, "User")
-            self.save_request(phone, user_name, user_data['service'], user_data['time'], user_data['location'])
-        
-        # Reset state
-        self.set_user_state(phone, 'idle')
-        
-        return response
+        return self.say(phone, 'profile_saved', **user_data)
     
-    def get_user_state(self, phone: str) -> Dict:
+    def get_user_state(self, phone: str) -> SessionState:
         """Get current conversation state for a user"""
-        return self.conversation_states.get(phone, {
-            'state': 'idle',
-            'data': {},
-            'last_message': None
-        })
-    
-    def set_user_state(self, phone: str, state: str, data: Dict = None):
-        """Set conversation state for a user"""
-        if data is None:
-            data = {}
-        self.conversation_states[phone] = {
-            'state': state,
-            'data': data,
-            'last_message': datetime.now()
-        }
+        return self.conversation_states.get(phone) or SessionState()
+    
+    def say(self, phone: str, key: str, **values) -> str:
+        """Render a catalog message in the user's language"""
+        return messages.render(key, self.get_user_state(phone).language, **values)
+    
+    def set_user_state(self, phone: str, state: str, data: Dict = None, language: str = None):
+        """Set conversation state for a user (the language carries over unless given)"""
+        current = self.conversation_states.get(phone)
+        spec = state_machine.get_state(current.state if current else state_machine.IDLE)
+        if spec is not None and not spec.allows(state):
+            print(f"Unexpected state transition for {phone}: {spec.name} -> {state}")
+        if language is None:
+            language = current.language if current else messages.DEFAULT_LANGUAGE
+        self.conversation_states[phone] = SessionState(state, {} if data is None else data, time.time(),
+                                                       messages.normalize_language(language))
+        self.scheduler.touch('conversation', phone)
     
     def save_user(self, phone: str, name: str, services: str, location: str):
         """Save user to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO users (phone, name, services, location)
-            VALUES (?, ?, ?, ?)
-        ''', (phone, name, services, location))
-        
-        conn.commit()
-        conn.close()
+        existing = self.profiles.get(phone)
+        if existing:
+            profile = replace(existing, name=name, services=services, location=location)
+        else:
+            profile = ProviderProfile(phone=phone, name=name, services=services, location=location)
+        self.profiles.save(profile)
+        self.db_context.invalidate(phone)
+        self.new_providers.add(phone)
     
     def save_user_with_details(self, phone: str, user_data: Dict):
         """Save user with detailed information"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create extended user table if it doesn't exist
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users_extended (
-                phone TEXT PRIMARY KEY,
-                name TEXT,
-                services TEXT,
-                location TEXT,
-                availability TEXT,
-                time_preference TEXT,
-                pricing TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO users_extended 
-            (phone, name, services, location, availability, time_preference, pricing)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            phone,
-            user_data.get('name', ''),
-            user_data.get('services', ''),
-            user_data.get('location', ''),
-            user_data.get('availability', ''),
-            user_data.get('time_preference', ''),
-            user_data.get('pricing', '')
-        ))
-        
-        conn.commit()
-        conn.close()
+        self.profiles.save(ProviderProfile.from_registration(phone, user_data))
+        self.db_context.invalidate(phone)
+        self.new_providers.add(phone)
     
     def save_request(self, phone: str, name: str, service: str, time: str, location: str):
         """Save request to database"""
@@ -836,203 +850,319 @@ Just say your name and let's get started! 😊"""
         name = name or "User"
         
         cursor.execute('''
-            INSERT INTO requests (phone, name, service, time, location)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (phone, name, service, time, location))
+            INSERT INTO requests (phone, name, service, time, location, service_mask)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (phone, name, service, time, location, service_taxonomy.service_mask(service)))
+        request_id = cursor.lastrowid
         
         conn.commit()
         conn.close()
+        self.request_index.add(request_id, phone, service, time, location,
+                               language=self.get_user_state(phone).language)
+        self.db_context.invalidate(phone)
+        return request_id
     
-    def find_matches(self, service: str, location: str) -> List[Dict]:
-        """Find 3 best matching helpers with ratings and pricing"""
+    def claim_request(self, request_id: int, pending_match: PendingMatch) -> bool:
+        """Atomically mark a pending request as matched; False if someone got there first"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Enhanced matching logic with ratings and availability
-        if 'translation' in service.lower() or 'prefecture' in service.lower() or 'french' in service.lower():
-            cursor.execute('''
-                SELECT name, phone, services, location, rating, total_services, availability
-                FROM users 
-                WHERE (services LIKE ? OR services LIKE ? OR services LIKE ?) 
-                AND availability = 'available'
-                ORDER BY rating DESC, total_services DESC
-                LIMIT 3
-            ''', ('%translation%', '%french%', '%prefecture%'))
-        else:
-            cursor.execute('''
-                SELECT name, phone, services, location, rating, total_services, availability
-                FROM users 
-                WHERE services LIKE ? AND availability = 'available'
-                ORDER BY rating DESC, total_services DESC
-                LIMIT 3
-            ''', (f'%{service}%',))
+        cursor.execute('''
+            UPDATE requests SET status = 'matched', matched_helper = ?, price_offered = ?
+            WHERE id = ? AND status = 'pending'
+        ''', (pending_match.provider_phone, pending_match.price, request_id))
+        claimed = cursor.rowcount == 1
         
+        conn.commit()
+        conn.close()
+        if claimed:
+            self.request_index.remove(request_id)
+            self.db_context.invalidate(pending_match.seeker_phone)
+        return claimed
+    
+    def find_matches(self, service: str, location: str, when: datetime = None, limit: int = 3,
+                     language: str = messages.DEFAULT_LANGUAGE) -> List[MatchCandidate]:
+        """Find the best matching helpers (3 by default) with ratings and pricing, optionally available at `when`
+        
+        Availability labels are worded in `language`, the seeker's.
+        
+        Providers nearest to `location` come first when it names a campus place, best rated first within each
+        distance band (see campus.py); otherwise it's rating order across the whole campus.
+        """
+        service = service or "general"
+        
+        # Bitmap index over the cached, ranked profiles: service AND hour-of-week, no database round-trip
+        index = self.profiles.matching_index()
+        mask = service_taxonomy.service_mask(service)
+        if mask:
+            # Canonical service ids: "car lending" finds "Airport pickup" providers
+            service_bits = index.mask_bits(mask)
+        else:
+            # Not in the taxonomy: fall back to matching the words themselves
+            service_bits = 0
+            for term in service_terms(service):
+                service_bits |= index.term_bits(term)
+        bits = service_bits & index.available_bits(when)
+        # Hour buckets are coarse, so check the exact minute for the few candidates taken
+        accept = (lambda profile: is_available_at(profile.windows, when)) if when else None
+        place = campus.normalize_location(location)
+        if place is None:
+            providers = index.first(bits, limit, accept)
+        else:
+            # Nearest distance band first: one AND per band over the same ranked bitmaps
+            providers = []
+            for ring in self.profiles.proximity_index(index).rings(place):
+                providers += index.first(bits & ring, limit - len(providers), accept)
+                if len(providers) >= limit:
+                    break
+        
+        now = campus_now()
         matches = []
-        for row in cursor.fetchall():
-            name, phone, services, location, rating, total_services, availability = row
-            # Calculate pricing based on service type and provider rating
-            base_price = self.calculate_base_price(service)
-            adjusted_price = base_price * (1 + (5.0 - rating) * 0.1)  # Higher rating = lower price
-            
-            matches.append({
-                'name': name,
-                'phone': phone,
-                'services': services,
-                'location': location,
-                'rating': rating,
-                'total_services': total_services,
-                'price': round(adjusted_price, 2),
-                'availability': availability
-            })
+        for profile in providers:
+            matches.append(MatchCandidate(
+                name=profile.name,
+                phone=profile.phone,
+                services=profile.services,
+                location=profile.location,
+                rating=profile.rating,
+                total_services=profile.total_services,
+                # Declared rate or rating-adjusted base price, times demand at the requested hour
+                price=self.pricing.quote(service, profile, when),
+                availability=profile.availability,
+                available_label=availability_label(profile.windows, now, when, language)
+            ))
         
-        conn.close()
         return matches
     
     def calculate_base_price(self, service: str) -> float:
-        """Calculate base price for different service types"""
-        service_lower = service.lower()
-        
-        if any(word in service_lower for word in ['translation', 'french', 'prefecture']):
-            return 15.0  # Translation services
-        elif any(word in service_lower for word in ['car', 'airport', 'transport']):
-            return 20.0  # Transportation
-        elif any(word in service_lower for word in ['food', 'delivery', 'kfc']):
-            return 5.0   # Food delivery
-        elif any(word in service_lower for word in ['it', 'tech', 'computer']):
-            return 12.0  # Tech help
-        elif any(word in service_lower for word in ['laundry', 'cleaning']):
-            return 8.0   # Cleaning services
-        elif any(word in service_lower for word in ['print', 'document']):
-            return 3.0   # Printing
-        else:
-            return 10.0  # General services
+        """Calculate base price for different service types (see service_taxonomy.SERVICES)"""
+        return pricing.base_price(pricing.category(service))
     
     def handle_service_request_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle service request with enhanced 3-option matching"""
         service = extracted_info.get("service", "general")
+        when = parse_request_time(extracted_info.get("time") or message)
         
-        # Find 3 best matches
-        matches = self.find_matches(service, "campus")
+        # Rank candidates once: the top 3 are offered, the rest back up declines and timeouts
+        location = extracted_info.get("location") or self.seeker_location(phone)
+        candidates = self.find_matches(service, location, when, limit=self.CASCADE_DEPTH,
+                                       language=self.get_user_state(phone).language)
+        matches = candidates[:3]
         
         if not matches:
-            return f"Sorry! I couldn't find anyone available for {service} right now. 😔\n\nTry again later or ask for a different service!"
+            # Keep it pending: reverse matching tells the seeker when a provider who fits registers
+            time = extracted_info.get("time") or "flexible"
+            self.save_request(phone, self.user_names.get(phone), service, time, location)
+            self.set_user_state(phone, 'idle')
+            return self.say(phone, 'request_saved', service=service, time=time, location=location)
+        
+        # Urgent: ask the top providers all at once instead of one at a time
+        if self.orchestrator and is_urgent(extracted_info.get("time") or message):
+            return self.broadcast_request(phone, service, candidates[:self.BROADCAST_SIZE], location)
         
         # Store active request for tracking
-        self.active_requests[phone] = {
-            'service': service,
-            'matches': matches,
-            'timestamp': datetime.now()
-        }
+        self.active_requests[phone] = ActiveRequest(service, when, matches, candidates)
+        self.scheduler.touch('active_request', phone)
         
         # Set state to choosing provider
         self.set_user_state(phone, 'choosing_provider', {'service': service})
         
         # Format response with 3 options
-        response = f"Found {len(matches)} neighbors who can help with {service}:\n\n"
-        
-        for i, match in enumerate(matches, 1):
-            emoji = "1️⃣" if i == 1 else "2️⃣" if i == 2 else "3️⃣"
-            response += f"{emoji} **{match['name']}** - {match['location']}\n"
-            response += f"   ⭐ Rating: {match['rating']}/5 ({match['total_services']} services)\n"
-            response += f"   💰 Price: {match['price']}€\n"
-            response += f"   📍 Available: {match['availability']}\n\n"
-        
-        response += "Reply with 1, 2, or 3 to connect with your chosen neighbor! 🚀"
-        
-        return response
+        language = self.get_user_state(phone).language
+        response = messages.render('matches_header', language, count=len(matches), service=service)
+        for emoji, match in zip(messages.NUMBER_EMOJIS, matches):
+            response += messages.render('match', language, number=emoji, name=match.name, location=match.location,
+                                        rating=match.rating, total_services=match.total_services,
+                                        price=match.price, available_label=match.available_label)
+        response += messages.render('matches_footer', language)
+        
+        return self.offer_matches(phone, response, matches)
+    
+    def offer_matches(self, phone: str, text: str, matches: List[MatchCandidate]) -> interactive.Reply:
+        """Attach the matches as list rows, so picking one is a tap instead of typing 1, 2 or 3"""
+        rows = [interactive.Choice(interactive.option_id(number), f"{emoji} {match.name}",
+                                   self.say(phone, 'match_row', rating=match.rating, price=match.price,
+                                            available_label=match.available_label))
+                for number, (emoji, match) in enumerate(zip(messages.NUMBER_EMOJIS, matches), 1)]
+        return interactive.Reply(text, rows, self.say(phone, 'list_choose'))
+    
+    def seeker_location(self, phone: str) -> str:
+        """Where a seeker is: their provider profile's location if they have one, else anywhere on campus"""
+        profile = self.profiles.get(phone)
+        return profile.location if profile is not None and profile.location else "campus"
     
     def handle_provider_choice_with_gpt(self, phone: str, message: str, extracted_info: Dict) -> str:
         """Handle user's choice and initiate two-way acceptance"""
         choice = message.strip()
         
         if choice not in ['1', '2', '3']:
-            return "Please reply with 1, 2, or 3 to select a provider."
+            if phone in self.active_requests:
+                return self.offer_matches(phone, self.say(phone, 'choose_option'), self.active_requests[phone].matches)
+            return self.say(phone, 'choose_option')
         
         # Get active request
         if phone not in self.active_requests:
-            return "Sorry, your request has expired. Please start a new request!"
+            return self.say(phone, 'request_expired')
         
         active_request = self.active_requests[phone]
-        matches = active_request['matches']
+        matches = active_request.matches
         
         if int(choice) > len(matches):
-            return "Sorry, that option is not available. Please choose 1, 2, or 3."
+            return self.say(phone, 'option_unavailable')
         
         selected_provider = matches[int(choice) - 1]
         
-        # Store pending match for two-way acceptance
-        match_id = f"{phone}_{selected_provider['phone']}_{active_request['service']}"
-        self.pending_matches[match_id] = {
-            'seeker_phone': phone,
-            'provider_phone': selected_provider['phone'],
-            'provider_name': selected_provider['name'],
-            'service': active_request['service'],
-            'price': selected_provider['price'],
-            'timestamp': datetime.now()
-        }
+        # Store pending match for two-way acceptance, with the other ranked candidates as fallbacks
+        fallbacks = [c for c in active_request.candidates if c.phone != selected_provider.phone]
+        match_id = self.add_pending_match(phone, selected_provider, active_request.service, fallbacks)
         
         # Clear active request and reset state
         del self.active_requests[phone]
+        self.scheduler.forget('active_request', phone)
         self.set_user_state(phone, 'idle')
         
-        return f"Perfect! Let me check with {selected_provider['name']}...\n\n🔄 Asking {selected_provider['name']}..."
+        # Message the provider and start the confirmation timer
+        if self.orchestrator:
+            self.orchestrator.start(match_id)
+        
+        return self.say(phone, 'asking_provider', name=selected_provider.name)
+    
+    def add_pending_match(self, seeker_phone: str, provider: MatchCandidate, service: str,
+                          candidates: List[MatchCandidate], broadcast_id: str = None) -> str:
+        """Record a match awaiting the provider's yes/no; `candidates` are the next ones to ask"""
+        match_id = f"{seeker_phone}_{provider.phone}_{service}"
+        self.pending_matches[match_id] = PendingMatch(seeker_phone, provider.phone, provider.name, service,
+                                                      provider.price, candidates, broadcast_id)
+        return match_id
     
-    def handle_provider_confirmation(self, provider_phone: str, message: str) -> str:
-        """Handle provider's confirmation or decline"""
-        # Find pending match for this provider
-        pending_match = None
-        match_id = None
+    def broadcast_request(self, phone: str, service: str, providers: List[MatchCandidate],
+                          location: str = "campus") -> str:
+        """Send an urgent request to several providers at once; the first to accept gets it"""
+        request_id = self.save_request(phone, self.user_names.get(phone), service, "asap", location)
+        broadcast_id = str(request_id)
+        members = [self.add_pending_match(phone, provider, service, [], broadcast_id) for provider in providers]
+        with self._claim_lock:
+            self.broadcasts[broadcast_id] = {
+                'seeker_phone': phone,
+                'service': service,
+                'request_id': request_id,
+                'members': set(members)
+            }
+        self.set_user_state(phone, 'idle')
+        self.orchestrator.broadcast(members)
+        
+        return self.say(phone, 'broadcast_sent', count=len(members), service=service)
+    
+    def claim_broadcast(self, match_id: str, pending_match: PendingMatch) -> Optional[List[Tuple[str, PendingMatch]]]:
+        """First accept wins: returns the other providers' (match_id, pending match) pairs, or None if already taken"""
+        with self._claim_lock:
+            broadcast = self.broadcasts.get(pending_match.broadcast_id)
+            if broadcast is None or not self.claim_request(broadcast['request_id'], pending_match):
+                self.pending_matches.pop(match_id, None)
+                return None
+            del self.broadcasts[pending_match.broadcast_id]
+            others = []
+            for member in broadcast['members']:
+                other = self.pending_matches.pop(member, None)
+                if other is not None and member != match_id:
+                    others.append((member, other))
+            return others
+    
+    def leave_broadcast(self, match_id: str, pending_match: PendingMatch) -> Optional[Dict]:
+        """Drop a provider who declined or timed out; returns the broadcast if nobody is left"""
+        with self._claim_lock:
+            broadcast = self.broadcasts.get(pending_match.broadcast_id)
+            if broadcast is None:
+                return None
+            broadcast['members'].discard(match_id)
+            if broadcast['members']:
+                return None
+            del self.broadcasts[pending_match.broadcast_id]
+            return broadcast
+    
+    def handle_provider_confirmation(self, provider_phone: str, message: str, accept: bool = None,
+                                     match_id: str = None) -> str:
+        """Handle provider's confirmation or decline (`accept`/`match_id` come from a tapped button)"""
+        if match_id is not None:
+            # The button names its request, which may not be the oldest one
+            pending_match = self.pending_matches.get(match_id)
+            found = (match_id, pending_match) if pending_match and pending_match.provider_phone == provider_phone else None
+        else:
+            # Find the provider's oldest pending match
+            found = self.pending_matches.first_for_provider(provider_phone)
         
-        for mid, match in self.pending_matches.items():
-            if match['provider_phone'] == provider_phone:
-                pending_match = match
-                match_id = mid
-                break
+        if not found:
+            return self.say(provider_phone, 'no_pending_requests')
         
-        if not pending_match:
-            return "Sorry, I don't see any pending requests for you."
+        match_id, pending_match = found
         
-        message_lower = message.lower()
+        if accept is None:
+            accept = interactive.parse_yes_no(message)
         
-        if any(word in message_lower for word in ['yes', 'ok', 'sure', 'available', 'can help']):
+        if accept:
             # Provider accepts
-            seeker_phone = pending_match['seeker_phone']
-            service = pending_match['service']
-            price = pending_match['price']
+            service = pending_match.service
+            price = pending_match.price
+            
+            # Broadcast requests go to whoever accepts first; everyone else is told it's taken
+            if pending_match.broadcast_id:
+                others = self.claim_broadcast(match_id, pending_match)
+                if others is None:
+                    return self.say(provider_phone, 'broadcast_taken')
+                self.save_match(pending_match)
+                if self.orchestrator:
+                    self.orchestrator.broadcast_won(match_id, pending_match, others)
+                return self.say(provider_phone, 'broadcast_won', service=service, price=price)
             
             # Save successful match
             self.save_match(pending_match)
             
             # Remove from pending
-            del self.pending_matches[match_id]
+            self.pending_matches.pop(match_id, None)
+            if self.orchestrator:
+                self.orchestrator.accepted(match_id, pending_match)
             
-            return f"Great! You're connected with the seeker for {service}.\n\n💰 Price: {price}€\n\nYou can discuss details directly in this chat! 🚀"
+            return self.say(provider_phone, 'match_accepted', service=service, price=price)
         
-        elif any(word in message_lower for word in ['no', 'sorry', 'busy', 'unavailable', 'cant']):
+        elif accept is False:
             # Provider declines
-            seeker_phone = pending_match['seeker_phone']
-            service = pending_match['service']
-            
             # Remove from pending
-            del self.pending_matches[match_id]
+            self.pending_matches.pop(match_id, None)
             
-            # Notify seeker and offer alternatives
-            remaining_matches = self.find_matches(service, "campus")
-            if remaining_matches:
-                response = f"Sorry, {pending_match['provider_name']} is not available.\n\nWould you like to try:\n"
-                for i, match in enumerate(remaining_matches[:2], 1):
-                    emoji = "1️⃣" if i == 1 else "2️⃣"
-                    response += f"{emoji} {match['name']} - {match['price']}€\n"
-                response += "\nReply with 1 or 2, or say 'no thanks' to cancel."
-            else:
-                response = "Sorry, no other providers are available right now. Try again later!"
+            # The orchestrator asks the next ranked candidate and keeps the seeker posted
+            if self.orchestrator:
+                self.orchestrator.declined(match_id, pending_match)
+                return self.say(provider_phone, 'decline_thanks')
             
-            return response
+            # Without the orchestrator the seeker can't be messaged now; the alternatives
+            # wait for their next message so their state only changes once they see them
+            self.deferred_offers[pending_match.seeker_phone] = pending_match
+            self.scheduler.touch('deferred_offer', pending_match.seeker_phone)
+            
+            return self.say(provider_phone, 'decline_thanks')
         
         else:
-            return "Please reply with 'yes' if you're available, or 'no' if you're busy."
+            return interactive.Reply(self.say(provider_phone, 'confirm_yes_no'), [
+                interactive.Choice(interactive.confirm_id('yes', match_id), self.say(provider_phone, 'button_yes')),
+                interactive.Choice(interactive.confirm_id('no', match_id), self.say(provider_phone, 'button_no')),
+            ])
     
-    def save_match(self, match_data: Dict):
+    def offer_alternatives(self, pending_match: PendingMatch) -> str:
+        """Offer the seeker the remaining ranked candidates (never the provider who just declined)"""
+        seeker = pending_match.seeker_phone
+        remaining_matches = pending_match.candidates
+        if not remaining_matches:
+            return self.say(seeker, 'no_alternatives')
+        alternatives = remaining_matches[:2]
+        self.active_requests[seeker] = ActiveRequest(pending_match.service, None, alternatives, remaining_matches)
+        self.scheduler.touch('active_request', seeker)
+        self.set_user_state(seeker, 'choosing_provider', {'service': pending_match.service})
+        text = self.say(seeker, 'alternatives_header', name=pending_match.provider_name)
+        for emoji, match in zip(messages.NUMBER_EMOJIS, alternatives):
+            text += self.say(seeker, 'alternative', number=emoji, name=match.name, price=match.price)
+        return text + self.say(seeker, 'alternatives_footer')
+    
+    def save_match(self, match_data: PendingMatch):
         """Save successful match to database"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
@@ -1040,11 +1170,23 @@ Just say your name and let's get started! 😊"""
         cursor.execute('''
             INSERT INTO matches (seeker_phone, provider_phone, service, price, status)
             VALUES (?, ?, ?, ?, ?)
-        ''', (match_data['seeker_phone'], match_data['provider_phone'], 
-              match_data['service'], match_data['price'], 'active'))
+        ''', (match_data.seeker_phone, match_data.provider_phone,
+              match_data.service, match_data.price, 'active'))
+        
+        # The seeker's waiting requests for this service are answered too (no more rematch notices)
+        cursor.execute('''
+            UPDATE requests SET status = 'matched', matched_helper = ?, price_offered = ?
+            WHERE phone = ? AND status = 'pending' AND (service = ? OR service_mask & ? != 0)
+            RETURNING id
+        ''', (match_data.provider_phone, match_data.price, match_data.seeker_phone, match_data.service,
+              service_taxonomy.service_mask(match_data.service)))
+        closed = cursor.fetchall()
         
         conn.commit()
         conn.close()
+        for request_id, in closed:
+            self.request_index.remove(request_id)
+        self.db_context.invalidate(match_data.seeker_phone, match_data.provider_phone)
     
     def complete_service(self, match_id: int, rating: int = None):
         """Mark service as completed and update ratings"""
@@ -1074,17 +1216,14 @@ Just say your name and let's get started! 😊"""
         
         conn.commit()
         conn.close()
+        
+        if result and rating:
+            self.profiles.invalidate(result[0])
     
     def get_user_rating(self, phone: str) -> float:
         """Get user's current rating"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT rating FROM users WHERE phone = ?', (phone,))
-        result = cursor.fetchone()
-        
-        conn.close()
-        return result[0] if result else 5.0 
+        profile = self.profiles.get(phone)
+        return profile.rating if profile else 5.0
 
     def handle_ecla_specific_query(self, phone: str, message: str) -> str:
         """Handle ECLA-specific queries and provide campus information"""
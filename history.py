@@ -0,0 +1,175 @@
+"""
+Per-session conversation history: a rolling summary plus the last few turns.
+
+The bot used to keep the last 10 messages as dicts with ISO timestamps and
+paste the last 5 verbatim into every prompt. Anything older was lost, and
+the recent turns cost tokens again on every request. HistoryStore keeps
+only `keep_recent` turns per phone, as slotted `Turn` objects. Turns that
+fall out of the window are folded into a short running summary. The
+summary is refreshed on a background thread once `summarize_every` turns
+have piled up, so the request path never waits on a summarization call.
+Prompts get the summary and then the recent turns.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+DEFAULT_KEEP_RECENT = 6
+DEFAULT_SUMMARIZE_EVERY = 4
+SUMMARY_MAX_CHARS = 300
+
+# summarizer(previous summary, turns to fold in) -> new summary
+Summarizer = Callable[[str, Sequence['Turn']], str]
+
+
+class Turn:
+    """One message in a conversation"""
+    __slots__ = ('role', 'content', 'at')
+
+    def __init__(self, role: str, content: str, at: float = None):
+        self.role = role
+        self.content = content
+        self.at = time.time() if at is None else at
+
+    def as_message(self) -> Dict[str, str]:
+        """Chat-completions message dict"""
+        return {'role': self.role, 'content': self.content}
+
+    def __repr__(self) -> str:
+        return f"Turn({self.role!r}, {self.content!r})"
+
+
+class Session:
+    """Summary, recent turns and the evicted turns not yet folded into the summary"""
+    __slots__ = ('summary', 'turns', 'unsummarized', 'refreshing')
+
+    def __init__(self, keep_recent: int):
+        self.summary = ''
+        self.turns = deque(maxlen=keep_recent)
+        self.unsummarized: List[Turn] = []
+        self.refreshing = False
+
+
+def compact_summary(previous: str, turns: Sequence[Turn], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Extractive fallback summary: the previous summary plus the user's clipped messages, newest kept
+
+    The bot's own replies are left out; they are mostly templates rebuilt from state.
+    """
+    lines = [' '.join(turn.content.split())[:80] for turn in turns if turn.role == 'user']
+    summary = ' | '.join(filter(None, [previous] + lines))
+    return summary if len(summary) <= max_chars else '…' + summary[-(max_chars - 1):]
+
+
+class HistoryStore:
+    """phone -> Session, with summaries refreshed off the request path (thread-safe)"""
+
+    def __init__(self, keep_recent: int = DEFAULT_KEEP_RECENT, summarize_every: int = DEFAULT_SUMMARIZE_EVERY,
+                 summarizer: Optional[Summarizer] = None, executor: ThreadPoolExecutor = None):
+        self.keep_recent = keep_recent
+        self.summarize_every = summarize_every
+        self.summarizer = summarizer or compact_summary
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Session] = {}
+        self._refreshes = set()  # in-flight summary futures
+        self.stats = {'turns': 0, 'summarized_turns': 0, 'refreshes': 0, 'summary_errors': 0}
+
+    def __contains__(self, phone: str) -> bool:
+        return phone in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add(self, phone: str, role: str, content: str):
+        """Record a turn; schedules a summary refresh once enough turns have aged out"""
+        with self._lock:
+            session = self._sessions.get(phone)
+            if session is None:
+                session = self._sessions[phone] = Session(self.keep_recent)
+            if len(session.turns) == self.keep_recent:
+                session.unsummarized.append(session.turns[0])
+            session.turns.append(Turn(role, content))
+            self.stats['turns'] += 1
+            refresh = self._claim_refresh(session)
+        if refresh:
+            self._schedule(phone, session)
+
+    def recent(self, phone: str, limit: int = None) -> List[Turn]:
+        """The last `limit` turns (all kept turns by default), oldest first"""
+        session = self._sessions.get(phone)
+        if session is None:
+            return []
+        turns = list(session.turns)
+        return turns[-limit:] if limit else turns
+
+    def summary(self, phone: str) -> str:
+        """Summary of everything older than the recent turns (may lag by a few turns)"""
+        session = self._sessions.get(phone)
+        return session.summary if session else ''
+
+    def context_messages(self, phone: str, limit: int = None) -> List[Dict[str, str]]:
+        """Prompt messages: the summary as a system note, then the recent turns"""
+        messages = []
+        summary = self.summary(phone)
+        if summary:
+            messages.append({'role': 'system', 'content': f"Summary of the earlier conversation: {summary}"})
+        messages.extend(turn.as_message() for turn in self.recent(phone, limit))
+        return messages
+
+    def pop(self, phone: str):
+        with self._lock:
+            self._sessions.pop(phone, None)
+
+    # Background summarization
+
+    def _claim_refresh(self, session: Session) -> bool:
+        """Called with the lock held: should a refresh start for this session now?"""
+        if session.refreshing or len(session.unsummarized) < self.summarize_every:
+            return False
+        session.refreshing = True
+        return True
+
+    def _schedule(self, phone: str, session: Session):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='history-summary')
+        future = self._executor.submit(self._refresh, phone, session)
+        self._refreshes.add(future)
+        future.add_done_callback(self._refreshes.discard)
+
+    def _refresh(self, phone: str, session: Session):
+        with self._lock:
+            previous, turns = session.summary, session.unsummarized
+            session.unsummarized = []
+        try:
+            summary = self.summarizer(previous, turns)
+        except Exception as e:
+            # Never lose the turns: fall back to the extractive summary
+            print(f"History summary error: {e}")
+            self.stats['summary_errors'] += 1
+            summary = compact_summary(previous, turns)
+        with self._lock:
+            session.summary = summary
+            session.refreshing = False
+            self.stats['refreshes'] += 1
+            self.stats['summarized_turns'] += len(turns)
+            # More turns may have aged out while the summarizer was running
+            again = self._sessions.get(phone) is session and self._claim_refresh(session)
+        if again:
+            self._schedule(phone, session)
+
+    def wait(self, timeout: float = None):
+        """Block until in-flight summary refreshes are done (tests, shutdown)"""
+        while self._refreshes:
+            for future in list(self._refreshes):
+                future.result(timeout)
+
+    def close(self):
+        """Finish pending refreshes and stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,103 @@
+"""
+Interactive (button / list) replies for the WhatsApp Business API.
+
+Choices used to be offered as text ("Reply with 1, 2, or 3") and the
+answer parsed back from whatever the user typed, with an LLM fallback when
+the parse failed. A reply that offers choices is now a Reply: a str that
+also carries its Choice list. Plain-text channels (Twilio, the replay
+harness, history) just see the text. MetaAdapter sends the choices as
+reply buttons (up to 3 short titles) or a list message (up to 10 rows).
+
+The tapped choice comes back in the webhook as its id. Ids are
+"<kind>:<value>[:<ref>]", e.g. "option:2", "role:seeker" or
+"confirm:yes:<match_id>", and GPTECLABot.handle_choice routes them straight
+to the handler, with no intent extraction.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Graph API limits for interactive messages
+MAX_BUTTONS = 3
+MAX_BUTTON_TITLE = 20
+MAX_ROWS = 10
+MAX_ROW_TITLE = 24
+MAX_ROW_DESCRIPTION = 72
+MAX_BODY = 1024
+MAX_ID = 256
+
+OPTION = 'option'
+ROLE = 'role'
+CONFIRM = 'confirm'
+
+ROLE_PROVIDER = 'role:provider'
+ROLE_SEEKER = 'role:seeker'
+
+# Typed answers to a confirm question, accent-folded; phrases such as "not available",
+# "no problem" or "pas dispo" are listed whole so their words don't count on their own
+ACCEPT_WORDS = ['yes', 'yeah', 'yep', 'ok', 'okay', 'sure', 'available', 'can help', 'no problem',
+                'oui', 'ouais', 'd accord', 'dac', 'volontiers', 'dispo', 'disponible', 'je peux',
+                'avec plaisir', 'bien sur', 'pas de probleme', 'pas de souci']
+DECLINE_WORDS = ['no', 'nope', 'sorry', 'busy', 'unavailable', 'not available', 'cant', 'can t', 'cannot',
+                 'non', 'desole', 'desolee', 'pas dispo', 'pas disponible', 'indisponible', 'occupe', 'occupee',
+                 'je peux pas', 'je ne peux pas', 'pas possible', 'impossible']
+_ANSWERS = {**{word: True for word in ACCEPT_WORDS}, **{word: False for word in DECLINE_WORDS}}
+# Longest first, so a phrase wins over the word it starts with
+_ANSWER_RE = re.compile(r'\b(' + '|'.join(re.escape(w) for w in sorted(_ANSWERS, key=len, reverse=True)) + r')\b')
+
+
+@dataclass(slots=True)
+class Choice:
+    """One button or list row"""
+    id: str
+    title: str
+    description: str = ''
+
+
+class Reply(str):
+    """Reply text plus the choices to offer with it (`button` opens a list message)"""
+
+    def __new__(cls, text: str, choices: List[Choice], button: str = 'Options'):
+        reply = super().__new__(cls, text)
+        reply.choices = choices
+        reply.button = button
+        return reply
+
+
+def clip(text: str, limit: int) -> str:
+    """Shorten to the API's limit, marking the cut with '…'"""
+    text = text.strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def option_id(number: int) -> str:
+    return f"{OPTION}:{number}"
+
+
+def confirm_id(answer: str, match_id: str) -> str:
+    """'yes'/'no' for one pending match; the match id keeps an old message's buttons pointing at its request"""
+    choice_id = f"{CONFIRM}:{answer}:{match_id}"
+    return choice_id if len(choice_id) <= MAX_ID else f"{CONFIRM}:{answer}"
+
+
+def parse_id(choice_id: str) -> Tuple[str, str, Optional[str]]:
+    """'confirm:yes:<match_id>' -> ('confirm', 'yes', '<match_id>'); match ids may contain ':'"""
+    kind, _, rest = (choice_id or '').partition(':')
+    value, _, ref = rest.partition(':')
+    return kind, value, ref or None
+
+
+def parse_yes_no(text: str) -> Optional[bool]:
+    """A typed yes (True) or no (False) in English or French; None if it says neither"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ' '.join(re.findall(r'[a-z0-9]+', ''.join(c for c in text if not unicodedata.combining(c))))
+    match = _ANSWER_RE.search(text)  # the first answer given ("Yes, sorry for the wait" is a yes)
+    return _ANSWERS[match.group(1)] if match else None
+
+
+def uses_buttons(choices: List[Choice]) -> bool:
+    """Reply buttons when they fit, a list message otherwise"""
+    return (len(choices) <= MAX_BUTTONS and not any(choice.description for choice in choices)
+            and all(len(choice.title) <= MAX_BUTTON_TITLE for choice in choices))
@@ -0,0 +1,193 @@
+"""
+Offline English/French detection for incoming messages.
+
+Language used to be decided by the GPT extraction (LANGUAGE_SELECTION and
+FRENCH_GREETING intents) or by an explicit choice. The detector here is a
+character trigram model in plain Python: each language gets a table of
+smoothed log-probabilities, built once at import from the short campus
+samples below. Scoring a message is one dict lookup per trigram and
+language, a few microseconds for a typical WhatsApp message.
+
+A message only counts as evidence when it has at least two words, enough
+letters, and one language wins by a clear margin per trigram. "1", "ok",
+"10€", "Studio" and names return None, and the session keeps its current
+language.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+ORDER = 3
+MIN_WORDS = 2
+MIN_LETTERS = 5
+MIN_MARGIN = 0.25  # mean log-probability gap per trigram
+
+# Whole-message greetings and language choices, routed without an intent extraction
+GREETINGS = {
+    'en': {'hi', 'hello', 'hey', 'hiya', 'yo', 'good morning', 'good evening', 'hey there', 'hello there'},
+    'fr': {'bonjour', 'salut', 'bonsoir', 'coucou', 'bonjour à tous', 'salut à tous'},
+}
+LANGUAGE_CHOICES = {
+    'en': {'english', 'anglais', 'en', '🇬🇧', 'english please', 'in english'},
+    'fr': {'français', 'francais', 'french', 'fr', '🇫🇷', 'en français', 'in french'},
+}
+
+SAMPLES = {
+    'en': """
+hi, I need someone to help me with my laundry this evening
+can someone pick me up from the airport tomorrow morning
+I want someone to lend me a car for the weekend
+I need food delivery to the residence, I can pay for it
+is anyone available to translate a letter for the prefecture
+my laptop won't boot, I need IT help before my exam
+where is the cafeteria and what time does it open
+thanks a lot, that was really helpful
+I can help with cooking and grocery shopping on weekends
+I am available every day after six in the evening
+what services do you offer and how does this work
+could you help me move some boxes to my new room
+who can print my documents at the library tonight
+I need a cigarette, does anyone have one
+the wifi in my building is not working again
+I would like to register as a service provider
+my name is Emma and I live in the studio building
+how much do you usually charge for this service
+I'll discuss the price with the person directly
+is there a bus to the train station near the campus
+sorry I am busy right now, maybe later
+yes I am available, I can help you with that
+please tell me when someone can help
+I lost my keys near the entrance of the residence
+what are the opening hours of the administration office
+can you recommend a good place to eat near the school
+we need two people to carry a sofa upstairs
+I have a question about my student card
+looking for someone who speaks French to come with me to the bank
+hello everyone, how are you doing today
+the washing machine on the second floor is broken
+I need help with my homework in mathematics
+could you check if anyone can help with shopping
+the package was delivered to the wrong building
+good morning, is the gym open this weekend
+I want to book the common room for a birthday party
+when is the next event for new students
+""",
+    'fr': """
+bonjour, j'ai besoin de quelqu'un pour m'aider avec ma lessive ce soir
+est-ce que quelqu'un peut venir me chercher à l'aéroport demain matin
+je cherche quelqu'un qui peut me prêter une voiture ce week-end
+j'ai besoin d'une livraison de repas à la résidence, je peux payer
+quelqu'un est disponible pour traduire un courrier pour la préfecture
+mon ordinateur ne démarre plus, j'ai besoin d'aide informatique avant mon examen
+où se trouve la cafétéria et à quelle heure elle ouvre
+merci beaucoup, c'était vraiment utile
+je peux aider pour la cuisine et les courses le week-end
+je suis disponible tous les jours après dix-huit heures
+quels services proposez-vous et comment ça marche
+pouvez-vous m'aider à déplacer des cartons dans ma nouvelle chambre
+qui peut imprimer mes documents à la bibliothèque ce soir
+j'ai besoin d'une cigarette, quelqu'un en a une
+le wifi ne marche toujours pas dans mon bâtiment
+je voudrais m'inscrire comme prestataire de services
+je m'appelle Camille et j'habite dans le bâtiment des studios
+combien demandez-vous d'habitude pour ce service
+je verrai le prix directement avec la personne
+est-ce qu'il y a un bus pour la gare près du campus
+désolé je suis occupé en ce moment, peut-être plus tard
+oui je suis disponible, je peux vous aider pour ça
+dites-moi quand quelqu'un peut m'aider
+j'ai perdu mes clés près de l'entrée de la résidence
+quels sont les horaires du bureau de l'administration
+vous pouvez me conseiller un bon endroit pour manger près de l'école
+on a besoin de deux personnes pour monter un canapé
+j'ai une question sur ma carte étudiante
+je cherche quelqu'un qui parle anglais pour venir avec moi à la banque
+salut tout le monde, comment ça va aujourd'hui
+la machine à laver du deuxième étage est en panne
+j'ai besoin d'aide pour mes devoirs de mathématiques
+tu peux vérifier si quelqu'un peut aider pour les courses
+le colis a été livré dans le mauvais bâtiment
+bonjour, est-ce que la salle de sport est ouverte ce week-end
+je veux réserver la salle commune pour un anniversaire
+c'est quand le prochain événement pour les nouveaux étudiants
+""",
+}
+
+_NON_LETTERS = re.compile(r"[^\w]+|[\d_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase letters only, words separated (and framed) by single spaces"""
+    return ' ' + ' '.join(_NON_LETTERS.sub(' ', text.lower()).split()) + ' '
+
+
+def ngrams(text: str, order: int = ORDER):
+    return [text[i:i + order] for i in range(len(text) - order + 1)]
+
+
+class LanguageDetector:
+    """Character n-gram language identification with add-one smoothed log-probabilities"""
+
+    def __init__(self, samples: Dict[str, str], order: int = ORDER):
+        self.order = order
+        self.tables: Dict[str, Dict[str, float]] = {}
+        self.unseen: Dict[str, float] = {}
+        for language, text in samples.items():
+            counts = Counter(ngrams(normalize(text), order))
+            total = sum(counts.values()) + len(counts) + 1
+            self.tables[language] = {gram: math.log((count + 1) / total) for gram, count in counts.items()}
+            self.unseen[language] = math.log(1 / total)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Mean log-probability per n-gram for each language (higher is more likely)"""
+        return self._scores(normalize(text))
+
+    def _scores(self, normalized: str) -> Dict[str, float]:
+        grams = ngrams(normalized, self.order)
+        if not grams:
+            return {language: 0.0 for language in self.tables}
+        return {language: sum(table.get(gram, self.unseen[language]) for gram in grams) / len(grams)
+                for language, table in self.tables.items()}
+
+    def detect(self, text: str, min_words: int = MIN_WORDS, min_letters: int = MIN_LETTERS,
+               min_margin: float = MIN_MARGIN) -> Optional[str]:
+        """The most likely language, or None when the message is too short or too close to call"""
+        normalized = normalize(text)
+        words = normalized.split()
+        if len(words) < min_words or sum(map(len, words)) < min_letters:
+            return None
+        ranked = sorted(self._scores(normalized).items(), key=lambda item: item[1], reverse=True)
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < min_margin:
+            return None
+        return ranked[0][0]
+
+
+DETECTOR = LanguageDetector(SAMPLES)
+
+
+def detect_language(text: str) -> Optional[str]:
+    return DETECTOR.detect(text)
+
+
+def _phrase(text: str) -> str:
+    return ' '.join(re.sub(r"[!?.,👋🙂😊]+", ' ', text.lower()).split())
+
+
+def greeting_language(text: str) -> Optional[str]:
+    """'Bonjour!' -> 'fr', 'hey 👋' -> 'en'; None unless the whole message is a greeting"""
+    phrase = _phrase(text)
+    for language, greetings in GREETINGS.items():
+        if phrase in greetings:
+            return language
+    return None
+
+
+def chosen_language(text: str) -> Optional[str]:
+    """'Français', '🇬🇧', 'english please' -> the language; None for anything else"""
+    phrase = _phrase(text)
+    for language, choices in LANGUAGE_CHOICES.items():
+        if phrase in choices:
+            return language
+    return None
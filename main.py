@@ -1,94 +1,97 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-import uvicorn
-import json
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import sqlite3
-from datetime import datetime
 import os
 from dotenv import load_dotenv
-from gpt_bot_logic import GPTECLABot
+import channels
+import database
 
 load_dotenv()
 
-app = FastAPI(title="ECLA WhatsApp Service Matching Bot")
+# GPT-powered bot, created by the lifespan hook (see get_bot)
+bot = None
 
-# Initialize GPT-powered bot
-bot = GPTECLABot()
+def get_bot():
+    """Create the bot on first use; schema setup and seeding happen here, not at import"""
+    global bot
+    if bot is None:
+        from gpt_bot_logic import GPTECLABot
+        bot = GPTECLABot()
+    return bot
 
-# Database setup
-def init_db():
-    conn = sqlite3.connect('ecla_bot.db')
-    cursor = conn.cursor()
-    
-    # Users table (service providers)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT UNIQUE NOT NULL,
-            services TEXT NOT NULL,
-            location TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Requests table (service seekers)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS requests (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT NOT NULL,
-            service TEXT NOT NULL,
-            time TEXT NOT NULL,
-            location TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            matched_helper TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Database schema (once per process) and bot state
+    get_bot()
+    # Warm the OpenAI client off the event loop so startup isn't blocked by the import
+    warm_up = asyncio.get_running_loop().run_in_executor(None, bot.warm_up)
+    # Proactive provider notifications need the WhatsApp Business API; without it
+    # providers are only asked when they next message the bot
+    outbox_worker = None
+    if os.getenv('WHATSAPP_BUSINESS_TOKEN') and os.getenv('WHATSAPP_PHONE_NUMBER_ID'):
+        from match_orchestrator import MatchOrchestrator
+        from outbound_queue import DEFAULT_RATE, DEFAULT_SENT_RETENTION, OutboundQueue
+        from whatsapp_business_integration import WhatsAppBusinessAPI
+        # One client for notifications and Meta replies; every send goes through the persistent outbox
+        whatsapp = WhatsAppBusinessAPI()
+        whatsapp.outbox = OutboundQueue(bot.db_path, whatsapp.deliver,
+                                        rate=float(os.getenv('WHATSAPP_MAX_MPS', DEFAULT_RATE)),
+                                        sent_retention=float(os.getenv('WHATSAPP_SENT_RETENTION_SECONDS',
+                                                                       DEFAULT_SENT_RETENTION)))
+        outbox_worker = asyncio.create_task(whatsapp.outbox.run_forever())
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp)
+        channels.META.whatsapp = whatsapp
+    # Expire stale sessions/requests, send reminders and re-match once a second
+    ticker = asyncio.create_task(bot.scheduler.run_forever(1.0))
+    yield
+    ticker.cancel()
+    if outbox_worker:
+        # Unsent messages stay in the outbox and go out after the next start
+        outbox_worker.cancel()
+    if bot.orchestrator:
+        await bot.orchestrator.shutdown()
+        bot.orchestrator = None
+    await channels.META.aclose()
+    await warm_up
 
-# Initialize database
-init_db()
+app = FastAPI(title="ECLA WhatsApp Service Matching Bot", lifespan=lifespan)
 
 # Favicon route to prevent 404 errors
 @app.get("/favicon.ico")
 async def favicon():
     return HTMLResponse("", status_code=204)
 
-# WhatsApp webhook endpoint
+# WhatsApp webhook endpoint: Twilio (form posts) and Meta (JSON) share one pipeline
 @app.post("/webhook")
 async def whatsapp_webhook(request: Request):
+    adapter = channels.adapter_for(request.headers.get("content-type"))
+    if adapter is None:
+        raise HTTPException(status_code=415, detail="Expected a Twilio form post or a Meta JSON callback")
     try:
-        # Twilio sends form data, not JSON
-        form_data = await request.form()
-        
-        # Extract message data from Twilio format
-        message_text = form_data.get("Body", "")
-        user_phone = form_data.get("From", "")
+        # The adapter reads the body once and normalizes the sender
+        inbound = await adapter.parse(request)
         
-        if message_text and user_phone:
-            # Process the message using enhanced bot logic
-            response = bot.process_message(user_phone, message_text)
-            
-            # Return TwiML response for WhatsApp
-            return HTMLResponse(f"""
-            <?xml version="1.0" encoding="UTF-8"?>
-            <Response>
-                <Message>{response}</Message>
-            </Response>
-            """, media_type="application/xml")
+        # Process the messages using enhanced bot logic; the bot makes blocking OpenAI and
+        # SQLite calls, so it runs in the threadpool and cascade timers and sends keep going
+        replies = [await run_in_threadpool(get_bot().process_message, message.phone, message.text,
+                                           message.choice_id)
+                   for message in inbound]
         
-        return {"status": "received"}
+        # TwiML body for Twilio, Graph API sends for Meta
+        return await adapter.respond(inbound, replies)
     
     except Exception as e:
         print(f"Webhook error: {e}")
         return {"status": "error", "detail": str(e)}
 
+# Meta webhook subscription handshake
+@app.get("/webhook")
+async def verify_webhook(request: Request):
+    return channels.META.verify(request.query_params)
+
 # Simple web interface
 @app.get("/", response_class=HTMLResponse)
 async def home():
@@ -270,7 +273,8 @@ async def home():
 # API endpoint for stats
 @app.get("/api/stats")
 async def get_stats():
-    conn = sqlite3.connect('ecla_bot.db')
+    database.init_db()
+    conn = sqlite3.connect(database.DB_PATH)
     cursor = conn.cursor()
     
     # Get counts
@@ -285,12 +289,16 @@ async def get_stats():
     
     conn.close()
     
-    return {
+    stats = {
         "helpers_count": helpers_count,
         "requests_count": requests_count,
         "matches_count": matches_count
     }
+    if bot is not None:
+        stats["context_cache_hit_ratio"] = round(bot.db_context.hit_ratio, 3)
+    return stats
 
 if __name__ == "__main__":
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port) 
\ No newline at end of file
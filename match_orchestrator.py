@@ -0,0 +1,189 @@
+"""
+Proactive provider notification with a timeout-driven fallback cascade.
+
+When a seeker picks a provider, MatchOrchestrator messages that provider
+(WhatsApp interactive Yes/No buttons) and starts a timer on the event loop.
+A decline or a timeout moves on to the next candidate from the ranked list
+computed once when the request was made, so a provider who already said no
+is never asked again. Urgent requests are broadcast to several providers
+at once instead; the first to accept wins and the rest are told the
+request is taken. Each cascade is just a dict entry plus one
+`loop.call_later` handle, so thousands can run side by side on one loop.
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Tuple
+
+import interactive
+from channels import to_graph_phone
+from models import PendingMatch
+
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv('MATCH_CONFIRM_TIMEOUT_SECONDS', 10 * 60))
+
+
+class MatchOrchestrator:
+    """Notifies chosen providers and cascades through ranked candidates on decline/timeout"""
+
+    def __init__(self, bot, whatsapp=None, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+                 loop: asyncio.AbstractEventLoop = None):
+        if whatsapp is None:
+            from whatsapp_business_integration import WhatsAppBusinessAPI
+            whatsapp = WhatsAppBusinessAPI()
+        self.bot = bot
+        self.whatsapp = whatsapp
+        self.timeout_seconds = timeout_seconds
+        self.loop = loop or asyncio.get_running_loop()
+        self._timers: Dict[str, asyncio.TimerHandle] = {}  # match_id -> timeout
+        self._sends = set()  # in-flight notification tasks
+        self.stats = {'started': 0, 'notified': 0, 'accepted': 0, 'declined': 0,
+                      'timed_out': 0, 'exhausted': 0, 'broadcasts': 0, 'already_taken': 0, 'send_errors': 0}
+
+    # Entry points. The bot calls these from its (synchronous) handlers, which may
+    # run off the loop thread, so the work itself is always done on the loop.
+
+    def start(self, match_id: str):
+        """Ask the provider of a freshly created pending match"""
+        self.stats['started'] += 1
+        self.loop.call_soon_threadsafe(self._ask, match_id)
+
+    def broadcast(self, match_ids: List[str]):
+        """Ask every provider of an urgent request at once"""
+        self.stats['started'] += 1
+        self.stats['broadcasts'] += 1
+        for match_id in match_ids:
+            self.loop.call_soon_threadsafe(self._ask, match_id)
+
+    def broadcast_won(self, match_id: str, pending_match: PendingMatch, others: List[Tuple[str, PendingMatch]]):
+        """One provider claimed a broadcast: tell the seeker and everyone else it's taken"""
+        self.loop.call_soon_threadsafe(self._broadcast_won, match_id, pending_match, others)
+
+    def accepted(self, match_id: str, pending_match: PendingMatch):
+        """Provider said yes: stop the timer and tell the seeker"""
+        self.loop.call_soon_threadsafe(self._accepted, match_id, pending_match)
+
+    def declined(self, match_id: str, pending_match: PendingMatch):
+        """Provider said no: move on to the next candidate"""
+        self.loop.call_soon_threadsafe(self._declined, match_id, pending_match)
+
+    def notify(self, phone: str, text: str):
+        """Plain text message to anyone (reminders, expiry notices)"""
+        self.loop.call_soon_threadsafe(self._send_text, phone, text)
+
+    @property
+    def active(self) -> int:
+        """Cascades currently waiting on a provider"""
+        return len(self._timers)
+
+    def close(self):
+        """Cancel outstanding timers (pending matches stay until their TTL)"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+
+    async def drain(self):
+        """Wait for notifications already handed to the WhatsApp API"""
+        while self._sends:
+            await asyncio.gather(*list(self._sends), return_exceptions=True)
+
+    async def shutdown(self):
+        """Stop timers, flush notifications and close the WhatsApp client"""
+        self.close()
+        await self.drain()
+        if hasattr(self.whatsapp, 'aclose'):
+            await self.whatsapp.aclose()
+
+    # Loop-side implementation
+
+    def _ask(self, match_id: str):
+        pending_match = self.bot.pending_matches.get(match_id)
+        if pending_match is None:
+            return
+        self._arm(match_id)
+        provider = pending_match.provider_phone
+        body = self.bot.say(provider, 'provider_ask', service=pending_match.service, price=pending_match.price)
+        # The button ids name this match, so a tap answers it even if newer requests are pending
+        buttons = [interactive.Choice(interactive.confirm_id(answer, match_id), self.bot.say(provider, f'button_{answer}'))
+                   for answer in ('yes', 'no')]
+        self._send(self.whatsapp.send_interactive_message(
+            to_graph_phone(provider), self.bot.say(provider, 'provider_ask_header'), body, buttons))
+        self.stats['notified'] += 1
+
+    def _arm(self, match_id: str):
+        previous = self._timers.pop(match_id, None)
+        if previous:
+            previous.cancel()
+        self._timers[match_id] = self.loop.call_later(self.timeout_seconds, self._timed_out, match_id)
+
+    def _disarm(self, match_id: str):
+        timer = self._timers.pop(match_id, None)
+        if timer:
+            timer.cancel()
+
+    def _accepted(self, match_id: str, pending_match: PendingMatch):
+        self._disarm(match_id)
+        self.stats['accepted'] += 1
+        self._tell_seeker(pending_match, 'seeker_accepted', name=pending_match.provider_name,
+                          service=pending_match.service)
+
+    def _declined(self, match_id: str, pending_match: PendingMatch):
+        self._disarm(match_id)
+        self.stats['declined'] += 1
+        self._move_on(match_id, pending_match, 'reason_declined')
+
+    def _timed_out(self, match_id: str):
+        self._timers.pop(match_id, None)
+        pending_match = self.bot.pending_matches.pop(match_id, None)
+        if pending_match is None:
+            return  # answered (or expired) meanwhile
+        self.stats['timed_out'] += 1
+        self._move_on(match_id, pending_match, 'reason_timed_out')
+
+    def _move_on(self, match_id: str, pending_match: PendingMatch, reason: str):
+        """`reason` is the catalog key saying why the provider dropped out"""
+        if not pending_match.broadcast_id:
+            self._cascade(pending_match, reason)
+            return
+        # Broadcasts don't cascade: the seeker only hears back once everyone has passed
+        if self.bot.leave_broadcast(match_id, pending_match) is not None:
+            self.stats['exhausted'] += 1
+            self._tell_seeker(pending_match, 'broadcast_exhausted', service=pending_match.service)
+
+    def _broadcast_won(self, match_id: str, pending_match: PendingMatch, others: List[Tuple[str, PendingMatch]]):
+        self._accepted(match_id, pending_match)
+        for other_id, other in others:
+            self._disarm(other_id)
+            self.stats['already_taken'] += 1
+            self._send_text(other.provider_phone,
+                            self.bot.say(other.provider_phone, 'broadcast_already_taken', service=other.service))
+
+    def _cascade(self, previous: PendingMatch, reason: str):
+        """Hand the request to the next ranked candidate, or give up"""
+        candidates = previous.candidates
+        reason = self.bot.say(previous.seeker_phone, reason, name=previous.provider_name)
+        if not candidates:
+            self.stats['exhausted'] += 1
+            self._tell_seeker(previous, 'cascade_exhausted', reason=reason, service=previous.service)
+            return
+        provider, rest = candidates[0], candidates[1:]
+        match_id = self.bot.add_pending_match(previous.seeker_phone, provider, previous.service, rest)
+        self._tell_seeker(previous, 'cascade_next', reason=reason, name=provider.name, price=provider.price)
+        self._ask(match_id)
+
+    def _tell_seeker(self, pending_match: PendingMatch, key: str, **values):
+        """Message the seeker in their session language"""
+        self._send_text(pending_match.seeker_phone, self.bot.say(pending_match.seeker_phone, key, **values))
+
+    def _send_text(self, phone: str, text: str):
+        self._send(self.whatsapp.send_text_message(to_graph_phone(phone), text))
+
+    def _send(self, coroutine):
+        task = self.loop.create_task(coroutine)
+        self._sends.add(task)
+        task.add_done_callback(self._sent)
+
+    def _sent(self, task: asyncio.Task):
+        self._sends.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats['send_errors'] += 1
+            print(f"WhatsApp notification error: {task.exception()!r}")
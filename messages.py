@@ -0,0 +1,349 @@
+"""
+Message catalog: the bot's fixed replies in English and French.
+
+Templates use str.format fields ("{name}"). They are compiled once, at
+import: each one is parsed and checked against the English original (a
+translation may not use fields the English one doesn't provide), then
+bound to its format method. Rendering a reply is a dict lookup plus
+str.format_map, a few microseconds, instead of an f-string buried in a
+handler or a GPT call. Keys missing in a language fall back to English.
+"""
+
+import string
+from typing import Dict, Tuple
+
+DEFAULT_LANGUAGE = 'en'
+LANGUAGES = ('en', 'fr')
+_ALIASES = {'english': 'en', 'anglais': 'en', 'french': 'fr', 'français': 'fr', 'francais': 'fr'}
+
+NUMBER_EMOJIS = ["1️⃣", "2️⃣", "3️⃣"]
+# Short weekday names (Monday first) for availability labels
+DAY_LABELS = {
+    'en': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+    'fr': ['lun.', 'mar.', 'mer.', 'jeu.', 'ven.', 'sam.', 'dim.'],
+}
+
+CATALOG: Dict[str, Dict[str, str]] = {
+    'en': {
+        # Onboarding
+        'welcome': """Hey there! 👋 I'm your ECLA Services Assistant.
+
+🏠 **How it works:**
+• Need help? Tell me what you need (laundry, food, translation, etc.)
+• Want to help others? Say "I want to provide service" to register
+• I'll connect you with 3 neighbors who can help
+
+💡 **Popular services:** Laundry, food delivery, translation, shopping, tech help, prefecture assistance
+
+What can I help you with today?""",
+        'first_time_greeting': """Hey Neighbour! 👋 I'm your ECLA Community Services Assistant!
+
+🏠 **Whether it's finding someone for IT help, laundry, moving boxes, or anything in between, we make it super easy.**
+
+I made this very customizable using our previous requests from the ECLA group. Now you can find what you need here!
+
+**💡 Just say things like:**
+• "Hey I need someone to lend a car"
+• "I want someone to pickup/drop to airport" 
+• "I need food delivery to pickup"
+• "I need a cig" 😄
+
+It will redirect you to the right person who is available for this kind of service, and once people are accepted, they will be invited to the same chat and you can connect directly!
+
+**💪 Advantages:**
+• No more lost requests in the group
+• Direct connection with neighbors
+• Quick and easy matching
+• Perfect for ECLA community needs
+
+Just say your name and let's get started! 😊""",
+        'how_it_works': """🌟 **Hey Neighbour! Welcome to ECLA Community Services!**
+
+I noticed so many requests going unnoticed in our group, so I created this smart way to connect neighbors! 🤝
+
+**🏠 How it works:**
+
+🔄 **Smart Matching System**
+• You register as either a service provider OR service seeker
+• I store your data securely
+• When someone needs help, I find the perfect match
+• You get 3 options to choose from
+• Once accepted, you both get invited to chat directly!
+
+**💡 Popular ECLA Services:**
+• 🚗 "Hey I need someone to lend a car"
+• ✈️ "I want someone to pickup/drop to airport"
+• 🍕 "I need food delivery to pickup"
+• 🧺 "I need laundry help"
+• 💻 "I need IT help"
+• 🇫🇷 "I need French translation for prefecture"
+• 🛒 "I need shopping assistance"
+• 📦 "I need help moving boxes"
+
+**🎯 The Process:**
+1. Say your name
+2. Choose: Service Provider OR Service Seeker
+3. Tell me what you offer/need
+4. I'll match you with neighbors
+5. You choose who to connect with
+6. Chat directly - no middleman!
+
+**💪 Advantages:**
+• No more lost requests in the group
+• Direct connection with neighbors
+• Quick and easy matching
+• Perfect for ECLA community needs
+
+Ready to get started? Just say your name! 😊""",
+        'ask_name': "I'm your ECLA assistant! 👋 What's your name?",
+        'language_chosen': "Perfect! 🇬🇧 What's your name?",
+
+        # Registration
+        'ask_role': "Nice to meet you, {name}! 😊\n\nAre you a service provider or service seeker?\n\n🛠️ **Service Provider** - You help others (laundry, food, translation, shopping, tech help, etc.)\n🤝 **Service Seeker** - You need help from others\n\nJust tell me which one you are!",
+        'provider_services_given': "Perfect! 🛠️ You offer: {services}\n\nWhich accommodation type are you in? (Studio, Colocation, Hostel, etc.)",
+        'ask_services': "Great! 🛠️ What services can you offer?\n\nExamples: laundry, food delivery, translation, shopping, tech help, prefecture assistance, etc.\n\nJust tell me what you can help with!",
+        'ask_need': "Perfect! 🤝 What do you need help with?\n\nExamples: I need cigarettes, I need laundry help, I need someone to go to prefecture with me, etc.\n\nJust tell me what you need!",
+        'ask_need_default': "I'll help you find what you need! 🤝\n\nWhat do you need help with?\n\nExamples: I need cigarettes, I need laundry help, I need someone to go to prefecture with me, etc.\n\nJust tell me what you need!",
+        'ask_location': "Great! You offer: {services} 🛠️\n\nWhich accommodation type are you in? (Studio, Colocation, Hostel, etc.)",
+        'ask_availability': "Perfect! You're in {location} 📍\n\nWhat days are you available?\n\nExamples: Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday\n\nOr just say: 'Every day' or 'Weekends only'",
+        'ask_time_preference': "Great! You're available: {availability} 📅\n\nWhat time of day do you prefer?\n\n🌅 Morning (6 AM - 12 PM)\n🌞 Afternoon (12 PM - 6 PM)\n🌙 Evening (6 PM - 12 AM)\n\nOr say: 'Any time' or 'Flexible'",
+        'ask_pricing': "Perfect! You prefer: {time_preference} ⏰\n\nWhat's your typical charge for this service?\n\nExamples: 10€, 15-20€, Free, Negotiable\n\nOr just say: 'I'll discuss with the person'",
+        'profile_saved': "Perfect! You're all set! 🎉\n\n**Your Profile:**\n• Name: {name}\n• Services: {services}\n• Location: {location}\n• Available: {availability}\n• Time: {time_preference}\n• Pricing: {pricing}\n\nI'll connect you with neighbors when they need your help! 🤝",
+
+        # Requests and matches
+        'request_saved': "📝 I've saved your request!\n\nService: {service}\nTime: {time}\nLocation: {location}\n\nI'll notify you when someone becomes available!",
+        'matches_header': "Found {count} neighbors who can help with {service}:\n\n",
+        'match': "{number} **{name}** - {location}\n   ⭐ Rating: {rating}/5 ({total_services} services)\n   💰 Price: {price}€\n   📍 {available_label}\n\n",
+        'matches_footer': "Reply with 1, 2, or 3 to connect with your chosen neighbor! 🚀",
+        'choose_option': "Please reply with 1, 2, or 3 to select a provider.",
+        'request_expired': "Sorry, your request has expired. Please start a new request!",
+        'option_unavailable': "Sorry, that option is not available. Please choose 1, 2, or 3.",
+        'asking_provider': "Perfect! Let me check with {name}...\n\n🔄 Asking {name}...",
+        'broadcast_sent': "🚨 Urgent request! I've asked the {count} best neighbors for {service} at once.\n\nThe first one to accept is yours, I'll let you know right away! ⏱️",
+
+        # Provider confirmations
+        'no_pending_requests': "Sorry, I don't see any pending requests for you.",
+        'broadcast_taken': "Sorry, another neighbor already took this request. Thanks for offering! 🙏",
+        'broadcast_won': "Great! You got it, you're connected with the seeker for {service}.\n\n💰 Price: {price}€\n\nYou can discuss details directly in this chat! 🚀",
+        'match_accepted': "Great! You're connected with the seeker for {service}.\n\n💰 Price: {price}€\n\nYou can discuss details directly in this chat! 🚀",
+        'decline_thanks': "No problem, thanks for letting us know! 👍",
+        'alternatives_header': "Sorry, {name} is not available.\n\nWould you like to try:\n",
+        'alternative': "{number} {name} - {price}€\n",
+        'alternatives_footer': "\nReply with 1 or 2, or say 'no thanks' to cancel.",
+        'no_alternatives': "Sorry, no other providers are available right now. Try again later!",
+        'confirm_yes_no': "Please reply with 'yes' if you're available, or 'no' if you're busy.",
+
+        # Button and list titles (interactive.py; buttons are at most 20 characters)
+        'button_provider': "🛠️ Provider",
+        'button_seeker': "🤝 Seeker",
+        'button_yes': "✅ Yes, I can help",
+        'button_no': "❌ No, sorry",
+        'list_choose': "Choose",
+        'match_row': "⭐ {rating}/5 · {price}€ · {available_label}",
+
+        # Reminders and expiry notices
+        'still_there': "Still there? 👋 Just reply to pick up where we left off.",
+        'conversation_expired': "⏰ Our conversation timed out, so I've reset it. Say hi whenever you need something!",
+        'options_waiting': "Your {service} options are still waiting! Reply with 1, 2, or 3 to connect. ⏳",
+        'active_request_expired': "⏰ Your {service} request expired. Just ask again when you need help!",
+        'provider_available': "Good news! {name} can now help with {service}. Ask again to see your options! 🎉",
+
+        # Match orchestrator notifications (match_orchestrator.py)
+        'provider_ask_header': "ECLA request 🙋",
+        'provider_ask': "A neighbor needs help with {service} for {price}€. Are you available?",
+        'seeker_accepted': "🎉 {name} accepted your {service} request! You can now chat directly.",
+        'reason_declined': "{name} is not available",
+        'reason_timed_out': "{name} didn't answer in time",
+        'cascade_next': "{reason}, so I'm asking {name} ({price}€) instead... 🔄",
+        'cascade_exhausted': "Sorry, {reason} and nobody else is free for {service} right now. Try again later!",
+        'broadcast_exhausted': "Sorry, none of the neighbors I asked can help with {service} right now. Try again later!",
+        'broadcast_already_taken': "Thanks! The {service} request was already taken by another neighbor. 🙏",
+
+        # Availability labels in match lists (availability.availability_label)
+        'available_now': "Available now",
+        'available_at': "Available at {time}",
+        'available_tomorrow_at': "Available tomorrow at {time}",
+        'available_day_at': "Available {day} at {time}",
+        'available_from': "Available from {time}",
+        'available_tomorrow_from': "Available tomorrow from {time}",
+        'available_day_from': "Available {day} from {time}",
+    },
+    'fr': {
+        'welcome': """Bonjour! 👋 Je suis votre assistant ECLA!
+
+🏠 **Comment ça marche:**
+• Besoin d'aide? Dites-moi ce dont vous avez besoin (lessive, nourriture, traduction, etc.)
+• Voulez-vous aider les autres? Dites "Je veux fournir un service" pour vous inscrire
+• Je vous connecterai avec 3 voisins qui peuvent aider
+
+💡 **Services populaires:** Lessive, livraison de nourriture, traduction, courses, aide informatique, assistance préfecture
+
+Comment puis-je vous aider aujourd'hui?""",
+        'first_time_greeting': """Bonjour voisin ! 👋 Je suis votre assistant des services de la communauté ECLA !
+
+🏠 **Trouver quelqu'un pour de l'aide informatique, la lessive, un déménagement ou n'importe quoi d'autre : on vous simplifie la vie.**
+
+Je me suis inspiré des demandes passées du groupe ECLA. Vous pouvez maintenant trouver ce qu'il vous faut ici !
+
+**💡 Dites simplement par exemple :**
+• "J'ai besoin qu'on me prête une voiture"
+• "Quelqu'un peut m'emmener à l'aéroport ?"
+• "J'ai besoin qu'on récupère une livraison de repas"
+• "J'ai besoin d'une clope" 😄
+
+Je vous redirige vers la bonne personne disponible pour ce service, et une fois acceptés, vous êtes mis en relation dans la même conversation !
+
+**💪 Avantages :**
+• Plus de demandes perdues dans le groupe
+• Contact direct entre voisins
+• Mise en relation simple et rapide
+• Pensé pour la communauté ECLA
+
+Dites-moi votre prénom et c'est parti ! 😊""",
+        'how_it_works': """🌟 **Bonjour voisin ! Bienvenue aux services de la communauté ECLA !**
+
+Trop de demandes passaient inaperçues dans notre groupe, alors j'ai créé ce moyen simple de mettre les voisins en relation ! 🤝
+
+**🏠 Comment ça marche :**
+
+🔄 **Mise en relation intelligente**
+• Vous vous inscrivez comme prestataire OU comme demandeur
+• Vos données sont stockées en sécurité
+• Quand quelqu'un a besoin d'aide, je trouve la bonne personne
+• Vous avez 3 options au choix
+• Une fois accepté, vous discutez directement !
+
+**💡 Services ECLA populaires :**
+• 🚗 "J'ai besoin qu'on me prête une voiture"
+• ✈️ "Quelqu'un peut m'emmener / me chercher à l'aéroport ?"
+• 🍕 "J'ai besoin qu'on récupère une livraison de repas"
+• 🧺 "J'ai besoin d'aide pour la lessive"
+• 💻 "J'ai besoin d'aide informatique"
+• 🇬🇧 "J'ai besoin d'une traduction pour la préfecture"
+• 🛒 "J'ai besoin d'aide pour les courses"
+• 📦 "J'ai besoin d'aide pour porter des cartons"
+
+**🎯 Les étapes :**
+1. Dites votre prénom
+2. Choisissez : prestataire OU demandeur
+3. Dites ce que vous proposez / cherchez
+4. Je vous mets en relation avec des voisins
+5. Vous choisissez avec qui
+6. Vous discutez directement, sans intermédiaire !
+
+**💪 Avantages :**
+• Plus de demandes perdues dans le groupe
+• Contact direct entre voisins
+• Mise en relation simple et rapide
+• Pensé pour la communauté ECLA
+
+Prêt ? Dites-moi simplement votre prénom ! 😊""",
+        'ask_name': "Je suis votre assistant ECLA ! 👋 Comment vous appelez-vous ?",
+        'language_chosen': "Parfait! 🇫🇷 Comment vous appelez-vous?",
+
+        'ask_role': "Enchanté, {name} ! 😊\n\nVous proposez un service ou vous en cherchez un ?\n\n🛠️ **Prestataire** - Vous aidez les autres (lessive, repas, traduction, courses, informatique, etc.)\n🤝 **Demandeur** - Vous avez besoin d'aide\n\nDites-moi simplement lequel !",
+        'provider_services_given': "Parfait ! 🛠️ Vous proposez : {services}\n\nQuel type de logement avez-vous ? (Studio, Colocation, Hostel, etc.)",
+        'ask_services': "Super ! 🛠️ Quels services pouvez-vous proposer ?\n\nExemples : lessive, livraison de repas, traduction, courses, informatique, aide à la préfecture, etc.\n\nDites-moi ce que vous savez faire !",
+        'ask_need': "Parfait ! 🤝 De quoi avez-vous besoin ?\n\nExemples : j'ai besoin de cigarettes, d'aide pour la lessive, de quelqu'un pour m'accompagner à la préfecture, etc.\n\nDites-moi ce qu'il vous faut !",
+        'ask_need_default': "Je vais vous aider à trouver ce qu'il vous faut ! 🤝\n\nDe quoi avez-vous besoin ?\n\nExemples : j'ai besoin de cigarettes, d'aide pour la lessive, de quelqu'un pour m'accompagner à la préfecture, etc.\n\nDites-moi ce qu'il vous faut !",
+        'ask_location': "Super ! Vous proposez : {services} 🛠️\n\nQuel type de logement avez-vous ? (Studio, Colocation, Hostel, etc.)",
+        'ask_availability': "Parfait ! Vous êtes en {location} 📍\n\nQuels jours êtes-vous disponible ?\n\nExemples : lundi, mardi, mercredi, jeudi, vendredi, samedi, dimanche\n\nOu dites simplement : 'Tous les jours' ou 'Le week-end'",
+        'ask_time_preference': "Super ! Vous êtes disponible : {availability} 📅\n\nQuel moment de la journée préférez-vous ?\n\n🌅 Matin (6h - 12h)\n🌞 Après-midi (12h - 18h)\n🌙 Soir (18h - minuit)\n\nOu dites : 'N'importe quand' ou 'Flexible'",
+        'ask_pricing': "Parfait ! Vous préférez : {time_preference} ⏰\n\nCombien demandez-vous habituellement pour ce service ?\n\nExemples : 10€, 15-20€, Gratuit, À négocier\n\nOu dites simplement : 'Je verrai avec la personne'",
+        'profile_saved': "Parfait, tout est prêt ! 🎉\n\n**Votre profil :**\n• Nom : {name}\n• Services : {services}\n• Logement : {location}\n• Disponibilités : {availability}\n• Horaires : {time_preference}\n• Tarif : {pricing}\n\nJe vous mettrai en relation avec les voisins qui ont besoin de vous ! 🤝",
+
+        'request_saved': "📝 J'ai enregistré votre demande !\n\nService : {service}\nQuand : {time}\nOù : {location}\n\nJe vous préviens dès que quelqu'un est disponible !",
+        'matches_header': "{count} voisins peuvent vous aider pour {service} :\n\n",
+        'match': "{number} **{name}** - {location}\n   ⭐ Note : {rating}/5 ({total_services} services)\n   💰 Prix : {price}€\n   📍 {available_label}\n\n",
+        'matches_footer': "Répondez 1, 2 ou 3 pour contacter le voisin de votre choix ! 🚀",
+        'choose_option': "Répondez 1, 2 ou 3 pour choisir un prestataire.",
+        'request_expired': "Désolé, votre demande a expiré. Faites une nouvelle demande !",
+        'option_unavailable': "Désolé, cette option n'existe pas. Choisissez 1, 2 ou 3.",
+        'asking_provider': "Parfait ! Je demande à {name}...\n\n🔄 En attente de {name}...",
+        'broadcast_sent': "🚨 Demande urgente ! J'ai contacté les {count} meilleurs voisins pour {service} en même temps.\n\nLe premier qui accepte est à vous, je vous préviens tout de suite ! ⏱️",
+
+        'no_pending_requests': "Désolé, je ne vois aucune demande en attente pour vous.",
+        'broadcast_taken': "Désolé, un autre voisin a déjà pris cette demande. Merci de votre proposition ! 🙏",
+        'broadcast_won': "Super ! C'est pour vous, vous êtes en relation avec le demandeur pour {service}.\n\n💰 Prix : {price}€\n\nVous pouvez discuter des détails directement ici ! 🚀",
+        'match_accepted': "Super ! Vous êtes en relation avec le demandeur pour {service}.\n\n💰 Prix : {price}€\n\nVous pouvez discuter des détails directement ici ! 🚀",
+        'decline_thanks': "Pas de souci, merci de nous avoir prévenus ! 👍",
+        'alternatives_header': "Désolé, {name} n'est pas disponible.\n\nVoulez-vous essayer :\n",
+        'alternatives_footer': "\nRépondez 1 ou 2, ou dites 'non merci' pour annuler.",
+        'no_alternatives': "Désolé, aucun autre prestataire n'est disponible pour le moment. Réessayez plus tard !",
+        'confirm_yes_no': "Répondez 'oui' si vous êtes disponible, ou 'non' si vous êtes occupé.",
+
+        'button_provider': "🛠️ Prestataire",
+        'button_seeker': "🤝 Demandeur",
+        'button_yes': "✅ Oui, je peux",
+        'button_no': "❌ Non, désolé",
+        'list_choose': "Choisir",
+        'match_row': "⭐ {rating}/5 · {price}€ · {available_label}",
+
+        'still_there': "Toujours là ? 👋 Répondez simplement pour reprendre où nous en étions.",
+        'conversation_expired': "⏰ Notre conversation a expiré, je l'ai réinitialisée. Dites bonjour quand vous avez besoin de quelque chose !",
+        'options_waiting': "Vos options pour {service} vous attendent toujours ! Répondez 1, 2 ou 3 pour être mis en relation. ⏳",
+        'active_request_expired': "⏰ Votre demande pour {service} a expiré. Redemandez quand vous voulez !",
+        'provider_available': "Bonne nouvelle ! {name} peut maintenant vous aider pour {service}. Redemandez pour voir vos options ! 🎉",
+
+        'provider_ask_header': "Demande ECLA 🙋",
+        'provider_ask': "Un voisin a besoin d'aide pour {service} pour {price}€. Êtes-vous disponible ?",
+        'seeker_accepted': "🎉 {name} a accepté votre demande pour {service} ! Vous pouvez maintenant discuter directement.",
+        'reason_declined': "{name} n'est pas disponible",
+        'reason_timed_out': "{name} n'a pas répondu à temps",
+        'cascade_next': "{reason}, je demande donc à {name} ({price}€)... 🔄",
+        'cascade_exhausted': "Désolé, {reason} et personne d'autre n'est libre pour {service} pour le moment. Réessayez plus tard !",
+        'broadcast_exhausted': "Désolé, aucun des voisins contactés ne peut aider pour {service} pour le moment. Réessayez plus tard !",
+        'broadcast_already_taken': "Merci ! La demande pour {service} a déjà été prise par un autre voisin. 🙏",
+
+        'available_now': "Disponible maintenant",
+        'available_at': "Disponible à {time}",
+        'available_tomorrow_at': "Disponible demain à {time}",
+        'available_day_at': "Disponible {day} à {time}",
+        'available_from': "Disponible à partir de {time}",
+        'available_tomorrow_from': "Disponible demain à partir de {time}",
+        'available_day_from': "Disponible {day} à partir de {time}",
+    },
+}
+
+
+class Template:
+    """One compiled catalog entry"""
+    __slots__ = ('key', 'language', 'text', 'fields', 'render')
+
+    def __init__(self, key: str, language: str, text: str):
+        self.key = key
+        self.language = language
+        self.text = text
+        self.fields = frozenset(name for _, name, _, _ in string.Formatter().parse(text) if name)
+        # Constant replies skip formatting entirely
+        self.render = text.format_map if self.fields else (lambda values, text=text: text)
+
+
+def _compile(catalog: Dict[str, Dict[str, str]]) -> Dict[Tuple[str, str], Template]:
+    english = catalog[DEFAULT_LANGUAGE]
+    compiled = {}
+    for language, entries in catalog.items():
+        for key, text in entries.items():
+            if key not in english:
+                raise ValueError(f"{language} message {key!r} has no English original")
+            template = Template(key, language, text)
+            compiled[(language, key)] = template
+            if language != DEFAULT_LANGUAGE and not template.fields <= compiled[(DEFAULT_LANGUAGE, key)].fields:
+                raise ValueError(f"{language} message {key!r} uses fields the English one doesn't")
+    return compiled
+
+
+TEMPLATES = _compile(CATALOG)
+
+
+def normalize_language(language: str) -> str:
+    """'fr', 'French', 'français' -> 'fr'; anything unknown -> English"""
+    language = (language or '').strip().lower()
+    language = _ALIASES.get(language, language)
+    return language if language in LANGUAGES else DEFAULT_LANGUAGE
+
+
+def render(key: str, language: str = DEFAULT_LANGUAGE, **values) -> str:
+    """Render a catalog message, falling back to English if it isn't translated"""
+    template = TEMPLATES.get((language, key)) or TEMPLATES[(DEFAULT_LANGUAGE, key)]
+    return template.render(values)
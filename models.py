@@ -0,0 +1,62 @@
+"""
+Compact records for the bot's per-phone state.
+
+Every active user used to carry a handful of small dicts: a conversation
+state, the active request and its ranked matches (each an 8-key dict
+rebuilt by find_matches), and pending matches. A slotted dataclass stores
+its fields inline, without a per-instance `__dict__`, which is several
+times smaller than the equivalent dict. Timestamps are epoch floats
+rather than datetimes for the same reason. Conversation turns live in
+history.Turn.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class SessionState:
+    """Where a user is in the conversation flow, plus the answers collected so far"""
+    state: str = 'idle'
+    data: Dict = field(default_factory=dict)
+    last_message: Optional[float] = None
+    language: str = 'en'  # messages.LANGUAGES
+
+
+@dataclass(slots=True)
+class MatchCandidate:
+    """A provider offered for a request, priced for that request"""
+    name: str
+    phone: str
+    services: str
+    location: str
+    rating: float
+    total_services: int
+    price: float
+    availability: str = 'available'
+    available_label: str = ''
+
+
+@dataclass(slots=True)
+class ActiveRequest:
+    """A seeker choosing between the offered matches"""
+    service: str
+    when: Optional[datetime]
+    matches: List[MatchCandidate]
+    candidates: List[MatchCandidate]  # ranked fallbacks for declines and timeouts
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass(slots=True)
+class PendingMatch:
+    """A match awaiting the provider's yes/no"""
+    seeker_phone: str
+    provider_phone: str
+    provider_name: str
+    service: str
+    price: float
+    candidates: List[MatchCandidate] = field(default_factory=list)  # next ones to ask
+    broadcast_id: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
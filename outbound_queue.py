@@ -0,0 +1,288 @@
+"""
+Persistent outbound queue for WhatsApp Business API sends.
+
+Sends used to be awaited inline, with the response ignored. A 429 from Meta
+or a network error silently lost the message, and nothing stopped a burst
+of broadcasts from going over the number's throughput limit. Now
+WhatsAppBusinessAPI hands every payload to an OutboundQueue.
+- Each payload is stored as an `outbound_messages` row before anything is
+  sent, so a restart doesn't lose it.
+- A worker claims due rows in batches and sends each batch through the
+  shared HTTP client: different recipients concurrently, each recipient's
+  rows one at a time in id order, so a split text stays ahead of its
+  interactive follow-up. When a row has to be retried, the recipient's
+  later rows wait for it, in this batch and in the claims after it. A token bucket per phone number ID
+  paces the sends (Meta allows about 80 messages/s per number by default).
+- Rate-limit answers (429 or Meta's throttling codes), 5xx and transport
+  errors are retried with jittered exponential backoff. On a rate limit
+  the number's bucket is paused too.
+- Other 4xx answers (bad payload, unknown recipient) are dead-lettered
+  straight away. So are messages that run out of attempts. Dead rows stay
+  in the table with their last error.
+- Sent rows are only kept for `sent_retention` seconds (a week by
+  default); the worker deletes older ones every PRUNE_INTERVAL.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import database
+
+DEFAULT_RATE = 80.0  # messages per second per phone number ID
+DEFAULT_BURST = 80
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 300.0
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_SENT_RETENTION = 7 * 24 * 3600.0
+PRUNE_INTERVAL = 3600.0  # seconds between sweeps of old sent rows
+
+# Graph API error codes that mean "slow down" rather than "this message is wrong"
+RATE_LIMIT_CODES = {4, 80007, 130429, 131048, 131056}
+
+# deliver(phone_number_id, payload) -> (HTTP status, response JSON, Retry-After seconds or None)
+Deliver = Callable[[str, Dict], Awaitable[Tuple[int, Dict, Optional[float]]]]
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `capacity` banked"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Take a token; returns how long to wait before using it (0 if one was available)"""
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Hold all sends for `seconds` (the API said we're over the limit); repeated pauses don't add up"""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def backoff(attempts: int, base: float = DEFAULT_BASE_DELAY, cap: float = DEFAULT_MAX_DELAY) -> float:
+    """Exponential backoff with jitter: somewhere in [d/2, d], d = base * 2^(attempts-1)"""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class OutboundQueue:
+    """SQLite-backed send queue with per-number rate limiting, retries and dead-lettering"""
+
+    def __init__(self, db_path: str, deliver: Deliver, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, batch_size: int = DEFAULT_BATCH_SIZE,
+                 sent_retention: float = DEFAULT_SENT_RETENTION):
+        self.deliver = deliver
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.sent_retention = sent_retention
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        database.init_db(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {'enqueued': 0, 'sent': 0, 'retried': 0, 'rate_limited': 0, 'dead': 0, 'pruned': 0}
+
+    # Producer side
+
+    def enqueue(self, phone_number_id: str, payload: Dict) -> int:
+        """Persist a message for sending; returns its row id (safe from any thread)"""
+        now = time.time()
+        with self._lock, self._conn:
+            row_id = self._conn.execute(
+                "INSERT INTO outbound_messages (phone_number_id, recipient, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)", (phone_number_id, payload.get('to'), json.dumps(payload), now, now)).lastrowid
+        self.stats['enqueued'] += 1
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return row_id
+
+    # Worker side
+
+    def recover(self) -> int:
+        """Requeue messages a crashed worker had claimed but not finished"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE outbound_messages SET status = 'queued' WHERE status = 'sending'").rowcount
+
+    def _claim(self) -> List[Tuple[int, str, Dict, int]]:
+        """Due rows in id order, skipping recipients with an older row still in flight or waiting to retry"""
+        now = time.time()
+        with self._lock, self._conn:
+            # Claimed in id order, so LIMIT never takes a recipient's newer row without the older ones
+            rows = self._conn.execute('''
+                UPDATE outbound_messages SET status = 'sending', attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM outbound_messages AS m WHERE status = 'queued' AND next_attempt_at <= ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM outbound_messages AS o
+                        WHERE o.phone_number_id = m.phone_number_id AND o.recipient IS m.recipient AND o.id < m.id
+                        AND (o.status = 'sending' OR (o.status = 'queued' AND o.next_attempt_at > ?)))
+                    ORDER BY id LIMIT ?)
+                RETURNING id, phone_number_id, payload, attempts
+            ''', (now, now, self.batch_size)).fetchall()
+        return sorted((row_id, number, json.loads(payload), attempts) for row_id, number, payload, attempts in rows)
+
+    def _bucket(self, phone_number_id: str) -> TokenBucket:
+        bucket = self.buckets.get(phone_number_id)
+        if bucket is None:
+            bucket = self.buckets[phone_number_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def _send(self, row_id: int, phone_number_id: str, payload: Dict, attempts: int):
+        """One delivery attempt -> the row's (status, next_attempt_at, last_error, message_id)"""
+        bucket = self._bucket(phone_number_id)
+        wait = bucket.delay()
+        if wait:
+            await asyncio.sleep(wait)
+        try:
+            status, body, retry_after = await self.deliver(phone_number_id, payload)
+        except Exception as e:
+            return self._retry(attempts, f"{type(e).__name__}: {e}")
+        error = body.get('error') if isinstance(body, dict) else None
+        if 200 <= status < 300 and not error:
+            self.stats['sent'] += 1
+            message_id = (body.get('messages') or [{}])[0].get('id')
+            return 'sent', None, None, message_id
+        reason = f"HTTP {status}" + (f": {error['message']}" if error and error.get('message') else "")
+        if status == 429 or (error or {}).get('code') in RATE_LIMIT_CODES:
+            self.stats['rate_limited'] += 1
+            delay = max(retry_after or 0, backoff(attempts, self.base_delay, self.max_delay))
+            bucket.pause(delay)
+            return self._retry(attempts, reason, delay)
+        if status >= 500:
+            return self._retry(attempts, reason, retry_after)
+        self.stats['dead'] += 1
+        return 'dead', None, reason, None
+
+    def _retry(self, attempts: int, reason: str, delay: float = None):
+        if attempts >= self.max_attempts:
+            self.stats['dead'] += 1
+            return 'dead', None, reason, None
+        self.stats['retried'] += 1
+        delay = delay or backoff(attempts, self.base_delay, self.max_delay)
+        return 'queued', time.time() + delay, reason, None
+
+    async def _send_in_order(self, rows: List[Tuple[int, str, Dict, int]], held: set):
+        """Send one recipient's rows one after another, oldest first; rows behind a retry wait with it"""
+        outcomes = []
+        retry_at = retry_id = None
+        for row in rows:
+            if retry_at is not None:
+                held.add(row[0])
+                outcomes.append(('queued', retry_at, f"waiting for message {retry_id}", None))
+                continue
+            outcome = await self._send(*row)
+            if outcome[0] == 'queued':
+                retry_at, retry_id = outcome[1], row[0]
+            outcomes.append(outcome)
+        return outcomes
+
+    async def process_batch(self) -> int:
+        """Claim up to batch_size due messages and send them, recipients concurrently but each in order"""
+        batch = self._claim()
+        if not batch:
+            return 0
+        # A split text and its interactive follow-up must not overtake each other
+        by_recipient: Dict[Tuple[str, Optional[str]], List] = {}
+        for row in batch:
+            by_recipient.setdefault((row[1], row[2].get('to')), []).append(row)
+        held = set()  # rows that never went out this round; their attempt isn't counted
+        results = await asyncio.gather(*(self._send_in_order(rows, held) for rows in by_recipient.values()))
+        outcomes = {row[0]: outcome for rows, group in zip(by_recipient.values(), results)
+                    for row, outcome in zip(rows, group)}
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany('''
+                UPDATE outbound_messages SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at),
+                    last_error = ?, message_id = ?, sent_at = CASE WHEN ? = 'sent' THEN ? END,
+                    attempts = attempts - ?
+                WHERE id = ?
+            ''', [(status, next_at, error, message_id, status, now, row_id in held, row_id)
+                  for row_id, (status, next_at, error, message_id) in outcomes.items()])
+        return len(batch)
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next queued message is due (None if nothing is queued)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbound_messages WHERE status = 'queued'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def prune_sent(self, now: float = None) -> int:
+        """Delete sent messages older than the retention window; dead letters are kept for inspection"""
+        cutoff = (now or time.time()) - self.sent_retention
+        with self._lock, self._conn:
+            pruned = self._conn.execute(
+                "DELETE FROM outbound_messages WHERE status = 'sent' AND sent_at < ?", (cutoff,)).rowcount
+        self.stats['pruned'] += pruned
+        return pruned
+
+    async def run_forever(self, idle_poll: float = 5.0, prune_interval: float = PRUNE_INTERVAL):
+        """Worker loop: send due messages, then sleep until the next one is due or a new one arrives"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.recover()
+        next_prune = time.monotonic()
+        while True:
+            if time.monotonic() >= next_prune:
+                self.prune_sent()
+                next_prune = time.monotonic() + prune_interval
+            if await self.process_batch():
+                continue
+            self._wakeup.clear()
+            due = self.next_due_in()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), idle_poll if due is None else min(due, idle_poll))
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain(self, timeout: float = None):
+        """Send until nothing is queued any more (tests, benchmarks, shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if await self.process_batch():
+                continue
+            due = self.next_due_in()
+            if due is None or (deadline is not None and time.monotonic() + due > deadline):
+                return
+            await asyncio.sleep(due)
+
+    # Inspection
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM outbound_messages GROUP BY status"))
+
+    def dead_letters(self, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, phone_number_id, payload, attempts, last_error FROM outbound_messages "
+                "WHERE status = 'dead' ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [{'id': row_id, 'phone_number_id': number, 'payload': json.loads(payload),
+                 'attempts': attempts, 'last_error': error} for row_id, number, payload, attempts, error in rows]
+
+    def close(self):
+        self._conn.close()
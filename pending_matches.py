@@ -0,0 +1,115 @@
+"""
+Pending match confirmations with a per-provider index and expiry.
+
+PendingMatches behaves like the old `pending_matches` dict (keyed by
+"{seeker}_{provider}_{service}") but also indexes entries by provider
+phone, so checking whether an inbound message is a provider confirmation
+is a dict lookup instead of a scan over every outstanding match. Entries
+expire after a TTL and are purged lazily from a heap on access.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from models import PendingMatch
+
+DEFAULT_TTL_SECONDS = 30 * 60
+
+
+class PendingMatches(MutableMapping):
+    """match_id -> PendingMatch, with a provider_phone index and TTL expiry (thread-safe)"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 on_expire: Optional[Callable[[str, PendingMatch], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.on_expire = on_expire
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._matches: Dict[str, PendingMatch] = {}
+        self._deadlines: Dict[str, float] = {}
+        # provider phone -> match ids in insertion order (dict used as an ordered set)
+        self._by_provider: Dict[str, Dict[str, None]] = {}
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+
+    def __setitem__(self, match_id: str, match: PendingMatch):
+        self.purge_expired()
+        with self._lock:
+            if match_id in self._matches:
+                self._unlink(match_id)
+            deadline = self.clock() + self.ttl_seconds
+            self._matches[match_id] = match
+            self._deadlines[match_id] = deadline
+            self._by_provider.setdefault(match.provider_phone, {})[match_id] = None
+            heapq.heappush(self._expiry_heap, (deadline, next(self._sequence), match_id))
+
+    def __getitem__(self, match_id: str) -> PendingMatch:
+        return self._matches[match_id]
+
+    def __delitem__(self, match_id: str):
+        with self._lock:
+            if match_id not in self._matches:
+                raise KeyError(match_id)
+            self._unlink(match_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._matches))
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def _unlink(self, match_id: str) -> PendingMatch:
+        """Remove an entry from every index (its heap slot is skipped lazily)"""
+        match = self._matches.pop(match_id)
+        del self._deadlines[match_id]
+        provider_matches = self._by_provider.get(match.provider_phone)
+        if provider_matches is not None:
+            provider_matches.pop(match_id, None)
+            if not provider_matches:
+                del self._by_provider[match.provider_phone]
+        # Keep stale heap slots from piling up when matches resolve long before their TTL
+        if len(self._expiry_heap) > 2 * len(self._matches) + 64:
+            self._expiry_heap = [(deadline, next(self._sequence), mid) for mid, deadline in self._deadlines.items()]
+            heapq.heapify(self._expiry_heap)
+        return match
+
+    def purge_expired(self, now: float = None) -> List[Tuple[str, PendingMatch]]:
+        """Drop entries past their TTL; amortized O(log n) per expired entry"""
+        now = self.clock() if now is None else now
+        expired = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                deadline, _, match_id = heapq.heappop(self._expiry_heap)
+                # Skip heap slots left behind by deleted or re-added entries
+                if self._deadlines.get(match_id) == deadline:
+                    expired.append((match_id, self._unlink(match_id)))
+        if self.on_expire:
+            for match_id, match in expired:
+                self.on_expire(match_id, match)
+        return expired
+
+    def has_provider(self, provider_phone: str) -> bool:
+        """O(1): does this phone have any match waiting for its confirmation?"""
+        self.purge_expired()
+        return provider_phone in self._by_provider
+
+    def for_provider(self, provider_phone: str) -> List[Tuple[str, PendingMatch]]:
+        """All live pending matches for a provider, oldest first"""
+        self.purge_expired()
+        with self._lock:
+            return [(match_id, self._matches[match_id]) for match_id in self._by_provider.get(provider_phone, ())]
+
+    def first_for_provider(self, provider_phone: str) -> Optional[Tuple[str, PendingMatch]]:
+        """The provider's oldest pending match, or None"""
+        self.purge_expired()
+        with self._lock:
+            match_ids = self._by_provider.get(provider_phone)
+            if not match_ids:
+                return None
+            match_id = next(iter(match_ids))
+            return match_id, self._matches[match_id]
@@ -0,0 +1,124 @@
+"""
+Table-driven pricing for matches.
+
+Prices used to come from a keyword if/elif chain run for every candidate
+of every request, and the short match list showed made-up numbers (2€,
+3€, 9€) that had nothing to do with them. A quote is now:
+
+    provider rate x demand(service category, hour of week)
+
+- The provider rate is what they declared when registering ("10€",
+  "5-8€", "free"; see profiles.parse_pricing) or, when they didn't, the
+  category's base price (service_taxonomy.SERVICES) adjusted for their
+  rating. It only depends on the profile, so PricingEngine memoizes it per
+  (category, provider), up to MAX_RATES entries, and recomputes it when
+  the profile changes.
+- DEMAND lists per-category multipliers by time of day and at weekends.
+  They are expanded at import into one 168-entry hour-of-week table per
+  category. Requests with no particular time pay no premium, and a
+  declared price range bounds the result.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import service_taxonomy
+
+GENERAL = 'general'
+RATING_STEP = 0.1  # +10% per star below 5
+MAX_RATES = 10_000  # memoized (category, provider) rates kept, least recently used dropped first
+
+# (band, first hour, last hour + 1)
+TIME_BANDS = (('night', 0, 7), ('morning', 7, 12), ('afternoon', 12, 18), ('evening', 18, 24))
+DEFAULT_DEMAND = {'night': 1.25, 'morning': 1.0, 'afternoon': 1.0, 'evening': 1.1, 'weekend': 1.0}
+# Per-category overrides of DEFAULT_DEMAND
+DEMAND: Dict[str, Dict[str, float]] = {
+    'food_delivery': {'morning': 0.9, 'afternoon': 1.1, 'evening': 1.25, 'night': 1.3, 'weekend': 1.1},
+    'transport': {'night': 1.5, 'morning': 1.15, 'weekend': 1.1},
+    'shopping': {'evening': 1.15, 'night': 1.4, 'weekend': 1.15},
+    'laundry': {'evening': 1.0, 'night': 1.0},  # machines are free at any hour
+    'printing': {'morning': 1.2, 'evening': 1.0},  # before class
+    'tutoring': {'evening': 1.2, 'night': 1.2, 'weekend': 0.9},
+    'translation': {'evening': 1.0, 'weekend': 1.0},  # paperwork is rarely done at night anyway
+}
+
+
+def _hourly(key: str) -> Tuple[float, ...]:
+    demand = {**DEFAULT_DEMAND, **DEMAND.get(key, {})}
+    by_hour = [1.0] * 24
+    for name, start, end in TIME_BANDS:
+        for hour in range(start, end):
+            by_hour[hour] = demand[name]
+    # Monday = day 0, as in availability.minute_of_week
+    return tuple(round(by_hour[hour] * (demand['weekend'] if day >= 5 else 1.0), 4)
+                 for day in range(7) for hour in range(24))
+
+
+DEMAND_TABLES: Dict[str, Tuple[float, ...]] = {key: _hourly(key) for key in (*service_taxonomy.BY_KEY, GENERAL)}
+
+
+@lru_cache(maxsize=4096)
+def category(service: str) -> str:
+    """Taxonomy key the price table uses for a requested service ('general' if unknown)"""
+    found = service_taxonomy.canonical(service)
+    return found.key if found else GENERAL
+
+
+def demand(key: str, when: Optional[datetime]) -> float:
+    """Demand multiplier for a category at the hour of `when` (1.0 when the time is flexible)"""
+    if when is None:
+        return 1.0
+    return DEMAND_TABLES[key][when.weekday() * 24 + when.hour]
+
+
+def base_price(key: str) -> float:
+    service = service_taxonomy.BY_KEY.get(key)
+    return service.base_price if service else service_taxonomy.DEFAULT_BASE_PRICE
+
+
+def provider_rate(key: str, profile) -> Tuple[float, float, float]:
+    """(rate, lowest, highest) a provider charges for a category, before demand"""
+    if profile.price_min is not None:
+        return profile.price_min, profile.price_min, profile.price_max
+    rating = profile.rating if profile.rating is not None else 5.0
+    # Higher rating = lower price
+    return base_price(key) * (1 + (5.0 - rating) * RATING_STEP), 0.0, math.inf
+
+
+class PricingEngine:
+    """Quotes for (service, provider, time), with provider rates memoized until their profile changes"""
+
+    def __init__(self, max_rates: int = MAX_RATES):
+        self._lock = threading.Lock()
+        self.max_rates = max_rates
+        # (category, phone) -> (profile the rate was computed from, rate), least recently used first
+        self._rates: "OrderedDict[Tuple[str, str], Tuple[object, Tuple[float, float, float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def rate(self, key: str, profile) -> Tuple[float, float, float]:
+        # ProfileStore replaces a profile object when its row changes, so identity means unchanged
+        with self._lock:
+            cached = self._rates.get((key, profile.phone))
+            if cached is not None and cached[0] is profile:
+                self._rates.move_to_end((key, profile.phone))
+                self.hits += 1
+                return cached[1]
+        rate = provider_rate(key, profile)
+        with self._lock:
+            self.misses += 1
+            self._rates[(key, profile.phone)] = (profile, rate)
+            self._rates.move_to_end((key, profile.phone))
+            while len(self._rates) > self.max_rates:
+                self._rates.popitem(last=False)
+        return rate
+
+    def quote(self, service: str, profile, when: Optional[datetime] = None) -> float:
+        """Price in euros for `profile` doing `service` at `when` (None = flexible)"""
+        key = category(service)
+        rate, lowest, highest = self.rate(key, profile)
+        return round(min(max(rate * demand(key, when), lowest), highest), 2)
@@ -0,0 +1,311 @@
+"""
+Provider profiles for the ECLA bot.
+
+All providers live in the `users` table (providers registered through the
+GPT flow used to go to `users_extended`, where matching never saw them).
+ProfileStore is a read-through, in-memory cache in front of that table:
+reads are served from memory, writes go to SQLite and invalidate the
+affected entry.
+"""
+
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import database
+from availability import AvailabilityIndex, build_windows, decode_windows, encode_windows
+from campus import ProximityIndex
+from service_taxonomy import service_mask
+
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ALL_DAYS = 0b1111111
+WEEKDAYS = 0b0011111
+WEEKENDS = 0b1100000
+
+# English and French day names / abbreviations -> weekday index (Monday = 0)
+DAY_ALIASES = {}
+for index, names in enumerate([
+    ('monday', 'mon', 'lundi', 'lun'),
+    ('tuesday', 'tue', 'tues', 'mardi', 'mar'),
+    ('wednesday', 'wed', 'mercredi', 'mer'),
+    ('thursday', 'thu', 'thur', 'thurs', 'jeudi', 'jeu'),
+    ('friday', 'fri', 'vendredi', 'ven'),
+    ('saturday', 'sat', 'samedi', 'sam'),
+    ('sunday', 'sun', 'dimanche', 'dim'),
+]):
+    for name in names:
+        DAY_ALIASES[name] = index
+
+_DAY_PATTERN = '|'.join(sorted(DAY_ALIASES, key=len, reverse=True))
+DAY_RANGE_RE = re.compile(rf'\b({_DAY_PATTERN})s?\b\s*(?:-|–|to|till|until|through|à|au)\s*\b({_DAY_PATTERN})s?\b')
+DAY_RE = re.compile(rf'\b({_DAY_PATTERN})s?\b')
+
+TIME_PREFERENCES = {
+    'morning': ['morning', 'matin', 'am', 'early'],
+    'afternoon': ['afternoon', 'après-midi', 'apres-midi', 'midday', 'lunch'],
+    'evening': ['evening', 'night', 'soir', 'soirée', 'tonight', 'pm', 'late'],
+}
+
+PRICE_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:€|eur|euros?)?(?:\s*(?:-|–|to|à)\s*(\d+(?:[.,]\d+)?))?')
+
+
+def parse_available_days(text: str) -> int:
+    """Weekday bitmask (bit 0 = Monday) from free text like 'Weekends only' or 'Mon-Fri'"""
+    text = (text or '').lower()
+    if not text.strip() or any(word in text for word in ['every day', 'everyday', 'any day', 'daily', 'all week', 'tous les jours', 'anytime', 'flexible']):
+        return ALL_DAYS
+
+    mask = 0
+    if 'weekend' in text or 'week-end' in text:
+        mask |= WEEKENDS
+    if 'weekday' in text or 'semaine' in text:
+        mask |= WEEKDAYS
+
+    for start, end in DAY_RANGE_RE.findall(text):
+        first, last = DAY_ALIASES[start], DAY_ALIASES[end]
+        day = first
+        while True:
+            mask |= 1 << day
+            if day == last:
+                break
+            day = (day + 1) % 7
+    for name in DAY_RE.findall(text):
+        mask |= 1 << DAY_ALIASES[name]
+
+    return mask or ALL_DAYS
+
+
+def describe_days(mask: int) -> str:
+    """Human readable form of a weekday bitmask"""
+    if mask == ALL_DAYS:
+        return 'Every day'
+    if mask == WEEKENDS:
+        return 'Weekends'
+    if mask == WEEKDAYS:
+        return 'Weekdays'
+    return ', '.join(DAY_NAMES[i].capitalize() for i in range(7) if mask & (1 << i))
+
+
+def parse_time_preference(text: str) -> str:
+    """Canonical time preference: 'any' or a comma list of morning/afternoon/evening"""
+    words = set(re.findall(r"[\w\-éè]+", (text or '').lower()))
+    found = [slot for slot, keywords in TIME_PREFERENCES.items() if words & set(keywords)]
+    if not found or len(found) == len(TIME_PREFERENCES):
+        return 'any'
+    return ','.join(found)
+
+
+def parse_pricing(text: str) -> Tuple[Optional[float], Optional[float]]:
+    """(min, max) price in euros; (0, 0) for free, (None, None) when negotiable"""
+    text = (text or '').lower()
+    if any(word in text for word in ['free', 'gratuit', 'nothing', 'no charge']):
+        return 0.0, 0.0
+    match = PRICE_RE.search(text)
+    if not match:
+        return None, None
+    low = float(match.group(1).replace(',', '.'))
+    high = float(match.group(2).replace(',', '.')) if match.group(2) else low
+    return min(low, high), max(low, high)
+
+
+def service_terms(service: str) -> List[str]:
+    """Lowercase terms a provider's services must mention to match a requested service"""
+    service_lower = (service or 'general').lower()
+    if 'translation' in service_lower or 'prefecture' in service_lower or 'french' in service_lower:
+        return ['translation', 'french', 'prefecture']
+    return [service_lower]
+
+
+@dataclass
+class ProviderProfile:
+    """A registered service provider (one row of `users`)"""
+    phone: str
+    name: str
+    services: str
+    location: str
+    availability: str = 'available'
+    rating: float = 5.0
+    total_services: int = 0
+    available_days: int = ALL_DAYS
+    availability_note: str = ''
+    time_preference: str = 'any'
+    pricing: str = ''
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    windows: Tuple[Tuple[int, int], ...] = ()
+    services_lower: str = field(init=False, repr=False, compare=False)
+    service_mask: int = field(init=False, repr=False, compare=False)  # service_taxonomy ids offered
+
+    def __post_init__(self):
+        self.services_lower = (self.services or '').lower()
+        self.service_mask = service_mask(self.services)
+        if not self.windows:
+            self.windows = build_windows(self.available_days, self.time_preference, self.availability_note)
+
+    @classmethod
+    def from_registration(cls, phone: str, user_data: Dict) -> 'ProviderProfile':
+        """Build a profile from the GPT registration flow's collected answers"""
+        availability_note = user_data.get('availability', '')
+        pricing = user_data.get('pricing', '')
+        price_min, price_max = parse_pricing(pricing)
+        return cls(
+            phone=phone,
+            name=user_data.get('name', ''),
+            services=user_data.get('services', ''),
+            location=user_data.get('location', ''),
+            available_days=parse_available_days(availability_note),
+            availability_note=availability_note,
+            time_preference=parse_time_preference(user_data.get('time_preference', '')),
+            pricing=pricing,
+            price_min=price_min,
+            price_max=price_max,
+        )
+
+
+PROFILE_COLUMNS = [
+    'phone', 'name', 'services', 'location', 'availability', 'rating', 'total_services',
+    'available_days', 'availability_note', 'time_preference', 'pricing', 'price_min', 'price_max',
+    'availability_windows',
+]
+_SELECT = f"SELECT {', '.join(PROFILE_COLUMNS)} FROM users"
+
+
+def _row_to_profile(row) -> ProviderProfile:
+    *fields, windows = row
+    profile = ProviderProfile(*fields, windows=decode_windows(windows))
+    if profile.available_days is None:
+        profile.available_days = ALL_DAYS
+    profile.time_preference = profile.time_preference or 'any'
+    return profile
+
+
+class ProfileStore:
+    """Read-through cache of provider profiles, invalidated on write"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or database.DB_PATH
+        self._lock = threading.RLock()
+        self._profiles: Dict[str, Optional[ProviderProfile]] = {}  # None = known non-provider
+        self._complete = False  # every provider row is cached
+        self._stale = set()  # phones written since they were cached
+        self._ranked: Optional[List[ProviderProfile]] = None
+        self._index: Optional[AvailabilityIndex] = None
+        self._proximity: Optional[ProximityIndex] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _query(self, sql: str, params=()) -> List[ProviderProfile]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [_row_to_profile(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def _refresh_stale(self):
+        if not self._stale:
+            return
+        phones = list(self._stale)
+        self._stale.clear()
+        for phone in phones:
+            self._profiles.pop(phone, None)
+        placeholders = ','.join('?' * len(phones))
+        for profile in self._query(f"{_SELECT} WHERE phone IN ({placeholders})", phones):
+            self._profiles[profile.phone] = profile
+        if not self._complete:
+            for phone in phones:
+                self._profiles.setdefault(phone, None)
+
+    def _load_all(self):
+        if self._complete:
+            self._refresh_stale()
+            return
+        self.misses += 1
+        self._stale.clear()
+        self._profiles = {profile.phone: profile for profile in self._query(_SELECT)}
+        self._complete = True
+
+    def get(self, phone: str) -> Optional[ProviderProfile]:
+        """Profile for a phone number, or None if they aren't a provider"""
+        with self._lock:
+            self._refresh_stale()
+            if phone in self._profiles or self._complete:
+                self.hits += 1
+                return self._profiles.get(phone)
+            self.misses += 1
+            rows = self._query(f"{_SELECT} WHERE phone = ?", (phone,))
+            self._profiles[phone] = rows[0] if rows else None
+            return self._profiles[phone]
+
+    def all(self) -> List[ProviderProfile]:
+        """Every registered provider"""
+        with self._lock:
+            self._load_all()
+            return [p for p in self._profiles.values() if p is not None]
+
+    def ranked_available(self) -> List[ProviderProfile]:
+        """Available providers, best rated (then most experienced) first"""
+        with self._lock:
+            self._load_all()
+            if self._ranked is None:
+                self._ranked = sorted(
+                    (p for p in self._profiles.values() if p is not None and p.availability == 'available'),
+                    key=lambda p: (-(p.rating or 0.0), -(p.total_services or 0)),
+                )
+            return self._ranked
+
+    def matching_index(self) -> AvailabilityIndex:
+        """Time/service bitmap index over ranked_available(), rebuilt after writes"""
+        with self._lock:
+            if self._index is None:
+                self._index = AvailabilityIndex(self.ranked_available())
+            return self._index
+
+    def proximity_index(self, index: AvailabilityIndex = None) -> ProximityIndex:
+        """Campus proximity bitmaps over the same ranked providers as `index` (default: matching_index())"""
+        with self._lock:
+            index = index or self.matching_index()
+            if self._proximity is None or self._proximity.providers is not index.providers:
+                self._proximity = ProximityIndex(index.providers)
+            return self._proximity
+
+    def save(self, profile: ProviderProfile):
+        """Insert or update a provider, keeping rating history intact"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO users (phone, name, services, location, available_days, availability_note,
+                               time_preference, pricing, price_min, price_max, availability_windows,
+                               service_mask)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(phone) DO UPDATE SET
+                name = excluded.name,
+                services = excluded.services,
+                location = excluded.location,
+                available_days = excluded.available_days,
+                availability_note = excluded.availability_note,
+                time_preference = excluded.time_preference,
+                pricing = excluded.pricing,
+                price_min = excluded.price_min,
+                price_max = excluded.price_max,
+                availability_windows = excluded.availability_windows,
+                service_mask = excluded.service_mask
+        ''', (profile.phone, profile.name, profile.services, profile.location, profile.available_days,
+              profile.availability_note, profile.time_preference, profile.pricing,
+              profile.price_min, profile.price_max, encode_windows(profile.windows), profile.service_mask))
+        conn.commit()
+        conn.close()
+        self.invalidate(profile.phone)
+
+    def invalidate(self, phone: str = None):
+        """Drop cached data for one phone (or everything) after a write"""
+        with self._lock:
+            self._ranked = None
+            self._index = None
+            self._proximity = None
+            if phone is None:
+                self._profiles.clear()
+                self._stale.clear()
+                self._complete = False
+            else:
+                self._stale.add(phone)
@@ -0,0 +1,171 @@
+"""
+Reverse matching index over pending service requests.
+
+find_matches answers "which providers fit this request?". This index
+answers the reverse, "which waiting requests does this provider fit?", so
+that a registration or availability change only touches the requests it
+can satisfy, not the whole `requests` table. Requests are indexed by
+location and by their canonical service ids (service_taxonomy), so a
+"Laundry, dry-cleaning" provider reaches requests for "laundry" or
+"clean" through two posting lists, and a match is `mask & mask`.
+Requests for services outside the taxonomy are indexed by each service
+term they match on, normalized to at most three words (the "category"
+posting list). A provider is looked up there through every run of up to
+three consecutive words in their services, plus every prefix of single
+words, and candidates are verified with the same substring rule
+find_matches falls back to.
+"""
+
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from availability import campus_now, campus_time, is_available_at, parse_request_time
+from profiles import ProviderProfile, service_terms
+from service_taxonomy import ids_of, service_mask
+
+WORD_RE = re.compile(r"\w+")
+MAX_CATEGORY_WORDS = 3
+GENERIC_LOCATIONS = {'', 'campus', 'anywhere', 'ecla', 'any'}
+
+
+def location_key(location: str) -> str:
+    """Normalized location; generic answers all mean 'campus'"""
+    location = (location or '').strip().lower()
+    return 'campus' if location in GENERIC_LOCATIONS else location
+
+
+def _category(term: str) -> str:
+    words = WORD_RE.findall(term)
+    return ' '.join(words[:MAX_CATEGORY_WORDS]) if words else term
+
+
+def _lookup_keys(services: str) -> Set[str]:
+    """Every category key a provider's services text can satisfy"""
+    words = WORD_RE.findall(services)
+    keys = set()
+    for i, word in enumerate(words):
+        keys.update(word[:end] for end in range(1, len(word) + 1))
+        for n in range(2, MAX_CATEGORY_WORDS + 1):
+            if i + n <= len(words):
+                keys.add(' '.join(words[i:i + n]))
+    return keys
+
+
+class PendingRequestIndex:
+    """Pending requests by service category and location, with per-request notified providers"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._requests: Dict[int, Dict] = {}
+        self._by_service: Dict[int, Set[int]] = {}
+        self._by_category: Dict[str, Set[int]] = {}
+        self._by_location: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __contains__(self, request_id: int) -> bool:
+        return request_id in self._requests
+
+    def load(self, rows: Iterable):
+        """Bulk add (id, phone, service, time, location, created_at[, service_mask]) rows"""
+        for row in rows:
+            self.add(*row)
+
+    def add(self, request_id: int, phone: str, service: str, time: str = '', location: str = '',
+            created_at: Optional[datetime] = None, mask: Optional[int] = None, language: Optional[str] = None):
+        mask = service_mask(service) if mask is None else mask
+        terms = [] if mask else service_terms(service)
+        if isinstance(created_at, str):
+            created_at = campus_time(datetime.fromisoformat(created_at))  # SQLite CURRENT_TIMESTAMP text, UTC
+        entry = {
+            'id': request_id,
+            'phone': phone,
+            'service': service,
+            'mask': mask,
+            'terms': terms,
+            'location': location_key(location),
+            # Resolved against when the request was made, so "tomorrow 5pm" keeps its meaning
+            'when': parse_request_time(time, created_at or campus_now()) if time else None,
+            'notified': set(),
+            'language': language,  # the seeker's, for notices after their session has expired
+        }
+        with self._lock:
+            self.remove(request_id)
+            self._requests[request_id] = entry
+            for service_id in ids_of(mask):
+                self._by_service.setdefault(service_id, set()).add(request_id)
+            for term in terms:
+                self._by_category.setdefault(_category(term), set()).add(request_id)
+            self._by_location.setdefault(entry['location'], set()).add(request_id)
+
+    def remove(self, request_id: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._requests.pop(request_id, None)
+            if entry is None:
+                return None
+            for service_id in ids_of(entry['mask']):
+                self._discard(self._by_service, service_id, request_id)
+            for term in entry['terms']:
+                self._discard(self._by_category, _category(term), request_id)
+            self._discard(self._by_location, entry['location'], request_id)
+            return entry
+
+    @staticmethod
+    def _discard(index: Dict, key, request_id: int):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(request_id)
+            if not ids:
+                del index[key]
+
+    def mark_notified(self, request_id: int, provider_phone: str):
+        """The seeker has been told about this provider; affected() won't suggest them again"""
+        with self._lock:
+            entry = self._requests.get(request_id)
+            if entry is not None:
+                entry['notified'].add(provider_phone)
+
+    def at_location(self, location: str) -> List[Dict]:
+        with self._lock:
+            return [self._requests[i] for i in self._by_location.get(location_key(location), ())]
+
+    def affected(self, profile: ProviderProfile) -> List[Dict]:
+        """Pending requests this provider can serve and hasn't been suggested for yet (see mark_notified)
+
+        Cost is one dict lookup per service id and lookup key of the provider's
+        services plus the size of the matching posting lists, independent of
+        table size.
+        Requests at the provider's own location come first.
+        """
+        if profile.availability != 'available':
+            return []
+        services = profile.services_lower
+        candidates: Set[int] = set()
+        with self._lock:
+            for service_id in ids_of(profile.service_mask):
+                ids = self._by_service.get(service_id)
+                if ids:
+                    candidates |= ids
+            for key in _lookup_keys(services):
+                ids = self._by_category.get(key)
+                if ids:
+                    candidates |= ids
+            found = []
+            for request_id in candidates:
+                entry = self._requests[request_id]
+                if entry['phone'] == profile.phone or profile.phone in entry['notified']:
+                    continue
+                if entry['mask']:
+                    if not entry['mask'] & profile.service_mask:
+                        continue
+                elif not any(term in services for term in entry['terms']):
+                    continue
+                if entry['when'] and profile.windows and not is_available_at(profile.windows, entry['when']):
+                    continue
+                found.append(entry)
+        provider_location = location_key(profile.location)
+        found.sort(key=lambda entry: (entry['location'] != provider_location, entry['id']))
+        return found
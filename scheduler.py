@@ -0,0 +1,124 @@
+"""
+In-process expiry scheduler for the bot's in-memory state.
+
+Each tracked item is a (kind, key) pair such as ('conversation', phone)
+with a per-kind TTL, an optional reminder some time before it expires,
+and handlers that the bot registers. Items sit in a heap ordered by their
+next action time. Touching an item only moves its deadline in a dict (no
+heap push). When a stale heap slot comes up, it is re-queued at the real
+deadline. A tick therefore costs O(due items × log n), no matter how many
+items are tracked, which keeps a once-a-second tick cheap with 100k
+sessions. Periodic jobs (DB sweeps, re-matching) run from the same tick.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Tuple
+
+Handler = Callable[[Hashable], None]
+
+
+class ExpiryScheduler:
+    """Heap-based TTL expiry with reminders and periodic jobs"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._kinds: Dict[str, Dict] = {}
+        # (kind, key) -> [deadline, reminded, queued_at]
+        self._entries: Dict[Tuple[str, Hashable], List] = {}
+        self._heap: List[Tuple[float, int, str, Hashable]] = []
+        self._sequence = itertools.count()
+        self._jobs: List[List] = []  # [interval, fn, next_run]
+        self.stats = {'expired': 0, 'reminded': 0, 'requeued': 0, 'ticks': 0}
+
+    def register(self, kind: str, ttl: float, on_expire: Handler,
+                 remind_before: float = None, on_remind: Handler = None):
+        """Declare a kind of tracked item and what happens when it goes stale"""
+        self._kinds[kind] = {'ttl': ttl, 'on_expire': on_expire,
+                             'remind_before': remind_before if on_remind else None, 'on_remind': on_remind}
+
+    def every(self, interval: float, fn: Callable[[], None]):
+        """Run `fn` from the tick at most once per `interval` seconds"""
+        self._jobs.append([interval, fn, self.clock() + interval])
+
+    def touch(self, kind: str, key: Hashable):
+        """(Re)start the TTL for an item; O(1) for items already tracked"""
+        config = self._kinds[kind]
+        deadline = self.clock() + config['ttl']
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is not None:
+                entry[0], entry[1] = deadline, False
+                return
+            entry = [deadline, False, self._next_action(config, deadline, False)]
+            self._entries[(kind, key)] = entry
+            heapq.heappush(self._heap, (entry[2], next(self._sequence), kind, key))
+
+    def forget(self, kind: str, key: Hashable):
+        """Stop tracking an item (its heap slot is skipped lazily)"""
+        with self._lock:
+            self._entries.pop((kind, key), None)
+
+    def __contains__(self, item: Tuple[str, Hashable]) -> bool:
+        return item in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _next_action(config: Dict, deadline: float, reminded: bool) -> float:
+        if config['remind_before'] is not None and not reminded:
+            return deadline - config['remind_before']
+        return deadline
+
+    def run_due(self, now: float = None) -> int:
+        """Fire reminders, expiries and jobs that are due; returns how many handlers ran"""
+        now = self.clock() if now is None else now
+        actions = []
+        with self._lock:
+            self.stats['ticks'] += 1
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                queued_at, _, kind, key = heapq.heappop(heap)
+                entry = self._entries.get((kind, key))
+                if entry is None or entry[2] != queued_at:
+                    continue  # forgotten, or a duplicate slot
+                config = self._kinds[kind]
+                action_at = self._next_action(config, entry[0], entry[1])
+                if action_at > now:
+                    # Touched since it was queued: go back in line at the real time
+                    entry[2] = action_at
+                    heapq.heappush(heap, (action_at, next(self._sequence), kind, key))
+                    self.stats['requeued'] += 1
+                elif config['remind_before'] is not None and not entry[1]:
+                    entry[1] = True
+                    entry[2] = entry[0]
+                    heapq.heappush(heap, (entry[0], next(self._sequence), kind, key))
+                    actions.append((config['on_remind'], key))
+                    self.stats['reminded'] += 1
+                else:
+                    del self._entries[(kind, key)]
+                    actions.append((config['on_expire'], key))
+                    self.stats['expired'] += 1
+            for job in self._jobs:
+                if job[2] <= now:
+                    job[2] = now + job[0]
+                    actions.append((job[1], None))
+
+        # Handlers run outside the lock; they may touch or forget items themselves
+        for handler, key in actions:
+            try:
+                handler() if key is None else handler(key)
+            except Exception as e:
+                print(f"Scheduler handler error: {e}")
+        return len(actions)
+
+    async def run_forever(self, interval: float = 1.0):
+        """Tick every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            self.run_due()
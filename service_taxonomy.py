@@ -0,0 +1,169 @@
+"""
+Canonical service taxonomy with a synonym / stemming index.
+
+Service categories used to be defined three ways that disagreed: the
+keyword dict in ECLABot.extract_service_from_message, the keyword branches
+in GPTECLABot.calculate_base_price ('it' matched "kitchen"), and whatever
+free text the LLM extracted ("car lending", "cigarettes") matched against
+providers' services with substring search. Now:
+- SERVICES lists each category once, with a stable integer id, a base
+  price and its English/French synonyms. Ids are stored in the database,
+  so never renumber them; append new categories at the end.
+- Text is folded (case, accents), split into words and lightly stemmed
+  ("cleaning" = "clean", "shopping" = "shop"). Each run of up to three
+  words is looked up in a phrase index compiled once at import.
+- A set of ids is stored as a bitmask (bit i = service id i), like
+  `available_days`. Providers' offerings and requests get theirs when they
+  are written (`service_mask` columns), and matching is `mask & mask`.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BASE_PRICE = 10.0
+MAX_PHRASE_WORDS = 3
+
+
+@dataclass(frozen=True, slots=True)
+class Service:
+    id: int
+    key: str
+    name: str
+    base_price: float
+    synonyms: Tuple[str, ...]
+
+    @property
+    def bit(self) -> int:
+        return 1 << self.id
+
+
+# Earlier entries win when a text names several categories (see canonical / base_price)
+SERVICES: Tuple[Service, ...] = (
+    Service(1, 'translation', "Translation & paperwork", 15.0, (
+        'translation', 'translate', 'translator', 'interpreter', 'french', 'language', 'prefecture',
+        'paperwork', 'official documents', 'administrative', 'caf', 'visa', 'titre de sejour', 'traduction',
+        'traduire')),
+    Service(2, 'transport', "Transport & car lending", 20.0, (
+        'transport', 'transportation', 'car', 'car lending', 'lend a car', 'ride', 'lift', 'drive', 'driver',
+        'airport', 'airport pickup', 'taxi', 'voiture', 'covoiturage', 'aeroport')),
+    Service(3, 'food_delivery', "Food delivery", 5.0, (
+        'food', 'food delivery', 'delivery', 'deliver', 'takeout', 'take away', 'restaurant', 'kfc', 'mcdonalds',
+        'mcdo', 'pizza', 'burger', 'lunch', 'dinner', 'breakfast', 'uber eats', 'deliveroo', 'livraison', 'repas')),
+    Service(4, 'it_support', "IT & tech help", 12.0, (
+        'it support', 'it help', 'tech', 'tech help', 'tech support', 'computer', 'laptop', 'wifi', 'internet',
+        'software', 'hardware', 'coding', 'programming', 'web design', 'website', 'informatique', 'ordinateur')),
+    Service(5, 'laundry', "Laundry", 8.0, (
+        'laundry', 'washing', 'wash', 'clothes', 'ironing', 'dry clean', 'dry cleaning', 'lessive', 'linge',
+        'repassage')),
+    Service(6, 'cleaning', "Cleaning", 8.0, (
+        'cleaning', 'clean', 'housekeeping', 'tidy', 'menage', 'nettoyage')),
+    Service(7, 'printing', "Printing & documents", 3.0, (
+        'print', 'printing', 'printer', 'printout', 'photocopy', 'scan', 'document help', 'impression', 'imprimer')),
+    Service(8, 'shopping', "Shopping & errands", DEFAULT_BASE_PRICE, (
+        'shopping', 'shop', 'groceries', 'grocery', 'supermarket', 'buy', 'purchase', 'store', 'errand',
+        'cigarettes', 'cigs', 'tobacco', 'fetch', 'bring', 'pick up', 'achats', 'supermarche', 'tabac')),
+    Service(9, 'cooking', "Cooking", DEFAULT_BASE_PRICE, (
+        'cooking', 'cook', 'meal', 'baking', 'homemade', 'cuisine', 'cuisiner')),
+    Service(10, 'tutoring', "Tutoring & study help", DEFAULT_BASE_PRICE, (
+        'tutor', 'tutoring', 'study', 'study group', 'homework', 'academic', 'math', 'maths', 'science', 'exam',
+        'lesson', 'soutien scolaire', 'devoirs')),
+    Service(11, 'maintenance', "Repairs & maintenance", DEFAULT_BASE_PRICE, (
+        'maintenance', 'repair', 'fix', 'install', 'plumbing', 'furniture assembly', 'bricolage', 'reparation')),
+    Service(12, 'moving', "Moving & carrying", DEFAULT_BASE_PRICE, (
+        'moving', 'move', 'moving boxes', 'boxes', 'carry', 'heavy', 'furniture', 'demenagement')),
+    Service(13, 'appointments', "Appointments & accompaniment", DEFAULT_BASE_PRICE, (
+        'appointment', 'medical appointment', 'doctor', 'hospital', 'pharmacy', 'accompany', 'rendez vous',
+        'medecin', 'accompagner')),
+    Service(14, 'design', "Design", DEFAULT_BASE_PRICE, (
+        'design', 'graphic', 'graphic design', 'logo', 'creative')),
+    Service(15, 'writing', "Writing & proofreading", DEFAULT_BASE_PRICE, (
+        'writing', 'essay', 'resume', 'cv', 'cover letter', 'proofreading', 'redaction')),
+    Service(16, 'photography', "Photography", DEFAULT_BASE_PRICE, (
+        'photo', 'photography', 'photographer', 'camera', 'picture')),
+    Service(17, 'music', "Music", DEFAULT_BASE_PRICE, (
+        'music', 'instrument', 'guitar', 'piano', 'singing', 'musique')),
+    Service(18, 'fitness', "Fitness & sport", DEFAULT_BASE_PRICE, (
+        'gym', 'workout', 'exercise', 'fitness', 'training', 'sport', 'coach')),
+    Service(19, 'beauty', "Hair & beauty", DEFAULT_BASE_PRICE, (
+        'hair', 'haircut', 'makeup', 'beauty', 'nails', 'coiffure')),
+    Service(20, 'pet_care', "Pet care", DEFAULT_BASE_PRICE, (
+        # Not bare 'chat': "chat about my French homework" isn't pet care
+        'pet', 'pet sitting', 'dog', 'dog walking', 'cat', 'chien', 'garde de chat', 'garde d animaux')),
+    Service(21, 'gaming', "Gaming", DEFAULT_BASE_PRICE, (
+        'game', 'gaming', 'esports', 'video games')),
+)
+
+BY_ID: Dict[int, Service] = {service.id: service for service in SERVICES}
+BY_KEY: Dict[str, Service] = {service.key: service for service in SERVICES}
+_ORDER = {service.id: position for position, service in enumerate(SERVICES)}
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_DOUBLED = ('bb', 'dd', 'gg', 'mm', 'nn', 'pp', 'rr', 'tt')
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping, applied the same way to synonyms and to user text"""
+    if len(word) > 5 and word.endswith('ing'):
+        word = word[:-3]
+        if word.endswith(_DOUBLED):
+            word = word[:-1]  # shopping -> shop
+    elif len(word) > 4 and word.endswith('ies'):
+        word = word[:-3] + 'y'  # photocopies -> photocopy
+    elif len(word) > 4 and word.endswith('es'):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    if len(word) > 3 and word.endswith('e'):
+        word = word[:-1]  # move / moving / moves -> mov
+    return word
+
+
+def _words(text: str) -> List[str]:
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return [stem(word) for word in _WORD_RE.findall(text)]
+
+
+_PHRASES: Dict[str, int] = {}
+for _service in SERVICES:
+    for _synonym in (_service.key.replace('_', ' '),) + _service.synonyms:
+        _phrase = ' '.join(_words(_synonym))
+        _PHRASES[_phrase] = _PHRASES.get(_phrase, 0) | _service.bit
+
+
+@lru_cache(maxsize=8192)
+def service_mask(text: str) -> int:
+    """Bitmask of the service ids a text mentions (0 if none)"""
+    words = _words(text)
+    mask = 0
+    for i in range(len(words)):
+        for n in range(1, MAX_PHRASE_WORDS + 1):
+            if i + n > len(words):
+                break
+            mask |= _PHRASES.get(' '.join(words[i:i + n]), 0)
+    return mask
+
+
+def ids_of(mask: int) -> List[int]:
+    """Service ids set in a mask, in id order"""
+    return [service_id for service_id in BY_ID if mask >> service_id & 1]
+
+
+def services_of(mask: int) -> List[Service]:
+    """Services in a mask, in taxonomy (priority) order"""
+    return sorted((BY_ID[service_id] for service_id in ids_of(mask)), key=lambda service: _ORDER[service.id])
+
+
+def canonical(text: str) -> Optional[Service]:
+    """The main service a text asks for, or None if it isn't in the taxonomy"""
+    services = services_of(service_mask(text))
+    return services[0] if services else None
+
+
+def base_price(text: str) -> float:
+    """Base price in euros for a requested service"""
+    service = canonical(text)
+    return service.base_price if service else DEFAULT_BASE_PRICE
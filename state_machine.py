@@ -0,0 +1,124 @@
+"""
+Declarative conversation state machine for GPTECLABot.
+
+Each conversation state is a StateSpec listing:
+- the handler that answers a message in that state;
+- the states it may move the user to;
+- whether the handler reads the LLM extraction at all;
+- whether the message may switch the session language (not for names).
+
+The bot dispatches with one dict lookup instead of an if/elif chain.
+States whose handler only looks at the raw message (a name, a menu
+choice, "weekends only") skip extract_info_with_gpt and save a full
+OpenAI round-trip.
+
+`idle` has no handler: idle messages are routed by the extracted intent.
+Even then the extraction is lazy (LazyExtraction): provider confirmations
+and campus FAQ answers are decided before the intent is looked at, so they
+never pay for it.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterator, Optional
+
+IDLE = 'idle'
+
+# handler(bot, phone, message, extracted_info) -> reply
+StateHandler = Callable[[object, str, str, Dict], str]
+
+
+@dataclass(frozen=True, slots=True)
+class StateSpec:
+    name: str
+    handler: Optional[StateHandler]
+    needs_extraction: bool
+    transitions: FrozenSet[str] = frozenset()
+    description: str = ''
+    detects_language: bool = True  # False where the message is a name, not a sentence
+
+    def allows(self, next_state: str) -> bool:
+        """Going back to idle (reset, expiry) or staying put is always allowed"""
+        return next_state in self.transitions or next_state in (IDLE, self.name)
+
+
+def _spec(name, handler, needs_extraction, transitions=(), description='', detects_language=True):
+    return StateSpec(name, handler, needs_extraction, frozenset(transitions), description, detects_language)
+
+
+STATES: Dict[str, StateSpec] = {spec.name: spec for spec in [
+    _spec(IDLE, None, True, ['registering_name', 'choosing_provider'],
+          "No flow in progress; the extracted intent decides what happens"),
+
+    # Registration
+    _spec('registering_name', lambda bot, phone, message, info: bot.handle_name_state(phone, message, info),
+          False, ['asking_role'], "Waiting for the user's name", detects_language=False),
+    _spec('asking_role', lambda bot, phone, message, info: bot.handle_role_selection(phone, message),
+          False, ['registering_services', 'registering_location', 'asking_service_need'],
+          "Provider or seeker?"),
+    _spec('registering_services',
+          lambda bot, phone, message, info: bot.handle_services_registration_with_gpt(phone, message, info),
+          False, ['registering_location'], "Provider lists their services"),
+    _spec('registering_location',
+          lambda bot, phone, message, info: bot.handle_location_registration_with_gpt(phone, message, info),
+          False, ['registering_availability'], "Provider's accommodation"),
+    _spec('registering_availability',
+          lambda bot, phone, message, info: bot.handle_availability_registration(phone, message),
+          False, ['registering_time_preference'], "Days the provider is free"),
+    _spec('registering_time_preference',
+          lambda bot, phone, message, info: bot.handle_time_preference_registration(phone, message),
+          False, ['registering_pricing'], "Morning / afternoon / evening"),
+    _spec('registering_pricing', lambda bot, phone, message, info: bot.handle_pricing_registration(phone, message),
+          False, [], "Typical price; saves the profile"),
+
+    # Requests
+    _spec('asking_service_need', lambda bot, phone, message, info: bot.handle_service_need(phone, message),
+          False, ['choosing_provider'], "Seeker says what they need (taken verbatim)"),
+    _spec('choosing_provider',
+          lambda bot, phone, message, info: bot.handle_provider_choice_with_gpt(phone, message, info),
+          False, [], "Seeker replies 1, 2 or 3"),
+]}
+
+
+def get_state(name: str) -> Optional[StateSpec]:
+    return STATES.get(name)
+
+
+def needs_extraction(name: str) -> bool:
+    """Unknown states fall back to a GPT reply, which uses the extraction"""
+    spec = STATES.get(name)
+    return spec is None or spec.needs_extraction
+
+
+def detects_language(name: str) -> bool:
+    spec = STATES.get(name)
+    return spec is None or spec.detects_language
+
+
+class LazyExtraction(Mapping):
+    """extract_info_with_gpt's result, computed on first read"""
+
+    def __init__(self, extract: Callable[[], Dict]):
+        self._extract = extract
+        self._info: Optional[Dict] = None
+
+    @property
+    def resolved(self) -> bool:
+        return self._info is not None
+
+    def _resolve(self) -> Dict:
+        if self._info is None:
+            self._info = self._extract() or {}
+        return self._info
+
+    def __getitem__(self, key):
+        return self._resolve()[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._resolve())
+
+    def __len__(self) -> int:
+        return len(self._resolve())
+
+    def __repr__(self) -> str:
+        return repr(self._resolve())
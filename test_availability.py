@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for structured availability windows and the time-aware matching index
+"""
+
+from datetime import datetime, timezone
+
+import availability
+from availability import (AvailabilityIndex, availability_label, build_windows, campus_time, is_available_at,
+                          parse_request_time)
+from profiles import ProviderProfile, WEEKENDS
+
+MONDAY_10AM = datetime(2026, 10, 19, 10, 0)
+
+
+def test_parse_request_time():
+    assert parse_request_time("at 5pm today", MONDAY_10AM) == datetime(2026, 10, 19, 17, 0)
+    assert parse_request_time("tomorrow morning", MONDAY_10AM).date() == datetime(2026, 10, 20).date()
+    assert parse_request_time("asap", MONDAY_10AM) == MONDAY_10AM
+    assert parse_request_time("I need 2 boxes moved", MONDAY_10AM) is None
+    assert parse_request_time("flexible", MONDAY_10AM) is None
+
+
+def test_now_is_campus_time_whatever_the_server_zone():
+    # Request rows are stamped in UTC; Paris is UTC+2 in summer and UTC+1 in winter
+    assert campus_time(datetime(2026, 7, 1, 15, 0)) == datetime(2026, 7, 1, 17, 0)
+    assert campus_time(datetime(2026, 1, 15, 15, 0)) == datetime(2026, 1, 15, 16, 0)
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert abs(campus_time(utc_now) - availability.campus_now()).total_seconds() < 5
+
+
+def test_windows_and_labels():
+    weekend_evenings = build_windows(WEEKENDS, "evening")
+    assert weekend_evenings == ((5 * 1440 + 1080, 6 * 1440), (6 * 1440 + 1080, 7 * 1440))
+    assert not is_available_at(weekend_evenings, MONDAY_10AM)
+    assert availability_label(weekend_evenings, MONDAY_10AM) == "Available Sat from 18:00"
+    assert availability_label(weekend_evenings, MONDAY_10AM, language='fr') == "Disponible sam. à partir de 18:00"
+    assert build_windows(0b1, "any", "after 6pm") == ((1080, 1440),)
+
+
+def test_index_filters_by_service_and_hour():
+    providers = [
+        ProviderProfile(phone="1", name="Evening", services="Laundry", location="Studio", time_preference="evening"),
+        ProviderProfile(phone="2", name="Morning", services="Laundry", location="Studio", time_preference="morning"),
+        ProviderProfile(phone="3", name="Cook", services="Cooking", location="Studio"),
+    ]
+    index = AvailabilityIndex(providers)
+    five_pm = datetime(2026, 10, 19, 17, 0)
+    nine_pm = datetime(2026, 10, 19, 21, 0)
+
+    assert index.first(index.term_bits("laundry") & index.available_bits(five_pm), 3) == []
+    assert [p.name for p in index.first(index.term_bits("laundry") & index.available_bits(nine_pm), 3)] == ["Evening"]
+    assert [p.name for p in index.first(index.term_bits("laundry") & index.available_bits(None), 3)] == ["Evening", "Morning"]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk provider/request import and export
+"""
+
+import io
+import json
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from bulk_io import RowError, export_rows, import_rows, normalize_phone, read_rows
+
+PROVIDERS_CSV = """Name,Phone,Services,Location,Days,Time_Preference,Pricing
+Lucas,06 11 22 33 44,Laundry and ironing,Residence B floor 3,Weekends only,Evening,10€
+Ana,0033 7 55 66 77 88,Math tutoring,Library,Mon-Fri,Afternoon,15-20€
+Bad,12,Printing,Library,,,
+Nope,+33611223399,,Library,,,
+"""
+
+
+def test_normalize_phone():
+    assert normalize_phone("06 12 34 56 78") == "+33612345678"
+    assert normalize_phone("whatsapp:+33 6 12 34 56 78") == "+33612345678"
+    assert normalize_phone("0044 20 7946 0958") == "+442079460958"
+    assert normalize_phone("33612345678") == "+33612345678"
+    with pytest.raises(RowError):
+        normalize_phone("call me")
+    with pytest.raises(RowError):
+        normalize_phone("12")
+
+
+def test_import_normalizes_validates_and_round_trips():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bot.db")
+        rejects = io.StringIO()
+        stats = import_rows(path, "users", read_rows(io.StringIO(PROVIDERS_CSV), "csv"), batch_size=1, rejects=rejects)
+        assert (stats.read, stats.written, stats.rejected) == (4, 2, 2)
+        assert [json.loads(line)["line"] for line in rejects.getvalue().splitlines()] == [4, 5]
+
+        conn = sqlite3.connect(path)
+        row = conn.execute("SELECT available_days, time_preference, price_min, price_max, availability_windows "
+                           "FROM users WHERE phone = '+33611223344'").fetchone()
+        assert row == (0b1100000, "evening", 10.0, 10.0, "8280-8640;9720-10080")
+
+        # Re-import updates the profile but keeps the earned rating
+        conn.execute("UPDATE users SET rating = 4.2, total_services = 3 WHERE phone = '+33611223344'")
+        conn.commit()
+        import_rows(path, "users", read_rows(io.StringIO(PROVIDERS_CSV.replace("Residence B floor 3", "Residence C")), "csv"))
+        assert conn.execute("SELECT location, rating, total_services FROM users WHERE phone = '+33611223344'").fetchone() \
+            == ("Residence C", 4.2, 3)
+        conn.close()
+
+        exported = io.StringIO()
+        assert export_rows(path, "users", exported, "jsonl").written == 2
+        rows = [json.loads(line) for line in exported.getvalue().splitlines()]
+        assert {r["phone"] for r in rows} == {"+33611223344", "+33755667788"}
+
+        # Exported JSONL imports back into a fresh database unchanged
+        copy = os.path.join(tmp, "copy.db")
+        assert import_rows(copy, "users", read_rows(io.StringIO(exported.getvalue()), "jsonl")).rejected == 0
+        again = io.StringIO()
+        export_rows(copy, "users", again, "jsonl")
+        assert again.getvalue() == exported.getvalue()
+
+
+def test_requests_import_and_filtered_csv_export():
+    lines = [json.dumps({"phone": "0612345678", "service": "laundry", "status": status})
+             for status in ["pending", "matched", "pending"]] + ["{not json", json.dumps({"service": "x"})]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bot.db")
+        stats = import_rows(path, "requests", read_rows(io.StringIO("\n".join(lines)), "jsonl"))
+        assert (stats.written, stats.rejected) == (3, 2)
+
+        out = io.StringIO()
+        export_rows(path, "requests", out, "csv", status="pending")
+        header, *rows = out.getvalue().splitlines()
+        assert header.startswith("id,phone,name,service")
+        assert len(rows) == 2 and all("+33612345678" in row for row in rows)
+
+
+def test_in_process_import_refreshes_the_bots_caches(make_bot):
+    bot = make_bot()
+    path = bot.db_path
+    sent = []
+    bot.notify = lambda phone, text: sent.append((phone, text)) or True
+    bot.save_request("+33600000009", "Mia", "laundry", "flexible", "campus")
+    assert bot.find_matches("laundry", "campus") == []
+
+    # Imported providers are matched at once, and seekers waiting for them are told
+    import_rows(path, "users", read_rows(io.StringIO(PROVIDERS_CSV), "csv"), imported=bot.bulk_imported)
+    assert [m.name for m in bot.find_matches("laundry", "campus")] == ["Lucas"]
+    assert [phone for phone, _ in sent] == ["+33600000009"]
+
+    # Imported pending requests join the reverse-matching index
+    lines = json.dumps({"phone": "0612345678", "service": "math tutoring"})
+    import_rows(path, "requests", read_rows(io.StringIO(lines), "jsonl"), imported=bot.bulk_imported)
+    assert len(bot.request_index) == 2
+
+
+def test_imported_hook_runs_per_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        lines = "\n".join(json.dumps({"phone": f"06000000{i:02d}", "service": "laundry"}) for i in range(5))
+        import_rows(os.path.join(tmp, "bot.db"), "requests", read_rows(io.StringIO(lines), "jsonl"), batch_size=2,
+                    imported=lambda table, phones: calls.append((table, sorted(phones))))
+        # One call per written batch with only that batch's phones, never the whole file at once
+        assert [len(phones) for _, phones in calls] == [2, 2, 1]
+        assert calls[0] == ("requests", ["+33600000000", "+33600000001"])
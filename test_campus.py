@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for campus location normalization and proximity-ranked matching
+"""
+
+import sqlite3
+
+import campus
+from profiles import ProviderProfile
+
+
+def test_free_text_maps_to_places():
+    seeds = ["Main Campus", "Student Housing", "Library", "Computer Lab", "Cafeteria", "Parking Lot", "Dormitory"]
+    assert [campus.normalize_location(text) for text in seeds] == [
+        "main_campus", "student_housing", "library", "computer_lab", "cafeteria", "parking_lot", "student_housing"]
+    assert campus.normalize_location("Résidence-B, 3rd floor") == "residence_b"
+    assert campus.normalize_location("near the Agora please") == "agora"
+    assert campus.normalize_location("Mini Studio") == campus.normalize_location("coloc") == "student_housing"
+    for text in ["campus", "", None, "10€", "somewhere"]:
+        assert campus.normalize_location(text) is None
+
+
+def test_distance_matrix():
+    n = len(campus.PLACES)
+    assert all(campus.DISTANCES[i][i] == 0 and campus.DISTANCES[i][j] == campus.DISTANCES[j][i]
+               for i in range(n) for j in range(n))
+    # Same floor of the same building is next door; the basement cinema costs a staircase
+    assert campus.distance("library", "computer_lab") < campus.distance("library", "cafeteria")
+    assert campus.distance("agora", "cinebox") == round(15.8 + campus.FLOOR_METRES, 1)
+    assert campus.distance("library", "nowhere") is None
+    assert campus.band(campus.distance("library", "computer_lab")) == 0
+    assert campus.band(campus.distance("agora", "rer_station")) == len(campus.BANDS)
+
+
+def test_matches_are_ranked_by_proximity_then_rating(make_bot):
+    bot = make_bot()
+    providers = [("+331", "Station", "RER station", 5.0), ("+332", "Parking", "Parking Lot", 5.0),
+                 ("+333", "Nowhere", "somewhere", 4.5), ("+334", "Library", "Library", 4.0)]
+    for phone, name, location, _ in providers:
+        bot.profiles.save(ProviderProfile(phone=phone, name=name, services="Printing", location=location))
+    with sqlite3.connect(bot.db_path) as conn:
+        conn.executemany("UPDATE users SET rating = ? WHERE phone = ?",
+                         [(rating, phone) for phone, _, _, rating in providers])
+    bot.profiles.invalidate()
+
+    names = lambda location: [m.name for m in bot.find_matches("printing", location, limit=4)]
+    assert names("campus") == ["Station", "Parking", "Nowhere", "Library"]
+    assert names("Computer Lab") == ["Library", "Parking", "Nowhere", "Station"]
+    assert names("Computer Lab")[:2] == [m.name for m in bot.find_matches("printing", "Computer Lab", limit=2)]
+
+    # A new provider next door is picked up once the cache is invalidated by the save
+    bot.profiles.save(ProviderProfile(phone="+335", name="Lab", services="Printing", location="computer room"))
+    assert names("Computer Lab")[0] == "Lab"
+
+
+def test_legacy_ranking_helper():
+    rows = [("A", "Parking Lot"), ("B", "somewhere"), ("C", "Library")]
+    # Unplaced locations count as UNKNOWN_DISTANCE, further than the parking lot from the library
+    assert [name for name, _ in campus.by_proximity("library", rows, lambda row: row[1])] == ["C", "A", "B"]
+    assert campus.by_proximity("anywhere", rows, lambda row: row[1]) == rows
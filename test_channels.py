@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the Twilio / Meta channel adapters behind /webhook
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import channels
+import main
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+META_PHONE = "33611111111"
+
+
+class Bot:
+    def __init__(self):
+        self.received = []
+        self.on_loop = []
+
+    def process_message(self, phone, message, choice_id=None):
+        self.received.append((phone, message))
+        try:
+            asyncio.get_running_loop()
+            self.on_loop.append(True)
+        except RuntimeError:
+            self.on_loop.append(False)
+        return f"echo: {message}"
+
+
+class FakeWhatsApp(WhatsAppBusinessAPI):
+    def __init__(self):
+        super().__init__()
+        self.verify_token = "secret"
+        self.sent = []
+
+    async def send_text_message(self, to_phone, message):
+        self.sent.append((to_phone, message))
+        return {"messages": [{"id": "wamid.1"}]}
+
+
+def meta_callback(*texts):
+    messages = [{"from": META_PHONE, "id": f"wamid.{i}", "timestamp": "0", "type": "text", "text": {"body": text}}
+                for i, text in enumerate(texts)]
+    return {"object": "whatsapp_business_account",
+            "entry": [{"changes": [{"value": {"messaging_product": "whatsapp", "messages": messages}}]}]}
+
+
+def client(monkeypatch):
+    bot = Bot()
+    whatsapp = FakeWhatsApp()
+    monkeypatch.setattr(main, "get_bot", lambda: bot)
+    monkeypatch.setattr(channels.META, "_whatsapp", whatsapp)
+    return TestClient(main.app), bot, whatsapp
+
+
+def test_adapter_chosen_by_content_type():
+    assert channels.adapter_for("application/x-www-form-urlencoded") is channels.TWILIO
+    assert channels.adapter_for("multipart/form-data; boundary=x") is channels.TWILIO
+    assert channels.adapter_for("application/json; charset=utf-8") is channels.META
+    assert channels.adapter_for("text/plain") is None and channels.adapter_for(None) is None
+
+
+def test_senders_are_normalized():
+    assert channels.e164("whatsapp:+33611111111") == channels.e164(META_PHONE) == "+33611111111"
+
+
+def test_twilio_and_meta_share_one_pipeline(monkeypatch):
+    http, bot, whatsapp = client(monkeypatch)
+
+    response = http.post("/webhook", data={"From": "whatsapp:+33611111111", "Body": "Hi"})
+    assert response.headers["content-type"].startswith("application/xml")
+    assert b"<Message>echo: Hi</Message>" in response.content
+
+    response = http.post("/webhook", json=meta_callback("Bonjour", "Lucas"))
+    assert response.json() == {"status": "ok"}
+    # Same user on both channels, replies sent through the Graph API
+    assert bot.received == [("+33611111111", "Hi"), ("+33611111111", "Bonjour"), ("+33611111111", "Lucas")]
+    assert whatsapp.sent == [(META_PHONE, "echo: Bonjour"), (META_PHONE, "echo: Lucas")]
+    # The blocking bot runs in the threadpool, never on the event loop
+    assert bot.on_loop == [False, False, False]
+
+    # Status callbacks (delivered/read) carry no messages
+    status = {"object": "whatsapp_business_account", "entry": [{"changes": [{"value": {"statuses": []}}]}]}
+    assert http.post("/webhook", json=status).json() == {"status": "ok"}
+    assert http.post("/webhook", content=b"hi", headers={"content-type": "text/plain"}).status_code == 415
+
+
+def test_meta_verification_handshake(monkeypatch):
+    http, _, _ = client(monkeypatch)
+    params = {"hub.mode": "subscribe", "hub.challenge": "1158201444", "hub.verify_token": "secret"}
+    response = http.get("/webhook", params=params)
+    assert response.status_code == 200 and response.text == "1158201444"
+    assert http.get("/webhook", params={**params, "hub.verify_token": "wrong"}).status_code == 403
+
+
+def test_graph_phone_is_the_same_for_every_address_form():
+    assert {channels.to_graph_phone(a) for a in ["whatsapp:+33611111111", "+33611111111", META_PHONE]} == {META_PHONE}
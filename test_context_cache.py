@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached database context used in GPT prompts
+"""
+
+from context_cache import ContextCache
+from models import PendingMatch
+
+SEEKER = "+33611111111"
+PROVIDER = "+33622222222"
+
+
+def test_render_once_until_invalidated():
+    renders = []
+    cache = ContextCache(lambda phone: renders.append(phone) or f"context for {phone}")
+    assert cache.get("a") == cache.get("a") == "context for a"
+    assert renders == ["a"] and (cache.hits, cache.misses) == (1, 1)
+
+    cache.invalidate("a")
+    cache.get("a")
+    cache.get("b")
+    assert renders == ["a", "a", "b"]
+    cache.invalidate()
+    assert len(cache) == 0 and cache.hit_ratio == 0.25
+
+
+def test_write_during_render_is_not_cached():
+    cache = None
+
+    def render(phone):
+        cache.invalidate(phone)  # a save_request lands while we're rendering
+        return "stale"
+
+    cache = ContextCache(render)
+    cache.get("a")
+    assert "a" not in cache
+
+
+def test_bot_invalidates_on_writes(make_bot):
+    bot = make_bot()
+    assert bot.get_database_context(SEEKER) == ""
+    assert bot.get_database_context(SEEKER) == ""
+    assert bot.db_context.hits == 1
+
+    request_id = bot.save_request(SEEKER, "Camille", "laundry", "tonight", "Residence B")
+    assert bot.get_database_context(SEEKER) == "Recent requests: laundry at Residence B (pending). "
+
+    bot.save_user(PROVIDER, "Emma", "Laundry help", "Dorm")
+    assert bot.get_database_context(PROVIDER).startswith("User is registered as Emma")
+
+    match = PendingMatch(SEEKER, PROVIDER, "Emma", "laundry", 8.0)
+    assert bot.claim_request(request_id, match)
+    assert "(matched)" in bot.get_database_context(SEEKER)
+
+    bot.get_database_context(PROVIDER)
+    bot.save_match(match)
+    assert SEEKER not in bot.db_context and PROVIDER not in bot.db_context
+
+    bot.get_database_context(SEEKER)
+    bot.expire_history(SEEKER)
+    assert SEEKER not in bot.db_context
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for conversation history compaction
+"""
+
+import threading
+
+from history import HistoryStore, Turn, compact_summary
+
+
+def test_recent_turns_and_background_summary():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def summarizer(previous, turns):
+        started.set()
+        release.wait(5)
+        calls.append([turn.content for turn in turns])
+        return (previous + ' ' if previous else '') + '+'.join(turn.content for turn in turns)
+
+    store = HistoryStore(keep_recent=3, summarize_every=2, summarizer=summarizer)
+    for i in range(5):
+        store.add('+33611', 'user', f"m{i}")
+    # m0 and m1 aged out: the refresh runs off the caller's thread
+    assert started.wait(5)
+    assert [turn.content for turn in store.recent('+33611')] == ['m2', 'm3', 'm4']
+    assert store.summary('+33611') == ''
+
+    # Turns aging out meanwhile are picked up by a follow-up refresh, not lost
+    store.add('+33611', 'assistant', 'm5')
+    store.add('+33611', 'user', 'm6')
+    release.set()
+    store.wait(5)
+    assert calls == [['m0', 'm1'], ['m2', 'm3']]
+    assert store.summary('+33611') == 'm0+m1 m2+m3'
+    assert store.context_messages('+33611', limit=2) == [
+        {'role': 'system', 'content': 'Summary of the earlier conversation: m0+m1 m2+m3'},
+        {'role': 'assistant', 'content': 'm5'},
+        {'role': 'user', 'content': 'm6'},
+    ]
+    store.close()
+
+
+def test_failing_summarizer_falls_back_to_extractive_summary():
+    def summarizer(previous, turns):
+        raise RuntimeError("LLM down")
+
+    store = HistoryStore(keep_recent=1, summarize_every=1, summarizer=summarizer)
+    store.add('a', 'user', 'I need help with   laundry')
+    store.add('a', 'assistant', 'Sure!')
+    store.wait(5)
+    assert store.summary('a') == 'I need help with laundry'
+    assert store.stats['summary_errors'] == 1
+    store.pop('a')
+    assert 'a' not in store and store.recent('a') == [] and store.summary('a') == ''
+    store.close()
+
+
+def test_compact_summary_keeps_newest_within_limit():
+    turns = [Turn('user', f"message number {i}") for i in range(40, 50)]
+    summary = compact_summary('x' * 580, turns, max_chars=100)
+    assert len(summary) == 100 and summary.startswith('…') and summary.endswith('message number 49')
+
+
+def test_bot_keeps_summary_after_many_messages(make_bot):
+    bot = make_bot()
+    for i in range(12):
+        bot.add_to_history('+33600000001', 'user' if i % 2 == 0 else 'assistant', f"turn {i}")
+    bot.history.wait(5)
+    assert [turn.content for turn in bot.get_conversation_history('+33600000001')] == \
+        [f"turn {i}" for i in range(6, 12)]
+    assert 'turn 0' in bot.history.summary('+33600000001')
+    bot.expire_history('+33600000001')
+    assert bot.get_conversation_history('+33600000001') == []
+    bot.history.close()
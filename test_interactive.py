@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for interactive button / list replies and their direct routing
+"""
+
+import asyncio
+
+import interactive
+from conftest import unknown_intent
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+SEEKER = "+33611111111"
+SOPHIE = "+33555555555"
+
+
+class RecordingWhatsApp(WhatsAppBusinessAPI):
+    def __init__(self):
+        super().__init__()
+        self.access_token, self.phone_number_id = "token", "100000000000001"
+        self.posted = []
+
+    async def _post_message(self, data):
+        self.posted.append(data)
+        return {}
+
+
+def callback(message):
+    return {"object": "whatsapp_business_account",
+            "entry": [{"changes": [{"value": {"messages": [{"from": "33611111111", "id": "wamid.1", **message}]}}]}]}
+
+
+def test_parse_webhook_reads_button_and_list_replies():
+    whatsapp = WhatsAppBusinessAPI()
+    button = {"type": "interactive", "interactive": {"type": "button_reply",
+                                                     "button_reply": {"id": "role:seeker", "title": "🤝 Seeker"}}}
+    row = {"type": "interactive", "interactive": {"type": "list_reply",
+                                                  "list_reply": {"id": "option:2", "title": "2️⃣ Sophie"}}}
+    template = {"type": "button", "button": {"payload": "confirm:no", "text": "No"}}
+    text = {"type": "text", "text": {"body": "hello"}}
+    image = {"type": "image", "image": {"id": "media.1"}}
+
+    parsed = [whatsapp.parse_webhook(callback(message)) for message in [button, row, template, text, image]]
+    assert [(m[0]["text"], m[0]["choice_id"]) for m in parsed[:4]] == [
+        ("🤝 Seeker", "role:seeker"), ("2️⃣ Sophie", "option:2"), ("No", "confirm:no"), ("hello", None)]
+    assert parsed[4] == []
+
+
+def test_choice_ids():
+    assert interactive.parse_id("confirm:yes:+336_+335_translation help") == ("confirm", "yes", "+336_+335_translation help")
+    assert interactive.parse_id("option:2") == ("option", "2", None)
+    assert interactive.parse_id(None) == ("", "", None)
+    assert interactive.confirm_id("no", "x" * 300) == "confirm:no"
+    assert interactive.clip("A very long provider name indeed", 20) == "A very long provide…"
+
+
+def test_taps_route_without_extraction(make_bot):
+    bot = make_bot(seed=True, extraction=unknown_intent)
+    bot.set_user_state(SEEKER, 'registering_name')
+    reply = bot.process_message(SEEKER, "Lucas")
+    assert [choice.id for choice in reply.choices] == [interactive.ROLE_PROVIDER, interactive.ROLE_SEEKER]
+
+    assert bot.process_message(SEEKER, "🤝 Seeker", "role:seeker").startswith("Perfect! 🤝 What do you need")
+    reply = bot.process_message(SEEKER, "prefecture")
+    assert bot.get_user_state(SEEKER).state == 'choosing_provider'
+    assert [row.id for row in reply.choices] == ["option:1", "option:2", "option:3"]
+
+    picked = bot.active_requests[SEEKER].matches[1]
+    assert bot.process_message(SEEKER, reply.choices[1].title, "option:2").startswith("Perfect! Let me check with")
+    assert bot.pending_matches.has_provider(picked.phone)
+    assert bot.extractions == 0
+
+    # A stale button (no longer choosing) falls back to reading the text
+    assert bot.handle_choice(SEEKER, "option:1") is None
+
+
+def test_confirm_button_answers_the_named_match(make_bot):
+    bot = make_bot(seed=True, extraction=unknown_intent)
+    [sophie] = [m for m in bot.find_matches("translation", "campus") if m.phone == SOPHIE]
+    older = bot.add_pending_match("+33600000001", sophie, "translation", [])
+    newer = bot.add_pending_match("+33600000002", sophie, "translation", [])
+
+    # Free text answers the oldest; a button answers the match it was sent for
+    reply = bot.process_message(SOPHIE, "Yes", interactive.confirm_id("yes", newer))
+    assert reply.startswith("Great! You're connected")
+    assert older in bot.pending_matches and newer not in bot.pending_matches
+
+    reply = bot.process_message(SOPHIE, "hmm, maybe")
+    assert [choice.id for choice in reply.choices] == [interactive.confirm_id("yes", older),
+                                                       interactive.confirm_id("no", older)]
+    assert bot.process_message(SOPHIE, "No", interactive.confirm_id("no", newer)).startswith("Sorry, I don't see")
+
+
+def test_decline_offers_the_seeker_alternatives_in_their_language(make_bot):
+    bot = make_bot(seed=True, extraction=unknown_intent)
+    bot.set_user_state(SEEKER, 'idle', language='fr')
+    bot.handle_service_request_with_gpt(SEEKER, "traduction", {"service": "translation", "time": "flexible"})
+    bot.process_message(SEEKER, "2", interactive.option_id(2))
+    state_before = bot.get_user_state(SEEKER).state
+
+    # The provider is only thanked; with no orchestrator the seeker can't be messaged yet,
+    # so nothing about their session changes until they write again
+    match_id, _ = bot.pending_matches.first_for_provider(SOPHIE)
+    reply = bot.process_message(SOPHIE, "No", interactive.confirm_id("no", match_id))
+    assert reply == bot.say(SOPHIE, 'decline_thanks')
+    assert bot.get_user_state(SEEKER).state == state_before
+    assert SEEKER not in bot.active_requests
+
+    # Their next message, whatever it says, is answered with the alternatives
+    reply = bot.process_message(SEEKER, "Des nouvelles ?")
+    assert reply.startswith("Désolé, Sophie n'est pas disponible")
+    assert bot.get_user_state(SEEKER).state == 'choosing_provider'
+    assert SOPHIE not in [m.phone for m in bot.active_requests[SEEKER].candidates]
+    assert bot.process_message(SEEKER, "1", interactive.option_id(1)).startswith("Parfait")
+
+
+def test_send_reply_picks_buttons_or_list():
+    whatsapp = RecordingWhatsApp()
+    roles = interactive.Reply("Provider or seeker?", [interactive.Choice(interactive.ROLE_PROVIDER, "🛠️ Provider"),
+                                                       interactive.Choice(interactive.ROLE_SEEKER, "🤝 Seeker")])
+    options = interactive.Reply("x" * 1500 + "\n\nPick one!",
+                                [interactive.Choice(interactive.option_id(i), f"Provider {i}", "⭐ 4.8/5 · 12€")
+                                 for i in range(1, 4)], "Choose")
+
+    async def scenario():
+        await whatsapp.send_reply("33611111111", "plain text")
+        await whatsapp.send_reply("33611111111", roles)
+        await whatsapp.send_reply("33611111111", options)
+
+    asyncio.run(scenario())
+    plain, buttons, long_text, rows = whatsapp.posted
+    assert plain["type"] == "text"
+    assert [b["reply"]["id"] for b in buttons["interactive"]["action"]["buttons"]] == ["role:provider", "role:seeker"]
+    # Too long for an interactive body: the text goes first, the choices carry the last paragraph
+    assert long_text["type"] == "text" and rows["interactive"]["body"]["text"] == "Pick one!"
+    assert rows["interactive"]["type"] == "list" and rows["interactive"]["action"]["button"] == "Choose"
+    assert [r["id"] for r in rows["interactive"]["action"]["sections"][0]["rows"]] == ["option:1", "option:2", "option:3"]
+
+
+def test_send_reply_splits_a_single_long_paragraph():
+    whatsapp = RecordingWhatsApp()
+    words = " ".join(f"word{i}" for i in range(300))
+    reply = interactive.Reply(words, [interactive.Choice(interactive.option_id(1), "Provider 1")])
+    asyncio.run(whatsapp.send_reply("33611111111", reply))
+
+    text, buttons = whatsapp.posted
+    head, body = text["text"]["body"], buttons["interactive"]["body"]["text"]
+    assert head and len(body) <= interactive.MAX_BODY
+    assert f"{head} {body}" == words
+
+
+def test_send_reply_never_leaves_an_empty_interactive_body():
+    whatsapp = RecordingWhatsApp()
+    reply = interactive.Reply("x" * 1500 + " Pick one!\n\n", [interactive.Choice(interactive.option_id(1), "Provider 1")])
+    asyncio.run(whatsapp.send_reply("33611111111", reply))
+
+    text, buttons = whatsapp.posted
+    assert text["text"]["body"] == "x" * 1500 and buttons["interactive"]["body"]["text"] == "Pick one!"
+
+def test_parse_yes_no_reads_french_and_whole_words():
+    assert [interactive.parse_yes_no(text) for text in ["oui", "D'accord, je suis dispo", "Yes, sorry for the wait"]] == [True] * 3
+    assert [interactive.parse_yes_no(text) for text in ["non", "Désolé, je suis prise", "je ne suis pas dispo",
+                                                        "not available", "I can't"]] == [False] * 5
+    # Whole words only: "book" is not "ok", "nothing" is not "no"
+    assert [interactive.parse_yes_no(text) for text in ["book it", "nothing", "hmm, maybe"]] == [None] * 3
+
+
+def test_french_provider_can_answer_in_french(make_bot):
+    bot = make_bot(seed=True, extraction=unknown_intent)
+    [sophie] = [m for m in bot.find_matches("translation", "campus") if m.phone == SOPHIE]
+    bot.set_user_state(SOPHIE, 'idle', language='fr')
+    first = bot.add_pending_match("+33600000001", sophie, "translation", [])
+    second = bot.add_pending_match("+33600000002", sophie, "translation", [])
+
+    assert bot.process_message(SOPHIE, "Oui") == bot.say(SOPHIE, 'match_accepted', service="translation", price=sophie.price)
+    assert first not in bot.pending_matches
+    assert bot.process_message(SOPHIE, "Désolé, je suis prise") == bot.say(SOPHIE, 'decline_thanks')
+    assert second not in bot.pending_matches
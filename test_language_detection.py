@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline language detector and local greeting routing
+"""
+
+import language_detection
+from conftest import no_extraction
+
+PHONE = "+33611111111"
+
+
+def test_detects_clear_messages():
+    assert language_detection.detect_language("Quelqu'un peut me prêter une perceuse ?") == 'fr'
+    assert language_detection.detect_language("Can someone lend me a drill?") == 'en'
+    assert language_detection.detect_language("Le matin c'est mieux pour moi") == 'fr'
+
+
+def test_abstains_on_short_or_ambiguous_messages():
+    for message in ["1", "ok", "10€", "Studio", "Camille", "", "🙂🙂"]:
+        assert language_detection.detect_language(message) is None, message
+
+
+def test_greetings_and_choices():
+    assert language_detection.greeting_language("Bonjour !") == 'fr'
+    assert language_detection.greeting_language("hey 👋") == 'en'
+    assert language_detection.greeting_language("hello, I need help") is None
+    assert language_detection.chosen_language("🇫🇷") == 'fr'
+    assert language_detection.chosen_language("English please") == 'en'
+    assert language_detection.chosen_language("I speak English") is None
+
+
+def test_bot_routes_and_switches_language_without_gpt(make_bot):
+    bot = make_bot(extraction=no_extraction)
+    assert bot.process_message(PHONE, "Bonjour").startswith("Bonjour! 👋")
+    # Names never switch the language, even French-looking ones
+    assert bot.process_message(PHONE, "Jean Pierre").startswith("Enchanté, Jean Pierre !")
+    assert bot.get_user_state(PHONE).language == 'fr'
+
+    # Writing in English switches the rest of the flow to English
+    reply = bot.process_message(PHONE, "I can offer laundry help")
+    assert reply.startswith("Perfect! 🛠️ You offer")
+    assert bot.get_user_state(PHONE).language == 'en'
+
+    other = "+33622222222"
+    assert bot.process_message(other, "français") == "Parfait! 🇫🇷 Comment vous appelez-vous?"
+    # A greeting while we wait for the name repeats the intro in the greeting's language
+    assert bot.process_message(other, "Hi").startswith("Hey Neighbour!")
+    assert bot.get_user_state(other).language == 'en'
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for proactive provider notification and the fallback cascade
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+from benchmarks.fake_services import FakeGraphAPI
+from channels import to_graph_phone
+from match_orchestrator import MatchOrchestrator
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+SEEKER = "+33612345678"
+
+
+class RecordingWhatsApp:
+    def __init__(self):
+        self.sent = []
+
+    async def send_interactive_message(self, to_phone, header_text, body_text, buttons):
+        self.sent.append(("ask", to_phone))
+        return {}
+
+    async def send_text_message(self, to_phone, message):
+        self.sent.append(("text", to_phone, message))
+        return {}
+
+
+async def settle(bot):
+    """Let scheduled orchestrator work run and its sends finish"""
+    await asyncio.sleep(0)
+    await bot.orchestrator.drain()
+
+
+def test_decline_and_timeout_cascade_through_ranked_candidates(make_bot):
+    async def scenario(bot, whatsapp):
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=0.25)
+        bot.handle_service_request_with_gpt(SEEKER, "translation help", {"service": "translation", "time": "flexible"})
+        assert len(bot.active_requests[SEEKER].candidates) == 3
+
+        # Seeker picks Sophie (option 2); she is messaged right away
+        bot.handle_provider_choice_with_gpt(SEEKER, "2", {})
+        await settle(bot)
+        assert whatsapp.sent[-1] == ("ask", "33555555555")  # the Graph API's form, no '+'
+
+        # Sophie declines -> Marie (best remaining) is asked, not Sophie again
+        assert bot.is_provider_confirmation("+33555555555", "no")
+        bot.process_message("+33555555555", "No, sorry")
+        await settle(bot)
+        assert not bot.pending_matches.has_provider("+33555555555")
+        assert bot.pending_matches.has_provider("+33123456789")
+        assert ("ask", "33123456789") in whatsapp.sent
+
+        # Marie never answers -> Pierre after the timeout (Pierre gets plenty of time)
+        bot.orchestrator.timeout_seconds = 60
+        await asyncio.sleep(0.35)
+        assert not bot.pending_matches.has_provider("+33123456789")
+        assert ("ask", "33987654321") in whatsapp.sent
+
+        bot.process_message("+33987654321", "Yes I can help")
+        await settle(bot)
+        assert bot.orchestrator.active == 0
+        assert bot.orchestrator.stats['declined'] == 1
+        assert bot.orchestrator.stats['timed_out'] == 1
+        assert bot.orchestrator.stats['accepted'] == 1
+        assert "accepted" in whatsapp.sent[-1][2]
+        assert whatsapp.sent[-1][1] == to_graph_phone(SEEKER)
+
+    bot = make_bot(seed=True)
+    asyncio.run(scenario(bot, RecordingWhatsApp()))
+
+
+def test_seeker_told_when_candidates_run_out(make_bot):
+    async def scenario(bot, whatsapp):
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=0.01)
+        bot.handle_service_request_with_gpt(SEEKER, "laundry", {"service": "laundry", "time": "flexible"})
+        bot.handle_provider_choice_with_gpt(SEEKER, "1", {})
+        await asyncio.sleep(0.05)
+        await settle(bot)
+        assert bot.orchestrator.stats['exhausted'] == 1
+        assert "nobody else" in whatsapp.sent[-1][2]
+        assert len(bot.pending_matches) == 0
+
+    bot = make_bot(seed=True)
+    asyncio.run(scenario(bot, RecordingWhatsApp()))
+
+
+def test_notifications_are_in_each_recipients_language(make_bot):
+    sophie = "+33555555555"
+
+    class AskRecorder(RecordingWhatsApp):
+        async def send_interactive_message(self, to_phone, header_text, body_text, buttons):
+            self.sent.append(("ask", to_phone, header_text, body_text, [button.title for button in buttons]))
+            return {}
+
+    async def scenario(bot, whatsapp):
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=60)
+        bot.set_user_state(SEEKER, 'idle', language='fr')
+        bot.set_user_state(sophie, 'idle', language='fr')
+        bot.handle_service_request_with_gpt(SEEKER, "traduction", {"service": "translation", "time": "flexible"})
+        bot.handle_provider_choice_with_gpt(SEEKER, "2", {})
+        await settle(bot)
+        ask = whatsapp.sent[-1]
+        assert ask[1] == to_graph_phone(sophie) and ask[2] == "Demande ECLA 🙋"
+        assert ask[3].startswith("Un voisin a besoin d'aide pour translation")
+        assert ask[4] == ["✅ Oui, je peux", "❌ Non, désolé"]
+
+        bot.process_message(sophie, "No, sorry")
+        await settle(bot)
+        cascade = [m[2] for m in whatsapp.sent if m[0] == "text" and m[1] == to_graph_phone(SEEKER)][-1]
+        assert cascade.startswith("Sophie n'est pas disponible, je demande donc à")
+
+    bot = make_bot(seed=True)
+    asyncio.run(scenario(bot, AskRecorder()))
+
+
+def test_broadcast_first_accept_wins_under_concurrent_replies(make_bot):
+    providers = ["+33123456789", "+33555555555", "+33987654321"]
+
+    async def scenario(bot, whatsapp):
+        bot.orchestrator = MatchOrchestrator(bot, whatsapp, timeout_seconds=60)
+        reply = bot.handle_service_request_with_gpt(SEEKER, "translation asap",
+                                                    {"service": "translation", "time": "asap", "location": "Computer Lab"})
+        assert "Urgent" in reply
+        await settle(bot)
+        assert sorted(m[1] for m in whatsapp.sent if m[0] == "ask") == sorted(map(to_graph_phone, providers))
+
+        # Everyone says yes at the same moment
+        barrier = threading.Barrier(len(providers))
+        replies = {}
+
+        def accept(phone):
+            barrier.wait()
+            replies[phone] = bot.handle_provider_confirmation(phone, "yes")
+
+        threads = [threading.Thread(target=accept, args=(phone,)) for phone in providers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await settle(bot)
+
+        winners = [phone for phone, text in replies.items() if text.startswith("Great!")]
+        assert len(winners) == 1
+        assert sum("already took" in text for text in replies.values()) == 2
+        assert len(bot.pending_matches) == 0 and bot.broadcasts == {}
+        assert bot.orchestrator.active == 0
+        taken = [m[1] for m in whatsapp.sent if m[0] == "text" and "already taken" in m[2]]
+        assert sorted(taken) == sorted(map(to_graph_phone, set(providers) - set(winners)))
+
+        conn = sqlite3.connect(bot.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0] == 1
+        assert conn.execute("SELECT status, matched_helper, location FROM requests").fetchall() == [
+            ("matched", winners[0], "Computer Lab")]
+        conn.close()
+
+    bot = make_bot(seed=True)
+    asyncio.run(scenario(bot, RecordingWhatsApp()))
+
+
+def test_broadcast_throughput_against_fake_graph_api(monkeypatch, make_bot):
+    """Notifications share one client and never exceed the concurrency bound"""
+    with FakeGraphAPI(latency="fixed:20") as graph:
+        monkeypatch.setenv("WHATSAPP_GRAPH_API_URL", graph.url)
+        monkeypatch.setenv("WHATSAPP_BUSINESS_TOKEN", "fake-token")
+        monkeypatch.setenv("WHATSAPP_PHONE_NUMBER_ID", "100000000000001")
+        bot = make_bot(seed=True)
+
+        async def scenario():
+            bot.orchestrator = MatchOrchestrator(bot, WhatsAppBusinessAPI(max_concurrency=8), timeout_seconds=60)
+            for i in range(40):
+                bot.handle_service_request_with_gpt(f"+3361000{i:04d}", "translation urgent",
+                                                    {"service": "translation", "time": "urgent"})
+            await settle(bot)
+            await bot.orchestrator.shutdown()
+
+        asyncio.run(scenario())
+        assert len(graph.sent) == 40 * 3
+        assert bot.orchestrator.stats['send_errors'] == 0
+        assert 1 < graph.peak_in_flight <= 8
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the message catalog and the bot's per-session language
+"""
+
+import pytest
+
+import messages
+
+PHONE = "+33611111111"
+
+
+def test_render_fills_fields():
+    assert messages.render('available_at', time="18:00") == "Available at 18:00"
+    assert messages.render('available_at', 'fr', time="18:00") == "Disponible à 18:00"
+    # Constant templates come back as-is
+    assert messages.render('choose_option') == "Please reply with 1, 2, or 3 to select a provider."
+
+
+def test_missing_translation_falls_back_to_english():
+    assert ('fr', 'alternative') not in messages.TEMPLATES
+    assert messages.render('alternative', 'fr', number="1️⃣", name="Emma", price=8.0) == "1️⃣ Emma - 8.0€\n"
+    assert messages.render('welcome', 'de') == messages.render('welcome')
+
+
+def test_catalog_is_validated_at_compile_time():
+    for key, template in messages.TEMPLATES.items():
+        assert template.fields <= messages.TEMPLATES[('en', template.key)].fields, key
+    with pytest.raises(ValueError):
+        messages._compile({'en': {'hi': "Hi {name}"}, 'fr': {'hi': "Salut {nom}"}})
+    with pytest.raises(ValueError):
+        messages._compile({'en': {}, 'fr': {'hi': "Salut"}})
+
+
+def test_normalize_language():
+    assert messages.normalize_language("Français") == 'fr'
+    assert messages.normalize_language("english") == 'en'
+    assert messages.normalize_language("") == messages.normalize_language("klingon") == 'en'
+
+
+def test_language_is_kept_for_the_session(make_bot):
+    bot = make_bot()
+    assert bot.handle_language_selection(PHONE, "Français 🇫🇷") == "Parfait! 🇫🇷 Comment vous appelez-vous?"
+    reply = bot.handle_name_registration_with_gpt(PHONE, "Camille", {})
+    assert reply.startswith("Enchanté, Camille !")
+    assert bot.get_user_state(PHONE).state == 'asking_role'
+    assert bot.get_user_state(PHONE).language == 'fr'
+
+    bot.handle_language_selection(PHONE, "English")
+    assert bot.say(PHONE, 'choose_option') == "Please reply with 1, 2, or 3 to select a provider."
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned schema migrations in database.py
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import database
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_fresh_database_reaches_latest_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fresh.db")
+        assert database.migrate(path) == database.LATEST_VERSION
+
+        conn = sqlite3.connect(path)
+        assert {"availability", "rating", "total_services"} <= _columns(conn, "users")
+        assert "idx_users_availability_rating" in _indexes(conn)
+        assert "idx_requests_phone_created" in _indexes(conn)
+        conn.close()
+
+
+def test_migrate_is_idempotent():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "twice.db")
+        database.migrate(path)
+        assert database.migrate(path) == database.LATEST_VERSION
+
+        conn = sqlite3.connect(path)
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+        conn.close()
+        assert versions == [version for version, _, _ in database.MIGRATIONS]
+
+
+def test_legacy_database_is_upgraded_in_place():
+    """Databases created by the old main.init_db / ECLABot.init_db keep their rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                phone TEXT UNIQUE NOT NULL,
+                services TEXT NOT NULL,
+                location TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO users (name, phone, services, location) VALUES ('Alex', '+331', 'IT', 'Room 305')")
+        conn.commit()
+        conn.close()
+
+        database.migrate(path)
+
+        conn = sqlite3.connect(path)
+        row = conn.execute("SELECT name, availability, rating, total_services FROM users").fetchone()
+        conn.close()
+        assert row == ("Alex", "available", 5.0, 0)
+
+
+def test_twilio_addresses_are_rekeyed_as_e164(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "twilio.db")
+        # A database from before migration 9, with rows keyed by Twilio's sender address
+        monkeypatch.setattr(database, "MIGRATIONS", [m for m in database.MIGRATIONS if m[0] < 9])
+        database.migrate(path)
+        conn = sqlite3.connect(path)
+        conn.executemany("INSERT INTO users (phone, name, services, location, rating, total_services) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         [("whatsapp:+33611111111", "Lina", "Laundry", "Residence A", 4.0, 4),
+                          ("whatsapp:+33622222222", "Tom", "Printing", "Library", 5.0, 1),
+                          # Tom registered again after the switch to E.164
+                          ("+33622222222", "Tom", "", "Library", 3.0, 1)])
+        conn.execute("INSERT INTO requests (phone, name, service, time, location, status, matched_helper) "
+                     "VALUES ('whatsapp:+33633333333', 'Nina', 'laundry', 'today', 'campus', 'matched', "
+                     "'whatsapp:+33611111111')")
+        conn.execute("INSERT INTO matches (seeker_phone, provider_phone, service, price, status) "
+                     "VALUES ('whatsapp:+33633333333', 'whatsapp:+33611111111', 'laundry', 8.0, 'completed')")
+        conn.commit()
+        conn.close()
+
+        monkeypatch.undo()
+        assert database.migrate(path) == database.LATEST_VERSION
+        conn = sqlite3.connect(path)
+        users = conn.execute("SELECT phone, services, rating, total_services FROM users ORDER BY phone").fetchall()
+        assert users == [("+33611111111", "Laundry", 4.0, 4), ("+33622222222", "Printing", 4.0, 2)]
+        assert conn.execute("SELECT phone, matched_helper FROM requests").fetchone() == ("+33633333333", "+33611111111")
+        assert conn.execute("SELECT seeker_phone, provider_phone FROM matches").fetchone() == \
+            ("+33633333333", "+33611111111")
+        conn.close()
+
+
+def test_users_extended_profiles_fill_in_empty_users_fields(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extended.db")
+        monkeypatch.setattr(database, "MIGRATIONS", [m for m in database.MIGRATIONS if m[0] < 5])
+        database.migrate(path)
+        conn = sqlite3.connect(path)
+        # Sam's users row came from an old flow that only kept the phone
+        conn.execute("INSERT INTO users (phone, name, services, location) VALUES ('+331', '', '', 'Dorm')")
+        conn.executemany("INSERT INTO users_extended (phone, name, services, location, availability, "
+                         "time_preference, pricing) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         [("+331", "Sam", "Car lending", "Residence B", "Weekends only", "Evening", "15-20€"),
+                          ("+332", "Ana", "Math tutoring", "Library", "Mon-Fri", "Morning", "free")])
+        conn.commit()
+        conn.close()
+
+        monkeypatch.undo()
+        database.migrate(path)
+        conn = sqlite3.connect(path)
+        rows = conn.execute("SELECT phone, name, services, location, available_days, time_preference, price_min, "
+                            "price_max, availability_windows, service_mask FROM users ORDER BY phone").fetchall()
+        conn.close()
+        assert rows == [
+            ("+331", "Sam", "Car lending", "Dorm", 0b1100000, "evening", 15.0, 20.0, "8280-8640;9720-10080", 1 << 2),
+            ("+332", "Ana", "Math tutoring", "Library", 0b0011111, "morning", 0.0, 0.0,
+             ";".join(f"{day * 1440 + 360}-{day * 1440 + 720}" for day in range(5)), 1 << 10),
+        ]
+
+
+def test_stale_pet_care_bits_are_recomputed(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.db")
+        monkeypatch.setattr(database, "MIGRATIONS", [m for m in database.MIGRATIONS if m[0] < 11])
+        database.migrate(path)
+        old_phrases = database._v8_phrases()
+        conn = sqlite3.connect(path)
+        conn.executemany("INSERT INTO users (phone, name, services, location, service_mask) VALUES (?, ?, ?, ?, ?)",
+                         [(phone, name, services, "Library", database._v8_service_mask(services, old_phrases))
+                          for phone, name, services in [("+331", "Ana", "Chat and homework help"),
+                                                        ("+332", "Leo", "Dog walking, chat sitting")]])
+        conn.execute("INSERT INTO requests (phone, name, service, time, location, service_mask) "
+                     "VALUES ('+333', 'Nina', 'chat', 'today', 'campus', ?)", (1 << 20,))
+        conn.commit()
+        conn.close()
+
+        monkeypatch.undo()
+        database.migrate(path)
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT phone, service_mask FROM users ORDER BY phone").fetchall() == [
+            ("+331", 1 << 10), ("+332", 1 << 20)]
+        assert conn.execute("SELECT service_mask FROM requests").fetchone() == (0,)
+        conn.close()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent, rate-limited outbound WhatsApp queue
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks.fake_services import FakeGraphAPI
+from outbound_queue import OutboundQueue, TokenBucket
+from whatsapp_business_integration import WhatsAppBusinessAPI
+
+NUMBER = "100000000000001"
+
+
+def text(to, body="hi"):
+    return {"messaging_product": "whatsapp", "to": to, "type": "text", "text": {"body": body}}
+
+
+class ScriptedGraph:
+    """deliver() stand-in answering from a per-recipient script of HTTP statuses"""
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.calls = []
+
+    async def deliver(self, phone_number_id, payload):
+        to = payload["to"]
+        self.calls.append(to)
+        script = self.scripts.setdefault(to, [200])
+        status = script.pop(0) if len(script) > 1 else script[0]  # the last answer repeats
+        if status == 200:
+            return 200, {"messages": [{"id": f"wamid.{len(self.calls)}"}]}, None
+        if status == 429:
+            return 429, {"error": {"message": "(#130429) Rate limit hit", "code": 130429}}, None
+        if status == "boom":
+            raise ConnectionError("connection reset")
+        return status, {"error": {"message": f"error {status}", "code": 100}}, None
+
+
+def test_token_bucket_paces_and_pauses():
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+    assert [bucket.delay() for _ in range(4)] == [0.0, 0.0, 0.1, 0.2]
+    now[0] = 1.0  # refilled to capacity
+    bucket.pause(3)
+    bucket.pause(3)  # pauses don't stack
+    assert abs(bucket.delay() - 3.1) < 1e-9
+
+
+def test_retries_and_dead_letters():
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = ScriptedGraph({"ok": [200], "throttled": [429, 429, 200], "flaky": ["boom", 500, 200],
+                               "bad": [400], "down": [500]})
+        queue = OutboundQueue(os.path.join(tmp, "bot.db"), graph.deliver, base_delay=0.01, max_attempts=3)
+        for to in ["ok", "throttled", "flaky", "bad", "down"]:
+            queue.enqueue(NUMBER, text(to))
+
+        asyncio.run(queue.drain(timeout=10))
+
+        assert queue.counts() == {"sent": 3, "dead": 2}
+        assert graph.calls.count("bad") == 1  # permanent errors aren't retried
+        assert graph.calls.count("down") == 3  # max_attempts
+        dead = {letter["payload"]["to"]: letter for letter in queue.dead_letters()}
+        assert dead["bad"]["last_error"] == "HTTP 400: error 400" and dead["down"]["attempts"] == 3
+        assert queue.stats["rate_limited"] == 2 and queue.stats["sent"] == 3
+
+
+def test_messages_survive_a_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bot.db")
+        graph = ScriptedGraph({})
+        queue = OutboundQueue(path, graph.deliver)
+        queue.enqueue(NUMBER, text("a"))
+        queue.enqueue(NUMBER, text("b"))
+        queue._claim()  # a worker claimed them, then the process died
+        queue.close()
+
+        queue = OutboundQueue(path, graph.deliver)
+        assert queue.recover() == 2
+        asyncio.run(queue.drain())
+        assert queue.counts() == {"sent": 2} and sorted(graph.calls) == ["a", "b"]
+
+
+def test_worker_prunes_old_sent_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = ScriptedGraph({"bad": [400]})
+        queue = OutboundQueue(os.path.join(tmp, "bot.db"), graph.deliver, sent_retention=60)
+        for to in ["old", "bad", "new"]:
+            queue.enqueue(NUMBER, text(to))
+        asyncio.run(queue.drain())
+        queue._conn.execute("UPDATE outbound_messages SET sent_at = sent_at - 3600 WHERE payload LIKE '%old%'")
+        queue._conn.commit()
+
+        async def run_briefly():
+            worker = asyncio.create_task(queue.run_forever(idle_poll=0.01))
+            await asyncio.sleep(0.05)
+            worker.cancel()
+
+        asyncio.run(run_briefly())
+        assert queue.counts() == {"sent": 1, "dead": 1} and queue.stats["pruned"] == 1
+        assert [letter["payload"]["to"] for letter in queue.dead_letters()] == ["bad"]
+
+
+def test_each_recipient_gets_their_messages_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        arrived = []
+        failures = {"retried": 1}
+
+        async def slow_texts(phone_number_id, payload):
+            # Texts are slow, so a concurrent send would let the interactive list overtake them
+            if payload["type"] == "text":
+                await asyncio.sleep(0.05)
+            if payload["to"] == "retried" and payload["type"] == "text" and failures["retried"]:
+                failures["retried"] -= 1
+                return 500, {"error": {"message": "try again", "code": 1}}, None
+            arrived.append((payload["to"], payload["type"]))
+            return 200, {"messages": [{"id": f"wamid.{len(arrived)}"}]}, None
+
+        queue = OutboundQueue(os.path.join(tmp, "bot.db"), slow_texts, base_delay=0.01)
+        for to in ["seeker", "retried"]:
+            queue.enqueue(NUMBER, text(to, "x" * 1500))
+            queue.enqueue(NUMBER, {"messaging_product": "whatsapp", "to": to, "type": "interactive",
+                                   "interactive": {"type": "list"}})
+
+        asyncio.run(queue.drain(timeout=10))
+
+        assert queue.counts() == {"sent": 4}
+        for to in ["seeker", "retried"]:
+            assert [kind for recipient, kind in arrived if recipient == to] == ["text", "interactive"]
+        # The list waited behind the retried text without using up one of its own attempts
+        attempts = dict(queue._conn.execute("SELECT payload LIKE '%interactive%', attempts FROM outbound_messages "
+                                            "WHERE payload LIKE '%retried%'"))
+        assert attempts == {0: 2, 1: 1}
+
+
+def test_order_holds_across_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = ScriptedGraph({"seeker": [500, 200]})
+        queue = OutboundQueue(os.path.join(tmp, "bot.db"), graph.deliver, base_delay=0.05, batch_size=1)
+        queue.enqueue(NUMBER, text("seeker", "first"))
+        queue.enqueue(NUMBER, text("seeker", "second"))  # beyond the first batch's LIMIT
+
+        async def scenario():
+            assert await queue.process_batch() == 1  # "first" fails and waits to retry
+            queue.enqueue(NUMBER, text("seeker", "third"))  # due now, unlike "first"
+            queue.enqueue(NUMBER, text("other"))
+            # Only the other recipient may go while "first" waits
+            assert await queue.process_batch() == 1 and graph.calls == ["seeker", "other"]
+            assert await queue.process_batch() == 0
+            await queue.drain(timeout=5)
+
+        asyncio.run(scenario())
+        bodies = [json.loads(payload)["text"]["body"] for payload, in queue._conn.execute(
+            "SELECT payload FROM outbound_messages WHERE recipient = 'seeker' ORDER BY sent_at, id")]
+        assert bodies == ["first", "second", "third"] and queue.counts() == {"sent": 4}
+
+
+def test_whatsapp_api_sends_through_the_outbox_within_the_rate_limit():
+    saved_env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp, FakeGraphAPI(rate_limit=50) as graph:
+        os.environ.update(WHATSAPP_GRAPH_API_URL=graph.url, WHATSAPP_BUSINESS_TOKEN="fake-token",
+                          WHATSAPP_PHONE_NUMBER_ID=NUMBER)
+        try:
+            whatsapp = WhatsAppBusinessAPI()
+            whatsapp.outbox = OutboundQueue(os.path.join(tmp, "bot.db"), whatsapp.deliver, rate=40, burst=10,
+                                            base_delay=0.05)
+
+            async def scenario():
+                results = await asyncio.gather(*(whatsapp.send_text_message(f"3361{i:07d}", "hello")
+                                                 for i in range(60)))
+                assert all("queued" in result for result in results)
+                await whatsapp.outbox.drain(timeout=20)
+                await whatsapp.aclose()
+
+            asyncio.run(scenario())
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+        assert whatsapp.outbox.counts() == {"sent": 60}
+        assert len(graph.sent) == 60 and graph.rejected[429] == 0
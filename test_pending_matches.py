@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the provider-indexed pending match store
+"""
+
+from models import PendingMatch
+from pending_matches import PendingMatches
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def pending(seeker, provider, service="laundry"):
+    return f"{seeker}_{provider}_{service}", PendingMatch(seeker, provider, 'Marie', service, 10)
+
+
+def test_multiple_matches_per_provider_oldest_first():
+    matches = PendingMatches()
+    first_id, first = pending("+33611111111", "+33612345678")
+    second_id, second = pending("+33622222222", "+33612345678", "cleaning")
+    matches[first_id] = first
+    matches[second_id] = second
+
+    assert matches.has_provider("+33612345678")
+    assert not matches.has_provider("+33611111111")
+    assert [mid for mid, _ in matches.for_provider("+33612345678")] == [first_id, second_id]
+    assert matches.first_for_provider("+33612345678")[0] == first_id
+
+    del matches[first_id]
+    assert matches.first_for_provider("+33612345678")[0] == second_id
+    del matches[second_id]
+    assert not matches.has_provider("+33612345678")
+    assert matches.first_for_provider("+33612345678") is None
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    expired = []
+    matches = PendingMatches(ttl_seconds=60, clock=clock, on_expire=lambda mid, m: expired.append(mid))
+    old_id, old = pending("+33611111111", "+33612345678")
+    matches[old_id] = old
+    clock.now = 30
+    new_id, new = pending("+33622222222", "+33612345678")
+    matches[new_id] = new
+
+    clock.now = 61
+    assert matches.first_for_provider("+33612345678")[0] == new_id
+    assert expired == [old_id]
+    assert old_id not in matches
+
+    # Re-adding resets the deadline; the stale heap slot must not expire it early
+    matches[new_id] = new
+    clock.now = 100
+    assert matches.has_provider("+33612345678")
+    clock.now = 200
+    assert not matches.has_provider("+33612345678")
+    assert len(matches) == 0
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the table-driven pricing engine
+"""
+
+from datetime import datetime
+
+import pricing
+from profiles import ProviderProfile
+
+MONDAY_NOON = datetime(2026, 10, 19, 12, 30)
+TUESDAY_NIGHT = datetime(2026, 10, 20, 2, 0)
+SATURDAY_EVENING = datetime(2026, 10, 24, 20, 0)
+
+
+def provider(pricing_text="", rating=5.0, phone="+33700000001"):
+    price_min, price_max = (None, None) if not pricing_text else {
+        "free": (0.0, 0.0), "5-8€": (5.0, 8.0), "10€": (10.0, 10.0)}[pricing_text]
+    return ProviderProfile(phone=phone, name="Lina", services="Food delivery", location="Campus", rating=rating,
+                           pricing=pricing_text, price_min=price_min, price_max=price_max)
+
+
+def test_demand_tables_by_category_and_hour():
+    assert all(len(table) == 168 for table in pricing.DEMAND_TABLES.values())
+    assert pricing.demand("food_delivery", None) == 1.0
+    assert pricing.demand("food_delivery", TUESDAY_NIGHT) == 1.3
+    assert pricing.demand("food_delivery", SATURDAY_EVENING) == round(1.25 * 1.1, 4)
+    assert pricing.demand("laundry", TUESDAY_NIGHT) == 1.0
+    assert pricing.demand(pricing.category("juggling"), TUESDAY_NIGHT) == pricing.DEFAULT_DEMAND['night']
+
+
+def test_quotes_use_declared_pricing_then_rated_base_price():
+    engine = pricing.PricingEngine()
+    # Undeclared: base price, +10% per star below 5, times demand
+    assert engine.quote("KFC", provider(), None) == 5.0
+    assert engine.quote("KFC", provider(rating=4.0, phone="+2"), TUESDAY_NIGHT) == round(5.0 * 1.1 * 1.3, 2)
+    # Declared prices win, and demand stays inside the declared range
+    assert engine.quote("KFC", provider("5-8€", phone="+3"), MONDAY_NOON) == 5.5
+    assert engine.quote("KFC", provider("5-8€", phone="+4"), SATURDAY_EVENING) == 6.88
+    assert engine.quote("KFC", provider("10€", phone="+5"), TUESDAY_NIGHT) == 10.0
+    assert engine.quote("KFC", provider("free", phone="+6"), TUESDAY_NIGHT) == 0.0
+
+
+def test_rates_are_memoized_until_the_profile_changes(make_bot):
+    bot = make_bot()
+    bot.profiles.save(ProviderProfile(phone="+331", name="Sam", services="Car lending", location="Campus"))
+    assert [m.price for m in bot.find_matches("car lending", "campus")] == [20.0]
+    bot.find_matches("airport pickup", "campus", TUESDAY_NIGHT)
+    assert (bot.pricing.misses, bot.pricing.hits) == (1, 1)
+
+    # A new declared price is picked up once the profile is reloaded
+    bot.profiles.save(ProviderProfile(phone="+331", name="Sam", services="Car lending", location="Campus",
+                                      pricing="15€", price_min=15.0, price_max=15.0))
+    assert [m.price for m in bot.find_matches("car lending", "campus")] == [15.0]
+    assert bot.pricing.misses == 2
+
+
+def test_rate_memo_drops_the_least_recently_used_provider():
+    engine = pricing.PricingEngine(max_rates=2)
+    first, second, third = (provider(phone=phone) for phone in ("+1", "+2", "+3"))
+    engine.quote("KFC", first)
+    engine.quote("KFC", second)
+    engine.quote("KFC", first)
+    engine.quote("KFC", third)
+    assert len(engine._rates) == 2
+
+    # `first` was used more recently than `second`, so only `second` is recomputed
+    engine.quote("KFC", first)
+    engine.quote("KFC", second)
+    assert (engine.misses, engine.hits) == (4, 2)
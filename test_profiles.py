@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the unified provider profile store
+"""
+
+import sqlite3
+
+from profiles import WEEKENDS, parse_available_days, parse_pricing, parse_time_preference
+
+
+def test_registration_parsers():
+    assert parse_available_days("Weekends only") == WEEKENDS
+    assert parse_available_days("Mon-Wed") == 0b0000111
+    assert parse_available_days("Every day") == 0b1111111
+    assert parse_time_preference("Evening") == "evening"
+    assert parse_time_preference("Flexible") == "any"
+    assert parse_pricing("15-20€") == (15.0, 20.0)
+    assert parse_pricing("Free") == (0.0, 0.0)
+    assert parse_pricing("I'll discuss with the person") == (None, None)
+
+
+def test_gpt_registered_provider_is_matchable(make_bot):
+    """Providers saved by the GPT registration flow show up in find_matches"""
+    bot = make_bot()
+    assert bot.find_matches("laundry", "campus") == []
+
+    bot.save_user_with_details("+33611111111", {
+        "name": "Lucas",
+        "services": "Laundry and ironing",
+        "location": "Studio",
+        "availability": "Weekends only",
+        "time_preference": "Evening",
+        "pricing": "10€",
+    })
+
+    matches = bot.find_matches("laundry", "campus")
+    assert [m.name for m in matches] == ["Lucas"]
+
+    profile = bot.profiles.get("+33611111111")
+    assert profile.available_days == WEEKENDS
+    assert (profile.price_min, profile.price_max) == (10.0, 10.0)
+
+
+def test_matching_is_served_from_cache(make_bot):
+    bot = make_bot(seed=True)
+    bot.find_matches("IT support", "campus")
+
+    # Writes behind the store's back are invisible until invalidated
+    conn = sqlite3.connect(bot.db_path)
+    conn.execute("UPDATE users SET availability = 'busy' WHERE phone = '+33666666666'")
+    conn.commit()
+    conn.close()
+    assert [m.name for m in bot.find_matches("IT support", "campus")] == ["Alex"]
+
+    bot.profiles.invalidate("+33666666666")
+    assert bot.find_matches("IT support", "campus") == []
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the replay harness (no OpenAI key or network needed)
+"""
+
+from benchmarks.replay import check_gate, load_transcripts, run_replay, SAMPLE_TRANSCRIPTS
+
+
+def test_replay_bot_against_fakes():
+    """Replay the bundled transcripts straight through process_message"""
+    report = run_replay(load_transcripts(SAMPLE_TRANSCRIPTS), target="bot")
+
+    assert report["errors"] == 0
+    assert report["messages"] == sum(len(c["messages"]) for c in load_transcripts(SAMPLE_TRANSCRIPTS))
+    assert report["llm_calls_per_message"] > 0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert check_gate(report, baseline=report) == []
+
+
+def test_replay_webhook_against_fakes():
+    """Replay through the FastAPI /webhook endpoint"""
+    conversations = [{"phone": "+33600009999", "messages": ["Hi", "Camille", "I need food delivery"]}]
+    report = run_replay(conversations, target="webhook")
+
+    assert report["errors"] == 0
+    assert report["messages"] == 3
+
+
+def test_gate_flags_regressions():
+    """Count metrics are gated exactly, timing metrics with tolerance"""
+    baseline = {
+        "errors": 0,
+        "throughput_msg_per_s": 100.0,
+        "latency_ms": {"p95": 10.0},
+        "llm_calls_per_message": 1.0,
+        "db_statements_per_message": 2.0,
+        "db_connections_per_message": 1.0,
+    }
+    report = dict(baseline, latency_ms={"p95": 20.0}, llm_calls_per_message=1.5)
+
+    failures = check_gate(report, baseline, tolerance=0.25)
+    assert any("p95" in f for f in failures)
+    assert any("llm_calls_per_message" in f for f in failures)
+    assert check_gate(baseline, thresholds={"max_llm_calls_per_message": 0.5})
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for reverse matching of pending requests
+"""
+
+import sqlite3
+from datetime import datetime
+
+import messages
+from profiles import WEEKENDS, ProviderProfile
+from request_index import PendingRequestIndex
+
+
+def provider(services, location="Campus", **kwargs):
+    return ProviderProfile(phone="+33700000001", name="Lina", services=services, location=location, **kwargs)
+
+
+def test_provider_reaches_only_requests_it_can_serve():
+    index = PendingRequestIndex()
+    index.add(1, "+33611111111", "laundry", "flexible", "campus")
+    index.add(2, "+33622222222", "clean", "flexible", "Dormitory")
+    index.add(3, "+33633333333", "IT support", "flexible", "campus")
+    index.add(4, "+33644444444", "prefecture", "flexible", "campus")
+
+    # Prefixes of "cleaning" reach the "clean" request; the dorm request sorts first
+    found = index.affected(provider("Laundry, dry-cleaning", location="Dormitory"))
+    assert [r['id'] for r in found] == [2, 1]
+
+    # Translation requests match on any of their terms
+    assert [r['id'] for r in index.affected(provider("French lessons"))] == [4]
+    assert index.affected(provider("Printing")) == []
+
+
+def test_each_provider_is_suggested_once_and_removed_requests_disappear():
+    index = PendingRequestIndex()
+    index.add(1, "+33611111111", "laundry", "flexible", "campus")
+    # Suggested again until the seeker has actually been told
+    assert len(index.affected(provider("Laundry"))) == 1
+    index.mark_notified(1, provider("Laundry").phone)
+    assert index.affected(provider("Laundry")) == []
+
+    index.add(2, "+33622222222", "laundry", "flexible", "campus")
+    index.remove(2)
+    assert 2 not in index and index.affected(provider("Laundry")) == []
+    # The seeker is never suggested to themselves
+    index.add(3, "+33700000001", "laundry", "flexible", "campus")
+    assert index.affected(provider("Laundry")) == []
+
+
+def test_requested_time_must_fit_provider_windows():
+    index = PendingRequestIndex()
+    monday = datetime(2026, 10, 19, 9, 0)
+    index.add(1, "+33611111111", "laundry", "today at 5pm", "campus", monday)
+    assert index.affected(provider("Laundry", available_days=WEEKENDS)) == []
+    assert [r['id'] for r in index.affected(provider("Laundry", time_preference="afternoon"))] == [1]
+
+
+def test_unmatched_conversation_request_is_saved_and_rematched(make_bot):
+    bot = make_bot()
+    sent = []
+    bot.notify = lambda phone, text: sent.append((phone, text)) or True
+    seeker, provider_phone = "+33611111111", "+33622222222"
+
+    bot.set_user_state(seeker, 'registering_name')
+    bot.process_message(seeker, "Nina")
+    bot.process_message(seeker, "🤝 Seeker", "role:seeker")
+    reply = bot.process_message(seeker, "I need guitar lessons please")
+    assert "saved your request" in reply and bot.get_user_state(seeker).state == 'idle'
+    assert len(bot.request_index) == 1
+
+    bot.set_user_state(provider_phone, 'registering_name')
+    for text, choice_id in [("Tom", None), ("🛠️ Provider", "role:provider"), ("Guitar lessons", None),
+                            ("Library", None), ("every day", None), ("any time", None), ("5€", None)]:
+        bot.process_message(provider_phone, text, choice_id)
+    assert bot.rematch_pending_requests() == 1
+    assert [phone for phone, text in sent if "Tom" in text] == [seeker]
+
+
+def test_rematch_notice_is_in_the_seekers_language(make_bot):
+    bot = make_bot()
+    sent = []
+    bot.notify = lambda phone, text: sent.append((phone, text)) or True
+    seeker, provider_phone = "+33611111111", "+33622222222"
+
+    bot.process_message(seeker, "Bonjour")
+    bot.process_message(seeker, "Camille")
+    bot.process_message(seeker, "🤝 Demandeur", "role:seeker")
+    assert "enregistré votre demande" in bot.process_message(seeker, "J'ai besoin d'aide pour la lessive")
+
+    bot.set_user_state(provider_phone, 'registering_name')
+    for text, choice_id in [("Tom", None), ("🛠️ Provider", "role:provider"), ("Laundry and ironing", None),
+                            ("Residence A", None), ("weekends", None), ("evening", None), ("free", None)]:
+        bot.process_message(provider_phone, text, choice_id)
+    # The scheduler re-matches, and by then the seeker's session may have expired too
+    bot.scheduler.run_due(float('inf'))
+    assert sent == [(seeker, messages.render('provider_available', 'fr', name="Tom",
+                                             service="J'ai besoin d'aide pour la lessive"))]
+    # Each provider is announced once per request
+    assert bot.rematch_pending_requests() == 0
+
+
+def test_rematch_waits_for_an_outbound_channel(make_bot):
+    bot = make_bot()
+    bot.save_request("+33611111111", "Nina", "guitar lessons", "flexible", "campus")
+    bot.save_user_with_details("+33622222222", {"name": "Tom", "services": "Guitar lessons", "location": "Dorms"})
+
+    # Twilio-only: notify() can't reach the seeker, so the notice stays due
+    assert bot.orchestrator is None and bot.rematch_pending_requests() == 0
+    assert bot.new_providers == {"+33622222222"}
+
+    sent = []
+    bot.notify = lambda phone, text: sent.append((phone, text)) or True
+    assert bot.rematch_pending_requests() == 1 and [phone for phone, _ in sent] == ["+33611111111"]
+    assert bot.rematch_pending_requests() == 0
+
+
+def test_accepted_match_closes_the_seekers_pending_request(make_bot):
+    bot = make_bot(seed=True)
+    seeker = "+33611111111"
+    bot.save_request(seeker, "Nina", "laundry", "flexible", "campus")
+    bot.save_request(seeker, "Nina", "guitar lessons", "flexible", "campus")
+    [provider_match, *_] = bot.find_matches("laundry", "campus")
+    match_id = bot.add_pending_match(seeker, provider_match, "laundry", [])
+
+    bot.handle_provider_confirmation(provider_match.phone, "yes", accept=True, match_id=match_id)
+    conn = sqlite3.connect(bot.db_path)
+    rows = conn.execute("SELECT service, status, matched_helper FROM requests ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [("laundry", "matched", provider_match.phone), ("guitar lessons", "pending", None)]
+    assert len(bot.request_index) == 1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the expiry scheduler and the bot's session expiry
+"""
+
+import sqlite3
+import time
+
+from scheduler import ExpiryScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_touch_remind_and_expire():
+    clock = FakeClock()
+    scheduler = ExpiryScheduler(clock)
+    events = []
+    scheduler.register('session', 100, lambda key: events.append(('expire', key)),
+                       remind_before=20, on_remind=lambda key: events.append(('remind', key)))
+    scheduler.touch('session', 'a')
+    scheduler.touch('session', 'b')
+    scheduler.touch('session', 'gone')
+    scheduler.forget('session', 'gone')
+
+    clock.now = 50
+    scheduler.touch('session', 'b')  # activity pushes b's deadline to 150
+    scheduler.run_due()
+    assert events == []
+
+    clock.now = 85
+    scheduler.run_due()
+    assert events == [('remind', 'a')]
+
+    clock.now = 100
+    scheduler.run_due()
+    assert events == [('remind', 'a'), ('expire', 'a')]
+    assert ('session', 'a') not in scheduler and ('session', 'b') in scheduler
+
+    clock.now = 200
+    scheduler.run_due()
+    assert events[2:] == [('remind', 'b'), ('expire', 'b')]
+    assert len(scheduler) == 0
+
+
+def test_bot_expires_sessions_and_rematches_pending_requests(make_bot):
+    bot = make_bot(seed=True)
+    sent = []
+    bot.notify = lambda phone, text: sent.append((phone, text)) or True
+
+    bot.handle_service_request_with_gpt("+33611111111", "laundry", {"service": "laundry", "time": "flexible"})
+    assert bot.get_user_state("+33611111111").state == 'choosing_provider'
+
+    later = time.monotonic() + bot.ttls['active_request'] + 1
+    bot.scheduler.run_due(later)
+    assert "+33611111111" not in bot.active_requests
+    assert bot.get_user_state("+33611111111").state == 'idle'
+    assert [text for _, text in sent if "expired" in text]
+    assert bot.handle_provider_choice_with_gpt("+33611111111", "1", {}).startswith("Sorry, your request has expired")
+
+    # A pending request for a service nobody offers yet, then a matching provider registers
+    bot.save_request("+33622222222", "Nina", "guitar lessons", "flexible", "campus")
+    bot.save_user_with_details("+33633333333", {"name": "Tom", "services": "Guitar lessons", "location": "Dorms"})
+    bot.scheduler.run_due(later + 1)
+    assert any(phone == "+33622222222" and "Tom" in text for phone, text in sent)
+
+    # Unanswered request rows are closed after their TTL
+    conn = sqlite3.connect(bot.db_path)
+    conn.execute("UPDATE requests SET created_at = datetime('now', '-2 days')")
+    conn.commit()
+    assert bot.expire_stale_requests() == 1
+    assert conn.execute("SELECT status FROM requests").fetchone() == ("expired",)
+    conn.close()
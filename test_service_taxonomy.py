@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the canonical service taxonomy and id-based matching
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import database
+import service_taxonomy
+from bot_logic import ECLABot
+from profiles import ProviderProfile
+
+
+def keys(text):
+    return [service.key for service in service_taxonomy.services_of(service_taxonomy.service_mask(text))]
+
+
+def test_synonyms_and_stems_map_to_canonical_ids():
+    assert keys("car lending") == keys("Airport pickup") == ["transport"]
+    assert keys("cigarettes") == keys("groceries") == ["shopping"]
+    assert keys("Laundry, dry-cleaning") == ["laundry", "cleaning"]
+    assert keys("Je cherche quelqu'un pour la lessive") == ["laundry"]
+    assert keys("Chat about my French homework") == ["translation", "tutoring"]
+    assert keys("garde de chat ce week-end") == keys("Garde d'animaux") == keys("cat sitting") == ["pet_care"]
+    assert service_taxonomy.service_mask("moves") == service_taxonomy.service_mask("moving")
+    # Bare "it" and substrings of other words are not services
+    assert keys("I need it done") == keys("kitchen") == keys("juggling") == []
+    ids = [service.id for service in service_taxonomy.SERVICES]
+    assert len(set(ids)) == len(ids) and all(0 < i < 63 for i in ids)
+
+
+def test_base_price_follows_taxonomy_order():
+    price = service_taxonomy.base_price
+    assert price("French-English translation") == 15.0
+    assert price("car lending") == 20.0
+    assert price("KFC delivery") == 5.0
+    assert price("IT support") == 12.0
+    assert price("Printing papers") == 3.0
+    # "kitchen" used to cost IT support prices through the 'it' substring
+    assert price("kitchen") == price("juggling") == service_taxonomy.DEFAULT_BASE_PRICE
+
+
+def test_matching_uses_service_ids_with_text_fallback(make_bot):
+    bot = make_bot()
+    for phone, name, services in [("+331", "Sam", "Car lending, airport pickup"),
+                                  ("+332", "Ana", "Grocery shopping"), ("+333", "Jo", "Juggling")]:
+        bot.profiles.save(ProviderProfile(phone=phone, name=name, services=services, location="Campus"))
+
+    assert [m.name for m in bot.find_matches("lend me a car", "campus")] == ["Sam"]
+    assert [m.name for m in bot.find_matches("cigarettes", "campus")] == ["Ana"]
+    assert [m.name for m in bot.find_matches("juggling", "campus")] == ["Jo"]
+
+    request_id = bot.save_request("+339", "Lea", "someone to buy groceries", "flexible", "campus")
+    with sqlite3.connect(bot.db_path) as conn:
+        masks = dict(conn.execute("SELECT phone, service_mask FROM users"))
+        request_mask = conn.execute("SELECT service_mask FROM requests WHERE id = ?", (request_id,)).fetchone()[0]
+    assert masks["+331"] == service_taxonomy.BY_KEY["transport"].bit
+    assert request_mask == masks["+332"] == service_taxonomy.BY_KEY["shopping"].bit
+    assert masks["+333"] == 0
+
+
+def test_migration_backfills_masks_and_legacy_bot_matches_on_them(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE users (phone TEXT PRIMARY KEY, name TEXT, services TEXT, location TEXT)")
+            conn.execute("INSERT INTO users VALUES ('+331', 'Kim', 'Food delivery, KFC runs', 'Library')")
+        database.migrate(path)
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT service_mask FROM users").fetchone()[0] == \
+                service_taxonomy.BY_KEY["food_delivery"].bit
+
+        monkeypatch.setattr(database, "DB_PATH", path)
+        bot = ECLABot()
+        service = bot.extract_service_from_message("Can someone get me a pizza?")
+        assert service == "food_delivery"
+        # The old LIKE '%food_delivery%' filter never matched "Food delivery"
+        assert [m['name'] for m in bot.find_matches(service, "campus")] == ["Kim"]
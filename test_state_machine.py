@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the conversation state machine dispatch
+"""
+
+from conftest import greeting_or_unknown
+from state_machine import IDLE, STATES, LazyExtraction, needs_extraction
+
+PHONE = "+33611111111"
+
+
+def test_table_is_consistent():
+    assert STATES[IDLE].handler is None and needs_extraction(IDLE)
+    for spec in STATES.values():
+        assert spec.transitions <= set(STATES), spec.name
+        if spec.name != IDLE:
+            assert spec.handler is not None, spec.name
+    assert not needs_extraction('registering_name') and not needs_extraction('choosing_provider')
+    assert needs_extraction('no_such_state')
+
+
+def test_registration_flow_extracts_only_when_idle(capsys, make_bot):
+    bot = make_bot(extraction=greeting_or_unknown)
+    replies = [bot.process_message(PHONE, message) for message in [
+        "Hi, I'm new here", "Lucas", "service provider", "Laundry and ironing", "Studio", "Weekends only", "Evening", "10€"]]
+
+    assert bot.extractions == 1  # only the opening message, sent while idle
+    assert bot.llm_stats == {'extractions': 1, 'extractions_avoided': 7}
+    assert replies[1].startswith("Nice to meet you, Lucas!")
+    assert "You're all set!" in replies[-1]
+    assert bot.get_user_state(PHONE).state == 'idle'
+    assert [m.name for m in bot.find_matches("laundry", "campus")] == ["Lucas"]
+    assert "Unexpected state transition" not in capsys.readouterr().out
+
+
+def test_english_choice_leaves_the_user_idle(capsys, make_bot):
+    bot = make_bot(extraction=greeting_or_unknown)
+    bot.set_user_state(PHONE, IDLE, language='fr')
+    assert bot.process_message(PHONE, "English") == bot.say(PHONE, 'welcome')
+    state = bot.get_user_state(PHONE)
+    assert (state.state, state.language) == (IDLE, 'en')
+
+    # What they say next is routed by intent, not swallowed by a welcome state
+    bot.process_message(PHONE, "Hi there, I'm new")
+    assert bot.extractions == 1 and bot.get_user_state(PHONE).state == 'registering_name'
+    assert "Unexpected state transition" not in capsys.readouterr().out
+
+
+def test_extraction_is_lazy(make_bot):
+    calls = []
+    info = LazyExtraction(lambda: calls.append(1) or {"intent": "GREETING"})
+    assert not info.resolved and calls == []
+    assert info.get("intent") == "GREETING" and info.get("service") is None
+    assert info.resolved and calls == [1]
+
+    bot = make_bot(extraction=greeting_or_unknown)
+    # Idle, but answered before the intent matters: no extraction
+    bot.process_message(PHONE, "Where is the laundry room?")
+    bot.process_message(PHONE, "yes")  # no pending match: falls through to the intent
+    assert bot.extractions == 1
+    assert bot.llm_stats == {'extractions': 1, 'extractions_avoided': 1}
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for TwiML rendering of webhook replies, including pathological LLM output
+"""
+
+import xml.etree.ElementTree as ET
+
+from fastapi.testclient import TestClient
+
+import main
+import twiml
+
+
+def messages_of(body: bytes):
+    root = ET.fromstring(body)  # raises on invalid XML
+    assert root.tag == "Response"
+    return [element.text or "" for element in root.findall("Message")]
+
+
+def test_markup_in_replies_is_escaped():
+    reply = 'Tom & Jerry <script>alert("x")</script> ]]> 5 > 3 &amp;'
+    body = twiml.render(reply)
+    assert body.startswith(b'<?xml version="1.0" encoding="UTF-8"?><Response><Message>')
+    assert messages_of(body) == [reply]
+
+
+def test_characters_xml_forbids_are_dropped():
+    reply = "null\x00 bell\x07 escape\x1b[31m tab\tok ￾ lone \ud83d surrogate 🎉"
+    [text] = messages_of(twiml.render(reply))
+    assert text == "null bell escape[31m tab\tok  lone ? surrogate 🎉"
+
+
+def test_empty_replies():
+    for reply in ["", None, "   \n  "]:
+        assert twiml.render(reply) == twiml.EMPTY
+        assert messages_of(twiml.render(reply)) == []
+
+
+def test_long_replies_split_on_paragraphs_then_words():
+    paragraphs = ["Paragraph %d. " % i + "word " * 150 for i in range(8)]
+    reply = "\n\n".join(paragraphs)
+    segments = messages_of(twiml.render(reply))
+    assert len(segments) > 1
+    assert all(len(segment) <= twiml.MAX_SEGMENT_CHARS for segment in segments)
+    assert all(segment.startswith("Paragraph") for segment in segments)
+    assert " ".join(" ".join(segments).split()) == " ".join(reply.split())
+
+
+def test_one_huge_token_is_cut_hard_and_capped():
+    reply = "&" * 50000
+    segments = messages_of(twiml.render(reply))
+    assert len(segments) == twiml.MAX_SEGMENTS
+    assert all(len(segment) <= twiml.MAX_SEGMENT_CHARS for segment in segments)
+    assert segments[-1].endswith(twiml.TRUNCATED)
+
+
+def test_webhook_returns_valid_twiml(monkeypatch):
+    class Bot:
+        def process_message(self, phone, message, choice_id=None):
+            return f"<b>{message}</b> & more"
+
+    monkeypatch.setattr(main, "get_bot", lambda: Bot())
+    response = TestClient(main.app).post("/webhook", data={"From": "whatsapp:+33611111111", "Body": "Fish & chips"})
+    assert response.headers["content-type"].startswith("application/xml")
+    assert messages_of(response.content) == ["<b>Fish & chips</b> & more"]
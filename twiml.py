@@ -0,0 +1,78 @@
+"""
+TwiML rendering for replies to Twilio's WhatsApp webhook.
+
+The webhook used to paste the bot's reply into an f-string. Any `&` or `<`
+in a GPT answer (or a user's name echoed back) made the XML invalid, and so
+did the whitespace before the XML declaration. Twilio rejects such bodies
+and retries the webhook. `render` escapes the reply, drops characters XML 1.0
+does not allow, and splits long replies into several <Message> verbs under
+the WhatsApp size limit. The result is one bytes body.
+
+The XML envelope pieces are precompiled bytes constants. Escaping is three
+str.replace calls, which return the same string when there is nothing to
+replace, plus one regex scan for forbidden characters. A typical reply is
+rendered in a couple of microseconds with a handful of allocations.
+"""
+
+import re
+from typing import List
+
+MAX_SEGMENT_CHARS = 1600  # Twilio's limit for one WhatsApp message body
+MAX_SEGMENTS = 10  # Twilio accepts at most 10 <Message> verbs per response
+TRUNCATED = "…"
+
+CONTENT_TYPE = "application/xml"
+HEAD = b'<?xml version="1.0" encoding="UTF-8"?><Response>'
+TAIL = b'</Response>'
+OPEN = b'<Message>'
+CLOSE = b'</Message>'
+EMPTY = b'<?xml version="1.0" encoding="UTF-8"?><Response/>'
+
+# Characters XML 1.0 does not allow anywhere, even escaped
+_FORBIDDEN = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def escape(text: str) -> str:
+    """Escape reply text for a TwiML element"""
+    if _FORBIDDEN.search(text):
+        text = _FORBIDDEN.sub('', text)
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def split_message(text: str, limit: int = MAX_SEGMENT_CHARS, max_segments: int = MAX_SEGMENTS) -> List[str]:
+    """Split a reply into WhatsApp-sized segments, preferring paragraph, then line, then word breaks"""
+    text = text.strip()
+    segments = []
+    while len(text) > limit:
+        if len(segments) == max_segments - 1:
+            segments.append(text[:limit - len(TRUNCATED)].rstrip() + TRUNCATED)
+            return segments
+        cut = _best_break(text, limit)
+        segments.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        segments.append(text)
+    return segments
+
+
+def _best_break(text: str, limit: int) -> int:
+    """Index to cut at: the last paragraph break within the limit, else the last line break, else a space"""
+    window = text[:limit + 1]
+    for separator in ('\n\n', '\n', ' '):
+        cut = window.rfind(separator)
+        if cut > limit // 2:
+            return cut
+    # One very long token (a URL, a wall of emoji): cut hard
+    return limit
+
+
+def render(reply: str, limit: int = MAX_SEGMENT_CHARS) -> bytes:
+    """TwiML body for a bot reply (an empty <Response/> when there is nothing to say)"""
+    segments = split_message(reply or '', limit)
+    if not segments:
+        return EMPTY
+    parts = [HEAD]
+    for segment in segments:
+        parts += (OPEN, escape(segment).encode('utf-8', 'replace'), CLOSE)
+    parts.append(TAIL)
+    return b''.join(parts)
@@ -3,34 +3,96 @@ WhatsApp Business API Integration for ECLA Bot
 This module provides integration with Meta's WhatsApp Business API
 """
 
+import asyncio
 import httpx
 import json
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+import interactive
+
 load_dotenv()
 
+
+def split_tail(text: str, limit: int) -> Tuple[str, str]:
+    """(head, tail) with the tail at most `limit` long, cut at a paragraph break, a line break or a space
+
+    Like twiml._best_break, but from the end: the tail is what fits in an interactive body.
+    Surrounding whitespace is dropped first, so a trailing separator never leaves an empty
+    tail (Meta rejects interactive messages with an empty body).
+    """
+    text = text.strip()
+    window_start = max(len(text) - limit, 0)
+    for separator in ('\n\n', '\n', ' '):
+        cut = text.find(separator, max(window_start - len(separator), 0))
+        if cut > 0 and text[cut + len(separator):].strip():
+            return text[:cut].rstrip(), text[cut + len(separator):].strip()
+    # One very long token: cut hard
+    return text[:window_start], text[window_start:]
+
+
 class WhatsAppBusinessAPI:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = None):
         self.access_token = os.getenv('WHATSAPP_BUSINESS_TOKEN')
         self.phone_number_id = os.getenv('WHATSAPP_PHONE_NUMBER_ID')
         self.verify_token = os.getenv('WHATSAPP_VERIFY_TOKEN')
         self.api_version = "v17.0"
-        self.base_url = f"https://graph.facebook.com/{self.api_version}"
-        
-    async def send_text_message(self, to_phone: str, message: str) -> Dict:
-        """Send text message via WhatsApp Business API"""
-        if not self.access_token or not self.phone_number_id:
-            raise ValueError("WhatsApp Business API credentials not configured")
-        
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
+        # Overridable so local fakes (benchmarks/fake_services.py) can stand in for Meta
+        graph_url = os.getenv('WHATSAPP_GRAPH_API_URL', 'https://graph.facebook.com').rstrip('/')
+        self.base_url = f"{graph_url}/{self.api_version}"
+        # One pooled client for every send, with at most max_concurrency requests in flight
+        self.max_concurrency = max_concurrency or int(os.getenv('WHATSAPP_MAX_CONCURRENCY', 16))
+        self._client = None
+        self._semaphore = None
+        # Optional outbound_queue.OutboundQueue: sends are persisted, rate limited and retried
+        self.outbox = None
+    
+    async def _post_message(self, data: Dict) -> Dict:
+        """Send through the outbox if there is one, else POST right away"""
+        if self.outbox is not None:
+            return {"queued": self.outbox.enqueue(self.phone_number_id, data)}
+        status, body, _ = await self.deliver(self.phone_number_id, data)
+        return body
+    
+    async def deliver(self, phone_number_id: str, data: Dict) -> Tuple[int, Dict, Optional[float]]:
+        """POST to the messages endpoint through the shared client: (status, JSON body, Retry-After)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        url = f"{self.base_url}/{phone_number_id}/messages"
         
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
         
+        async with self._semaphore:
+            response = await self._client.post(url, headers=headers, json=data)
+        retry_after = response.headers.get("Retry-After")
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"error": {"message": response.text[:200]}}
+        return response.status_code, body, float(retry_after) if retry_after else None
+    
+    async def aclose(self):
+        """Close the shared client (call on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+        
+    async def send_text_message(self, to_phone: str, message: str) -> Dict:
+        """Send text message via WhatsApp Business API"""
+        if not self.access_token or not self.phone_number_id:
+            raise ValueError("WhatsApp Business API credentials not configured")
+        
         data = {
             "messaging_product": "whatsapp",
             "to": to_phone,
@@ -38,19 +100,10 @@ class WhatsAppBusinessAPI:
             "text": {"body": message}
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            return response.json()
+        return await self._post_message(data)
     
     async def send_template_message(self, to_phone: str, template_name: str, language_code: str = "en_US") -> Dict:
         """Send template message via WhatsApp Business API"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "messaging_product": "whatsapp",
             "to": to_phone,
@@ -63,27 +116,20 @@ class WhatsAppBusinessAPI:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            return response.json()
+        return await self._post_message(data)
     
     async def send_interactive_message(self, to_phone: str, header_text: str, body_text: str, buttons: list) -> Dict:
-        """Send interactive message with buttons"""
-        url = f"{self.base_url}/{self.phone_number_id}/messages"
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
+        """Send interactive message with buttons (titles, or interactive.Choice with their own ids)"""
         # Format buttons for WhatsApp API
         formatted_buttons = []
-        for i, button in enumerate(buttons[:3]):  # WhatsApp allows max 3 buttons
+        for i, button in enumerate(buttons[:interactive.MAX_BUTTONS]):  # WhatsApp allows max 3 buttons
+            if not isinstance(button, interactive.Choice):
+                button = interactive.Choice(f"btn_{i}", button)
             formatted_buttons.append({
                 "type": "reply",
                 "reply": {
-                    "id": f"btn_{i}",
-                    "title": button
+                    "id": button.id,
+                    "title": interactive.clip(button.title, interactive.MAX_BUTTON_TITLE)
                 }
             })
         
@@ -93,22 +139,58 @@ class WhatsAppBusinessAPI:
             "type": "interactive",
             "interactive": {
                 "type": "button",
-                "header": {
-                    "type": "text",
-                    "text": header_text
-                },
                 "body": {
-                    "text": body_text
+                    "text": interactive.clip(body_text, interactive.MAX_BODY)
                 },
                 "action": {
                     "buttons": formatted_buttons
                 }
             }
         }
+        if header_text:
+            data["interactive"]["header"] = {"type": "text", "text": header_text}
+        
+        return await self._post_message(data)
+    
+    async def send_list_message(self, to_phone: str, body_text: str, button_text: str, rows: list) -> Dict:
+        """Send interactive list message (up to 10 rows of interactive.Choice)"""
+        data = {
+            "messaging_product": "whatsapp",
+            "to": to_phone,
+            "type": "interactive",
+            "interactive": {
+                "type": "list",
+                "body": {
+                    "text": interactive.clip(body_text, interactive.MAX_BODY)
+                },
+                "action": {
+                    "button": interactive.clip(button_text, interactive.MAX_BUTTON_TITLE),
+                    "sections": [{
+                        "rows": [{
+                            "id": row.id,
+                            "title": interactive.clip(row.title, interactive.MAX_ROW_TITLE),
+                            "description": interactive.clip(row.description, interactive.MAX_ROW_DESCRIPTION)
+                        } for row in rows[:interactive.MAX_ROWS]]
+                    }]
+                }
+            }
+        }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=data)
-            return response.json()
+        return await self._post_message(data)
+    
+    async def send_reply(self, to_phone: str, reply: str) -> Dict:
+        """Send a bot reply: as text, or with its buttons / list if it's an interactive.Reply"""
+        choices = getattr(reply, 'choices', None)
+        if not choices:
+            return await self.send_text_message(to_phone, reply)
+        body = str(reply).strip()
+        if len(body) > interactive.MAX_BODY:
+            # Too long for an interactive body: the text goes first, the end carries the choices
+            text, body = split_tail(body, interactive.MAX_BODY)
+            await self.send_text_message(to_phone, text)
+        if interactive.uses_buttons(choices):
+            return await self.send_interactive_message(to_phone, None, body, choices)
+        return await self.send_list_message(to_phone, body, reply.button, choices)
     
     def verify_webhook(self, mode: str, challenge: str, verify_token: str) -> Optional[str]:
         """Verify webhook for WhatsApp Business API"""
@@ -116,6 +198,21 @@ class WhatsAppBusinessAPI:
             return challenge
         return None
     
+    @staticmethod
+    def message_content(message: Dict) -> Tuple[str, Optional[str]]:
+        """(text, tapped choice id) of an inbound message; other types (media, location...) -> ('', None)"""
+        kind = message.get("type")
+        if kind == "text":
+            return message.get("text", {}).get("body", ""), None
+        if kind == "interactive":
+            interactive_reply = message.get("interactive", {})
+            reply = interactive_reply.get(interactive_reply.get("type"), {})  # button_reply or list_reply
+            return reply.get("title", ""), reply.get("id")
+        if kind == "button":  # quick reply button of a template message
+            button = message.get("button", {})
+            return button.get("text", ""), button.get("payload")
+        return "", None
+    
     def parse_webhook(self, body: Dict) -> list:
         """Parse incoming webhook messages"""
         messages = []
@@ -125,84 +222,21 @@ class WhatsAppBusinessAPI:
                 for change in entry.get("changes", []):
                     if change.get("value", {}).get("messages"):
                         for message in change["value"]["messages"]:
-                            if message.get("type") == "text":
+                            text, choice_id = self.message_content(message)
+                            if text or choice_id:
                                 messages.append({
                                     "from": message.get("from"),
-                                    "text": message.get("text", {}).get("body", ""),
+                                    "text": text,
+                                    "choice_id": choice_id,
                                     "timestamp": message.get("timestamp"),
                                     "message_id": message.get("id")
                                 })
         
         return messages
 
-# Enhanced main.py integration
-def create_whatsapp_business_endpoints(app, bot):
-    """Add WhatsApp Business API endpoints to FastAPI app"""
-    
-    whatsapp_api = WhatsAppBusinessAPI()
-    
-    @app.post("/webhook")
-    async def whatsapp_webhook(request: Request):
-        try:
-            # Handle webhook verification
-            form_data = await request.form()
-            if form_data.get("hub.mode") == "subscribe":
-                challenge = form_data.get("hub.challenge")
-                verify_token = form_data.get("hub.verify_token")
-                response = whatsapp_api.verify_webhook("subscribe", challenge, verify_token)
-                if response:
-                    return HTMLResponse(response)
-                else:
-                    return HTMLResponse("Forbidden", status_code=403)
-            
-            # Handle incoming messages
-            body = await request.json()
-            messages = whatsapp_api.parse_webhook(body)
-            
-            for message in messages:
-                user_phone = message["from"]
-                message_text = message["text"]
-                
-                if message_text and user_phone:
-                    # Process message with bot
-                    response = bot.process_message(user_phone, message_text)
-                    
-                    # Send response via WhatsApp Business API
-                    await whatsapp_api.send_text_message(user_phone, response)
-            
-            return {"status": "ok"}
-        
-        except Exception as e:
-            print(f"Webhook error: {e}")
-            return {"status": "error", "detail": str(e)}
-    
-    @app.get("/webhook")
-    async def verify_webhook(request: Request):
-        """Handle webhook verification for WhatsApp Business API"""
-        params = request.query_params
-        
-        mode = params.get("hub.mode")
-        challenge = params.get("hub.challenge")
-        verify_token = params.get("hub.verify_token")
-        
-        if mode and challenge and verify_token:
-            response = whatsapp_api.verify_webhook(mode, challenge, verify_token)
-            if response:
-                return HTMLResponse(response)
-        
-        return HTMLResponse("Forbidden", status_code=403)
-    
-    return app
-
-# Example usage in main.py
-"""
-# Add this to your main.py
-
-from whatsapp_business_integration import create_whatsapp_business_endpoints
-
-# After creating your FastAPI app and bot
-app = create_whatsapp_business_endpoints(app, bot)
-"""
+# The /webhook endpoints live in main.py: channels.MetaAdapter parses Meta's
+# callbacks with parse_webhook and replies with send_reply, next to the
+# Twilio adapter, so both providers run in the same process.
 
 # Environment variables needed:
 """